@@ -0,0 +1,128 @@
+"""
+ANR 逐行解析微基準測試 - 以合成的 ANR trace 比較逐行解析的成本（字串模式 vs 已編譯模式）
+
+用法（在專案根目錄）:
+    python3 bench/bench_anr_patterns.py [行數]
+"""
+
+import io
+import os
+import random
+import re
+import sys
+import time
+from typing import List, Tuple
+
+# 分析器模組以 routes 資料夾為匯入根目錄
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'routes'))
+
+
+def generate_anr_trace(line_count: int, seed: int = 20) -> str:
+    """產生指定行數的合成 ANR trace（固定亂數種子，結果可重現）"""
+    rng = random.Random(seed)
+    states = ['Blocked', 'Sleeping', 'Native', 'Waiting', 'Runnable', 'TimedWaiting']
+    lines = [
+        '----- pid 1234 at 2024-01-01 10:00:00.000+0800 -----',
+        'Cmd line: com.example.app',
+        'Subject: ANR Input dispatching timed out (Waited 5001ms for FocusEvent)',
+        '',
+        'DALVIK THREADS:',
+    ]
+    tid = 1
+    while len(lines) < line_count:
+        name = 'main' if tid == 1 else f'Worker-{tid}'
+        lines.append(f'"{name}" prio=5 tid={tid} {rng.choice(states)}')
+        lines.append(f'  | group="main" sCount=1 dsCount=0 flags=1 obj=0x12c{tid:05x} self=0xb40{tid}')
+        lines.append(f'  | sysTid={1000 + tid} nice=0 cgrp=default sched=0/0 handle=0x7d')
+        lines.append(f'  | state=S schedstat=( {tid * 100} 200 300 ) utm={tid} stm=2 core=1 HZ=100')
+        for k in range(rng.randint(5, 30)):
+            r = rng.random()
+            if r < 0.1:
+                lines.append(f'  native: #{k:02d} pc 000000000009b1a4  /apex/com.android.runtime/lib64/bionic/libc.so (__ioctl+4)')
+            elif r < 0.15:
+                lines.append(f'  - locked <0x0abc{k:04x}> (a java.lang.Object)')
+            elif r < 0.18:
+                lines.append(f'  - waiting to lock <0x0abc{k:04x}> (a java.lang.Object) held by thread {tid + 1}')
+            else:
+                lines.append(f'  at com.example.pkg{k % 7}.Class{k}.method{k}(Class{k}.java:{k * 10})')
+        lines.append('')
+        tid += 1
+    lines.append('----- end 1234 -----')
+    return '\n'.join(lines) + '\n'
+
+
+def _legacy_line_checks(analyzer, lines: List[str]) -> Tuple[int, int]:
+    """原本的做法：每一行以字串模式呼叫 re.match/re.search，堆疊幀模式每次重建"""
+    thread_patterns = analyzer.patterns['thread_patterns']
+    thread_lines = frames = 0
+    for line in lines:
+        # _parse_thread_header
+        if re.match(r'"([^"]+)"\s+prio=(\d+)\s+tid=(\d+)\s+(\w+)', line) or \
+                any(re.search(pattern, line) for pattern in thread_patterns):
+            thread_lines += 1
+        # _is_thread_start
+        if any(re.search(pattern, line) for pattern in thread_patterns[:3]):
+            continue
+        # _is_stack_frame
+        patterns = [
+            r'^\s*at\s+',
+            r'^\s*#\d+\s+',
+            r'\([^)]+\.java:\d+\)',
+            r'\([^)]+\.kt:\d+\)',
+            r'^\s*-\s+(locked|waiting)',
+            r'Native Method',
+        ]
+        if any(re.search(pattern, line) for pattern in patterns):
+            frames += 1
+    return thread_lines, frames
+
+
+def _registry_line_checks(analyzer, lines: List[str]) -> Tuple[int, int]:
+    """目前的做法：直接呼叫分析器使用登錄表的方法"""
+    thread_lines = frames = 0
+    for line in lines:
+        if analyzer._parse_thread_header(line):
+            thread_lines += 1
+        if analyzer._is_thread_start(line):
+            continue
+        if analyzer._is_stack_frame(line):
+            frames += 1
+    return thread_lines, frames
+
+
+def run_benchmark(line_count: int = 50000, repeat: int = 3):
+    """比較逐行解析的成本並印出結果"""
+    from vp_analyze_logs import ANRAnalyzer, ANRTraceParser
+
+    content = generate_anr_trace(line_count)
+    lines = content.splitlines()
+    analyzer = ANRAnalyzer()
+    print(f"📄 合成 ANR trace: {len(lines)} 行")
+
+    def best_of(func):
+        best = None
+        result = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    legacy_time, legacy_result = best_of(lambda: _legacy_line_checks(analyzer, lines))
+    registry_time, registry_result = best_of(lambda: _registry_line_checks(analyzer, lines))
+    if legacy_result != registry_result:
+        print(f"❌ 結果不一致: 字串模式 {legacy_result}，已編譯模式 {registry_result}")
+
+    parse_time, anr_info = best_of(lambda: ANRTraceParser(analyzer).parse(io.StringIO(content)))
+
+    per_line = lambda seconds: seconds / len(lines) * 1e6
+    print(f"  • 線程/堆疊幀判斷（字串模式）: {legacy_time:.3f} 秒 ({per_line(legacy_time):.2f} µs/行)")
+    print(f"  • 線程/堆疊幀判斷（已編譯模式）: {registry_time:.3f} 秒 ({per_line(registry_time):.2f} µs/行)")
+    print(f"  • 加速: {legacy_time / registry_time:.1f}x")
+    print(f"  • 單次掃描完整解析 ANRTraceParser: {parse_time:.3f} 秒 "
+          f"({per_line(parse_time):.2f} µs/行, {len(anr_info.all_threads)} 個線程)")
+
+
+if __name__ == '__main__':
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,125 @@
+"""
+ThreadInfo 記憶體基準測試 - 比較 1000 份解析後 ANR 的記憶體用量：
+原本的 dataclass + List[str] 與 slots + frame id 陣列（含 frame 表）
+
+用法（在專案根目錄）:
+    python3 bench/bench_thread_memory.py [份數]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import List, Optional, Set
+
+# 分析器模組以 routes 資料夾為匯入根目錄
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'routes'))
+
+from vp_analyze_logs import ANRAnalyzer
+from vp_analyze_logs_base import ANRInfo, ThreadInfo, ThreadState, frame_table_scope
+from bench_anr_patterns import generate_anr_trace
+
+
+@dataclass
+class LegacyThreadInfo:
+    """原本的 ThreadInfo（每層堆疊都是獨立的字串）"""
+    name: str
+    tid: str
+    prio: str = "N/A"
+    state: ThreadState = ThreadState.UNKNOWN
+    nice: Optional[str] = None
+    core: Optional[str] = None
+    handle: Optional[str] = None
+    backtrace: List[str] = field(default_factory=list)
+    waiting_info: Optional[str] = None
+    held_locks: List[str] = field(default_factory=list)
+    waiting_locks: List[str] = field(default_factory=list)
+    utm: Optional[str] = None
+    stm: Optional[str] = None
+    schedstat: Optional[str] = None
+    sysTid: Optional[str] = None
+
+
+def _deep_sizeof(root, seen: Set[int]) -> int:
+    """物件與其引用內容佔用的位元組數（已計算過的物件與 Enum 成員不重複計算）"""
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (Enum, type, type(threading.Lock()))):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, bool, array)) or obj is None:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+            for klass in type(obj).__mro__:
+                for slot in getattr(klass, '__slots__', ()):
+                    if hasattr(obj, slot):
+                        stack.append(getattr(obj, slot))
+    return total
+
+
+def run_memory_benchmark(count: int = 1000, lines_per_anr: int = 6000):
+    """比較 1000 份解析後 ANR 的記憶體用量：原本的 dataclass + List[str] 與 slots + frame id 陣列"""
+    def to_legacy(thread: ThreadInfo) -> LegacyThreadInfo:
+        # 原本每次解析都會為每一層產生新的字串物件
+        return LegacyThreadInfo(
+            name=thread.name, tid=thread.tid, prio=thread.prio, state=thread.state,
+            nice=thread.nice, core=thread.core, handle=thread.handle,
+            backtrace=[frame.encode().decode() for frame in thread.backtrace],
+            waiting_info=thread.waiting_info, held_locks=list(thread.held_locks),
+            waiting_locks=list(thread.waiting_locks), utm=thread.utm, stm=thread.stm,
+            schedstat=thread.schedstat, sysTid=thread.sysTid,
+        )
+
+    analyzer = ANRAnalyzer()
+    traces = [generate_anr_trace(lines_per_anr, seed) for seed in range(20)]
+
+    start = time.perf_counter()
+    anrs = []
+    # 與 LogAnalyzerSystem 一次執行相同：整批共用一個 frame 表
+    with frame_table_scope() as frame_table, contextlib.redirect_stdout(io.StringIO()):
+        for i in range(count):
+            anrs.append(analyzer._parse_anr_info(traces[i % len(traces)]))
+    parse_time = time.perf_counter() - start
+
+    legacy = []
+    for anr in anrs:
+        threads = [to_legacy(thread) for thread in anr.all_threads]
+        main_index = anr.all_threads.index(anr.main_thread) if anr.main_thread else None
+        legacy.append(ANRInfo(
+            anr_type=anr.anr_type, process_name=anr.process_name, pid=anr.pid,
+            timestamp=anr.timestamp, reason=anr.reason,
+            main_thread=threads[main_index] if main_index is not None else None,
+            all_threads=threads, cpu_usage=anr.cpu_usage, memory_info=anr.memory_info,
+            timeout_info=anr.timeout_info,
+        ))
+
+    thread_count = sum(len(anr.all_threads) for anr in anrs)
+    frame_count = sum(len(thread.backtrace) for anr in anrs for thread in anr.all_threads)
+    legacy_bytes = _deep_sizeof(legacy, set())
+    compact_bytes = _deep_sizeof(anrs, set()) + _deep_sizeof(frame_table, set())
+
+    mb = lambda size: size / 1024 / 1024
+    print(f"📄 {count} 份 ANR（解析 {parse_time:.1f} 秒）: {thread_count} 個線程，{frame_count} 層堆疊，"
+          f"{len(frame_table)} 個不同的堆疊幀")
+    print(f"  • 原本 (dataclass + List[str]): {mb(legacy_bytes):.1f} MB")
+    print(f"  • 精簡 (slots + frame id 陣列，含 frame 表): {mb(compact_bytes):.1f} MB")
+    print(f"  • 節省: {(1 - compact_bytes / legacy_bytes) * 100:.0f}%")
+
+
+if __name__ == '__main__':
+    run_memory_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
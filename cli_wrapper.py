@@ -236,29 +236,19 @@ def prepare_analysis_directory(input_items, temp_dir, auto_group=True):
                 group_counter += 1
 
 def run_vp_analyze(analysis_path, output_path):
-    """執行 vp_analyze_logs.py"""
+    """執行 vp_analyze_logs（進程內引擎，失敗時以子進程執行）"""
     try:
-        vp_script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'routes', 'vp_analyze_logs.py')
-        
-        if not os.path.exists(vp_script_path):
-            print("警告：找不到 vp_analyze_logs.py，跳過詳細分析")
-            return False
+        from routes.vp_analyze_engine import VPAnalyzeEngine
         
         print("執行詳細分析...")
-        cmd = ['python3.12', vp_script_path, analysis_path, output_path]
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
+        engine = VPAnalyzeEngine(timeout=300)
+        result = engine.run(analysis_path, output_path)
         
-        if result.returncode == 0:
+        if result['success']:
             print("詳細分析完成")
             return True
         else:
-            print(f"詳細分析失敗: {result.stderr}")
+            print(f"詳細分析失敗: {result['error']}")
             return False
             
     except Exception as e:
@@ -182,6 +182,10 @@ TOKEN_PRICING = {
     }
 }
 
+# ANR/Tombstone 分析的跨執行資料目錄（崩潰簽名索引、分析結果快取、增量索引狀態、符號快取）
+# 未設定時不保存任何跨執行資料，每次分析都是獨立的完整分析
+ANALYSIS_DATA_DIR = os.environ.get('ANR_SIGNATURE_DB_DIR', '')
+
 # Rate Limits 配置 - 新增 Realtek 限制
 RATE_LIMITS = {
     'anthropic': {
@@ -0,0 +1,197 @@
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+from datetime import datetime
+
+class AnalysisJobManager:
+    """管理背景分析工作（有上限的工作池 + 進度事件）"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 20, job_ttl: int = 3600):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+        self._jobs: Dict[str, Dict] = {}  # 工作 ID -> 工作狀態
+        self._condition = threading.Condition()  # 保護 _jobs 並通知等待進度的串流
+        self._max_pending = max_pending  # 排隊中 + 執行中的工作上限
+        self._job_ttl = job_ttl  # 完成的工作保留時間（秒）
+
+    def submit(self, func: Callable, *args, job_key: str = None, **kwargs) -> tuple[Optional[str], Optional[str]]:
+        """
+        提交背景工作
+
+        func 會多收到一個 progress 參數: progress(階段, 已完成數, 總數, 訊息)
+        job_key（例如分析路徑）相同的工作仍在排隊或執行中時拒絕提交
+
+        Returns:
+            (工作 ID 或 None, 錯誤訊息或 None)
+        """
+        with self._condition:
+            self._cleanup_expired_jobs()
+
+            active = sum(1 for job in self._jobs.values() if job['status'] in ('queued', 'running'))
+            if active >= self._max_pending:
+                return None, f"目前有 {active} 個分析工作排隊中，請稍後再試。"
+            if job_key is not None and self._find_active_job(job_key):
+                return None, "此路徑已有分析工作排隊或執行中，請等待完成後再試。"
+
+            job_id = datetime.now().strftime('%Y%m%d%H%M%S') + '_' + str(uuid.uuid4())[:8]
+            self._jobs[job_id] = {
+                'id': job_id,
+                'key': job_key,
+                'status': 'queued',
+                'stage': 'queued',
+                'done': 0,
+                'total': 0,
+                'message': '排隊中',
+                'eta': None,
+                'submitted': time.time(),
+                'started': None,
+                'finished': None,
+                'stage_started': None,
+                'result': None,
+                'error': None,
+                'events': [],
+                'event_seq': 0,
+            }
+            self._add_event(self._jobs[job_id])
+
+        self._executor.submit(self._run_job, job_id, func, args, kwargs)
+        return job_id, None
+
+    def _run_job(self, job_id: str, func: Callable, args: tuple, kwargs: Dict):
+        """在工作執行緒中執行工作"""
+        with self._condition:
+            job = self._jobs[job_id]
+            job['status'] = 'running'
+            job['started'] = time.time()
+            self._add_event(job)
+
+        def progress(stage: str, done: int = 0, total: int = 0, message: str = ''):
+            self.update_progress(job_id, stage, done, total, message)
+
+        try:
+            result = func(*args, progress=progress, **kwargs)
+            with self._condition:
+                job['status'] = 'done'
+                job['stage'] = 'done'
+                job['result'] = result
+                job['eta'] = 0
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            with self._condition:
+                job['status'] = 'error'
+                job['error'] = str(e)
+        finally:
+            with self._condition:
+                job['finished'] = time.time()
+                self._add_event(job)
+
+    def update_progress(self, job_id: str, stage: str, done: int, total: int, message: str = ''):
+        """更新工作進度並計算預估剩餘時間"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+
+            now = time.time()
+            if stage != job['stage']:
+                job['stage'] = stage
+                job['stage_started'] = now
+
+            job['done'] = done
+            job['total'] = total
+            job['message'] = message
+
+            # 依目前階段的處理速度估算剩餘時間
+            elapsed = now - (job['stage_started'] or now)
+            if total and 0 < done <= total and elapsed > 0:
+                job['eta'] = round(elapsed / done * (total - done), 1)
+            else:
+                job['eta'] = None
+
+            self._add_event(job)
+
+    def _add_event(self, job: Dict):
+        """記錄進度事件並喚醒等待中的串流（呼叫前須持有 _condition）"""
+        job['events'].append({
+            'seq': job['event_seq'],
+            'status': job['status'],
+            'stage': job['stage'],
+            'done': job['done'],
+            'total': job['total'],
+            'message': job['message'],
+            'eta': job['eta'],
+            'elapsed': round(time.time() - (job['started'] or job['submitted']), 1),
+            'error': job['error'],
+        })
+        job['event_seq'] += 1
+        # 只保留最近的事件，避免長時間工作佔用記憶體
+        if len(job['events']) > 500:
+            job['events'] = job['events'][-500:]
+        self._condition.notify_all()
+
+    def has_active_job(self, job_key: str) -> bool:
+        """檢查是否有相同 job_key 的工作仍在排隊或執行中"""
+        with self._condition:
+            return self._find_active_job(job_key) is not None
+
+    def _find_active_job(self, job_key: str) -> Optional[str]:
+        """找出相同 job_key 且仍在排隊或執行中的工作 ID（呼叫前須持有 _condition）"""
+        for job_id, job in self._jobs.items():
+            if job['key'] == job_key and job['status'] in ('queued', 'running'):
+                return job_id
+        return None
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """獲取工作狀態（不含事件列表）"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            return {key: value for key, value in job.items() if key not in ('events', 'event_seq')}
+
+    def stream_events(self, job_id: str, heartbeat: float = 15.0) -> Iterator[str]:
+        """以 text/event-stream 格式輸出工作進度，直到工作結束"""
+        last_seq = -1
+        while True:
+            with self._condition:
+                job = self._jobs.get(job_id)
+                if not job:
+                    yield f"event: error\ndata: {json.dumps({'error': '找不到分析工作'}, ensure_ascii=False)}\n\n"
+                    return
+
+                events = self._pending_events(job, last_seq)
+                if not events and job['status'] in ('queued', 'running'):
+                    self._condition.wait(timeout=heartbeat)
+                    events = self._pending_events(job, last_seq)
+                finished = job['status'] in ('done', 'error')
+
+            if not events and not finished:
+                # 保持連線
+                yield ": heartbeat\n\n"
+                continue
+
+            for event in events:
+                last_seq = event['seq']
+                yield f"event: progress\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+            if finished and not self._pending_events(job, last_seq):
+                yield f"event: {job['status']}\ndata: {json.dumps({'job_id': job_id, 'status': job['status'], 'error': job['error']}, ensure_ascii=False)}\n\n"
+                return
+
+    @staticmethod
+    def _pending_events(job: Dict, last_seq: int) -> List[Dict]:
+        """取得尚未送出的事件"""
+        return [event for event in job['events'] if event['seq'] > last_seq]
+
+    def _cleanup_expired_jobs(self):
+        """清理過期的已完成工作（呼叫前須持有 _condition）"""
+        current_time = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['finished'] and current_time - job['finished'] > self._job_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
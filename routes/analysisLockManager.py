@@ -1,23 +1,25 @@
 import os
 import threading
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 from datetime import datetime, timedelta
 
 class AnalysisLockManager:
     """管理分析路徑的鎖機制"""
     
     def __init__(self):
-        self._locks: Dict[str, Dict] = {}  # 路徑 -> {lock: threading.Lock, owner: str, start_time: datetime}
+        self._locks: Dict[str, Dict] = {}  # 路徑 -> {lock: threading.Lock, owner: str, start_time: datetime, keep_alive}
         self._manager_lock = threading.Lock()  # 用於保護 _locks 字典的鎖
         self._lock_timeout = 360  # 鎖的超時時間（秒）
     
-    def acquire_lock(self, path: str, owner_id: str = None) -> tuple[bool, Optional[str]]:
+    def acquire_lock(self, path: str, owner_id: str = None,
+                     keep_alive: Callable[[], bool] = None) -> tuple[bool, Optional[str]]:
         """
         嘗試獲取路徑的鎖
         
         Args:
             path: 要分析的路徑
             owner_id: 鎖的擁有者ID（可以是 session ID 或用戶 ID）
+            keep_alive: 回傳 True 時鎖不會因超時而失效（例如分析工作仍在排隊或執行中）
             
         Returns:
             (成功與否, 錯誤訊息或None)
@@ -34,9 +36,12 @@ class AnalysisLockManager:
                 elapsed_time = (datetime.now() - lock_info['start_time']).total_seconds()
                 
                 # 檢查鎖是否過期
-                if elapsed_time > self._lock_timeout:
+                if self._is_expired(lock_info, elapsed_time):
                     # 過期的鎖，可以移除
                     del self._locks[normalized_path]
+                elif elapsed_time > self._lock_timeout:
+                    # 超過預估時間但分析仍在進行中
+                    return False, "此路徑正在被其他使用者分析中，請等待目前的分析完成後再試。"
                 else:
                     # 鎖還有效，返回等待訊息
                     remaining_time = self._lock_timeout - elapsed_time
@@ -46,7 +51,8 @@ class AnalysisLockManager:
             self._locks[normalized_path] = {
                 'lock': threading.Lock(),
                 'owner': owner_id or 'unknown',
-                'start_time': datetime.now()
+                'start_time': datetime.now(),
+                'keep_alive': keep_alive
             }
             
             return True, None
@@ -82,8 +88,15 @@ class AnalysisLockManager:
         
         for path, lock_info in self._locks.items():
             elapsed_time = (current_time - lock_info['start_time']).total_seconds()
-            if elapsed_time > self._lock_timeout:
+            if self._is_expired(lock_info, elapsed_time):
                 expired_paths.append(path)
         
         for path in expired_paths:
             del self._locks[path]
+    
+    def _is_expired(self, lock_info: Dict, elapsed_time: float) -> bool:
+        """超過超時時間且沒有 keep_alive（或 keep_alive 回傳 False）的鎖視為過期"""
+        if elapsed_time <= self._lock_timeout:
+            return False
+        keep_alive = lock_info.get('keep_alive')
+        return not (keep_alive and keep_alive())
@@ -0,0 +1,106 @@
+"""
+原始檔案放置 - 將輸入檔案放到輸出資料夾時不一定要完整複製一份
+
+    hardlink  : 硬連結（同一個檔案系統時，不佔額外空間）
+    reflink   : 寫入時複製的 clone（Btrfs / XFS 等支援 FICLONE 的檔案系統）
+    reference : 相對路徑的符號連結，指回輸入資料夾中的檔案（只在明確指定時使用）
+    copy      : 完整複製（原本的做法）
+    auto      : 依 hardlink → reflink → copy 的順序嘗試
+
+放置後的路徑與複製時相同，/view-file 與報告中的原始檔連結不需要改變；
+hardlink 與 reflink 在輸入資料夾刪除後仍然有效；reference 會失效，因此 auto 不會使用，
+確定輸入檔案會保留時才指定 reference。
+"""
+
+import os
+import shutil
+import threading
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+PLACEMENT_AUTO = 'auto'
+PLACEMENT_HARDLINK = 'hardlink'
+PLACEMENT_REFLINK = 'reflink'
+PLACEMENT_REFERENCE = 'reference'
+PLACEMENT_COPY = 'copy'
+PLACEMENT_MODES = (PLACEMENT_AUTO, PLACEMENT_HARDLINK, PLACEMENT_REFLINK, PLACEMENT_REFERENCE, PLACEMENT_COPY)
+
+# Linux ioctl FICLONE = _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+# auto 模式的嘗試順序（不含 reference：輸入資料夾刪除後符號連結會失效）
+_AUTO_ORDER = (PLACEMENT_HARDLINK, PLACEMENT_REFLINK, PLACEMENT_COPY)
+
+
+def _hardlink(source_path: str, tmp_path: str):
+    os.link(source_path, tmp_path)
+
+
+def _reflink(source_path: str, tmp_path: str):
+    if not HAS_FCNTL:
+        raise OSError("此平台不支援 reflink")
+    with open(source_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    shutil.copystat(source_path, tmp_path)
+
+
+def _reference(source_path: str, tmp_path: str):
+    target = os.path.relpath(os.path.abspath(source_path), os.path.dirname(os.path.abspath(tmp_path)))
+    os.symlink(target, tmp_path)
+
+
+def _copy(source_path: str, tmp_path: str):
+    shutil.copy2(source_path, tmp_path)
+
+
+_PLACERS = {
+    PLACEMENT_HARDLINK: _hardlink,
+    PLACEMENT_REFLINK: _reflink,
+    PLACEMENT_REFERENCE: _reference,
+    PLACEMENT_COPY: _copy,
+}
+
+
+def place_file(source_path: str, dest_path: str, mode: str = PLACEMENT_AUTO) -> str:
+    """將 source_path 放到 dest_path
+
+    指定的方式失敗時（跨檔案系統、不支援 reflink、沒有建立符號連結的權限等）改用完整複製；
+    dest_path 已經指向同一個檔案（先前的硬連結或符號連結）時不做任何事。
+
+    Returns:
+        實際使用的方式 (hardlink / reflink / reference / copy / existing)
+    """
+    if mode not in PLACEMENT_MODES:
+        raise ValueError(f"未知的原始檔案放置方式: {mode}")
+
+    if mode != PLACEMENT_COPY and os.path.lexists(dest_path):
+        try:
+            if os.path.samefile(source_path, dest_path):
+                return 'existing'
+        except OSError:
+            pass
+
+    if mode == PLACEMENT_AUTO:
+        order = _AUTO_ORDER
+    elif mode == PLACEMENT_COPY:
+        order = (PLACEMENT_COPY,)
+    else:
+        order = (mode, PLACEMENT_COPY)
+    # 先放到暫存路徑再改名，覆蓋上一次的輸出時不會留下不完整的檔案
+    tmp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    last_error = None
+    for method in order:
+        try:
+            _PLACERS[method](source_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+            return method
+        except (OSError, NotImplementedError) as e:
+            last_error = e
+        finally:
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+    raise last_error
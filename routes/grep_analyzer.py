@@ -1,13 +1,18 @@
 import subprocess
 from collections import defaultdict
+import io
 import os
 import re
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Tuple
 from enum import Enum
 from datetime import datetime, timedelta
 from collections import OrderedDict
+import json
+import shutil
+from routes.zip_scanner import ZipArchiveReader, ZIP_MEMBER_SEPARATOR, can_scan_in_place, is_zip_member_path
 
 class LogType(Enum):
     ANR = "ANR"
@@ -55,12 +60,31 @@ class LimitedCache:
             self.timestamps.pop(key, None)
 
 class AndroidLogAnalyzer:
-    def __init__(self):
+    # Number of files passed to one grep invocation
+    GREP_BATCH_SIZE = 500
+    # Bytes of each file read before the header parser falls back to the whole file
+    HEADER_PREFIX_BYTES = 64 * 1024
+    # Completion manifest written into every "<name>.zip_extracted" folder
+    EXTRACT_MANIFEST_NAME = '.extract_manifest.json'
+    
+    def __init__(self, scan_workers: int = 8, zip_mode: str = 'inplace', extract_workers: int = 4):
+        # Number of folders / files scanned concurrently (1 = serial scan)
+        self.scan_workers = max(1, scan_workers)
+        # Number of zip archives extracted concurrently
+        self.extract_workers = max(1, extract_workers)
+        self.zip_extract_stats = {'extracted': 0, 'reused': 0, 'failed': 0}
+        # 'inplace': read anr/tombstones members directly inside zip archives (nested zips included);
+        # 'extract': unzip every archive into a "<name>.zip_extracted" folder first
+        self.zip_mode = zip_mode
+        self.zip_reader = ZipArchiveReader()
         # Support both "Cmd line:" and "Cmdline:" formats
         self.cmdline_pattern = re.compile(r'(?:Cmd line|Cmdline):\s+(.+)', re.IGNORECASE)
         self.subject_pattern = re.compile(r'Subject:\s+(.+)')
         self.timestamp_pattern = re.compile(r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})')
         self.process_pattern = re.compile(r'Cmd line:\s+(.+)', re.IGNORECASE)
+        # Line filters equivalent to the grep searches (first hit per file)
+        self.subject_line_pattern = re.compile(r'Subject:', re.IGNORECASE)
+        self.cmdline_line_pattern = re.compile(r'(?:Cmd line|Cmdline):', re.IGNORECASE)
         self.use_grep = self.check_grep_availability()
         self.use_unzip = self.check_unzip_availability()
         
@@ -78,8 +102,8 @@ class AndroidLogAnalyzer:
             print("✗ unzip not available: {}".format(e))
             return False
 
-    def extract_and_process_zip_files(self, base_path: str) -> List[str]:
-        """Find and extract all zip files in the given path"""
+    def extract_and_process_zip_files(self, base_path: str, zip_files: List[str] = None) -> List[str]:
+        """Find and extract all zip files in the given path (or only the given zip_files)"""
         extracted_paths = []
         
         if not self.use_unzip:
@@ -89,11 +113,14 @@ class AndroidLogAnalyzer:
         # print(f"\nSearching for zip files to extract...")
         
         # Find all zip files
-        zip_files_found = []
-        for root, dirs, files in os.walk(base_path):
-            for file in files:
-                if file.lower().endswith('.zip'):
-                    zip_files_found.append(os.path.join(root, file))
+        if zip_files is not None:
+            zip_files_found = list(zip_files)
+        else:
+            zip_files_found = []
+            for root, dirs, files in os.walk(base_path):
+                for file in files:
+                    if file.lower().endswith('.zip'):
+                        zip_files_found.append(os.path.join(root, file))
         
         if not zip_files_found:
             print("  No zip files found")
@@ -101,42 +128,108 @@ class AndroidLogAnalyzer:
         
         print(f"  Found {len(zip_files_found)} zip files")
         
-        for zip_path in zip_files_found:
-            file = os.path.basename(zip_path)
-            extract_dir = os.path.join(os.path.dirname(zip_path), f"{file}_extracted")
-            
-            # Skip if already extracted
-            if os.path.exists(extract_dir):
-                # print(f"  ✓ Already extracted: {file}")
+        # 多個壓縮檔同時解壓縮（有上限的執行緒池），結果依原始順序回傳
+        self.zip_extract_stats = {'extracted': 0, 'reused': 0, 'failed': 0}
+        if self.extract_workers > 1 and len(zip_files_found) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.extract_workers, len(zip_files_found))) as executor:
+                outcomes = list(executor.map(self._extract_zip_file, zip_files_found))
+        else:
+            outcomes = [self._extract_zip_file(zip_path) for zip_path in zip_files_found]
+        
+        for extract_dir, outcome in outcomes:
+            self.zip_extract_stats[outcome] += 1
+            if extract_dir:
                 extracted_paths.append(extract_dir)
-                continue
-            
-            # print(f"  Extracting: {file}")
-            try:
-                # Create extraction directory
-                os.makedirs(extract_dir, exist_ok=True)
-                
-                # Extract using unzip command
-                cmd = ['unzip', '-q', '-o', zip_path, '-d', extract_dir]
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-                
-                if result.returncode == 0:
-                    # print(f"    ✓ Successfully extracted to: {extract_dir}")
-                    extracted_paths.append(extract_dir)
-                else:
-                    # print(f"    ✗ Failed to extract: {result.stderr}")
-                    # Clean up failed extraction
-                    if os.path.exists(extract_dir) and not os.listdir(extract_dir):
-                        os.rmdir(extract_dir)
-            except subprocess.TimeoutExpired:
-                print(f"    ✗ Extraction timeout")
-            except Exception as e:
-                print(f"    ✗ Extraction error: {e}")
         
         if extracted_paths:
             print(f"Successfully extracted/found {len(extracted_paths)} zip file contents")
         
         return extracted_paths
+    
+    def _extract_zip_file(self, zip_path: str) -> Tuple[str, str]:
+        """Extract one archive into "<name>.zip_extracted" unless a current manifest says it is already done
+        
+        Extraction goes into a temporary sibling folder that is renamed into place only after
+        unzip succeeded and the manifest was written, so an interrupted run never leaves a
+        folder that looks complete.
+        
+        Returns (extract_dir or None, 'extracted' | 'reused' | 'failed')
+        """
+        file = os.path.basename(zip_path)
+        extract_dir = os.path.join(os.path.dirname(zip_path), f"{file}_extracted")
+        
+        # Skip if already extracted (manifest matches the archive and the files on disk)
+        if self._is_extraction_current(zip_path, extract_dir):
+            # print(f"  ✓ Already extracted: {file}")
+            return extract_dir, 'reused'
+        
+        # print(f"  Extracting: {file}")
+        # 隱藏的暫存資料夾，中斷時留下的殘留不會被目錄掃描讀到
+        partial_dir = os.path.join(os.path.dirname(zip_path),
+                                   f".{file}_extracted.partial-{os.getpid()}-{threading.get_ident()}")
+        try:
+            archive_stat = os.stat(zip_path)
+            
+            # Create extraction directory
+            os.makedirs(partial_dir, exist_ok=True)
+            
+            # Extract using unzip command (大型壓縮檔給較長的時間)
+            cmd = ['unzip', '-q', '-o', zip_path, '-d', partial_dir]
+            timeout = max(60, archive_stat.st_size / (10 * 1024 * 1024))
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout,
+                                    stdin=subprocess.DEVNULL)
+            
+            if result.returncode != 0:
+                print(f"    ✗ Failed to extract {file}: {result.stderr.strip()}")
+                return None, 'failed'
+            
+            # 記錄解壓縮完成的檔案清單與壓縮檔狀態
+            members = []
+            for root, dirs, files in os.walk(partial_dir):
+                for name in files:
+                    member_path = os.path.join(root, name)
+                    members.append([os.path.relpath(member_path, partial_dir), os.path.getsize(member_path)])
+            manifest = {
+                'archive': file,
+                'archive_size': archive_stat.st_size,
+                'archive_mtime': archive_stat.st_mtime,
+                'members': members,
+            }
+            with open(os.path.join(partial_dir, self.EXTRACT_MANIFEST_NAME), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            
+            # 取代過期或不完整的解壓縮資料夾
+            if os.path.exists(extract_dir):
+                shutil.rmtree(extract_dir, ignore_errors=True)
+            os.rename(partial_dir, extract_dir)
+            # print(f"    ✓ Successfully extracted to: {extract_dir}")
+            return extract_dir, 'extracted'
+        except subprocess.TimeoutExpired:
+            print(f"    ✗ Extraction timeout: {file}")
+        except Exception as e:
+            print(f"    ✗ Extraction error: {e}")
+        finally:
+            # Clean up failed extraction
+            if os.path.exists(partial_dir):
+                shutil.rmtree(partial_dir, ignore_errors=True)
+        return None, 'failed'
+    
+    def _is_extraction_current(self, zip_path: str, extract_dir: str) -> bool:
+        """Check the completion manifest: archive size/mtime unchanged and every member present with its size"""
+        manifest_path = os.path.join(extract_dir, self.EXTRACT_MANIFEST_NAME)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            archive_stat = os.stat(zip_path)
+            if (manifest.get('archive_size') != archive_stat.st_size
+                    or manifest.get('archive_mtime') != archive_stat.st_mtime):
+                return False
+            for rel_path, size in manifest.get('members', []):
+                if os.path.getsize(os.path.join(extract_dir, rel_path)) != size:
+                    return False
+            return True
+        except (OSError, ValueError, TypeError):
+            return False
         
     def extract_process_name(self, cmdline: str) -> str:
         """Extract process name from command line"""
@@ -219,6 +312,148 @@ class AndroidLogAnalyzer:
             print(f"grep not available: {e}")
             return False
     
+    def walk_target_folders(self, search_paths: List[str], zip_files: List[str] = None,
+                            skip_extracted: bool = False) -> Tuple[List[str], List[str], Dict[str, Dict[str, List[str]]]]:
+        """Single directory walk: find ALL anr/tombstones folders and list their files
+        
+        Returns (anr_folders, tombstone_folders, folder_files) where folder_files maps each target
+        folder to {'top_level': files directly inside it, 'all': files in it and its sub folders}.
+        Search paths nested inside an earlier search path are not walked twice.
+        If zip_files is a list, the zip archives seen during the walk are appended to it.
+        skip_extracted: don't descend into "<name>.zip_extracted" folders next to their archive.
+        """
+        anr_folders = []
+        tombstone_folders = []
+        folder_files = {}
+        walked_roots = []
+        
+        def register(folder, is_anr):
+            if folder in folder_files:
+                return
+            folder_files[folder] = {'top_level': [], 'all': []}
+            (anr_folders if is_anr else tombstone_folders).append(folder)
+        
+        for search_path in search_paths:
+            normalized = os.path.normpath(search_path)
+            if any(normalized == root or normalized.startswith(root + os.sep) for root in walked_roots):
+                continue
+            walked_roots.append(normalized)
+            
+            # directory -> target folder it belongs to
+            owner = {}
+            base_name = os.path.basename(search_path).lower()
+            if base_name == 'anr':
+                register(search_path, True)
+                owner[search_path] = search_path
+            elif base_name in ['tombstones', 'tombstone']:
+                register(search_path, False)
+                owner[search_path] = search_path
+            
+            for root, dirs, files in os.walk(search_path):
+                # 排除隱藏資料夾
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                if skip_extracted:
+                    file_names = set(files)
+                    dirs[:] = [d for d in dirs if not (d.endswith('_extracted') and d[:-len('_extracted')] in file_names)]
+                
+                if zip_files is not None:
+                    zip_files.extend(os.path.join(root, f) for f in files if f.lower().endswith('.zip'))
+                
+                current_target = owner.get(root)
+                if current_target:
+                    paths = [os.path.join(root, f) for f in files]
+                    folder_files[current_target]['all'].extend(paths)
+                    if root == current_target:
+                        folder_files[current_target]['top_level'].extend(paths)
+                
+                for dir_name in dirs:
+                    dir_lower = dir_name.lower()
+                    full_path = os.path.join(root, dir_name)
+                    
+                    if dir_lower == 'anr':
+                        register(full_path, True)
+                        owner[full_path] = full_path
+                    elif dir_lower in ['tombstones', 'tombstone']:
+                        register(full_path, False)
+                        owner[full_path] = full_path
+                    elif current_target:
+                        owner[full_path] = current_target
+        
+        return anr_folders, tombstone_folders, folder_files
+    
+    def collect_zip_target_folders(self, zip_paths: List[str]) -> Tuple[List[str], List[str], Dict[str, Dict[str, List[str]]]]:
+        """Find anr/tombstones folders inside zip archives (nested zips included) without extracting
+        
+        Same return shape as walk_target_folders; folders and files are virtual paths
+        such as /data/drop.zip!/FS/data/anr/anr_1 (see routes.zip_scanner).
+        """
+        anr_folders = []
+        tombstone_folders = []
+        folder_files = {}
+        
+        for zip_path in zip_paths:
+            for member in self.zip_reader.iter_members(zip_path):
+                archive_prefix, member_name = member['path'].rsplit(ZIP_MEMBER_SEPARATOR, 1)
+                parts = member_name.split('/')
+                # 排除隱藏資料夾
+                if any(part.startswith('.') for part in parts[:-1]):
+                    continue
+                
+                # 檔案屬於最近一層的 anr/tombstones 資料夾
+                for idx in range(len(parts) - 2, -1, -1):
+                    dir_lower = parts[idx].lower()
+                    if dir_lower in ['anr', 'tombstones', 'tombstone']:
+                        folder = archive_prefix + ZIP_MEMBER_SEPARATOR + '/'.join(parts[:idx + 1])
+                        if folder not in folder_files:
+                            folder_files[folder] = {'top_level': [], 'all': []}
+                            (anr_folders if dir_lower == 'anr' else tombstone_folders).append(folder)
+                        folder_files[folder]['all'].append(member['path'])
+                        if idx == len(parts) - 2:
+                            folder_files[folder]['top_level'].append(member['path'])
+                        break
+        
+        return anr_folders, tombstone_folders, folder_files
+    
+    def partition_zip_files(self, zip_files: List[str]) -> Tuple[List[str], List[str]]:
+        """Split zip archives into (scan in place, needs extraction)
+        
+        Archives that already have a "<name>.zip_extracted" folder keep using it (its
+        manifest decides whether it has to be extracted again). Encrypted or otherwise
+        unsupported archives fall back to extraction.
+        """
+        in_place = []
+        to_extract = []
+        for zip_path in zip_files:
+            if os.path.isdir(f"{zip_path}_extracted"):
+                to_extract.append(zip_path)
+            elif self.zip_mode == 'inplace' and can_scan_in_place(zip_path):
+                in_place.append(zip_path)
+            else:
+                to_extract.append(zip_path)
+        return in_place, to_extract
+    
+    @staticmethod
+    def _merge_target_folders(target: Tuple[List[str], List[str], Dict], source: Tuple[List[str], List[str], Dict]):
+        """Append the folders found by another walk (skipping folders already present)"""
+        for idx in (0, 1):
+            for folder in source[idx]:
+                if folder not in target[2]:
+                    target[idx].append(folder)
+                    target[2][folder] = source[2][folder]
+    
+    def _open_log_file(self, file_path: str):
+        """Open a log file (or a zip member virtual path) for binary reading"""
+        if is_zip_member_path(file_path):
+            return self.zip_reader.open(file_path)
+        return open(file_path, 'rb')
+    
+    def _stat_log_file(self, file_path: str) -> Tuple[int, float]:
+        """Return (size, mtime) of a log file or zip member"""
+        if is_zip_member_path(file_path):
+            return self.zip_reader.stat(file_path)
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime
+    
     def find_target_folders(self, base_path: str) -> Tuple[List[str], List[str]]:
         """Find ALL anr and tombstones folders recursively in the given path"""
         anr_folders = []
@@ -256,67 +491,107 @@ class AndroidLogAnalyzer:
     
     def grep_cmdline_files(self, folder_path: str) -> List[Tuple[str, str, int]]:
         """Use grep to find files containing 'Cmd line:', 'Cmdline:', or 'Subject:' and extract the content with line number"""
-        results = []
-        seen_files = set()  # 用完整路徑判斷唯一性
+        # 判斷是否為 ANR 資料夾
+        is_anr_folder = 'anr' in folder_path.lower()
         
-        try:
-            # 判斷是否為 ANR 資料夾
-            is_anr_folder = 'anr' in folder_path.lower()
-            
-            if is_anr_folder:
-                # ANR 資料夾：搜尋 Subject:
-                cmd = ['grep', '-H', '-n', '-i', '-r', 'Subject:', '.']
+        file_paths = []
+        for root, dirs, files in os.walk(folder_path):
+            file_paths.extend(os.path.join(root, f) for f in files)
+        
+        matches = self.search_first_matches(file_paths, is_anr_folder)
+        return [(filepath,) + matches[filepath] for filepath in file_paths if filepath in matches]
+    
+    def search_first_matches(self, file_paths: List[str], is_anr: bool, executor=None) -> Dict[str, Tuple[str, int]]:
+        """Find the first Subject: (ANR) or Cmd line:/Cmdline: (tombstone) line of every file
+        
+        Files are searched in batches by a single grep invocation each (grep -m 1 stops at the
+        first hit per file); without grep, or when a batch fails, the same search runs in-process.
+        Returns {filepath: (subject or cmdline, line_number)} for files whose first hit parses.
+        """
+        batches = [file_paths[i:i + self.GREP_BATCH_SIZE]
+                   for i in range(0, len(file_paths), self.GREP_BATCH_SIZE)]
+        
+        if executor is not None and len(batches) > 1:
+            batch_results = list(executor.map(lambda batch: self._search_batch(batch, is_anr), batches))
+        else:
+            batch_results = [self._search_batch(batch, is_anr) for batch in batches]
+        
+        matches = {}
+        for batch_result in batch_results:
+            for filepath, (content, line_number) in batch_result.items():
+                # ANR: 處理 Subject；Tombstone: 處理 Cmdline
+                pattern = self.subject_pattern if is_anr else self.cmdline_pattern
+                match = pattern.search(content)
+                if match:
+                    matches[filepath] = (match.group(1).strip(), line_number)
+        return matches
+    
+    def _search_batch(self, file_paths: List[str], is_anr: bool) -> Dict[str, Tuple[str, int]]:
+        """Return {filepath: (first matching line, line_number)} for one batch of files"""
+        if not file_paths:
+            return {}
+        
+        # zip 壓縮檔內的成員無法交給 grep，改用程序內比對
+        member_paths = [p for p in file_paths if is_zip_member_path(p)]
+        if member_paths:
+            results = self._search_batch_in_process(member_paths, is_anr)
+            disk_paths = [p for p in file_paths if not is_zip_member_path(p)]
+            results.update(self._search_batch(disk_paths, is_anr))
+            return results
+        
+        if self.use_grep:
+            if is_anr:
+                # ANR 檔案：搜尋 Subject:
+                cmd = ['grep', '-H', '-n', '-i', '-m', '1', '-Z', '-F', 'Subject:', '--'] + file_paths
             else:
-                # Tombstone 資料夾：搜尋 Cmd line 或 Cmdline
-                cmd = ['grep', '-H', '-n', '-i', '-r', '-E', '(Cmd line|Cmdline):', '.']
-            
-            # Run grep in the target folder
-            result = subprocess.run(cmd, 
-                                  cwd=folder_path,
-                                  capture_output=True, 
-                                  text=True,
-                                  timeout=30)
+                # Tombstone 檔案：搜尋 Cmd line 或 Cmdline
+                cmd = ['grep', '-H', '-n', '-i', '-m', '1', '-Z', '-E', '(Cmd line|Cmdline):', '--'] + file_paths
             
-            if result.returncode == 0 and result.stdout.strip():
-                # Parse grep output
-                for line in result.stdout.strip().split('\n'):
-                    if line and ':' in line:  # Ensure line is not empty and contains separator
-                        # Format: filename:linenumber:content
-                        parts = line.split(':', 3)  # Split into max 4 parts
-                        if len(parts) >= 4:
-                            relative_filename = parts[0].lstrip('./')  # 例如 foo.txt 或 subdir/foo.txt
-                            filepath = os.path.normpath(os.path.join(folder_path, relative_filename))
-                            if filepath in seen_files:
-                                continue  # 只抓第一次
-                            seen_files.add(filepath)
-                            
-                            line_number = int(parts[1])
-                            content = parts[3] if len(parts) > 3 else parts[2]
-                            
-                            if is_anr_folder:
-                                # 處理 ANR Subject
-                                subject_match = self.subject_pattern.search(content)
-                                if not subject_match:
-                                    subject_match = self.subject_pattern.search(line)
-                                if subject_match:
-                                    subject_content = subject_match.group(1).strip()
-                                    results.append((filepath, subject_content, line_number))
-                            else:
-                                # 處理 Tombstone Cmdline
-                                cmdline_match = self.cmdline_pattern.search(content)
-                                if not cmdline_match:
-                                    cmdline_match = self.cmdline_pattern.search(line)
-                                if cmdline_match:
-                                    cmdline = cmdline_match.group(1).strip()
-                                    results.append((filepath, cmdline, line_number))
-            
-            # print(f"grep found {len(results)} files in {folder_path}")
-            
-        except subprocess.TimeoutExpired:
-            print(f"grep timeout in {folder_path}, falling back to file reading")
-        except Exception as e:
-            print(f"grep error in {folder_path}: {e}")
+            try:
+                result = subprocess.run(cmd,
+                                      capture_output=True,
+                                      timeout=max(30, len(file_paths) * 0.1))
+                # returncode 2 表示部分檔案無法讀取，其餘結果仍然有效
+                if result.returncode in (0, 1) or result.stdout:
+                    return self._parse_grep_output(result.stdout)
+            except subprocess.TimeoutExpired:
+                print(f"grep timeout on {len(file_paths)} files, falling back to file reading")
+            except Exception as e:
+                print(f"grep error: {e}")
         
+        # In-process matcher (no grep, or grep failed for this batch)
+        return self._search_batch_in_process(file_paths, is_anr)
+    
+    def _search_batch_in_process(self, file_paths: List[str], is_anr: bool) -> Dict[str, Tuple[str, int]]:
+        """Same as the grep search, reading each file only up to its first hit"""
+        line_pattern = self.subject_line_pattern if is_anr else self.cmdline_line_pattern
+        results = {}
+        for filepath in file_paths:
+            try:
+                with self._open_log_file(filepath) as f:
+                    for line_no, raw_line in enumerate(f, 1):
+                        # 二進位讀取不會轉換換行：去掉行尾的 \r\n，避免 CRLF 檔案的 \r 留在擷取結果中
+                        line = raw_line.rstrip(b'\r\n').decode('utf-8', errors='ignore')
+                        if line_pattern.search(line):
+                            results[filepath] = (line, line_no)
+                            break
+            except Exception:
+                pass
+        return results
+    
+    @staticmethod
+    def _parse_grep_output(output: bytes) -> Dict[str, Tuple[str, int]]:
+        """Parse `grep -H -n -Z` output (filename NUL linenumber:content)"""
+        results = {}
+        for raw_line in output.split(b'\n'):
+            if b'\0' not in raw_line:
+                continue
+            raw_path, rest = raw_line.split(b'\0', 1)
+            line_number, _, content = rest.partition(b':')
+            filepath = os.fsdecode(raw_path)
+            if filepath in results or not line_number.isdigit():
+                continue  # 只抓第一次
+            results[filepath] = (content.rstrip(b'\r').decode('utf-8', errors='ignore'), int(line_number))
         return results
 
     def extract_problem_set_from_path(self, folder_path: str) -> str:
@@ -352,7 +627,7 @@ class AndroidLogAnalyzer:
         
         # Get file size
         try:
-            info['filesize'] = os.path.getsize(file_path)
+            info['filesize'] = self._stat_log_file(file_path)[0]
         except:
             pass
         
@@ -368,15 +643,23 @@ class AndroidLogAnalyzer:
         # === 新增：一開始就檢查是否需要搜尋 process ===
         need_process_search = is_anr and cmdline and not info['process']
         
+        # 掃描統計：讀取的位元組數、是否超出標頭前綴
+        info['bytes_read'] = 0
+        info['header_full_read'] = False
+        
         try:
-            # Read file to get timestamp and line number if not provided
-            with open(file_path, 'r', errors='ignore') as f:
-                lines = f.readlines()
-                
+            # Stream the file header: stop as soon as timestamp, cmdline/line number and process
+            # are resolved. Only when the first HEADER_PREFIX_BYTES are not enough does the scan
+            # continue through the rest of the file (full-file fallback).
+            with self._open_log_file(file_path) as f:
                 # 新增：用於 ANR 檔案的特殊處理
                 found_subject = False
                 
-                for line_no, line in enumerate(lines, 1):
+                for line_no, raw_line in enumerate(f, 1):
+                    info['bytes_read'] += len(raw_line)
+                    # 去掉行尾的 \r\n，與文字模式讀取一致（否則 CRLF 檔案的 Cmd line: 擷取會帶著 \r）
+                    line = raw_line.rstrip(b'\r\n').decode('utf-8', errors='ignore')
+                    
                     # Extract timestamp
                     if not info['timestamp']:
                         timestamp_match = self.timestamp_pattern.search(line)
@@ -422,11 +705,19 @@ class AndroidLogAnalyzer:
                             info['process'] = process_match.group(1)
                             info['line_number'] = line_no
                             need_process_search = False  # 找到了，停止搜尋
+                    
+                    # 標頭資訊已齊全，不需要再讀取檔案其餘部分
+                    if (info['timestamp'] and info['cmdline'] and info['line_number']
+                            and not (is_anr and need_process_search and not info['process'])):
+                        break
+                    
+                    if not info['header_full_read'] and info['bytes_read'] >= self.HEADER_PREFIX_BYTES:
+                        info['header_full_read'] = True
             
             # Get file modification time if timestamp not found
             if not info['timestamp']:
-                stat = os.stat(file_path)
-                info['timestamp'] = datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                mtime = self._stat_log_file(file_path)[1]
+                info['timestamp'] = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
                 
         except Exception as e:
             print(f"Error reading file {file_path}: {e}")
@@ -452,12 +743,16 @@ class AndroidLogAnalyzer:
         
         # Get file size
         try:
-            info['filesize'] = os.path.getsize(file_path)
+            info['filesize'] = self._stat_log_file(file_path)[0]
         except:
             pass
         
+        # 掃描統計：此方法讀取整個檔案
+        info['bytes_read'] = info['filesize']
+        info['header_full_read'] = True
+        
         try:
-            with open(file_path, 'r', errors='ignore') as f:
+            with io.TextIOWrapper(self._open_log_file(file_path), errors='ignore') as f:
                 lines = f.readlines()
                 
                 # 新增：用於 ANR 檔案的特殊處理
@@ -502,37 +797,95 @@ class AndroidLogAnalyzer:
                 
                 # Get file modification time if timestamp not found
                 if not info['timestamp']:
-                    stat = os.stat(file_path)
-                    info['timestamp'] = datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                    mtime = self._stat_log_file(file_path)[1]
+                    info['timestamp'] = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
                     
         except Exception as e:
             print(f"Error parsing file {file_path}: {e}")
         
         return info
     
-    def analyze_logs(self, path: str) -> Dict:
-        """Analyze all files in anr/ and tombstones/ folders"""
+    def _scan_folder(self, folder: str, is_anr_folder: bool, files: Dict[str, List[str]],
+                     matches: Dict[str, Tuple[str, int]], file_executor=None) -> Dict:
+        """Extract info for every file with a cmdline in one anr/ or tombstones/ folder
+        
+        files: the folder's entry from walk_target_folders; matches: first-hit results from
+        search_first_matches. file_executor: optional thread pool for per-file extraction
+        (results keep walk order).
+        """
+        folder_result = {
+            'logs': [],
+            'files_scanned': len(files['top_level']),
+            'files_with_cmdline': 0,
+            'anr_subject_count': 0,
+            'bytes_read': 0,
+            'full_reads': 0,
+            'scan_time': 0.0
+        }
+        folder_start = time.time()
+        
+        def run_all(func, items):
+            if file_executor is not None and len(items) > 1:
+                return list(file_executor.map(lambda item: func(*item), items))
+            return [func(*item) for item in items]
+        
+        hits = [(filepath,) + matches[filepath] for filepath in files['all'] if filepath in matches]
+        if hits:
+            infos = run_all(self.extract_full_info_from_file, hits)
+        else:
+            # Fallback to file reading if the search didn't find anything
+            infos = run_all(self.extract_cmdline_from_file_fallback,
+                            [(filepath,) for filepath in files['top_level']])
+        
+        for log_info in infos:
+            # 掃描統計不放入 log 資料
+            folder_result['bytes_read'] += log_info.pop('bytes_read', 0)
+            folder_result['full_reads'] += 1 if log_info.pop('header_full_read', False) else 0
+            
+            if log_info['cmdline']:
+                folder_result['logs'].append(log_info)
+                folder_result['files_with_cmdline'] += 1
+                # ANR Subject 計數維持原有規則：ANR 資料夾一律計入；Tombstone 資料夾中路徑含 anr 的檔案
+                # 只在沒有 grep（逐檔讀取）時計入，與原本 grep / 非 grep 分支的統計相同
+                if log_info['type'] == 'ANR' and (is_anr_folder or not self.use_grep):  # 確保是 ANR 類型
+                    folder_result['anr_subject_count'] += 1
+        
+        folder_result['scan_time'] = time.time() - folder_start
+        return folder_result
+    
+    def analyze_logs(self, path: str, progress_callback=None) -> Dict:
+        """Analyze all files in anr/ and tombstones/ folders
+        
+        progress_callback: optional (stage, done, total, message), called once per folder
+        """
         start_time = time.time()
         
         # 保存基礎路徑
         self.base_path = path
 
-        # First, extract any zip files
-        extracted_paths = self.extract_and_process_zip_files(path)
-        
-        # Search in original path and all extracted paths
-        search_paths = [path] + extracted_paths
-        all_anr_folders = []
-        all_tombstone_folders = []
-        
-        for search_path in search_paths:
-            anr_folders, tombstone_folders = self.find_target_folders(search_path)
-            all_anr_folders.extend(anr_folders)
-            all_tombstone_folders.extend(tombstone_folders)
-        
-        # Remove duplicates
-        all_anr_folders = list(set(all_anr_folders))
-        all_tombstone_folders = list(set(all_tombstone_folders))
+        zip_files_in_place = []
+        self.zip_extract_stats = {'extracted': 0, 'reused': 0, 'failed': 0}
+        if self.zip_mode == 'inplace':
+            # One directory walk; zip archives are read in place, only unsupported ones are extracted
+            zip_files = []
+            targets = self.walk_target_folders([path], zip_files, skip_extracted=True)
+            zip_files_in_place, zip_files_to_extract = self.partition_zip_files(zip_files)
+            extracted_paths = self.extract_and_process_zip_files(path, zip_files_to_extract) if zip_files_to_extract else []
+            if extracted_paths:
+                # 解壓縮資料夾中的 zip 也直接讀取
+                nested_zip_files = []
+                self._merge_target_folders(targets, self.walk_target_folders(extracted_paths, nested_zip_files))
+                zip_files_in_place += [z for z in nested_zip_files if can_scan_in_place(z)]
+            if zip_files_in_place:
+                self._merge_target_folders(targets, self.collect_zip_target_folders(zip_files_in_place))
+            all_anr_folders, all_tombstone_folders, folder_files = targets
+        else:
+            # First, extract any zip files
+            extracted_paths = self.extract_and_process_zip_files(path)
+            
+            # Search in original path and all extracted paths (one directory walk)
+            search_paths = [path] + extracted_paths
+            all_anr_folders, all_tombstone_folders, folder_files = self.walk_target_folders(search_paths)
         
         # print(f"Total found: {len(all_anr_folders)} ANR folders, {len(all_tombstone_folders)} tombstone folders")
         # print(f"Using grep: {self.use_grep}")
@@ -541,104 +894,76 @@ class AndroidLogAnalyzer:
         files_with_cmdline = 0
         total_files_scanned = 0
         anr_subject_count = 0  # 新增：ANR Subject 計數器
-                
-        # Process ANR folders
-        for anr_folder in all_anr_folders:
-            if os.path.exists(anr_folder):
-                folder_start = time.time()
-                # print(f"\nProcessing ANR folder: {anr_folder}")
-                
-                if self.use_grep:
-                    # Use grep to quickly find files with Cmdline
-                    grep_results = self.grep_cmdline_files(anr_folder)
-                    
-                    # Count total files in the directory
-                    total_in_folder = len([f for f in os.listdir(anr_folder) 
-                                        if os.path.isfile(os.path.join(anr_folder, f))])
-                    total_files_scanned += total_in_folder
-                    
-                    if grep_results:
-                        # Process grep results
-                        for filepath, cmdline, line_number in grep_results:
-                            log_info = self.extract_full_info_from_file(filepath, cmdline, line_number)
-                            if log_info['cmdline']:
-                                all_logs.append(log_info)
-                                files_with_cmdline += 1
-                                if log_info['type'] == 'ANR':  # 確保是 ANR 類型
-                                    anr_subject_count += 1                                
-                    else:
-                        # Fallback to file reading if grep didn't find anything
-                        # print(f"  No grep results, falling back to file reading")
-                        for file_name in os.listdir(anr_folder):
-                            file_path = os.path.join(anr_folder, file_name)
-                            if os.path.isfile(file_path):
-                                log_info = self.extract_cmdline_from_file_fallback(file_path)
-                                if log_info['cmdline']:
-                                    all_logs.append(log_info)
-                                    files_with_cmdline += 1
-                                    if log_info['type'] == 'ANR':  # 確保是 ANR 類型
-                                        anr_subject_count += 1
-                else:
-                    # No grep available, use traditional method
-                    for file_name in os.listdir(anr_folder):
-                        file_path = os.path.join(anr_folder, file_name)
-                        if os.path.isfile(file_path):
-                            total_files_scanned += 1
-                            log_info = self.extract_cmdline_from_file_fallback(file_path)
-                            if log_info['cmdline']:
-                                all_logs.append(log_info)
-                                files_with_cmdline += 1
-                                if log_info['type'] == 'ANR':  # 確保是 ANR 類型
-                                    anr_subject_count += 1                                
-                
-                # print(f"  Processed in {time.time() - folder_start:.2f} seconds")
         
-        # Process tombstone folders
-        for tombstone_folder in all_tombstone_folders:
-            if os.path.exists(tombstone_folder):
-                folder_start = time.time()
-                # print(f"\nProcessing tombstone folder: {tombstone_folder}")
-                
-                if self.use_grep:
-                    # Use grep to quickly find files with Cmdline
-                    grep_results = self.grep_cmdline_files(tombstone_folder)
-                    
-                    # Count total files in the directory
-                    total_in_folder = len([f for f in os.listdir(tombstone_folder) 
-                                        if os.path.isfile(os.path.join(tombstone_folder, f))])
-                    total_files_scanned += total_in_folder
-                    
-                    if grep_results:
-                        # Process grep results
-                        for filepath, cmdline, line_number in grep_results:
-                            log_info = self.extract_full_info_from_file(filepath, cmdline, line_number)
-                            if log_info['cmdline']:
-                                all_logs.append(log_info)
-                                files_with_cmdline += 1
-                    else:
-                        # Fallback to file reading
-                        # print(f"  No grep results, falling back to file reading")
-                        for file_name in os.listdir(tombstone_folder):
-                            file_path = os.path.join(tombstone_folder, file_name)
-                            if os.path.isfile(file_path):
-                                log_info = self.extract_cmdline_from_file_fallback(file_path)
-                                if log_info['cmdline']:
-                                    all_logs.append(log_info)
-                                    files_with_cmdline += 1                                   
-                else:
-                    # No grep available, use traditional method
-                    for file_name in os.listdir(tombstone_folder):
-                        file_path = os.path.join(tombstone_folder, file_name)
-                        if os.path.isfile(file_path):
-                            total_files_scanned += 1
-                            log_info = self.extract_cmdline_from_file_fallback(file_path)
-                            if log_info['cmdline']:
-                                all_logs.append(log_info)
-                                files_with_cmdline += 1
-                                if log_info['type'] == 'ANR':  # 確保是 ANR 類型
-                                    anr_subject_count += 1
-                
-                # print(f"  Processed in {time.time() - folder_start:.2f} seconds")
+        # ANR 資料夾在前、Tombstone 資料夾在後，結果依此順序合併
+        folder_jobs = [(folder, True) for folder in all_anr_folders] + \
+                      [(folder, False) for folder in all_tombstone_folders]
+        total_folders = len(folder_jobs)
+        folder_results = [None] * total_folders
+        
+        file_executor = ThreadPoolExecutor(max_workers=self.scan_workers) if self.scan_workers > 1 else None
+        try:
+            # 一次搜尋所有資料夾的檔案（每個檔案只取第一個 Subject:/Cmd line: 命中）
+            search_start = time.time()
+            anr_matches = self.search_first_matches(
+                [f for folder in all_anr_folders for f in folder_files[folder]['all']], True, file_executor)
+            tombstone_matches = self.search_first_matches(
+                [f for folder in all_tombstone_folders for f in folder_files[folder]['all']], False, file_executor)
+            search_time = time.time() - search_start
+            
+            if file_executor is not None and total_folders > 1:
+                # 並行擷取：每個資料夾的檔案資訊擷取在有上限的執行緒池中執行
+                with ThreadPoolExecutor(max_workers=min(self.scan_workers, total_folders)) as folder_executor:
+                    future_to_idx = {
+                        folder_executor.submit(
+                            self._scan_folder, folder, is_anr_folder, folder_files[folder],
+                            anr_matches if is_anr_folder else tombstone_matches, file_executor
+                        ): idx
+                        for idx, (folder, is_anr_folder) in enumerate(folder_jobs)
+                    }
+                    for folders_done, future in enumerate(as_completed(future_to_idx), 1):
+                        idx = future_to_idx[future]
+                        folder_results[idx] = future.result()
+                        if progress_callback:
+                            progress_callback('scan', folders_done, total_folders, folder_jobs[idx][0])
+            else:
+                for idx, (folder, is_anr_folder) in enumerate(folder_jobs):
+                    if progress_callback:
+                        progress_callback('scan', idx, total_folders, folder)
+                    folder_results[idx] = self._scan_folder(
+                        folder, is_anr_folder, folder_files[folder],
+                        anr_matches if is_anr_folder else tombstone_matches
+                    )
+        finally:
+            if file_executor is not None:
+                file_executor.shutdown()
+            # 釋放本次掃描開啟的壓縮檔
+            self.zip_reader.close()
+        
+        # 依原始資料夾順序合併結果與統計
+        folder_scan_times = []
+        total_bytes_read = 0
+        total_full_reads = 0
+        for (folder, is_anr_folder), folder_result in zip(folder_jobs, folder_results):
+            if folder_result is None:
+                continue
+            all_logs.extend(folder_result['logs'])
+            files_with_cmdline += folder_result['files_with_cmdline']
+            total_files_scanned += folder_result['files_scanned']
+            anr_subject_count += folder_result['anr_subject_count']
+            total_bytes_read += folder_result['bytes_read']
+            total_full_reads += folder_result['full_reads']
+            folder_scan_times.append({
+                'folder': folder,
+                'type': 'ANR' if is_anr_folder else 'Tombstone',
+                'files': folder_result['files_scanned'],
+                'hits': folder_result['files_with_cmdline'],
+                'bytes_read': folder_result['bytes_read'],
+                'seconds': round(folder_result['scan_time'], 3)
+            })
+
+        if progress_callback:
+            progress_callback('scan', total_folders, total_folders, f'{files_with_cmdline} files with cmdline')
 
         total_time = time.time() - start_time
         # print(f"\nTotal analysis time: {total_time:.2f} seconds")
@@ -665,7 +990,13 @@ class AndroidLogAnalyzer:
             'analysis_time': round(total_time, 2),
             'used_grep': self.use_grep,
             'zip_files_extracted': len(extracted_paths),
-            'anr_subject_count': anr_subject_count
+            'zip_files_scanned_in_place': len(zip_files_in_place),
+            'zip_extraction': dict(self.zip_extract_stats),
+            'anr_subject_count': anr_subject_count,
+            'folder_scan_times': folder_scan_times,
+            'search_time': round(search_time, 3),
+            'bytes_read': total_bytes_read,
+            'full_reads': total_full_reads
         }
     
     def generate_file_statistics(self, logs: List[Dict]) -> List[Dict]:
@@ -744,6 +1075,9 @@ class AndroidLogAnalyzer:
         if path_parts and path_parts[0] and path_parts[0] != '.':
             # 檢查第一部分是否符合格式（如 7L09, 7L52）
             first_part = path_parts[0]
+            # 壓縮檔內的檔案 (drop.zip!/...)：以壓縮檔名稱作為問題 set
+            if is_zip_member_path(file_path) and first_part.endswith('!'):
+                first_part = first_part[:-1]
             if len(first_part) >= 4 and first_part[0].isdigit() and first_part[1].isalpha():
                 return first_part
             # 即使不符合格式，也返回第一層資料夾名稱
@@ -27,10 +27,18 @@ import requests
 import atexit
 import tempfile
 from routes.analysisLockManager import AnalysisLockManager
+from routes.vp_analyze_engine import run_analysis as run_vp_analysis
+from routes.analysisJobManager import AnalysisJobManager
+from routes.zip_scanner import is_zip_member_path, materialize_zip_member
+from routes.report_assets import ASSET_MODE_SHARED, resolve_asset_path
+from config.config import ANALYSIS_DATA_DIR
 
 # 創建全域的鎖管理器實例
 analysis_lock_manager = AnalysisLockManager()
 
+# 背景分析工作管理器（最多同時執行 2 個分析工作）
+analysis_job_manager = AnalysisJobManager(max_workers=2)
+
 # 創建一個藍圖實例
 main_page_bp = Blueprint('main_page_bp', __name__)
 
@@ -3839,6 +3847,60 @@ HTML_TEMPLATE = r'''
             });
         }
 
+        // 以背景工作執行分析：提交後透過 SSE 顯示進度，完成後取回結果
+        // 回傳類似 fetch Response 的物件 (status / ok / json())
+        async function runAnalysisJob(path) {
+            const submitResponse = await fetch('/analyze-async', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ path: path })
+            });
+            
+            if (submitResponse.status !== 202) {
+                return submitResponse;
+            }
+            
+            const job = await submitResponse.json();
+            const loadingEl = document.getElementById('loading');
+            const stageNames = { queued: '排隊中', scan: '搜尋 Cmd line', analyze: '分析檔案', index: '生成索引', excel: '處理 Excel' };
+            
+            await new Promise((resolve) => {
+                const source = new EventSource(job.progress_url);
+                source.addEventListener('progress', (event) => {
+                    const progress = JSON.parse(event.data);
+                    if (!loadingEl) return;
+                    let text = '正在分析中 - ' + (stageNames[progress.stage] || progress.stage);
+                    if (progress.total) {
+                        text += ` (${progress.done}/${progress.total})`;
+                    }
+                    if (progress.eta !== null && progress.eta !== undefined && progress.eta > 0) {
+                        text += `，預估剩餘 ${Math.ceil(progress.eta)} 秒`;
+                    }
+                    loadingEl.textContent = text;
+                });
+                const finish = () => {
+                    source.close();
+                    resolve();
+                };
+                source.addEventListener('done', finish);
+                source.addEventListener('error', finish);
+            });
+            
+            if (loadingEl) {
+                loadingEl.textContent = '正在分析中';
+            }
+            
+            // 串流中斷時以輪詢等待結果
+            let resultResponse = await fetch(job.result_url);
+            while (resultResponse.status === 202) {
+                await new Promise(resolve => setTimeout(resolve, 2000));
+                resultResponse = await fetch(job.result_url);
+            }
+            return resultResponse;
+        }
+
         // 修改 waitForAnalysisUnlock 函數，改善錯誤處理
         async function waitForAnalysisUnlock(path, maxWaitTime = 300000) {
             const startTime = Date.now();
@@ -4776,13 +4838,7 @@ HTML_TEMPLATE = r'''
             clearMessage();
             
             try {
-                const response = await fetch('/analyze', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({ path: path })
-                });
+                const response = await runAnalysisJob(path);
                 
                 const data = await response.json();
                 
@@ -8216,13 +8272,7 @@ HTML_TEMPLATE = r'''
                         console.log('設置 basePath:', window.basePath);
                         
                         // 使用臨時路徑直接呼叫 analyze 端點
-                        const analyzeResponse = await fetch('/analyze', {
-                            method: 'POST',
-                            headers: {
-                                'Content-Type': 'application/json',
-                            },
-                            body: JSON.stringify({ path: data.temp_path })
-                        });
+                        const analyzeResponse = await runAnalysisJob(data.temp_path);
                         
                         const analyzeData = await analyzeResponse.json();
                         
@@ -8673,6 +8723,282 @@ def server_info():
         'host': request.host_url.rstrip('/')
     })
     
+def _run_analyze_pipeline(path: str, progress_callback=None, log_analyzer=None) -> Tuple[Dict, int]:
+    """執行完整分析流程（Cmd line 搜尋 + vp_analyze_logs），回傳 (回應資料, HTTP 狀態碼)
+    
+    progress_callback: (階段, 已完成數, 總數, 訊息)，階段為 scan / analyze / index / excel
+    """
+    def report_progress(stage, done=0, total=0, message=''):
+        if progress_callback:
+            progress_callback(stage, done, total, message)
+    
+    def report_vp_progress(stage, done, total, message):
+        # vp_analyze_logs 的掃描視為分析階段的開始，完成事件由工作本身回報
+        if stage == 'scan':
+            report_progress('analyze', 0, total, message)
+        elif stage != 'done':
+            report_progress(stage, done, total, message)
+    
+    # 生成包含時間戳和 UUID 的唯一 ID
+    analysis_id = datetime.now().strftime('%Y%m%d%H%M%S') + '_' + str(uuid.uuid4())[:8]
+                
+    # === 新增：執行 vp_analyze_logs.py ===
+    # 取得路徑的最後一個資料夾名稱
+    last_folder_name = os.path.basename(path.rstrip(os.sep))
+    # 建立輸出目錄名稱
+    output_dir_name = f".{last_folder_name}_anr_tombstones_analyze"
+    output_path = os.path.join(path, output_dir_name)
+
+    # 修改：備份 all_anr_tombstone_result.xlsx 到上一層目錄
+    all_excel_exists = False
+    all_excel_path_in_output = os.path.join(output_path, 'all_anr_tombstone_result.xlsx')
+    all_excel_backup_path = os.path.join(path, 'all_anr_tombstone_result.xlsx.backup')
+    
+    # 如果輸出目錄存在
+    if os.path.exists(output_path):
+        # print(f"發現已存在的輸出目錄: {output_path}")
+        
+        # 備份 all_anr_tombstone_result.xlsx 到上一層目錄
+        if os.path.exists(all_excel_path_in_output):
+            try:
+                # 備份到上一層目錄（使用 .backup 後綴避免衝突）
+                shutil.copy2(all_excel_path_in_output, all_excel_backup_path)
+                all_excel_exists = True
+                # print(f"已備份 all_anr_tombstone_result.xlsx 到: {all_excel_backup_path}")
+            except Exception as e:
+                print(f"備份 all_anr_tombstone_result.xlsx 失敗: {e}")
+                all_excel_exists = False
+        
+        # 刪除輸出目錄
+        try:
+            shutil.rmtree(output_path)
+            # print(f"已刪除舊的輸出目錄: {output_path}")
+        except Exception as e:
+            print(f"刪除輸出目錄失敗: {e}")
+            # 如果刪除失敗，清理備份
+            if all_excel_exists and os.path.exists(all_excel_backup_path):
+                try:
+                    os.unlink(all_excel_backup_path)
+                except:
+                    pass
+            return {'error': f'無法刪除現有的輸出目錄: {output_path}, 錯誤: {str(e)}'}, 500
+    else:
+        print(f"輸出目錄不存在，將建立新的: {output_path}")
+
+    # 執行分析
+    report_progress('scan', 0, 0, '搜尋 Cmd line')
+    results = (log_analyzer or analyzer).analyze_logs(path, progress_callback=report_progress)
+
+    # 檢查是否有找到資料
+    if results.get('files_with_cmdline', 0) == 0:
+        return {
+            'analysis_id': analysis_id,
+            'total_files': results['total_files'],
+            'files_with_cmdline': 0,
+            'anr_folders': 0,
+            'tombstone_folders': 0,
+            'statistics': {'type_process_summary': [], 'by_type': {}, 'by_date': {}, 'by_hour': {}},
+            'file_statistics': [],
+            'logs': [],
+            'analysis_time': results.get('analysis_time', 0),
+            'used_grep': results.get('used_grep', False),
+            'anr_subject_count': 0,
+            'message': '沒有找到包含 Cmd line: 或 Cmdline: 的檔案'
+        }, 200
+        
+    # 重要：保存基礎路徑到結果中
+    results['path'] = path  # 確保保存原始輸入路徑
+    results['base_path'] = path  # 也保存為 base_path
+                
+    # 執行 vp_analyze_logs（進程內引擎，失敗時以子進程隔離執行）
+    vp_analyze_success = False
+    vp_analyze_error = None
+    
+    try:
+        # 網頁檢視的報告共用 report_assets/ 下的 CSS/JS（經由 /view-analysis-report 載入）
+        # 跨執行資料（崩潰簽名索引等）只在設定資料目錄時保存
+        vp_result = run_vp_analysis(path, output_path, report_vp_progress, report_assets=ASSET_MODE_SHARED,
+                                    data_dir=ANALYSIS_DATA_DIR or None)
+        
+        if vp_result['success']:
+            vp_analyze_success = True
+            # print(f"分析結果輸出到: {output_path} ({vp_result['mode']}, {vp_result['elapsed']:.1f} 秒)")
+            
+            # 確保輸出目錄存在
+            if os.path.exists(output_path):
+                # print(f"確認輸出目錄已建立: {output_path}")
+                
+                # 還原備份的 all_anr_tombstone_result.xlsx
+                report_progress('excel', 0, 1, '還原 Excel 報告')
+                if all_excel_exists and os.path.exists(all_excel_backup_path):
+                    try:
+                        # 將備份檔案移回輸出目錄
+                        shutil.move(all_excel_backup_path, all_excel_path_in_output)
+                        # print(f"已還原 all_anr_tombstone_result.xlsx 到: {all_excel_path_in_output}")
+                    except Exception as e:
+                        print(f"還原 all_anr_tombstone_result.xlsx 失敗: {e}")
+                        # 如果移動失敗，嘗試複製
+                        try:
+                            shutil.copy2(all_excel_backup_path, all_excel_path_in_output)
+                            os.unlink(all_excel_backup_path)
+                            # print(f"已複製並還原 all_anr_tombstone_result.xlsx")
+                        except Exception as e2:
+                            print(f"複製 all_anr_tombstone_result.xlsx 也失敗: {e2}")
+                
+                report_progress('excel', 1, 1, 'Excel 報告完成')
+                
+                # 列出目錄內容
+                try:
+                    files = os.listdir(output_path)
+                    print(f"輸出目錄包含 {len(files)} 個檔案")
+                    if 'all_anr_tombstone_result.xlsx' in files:
+                        print("確認 all_anr_tombstone_result.xlsx 已在輸出目錄中")
+                except:
+                    pass
+            else:
+                print("警告：輸出目錄不存在")
+                vp_analyze_success = False
+                vp_analyze_error = "輸出目錄未建立"
+        else:
+            vp_analyze_error = vp_result['error']
+            print(vp_analyze_error)
+            
+    except Exception as e:
+        vp_analyze_error = f"執行 vp_analyze_logs.py 時發生錯誤: {str(e)}"
+        print(vp_analyze_error)
+        import traceback
+        traceback.print_exc()
+    finally:
+        # 清理備份檔案（如果還存在）
+        if os.path.exists(all_excel_backup_path):
+            try:
+                os.unlink(all_excel_backup_path)
+                print(f"已清理備份檔案: {all_excel_backup_path}")
+            except Exception as e:
+                print(f"清理備份檔案失敗: {e}")
+
+    # 在每個 log 中添加完整路徑
+    for log in results['logs']:
+        log['full_path'] = log.get('file', '')
+        
+        # 從檔案路徑中提取 problem_set
+        # 假設路徑格式為 /base/path/問題集名稱/anr或tombstones/檔案名稱
+        if 'problem_set' not in log and log.get('file'):
+            try:
+                file_path = log['file']
+                # 移除基礎路徑
+                relative_path = file_path.replace(path, '').lstrip('/')
+                # 取得第一層資料夾名稱作為 problem_set
+                parts = relative_path.split('/')
+                if len(parts) > 1:
+                    log['problem_set'] = parts[0]
+                else:
+                    log['problem_set'] = '未分類'
+            except:
+                log['problem_set'] = '未分類'
+
+    # 在每個 file_stat 中添加完整路徑  
+    for file_stat in results['file_statistics']:
+        file_stat['full_path'] = file_stat.get('filepath', '')
+        
+        # 同樣處理 file_statistics 的 problem_set
+        if 'problem_set' not in file_stat and file_stat.get('filepath'):
+            try:
+                file_path = file_stat['filepath']
+                relative_path = file_path.replace(path, '').lstrip('/')
+                parts = relative_path.split('/')
+                if len(parts) > 1:
+                    file_stat['problem_set'] = parts[0]
+                else:
+                    file_stat['problem_set'] = '未分類'
+            except:
+                file_stat['problem_set'] = '未分類'
+
+    # 將分析輸出路徑加入結果中
+    results['vp_analyze_output_path'] = output_path if vp_analyze_success else None
+    results['vp_analyze_success'] = vp_analyze_success
+    results['vp_analyze_error'] = vp_analyze_error
+    
+    # 檢查 all_anr_tombstone_result.xlsx 是否存在
+    results['has_all_excel'] = os.path.exists(all_excel_path_in_output)
+    results['all_excel_path'] = all_excel_path_in_output if results['has_all_excel'] else None
+    
+    # print(f"最終檢查 all_anr_tombstone_result.xlsx: {results['has_all_excel']}")
+    
+    # 使用新的 cache
+    analysis_cache.set(analysis_id, results)
+    
+    # Return results
+    return {
+        'analysis_id': analysis_id,
+        'total_files': results['total_files'],
+        'files_with_cmdline': results['files_with_cmdline'],
+        'anr_folders': results['anr_folders'],
+        'tombstone_folders': results['tombstone_folders'],
+        'statistics': results['statistics'],
+        'file_statistics': results['file_statistics'],
+        'logs': results['logs'],
+        'analysis_time': results['analysis_time'],
+        'used_grep': results['used_grep'],
+        'zip_files_extracted': results.get('zip_files_extracted', 0),
+        'anr_subject_count': results.get('anr_subject_count', 0),
+        'vp_analyze_output_path': results.get('vp_analyze_output_path'),
+        'vp_analyze_success': results.get('vp_analyze_success', False),
+        'vp_analyze_error': results.get('vp_analyze_error'),
+        'has_all_excel': results.get('has_all_excel', False),
+        'all_excel_path': results.get('all_excel_path')
+    }, 200
+
+
+def _analyze_job(path: str, owner_id: str, lock_path: str, progress=None) -> Dict:
+    """背景分析工作：執行完整流程並釋放分析鎖 (lock_path 為取得鎖時使用的路徑)"""
+    try:
+        # 每個工作使用獨立的分析器，避免共用的 base_path 被其他工作覆寫
+        payload, status_code = _run_analyze_pipeline(path, progress, log_analyzer=AndroidLogAnalyzer())
+        payload['status_code'] = status_code
+        return payload
+    finally:
+        analysis_lock_manager.release_lock(lock_path, owner_id)
+
+def _lock_info_payload(path: str) -> Optional[Dict]:
+    """可序列化的鎖資訊（不含 threading.Lock 物件）"""
+    lock_info = analysis_lock_manager.get_lock_info(path)
+    if not lock_info:
+        return None
+    return {
+        'owner': lock_info['owner'],
+        'start_time': lock_info['start_time'].isoformat(),
+        'elapsed_time': int((datetime.now() - lock_info['start_time']).total_seconds())
+    }
+
+def _resolve_analyze_path(path: str):
+    """正規化分析路徑並檢查是否為存在的資料夾，回傳 (路徑, 錯誤回應或 None)"""
+    # Handle Windows UNC paths and regular paths
+    original_path = path
+    
+    # Convert Windows backslashes to forward slashes for consistency
+    # But preserve UNC paths starting with \\
+    if path.startswith('\\\\'):
+        # This is a UNC path, keep it as is
+        print(f"UNC path detected: {path}")
+    else:
+        # Expand user path and convert to absolute
+        path = os.path.expanduser(path)
+        path = os.path.abspath(path)
+    
+    if not os.path.exists(path):
+        return path, (jsonify({
+            'error': f'Path does not exist: {path}',
+            'original_path': original_path,
+            'resolved_path': path,
+            'hint': 'For network paths, ensure the share is accessible and mounted'
+        }), 400)
+    
+    if not os.path.isdir(path):
+        return path, (jsonify({'error': f'Path is not a directory: {path}'}), 400)
+    
+    return path, None
+
 @main_page_bp.route('/analyze', methods=['POST'])
 def analyze():
     """Analyze logs endpoint"""
@@ -8690,294 +9016,140 @@ def analyze():
         # 使用 session ID 或 IP 作為 owner_id
         owner_id = request.remote_addr  # 或使用 session.get('id') 如果有 session
         
-        # 嘗試獲取鎖
-        lock_acquired, error_message = analysis_lock_manager.acquire_lock(path, owner_id)
+        # 嘗試獲取鎖（分析執行期間不會因超時而失效）
+        lock_path = path
+        lock_acquired, error_message = analysis_lock_manager.acquire_lock(
+            lock_path, owner_id, keep_alive=threading.current_thread().is_alive)
         
         if not lock_acquired:
             return jsonify({
                 'error': error_message,
                 'locked': True,
-                'lock_info': analysis_lock_manager.get_lock_info(path)
+                'lock_info': _lock_info_payload(lock_path)
             }), 423  # 423 Locked status code
         
         try:
-            # Handle Windows UNC paths and regular paths
-            original_path = path
-            
-            # Convert Windows backslashes to forward slashes for consistency
-            # But preserve UNC paths starting with \\
-            if path.startswith('\\\\'):
-                # This is a UNC path, keep it as is
-                print(f"UNC path detected: {path}")
-            else:
-                # Expand user path and convert to absolute
-                path = os.path.expanduser(path)
-                path = os.path.abspath(path)
+            path, error_response = _resolve_analyze_path(path)
+            if error_response:
+                return error_response
             
-            # print(f"Analyzing path: {path}")
-            # print(f"Original input: {original_path}")
-            
-            if not os.path.exists(path):
+            # 同一路徑的背景工作仍在排隊或執行中
+            if analysis_job_manager.has_active_job(path):
                 return jsonify({
-                    'error': f'Path does not exist: {path}',
-                    'original_path': original_path,
-                    'resolved_path': path,
-                    'hint': 'For network paths, ensure the share is accessible and mounted'
-                }), 400
-            
-            if not os.path.isdir(path):
-                return jsonify({'error': f'Path is not a directory: {path}'}), 400
-            
-            # 生成包含時間戳和 UUID 的唯一 ID
-            analysis_id = datetime.now().strftime('%Y%m%d%H%M%S') + '_' + str(uuid.uuid4())[:8]
-                        
-            # === 新增：執行 vp_analyze_logs.py ===
-            # 取得路徑的最後一個資料夾名稱
-            last_folder_name = os.path.basename(path.rstrip(os.sep))
-            # 建立輸出目錄名稱
-            output_dir_name = f".{last_folder_name}_anr_tombstones_analyze"
-            output_path = os.path.join(path, output_dir_name)
-
-            # 修改：備份 all_anr_tombstone_result.xlsx 到上一層目錄
-            all_excel_exists = False
-            all_excel_path_in_output = os.path.join(output_path, 'all_anr_tombstone_result.xlsx')
-            all_excel_backup_path = os.path.join(path, 'all_anr_tombstone_result.xlsx.backup')
-            
-            # 如果輸出目錄存在
-            if os.path.exists(output_path):
-                # print(f"發現已存在的輸出目錄: {output_path}")
-                
-                # 備份 all_anr_tombstone_result.xlsx 到上一層目錄
-                if os.path.exists(all_excel_path_in_output):
-                    try:
-                        # 備份到上一層目錄（使用 .backup 後綴避免衝突）
-                        shutil.copy2(all_excel_path_in_output, all_excel_backup_path)
-                        all_excel_exists = True
-                        # print(f"已備份 all_anr_tombstone_result.xlsx 到: {all_excel_backup_path}")
-                    except Exception as e:
-                        print(f"備份 all_anr_tombstone_result.xlsx 失敗: {e}")
-                        all_excel_exists = False
-                
-                # 刪除輸出目錄
-                try:
-                    shutil.rmtree(output_path)
-                    # print(f"已刪除舊的輸出目錄: {output_path}")
-                except Exception as e:
-                    print(f"刪除輸出目錄失敗: {e}")
-                    # 如果刪除失敗，清理備份
-                    if all_excel_exists and os.path.exists(all_excel_backup_path):
-                        try:
-                            os.unlink(all_excel_backup_path)
-                        except:
-                            pass
-                    return jsonify({'error': f'無法刪除現有的輸出目錄: {output_path}, 錯誤: {str(e)}'}), 500
-            else:
-                print(f"輸出目錄不存在，將建立新的: {output_path}")
-
-            # 執行分析
-            results = analyzer.analyze_logs(path)
-
-            # 檢查是否有找到資料
-            if results.get('files_with_cmdline', 0) == 0:
-                # 立即釋放鎖
-                analysis_lock_manager.release_lock(path, owner_id)
-                
-                return jsonify({
-                    'analysis_id': analysis_id,
-                    'total_files': results['total_files'],
-                    'files_with_cmdline': 0,
-                    'anr_folders': 0,
-                    'tombstone_folders': 0,
-                    'statistics': {'type_process_summary': [], 'by_type': {}, 'by_date': {}, 'by_hour': {}},
-                    'file_statistics': [],
-                    'logs': [],
-                    'analysis_time': results.get('analysis_time', 0),
-                    'used_grep': results.get('used_grep', False),
-                    'anr_subject_count': 0,
-                    'message': '沒有找到包含 Cmd line: 或 Cmdline: 的檔案'
-                })
-                
-            # 重要：保存基礎路徑到結果中
-            results['path'] = path  # 確保保存原始輸入路徑
-            results['base_path'] = path  # 也保存為 base_path
-                        
-            # 執行 vp_analyze_logs.py
-            vp_analyze_success = False
-            vp_analyze_error = None
-            
-            try:
-                # 確保 vp_analyze_logs.py 在同一目錄
-                vp_script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vp_analyze_logs.py')
-                
-                if os.path.exists(vp_script_path):
-                    # print(f"找到 vp_analyze_logs.py: {vp_script_path}")
-                    # print(f"執行命令: python3.12 {vp_script_path} {path} {output_path}")
-                    
-                    # 使用 python3.12 執行 vp_analyze_logs.py
-                    cmd = ['python3.12', vp_script_path, path, output_path]
-                    
-                    # 執行命令
-                    result = subprocess.run(
-                        cmd, 
-                        capture_output=True, 
-                        text=True, 
-                        timeout=1000,
-                        cwd=os.path.dirname(vp_script_path)  # 設定工作目錄
-                    )
-                    
-                    # print(f"Return code: {result.returncode}")
-                    # print(f"STDOUT: {result.stdout}")
-                    # print(f"STDERR: {result.stderr}")
-                    
-                    if result.returncode == 0:
-                        vp_analyze_success = True
-                        # print("vp_analyze_logs.py 執行成功")
-                        # print(f"分析結果輸出到: {output_path}")
-                        
-                        # 確保輸出目錄存在
-                        if os.path.exists(output_path):
-                            # print(f"確認輸出目錄已建立: {output_path}")
-                            
-                            # 還原備份的 all_anr_tombstone_result.xlsx
-                            if all_excel_exists and os.path.exists(all_excel_backup_path):
-                                try:
-                                    # 將備份檔案移回輸出目錄
-                                    shutil.move(all_excel_backup_path, all_excel_path_in_output)
-                                    # print(f"已還原 all_anr_tombstone_result.xlsx 到: {all_excel_path_in_output}")
-                                except Exception as e:
-                                    print(f"還原 all_anr_tombstone_result.xlsx 失敗: {e}")
-                                    # 如果移動失敗，嘗試複製
-                                    try:
-                                        shutil.copy2(all_excel_backup_path, all_excel_path_in_output)
-                                        os.unlink(all_excel_backup_path)
-                                        # print(f"已複製並還原 all_anr_tombstone_result.xlsx")
-                                    except Exception as e2:
-                                        print(f"複製 all_anr_tombstone_result.xlsx 也失敗: {e2}")
-                            
-                            # 列出目錄內容
-                            try:
-                                files = os.listdir(output_path)
-                                print(f"輸出目錄包含 {len(files)} 個檔案")
-                                if 'all_anr_tombstone_result.xlsx' in files:
-                                    print("確認 all_anr_tombstone_result.xlsx 已在輸出目錄中")
-                            except:
-                                pass
-                        else:
-                            print("警告：輸出目錄不存在")
-                            vp_analyze_success = False
-                            vp_analyze_error = "輸出目錄未建立"
-                    else:
-                        vp_analyze_error = f"vp_analyze_logs.py 執行失敗 (return code: {result.returncode})\nSTDERR: {result.stderr}\nSTDOUT: {result.stdout}"
-                        print(vp_analyze_error)
-                else:
-                    vp_analyze_error = f"找不到 vp_analyze_logs.py: {vp_script_path}"
-                    print(vp_analyze_error)
-                    
-            except subprocess.TimeoutExpired:
-                vp_analyze_error = "vp_analyze_logs.py 執行超時 (超過 300 秒)"
-                print(vp_analyze_error)
-            except FileNotFoundError:
-                vp_analyze_error = "找不到 python3.12 命令，請確認已安裝 Python 3.12"
-                print(vp_analyze_error)
-            except Exception as e:
-                vp_analyze_error = f"執行 vp_analyze_logs.py 時發生錯誤: {str(e)}"
-                print(vp_analyze_error)
-                import traceback
-                traceback.print_exc()
-            finally:
-                # 清理備份檔案（如果還存在）
-                if os.path.exists(all_excel_backup_path):
-                    try:
-                        os.unlink(all_excel_backup_path)
-                        print(f"已清理備份檔案: {all_excel_backup_path}")
-                    except Exception as e:
-                        print(f"清理備份檔案失敗: {e}")
-
-            # 在每個 log 中添加完整路徑
-            for log in results['logs']:
-                log['full_path'] = log.get('file', '')
-                
-                # 從檔案路徑中提取 problem_set
-                # 假設路徑格式為 /base/path/問題集名稱/anr或tombstones/檔案名稱
-                if 'problem_set' not in log and log.get('file'):
-                    try:
-                        file_path = log['file']
-                        # 移除基礎路徑
-                        relative_path = file_path.replace(path, '').lstrip('/')
-                        # 取得第一層資料夾名稱作為 problem_set
-                        parts = relative_path.split('/')
-                        if len(parts) > 1:
-                            log['problem_set'] = parts[0]
-                        else:
-                            log['problem_set'] = '未分類'
-                    except:
-                        log['problem_set'] = '未分類'
-        
-            # 在每個 file_stat 中添加完整路徑  
-            for file_stat in results['file_statistics']:
-                file_stat['full_path'] = file_stat.get('filepath', '')
-                
-                # 同樣處理 file_statistics 的 problem_set
-                if 'problem_set' not in file_stat and file_stat.get('filepath'):
-                    try:
-                        file_path = file_stat['filepath']
-                        relative_path = file_path.replace(path, '').lstrip('/')
-                        parts = relative_path.split('/')
-                        if len(parts) > 1:
-                            file_stat['problem_set'] = parts[0]
-                        else:
-                            file_stat['problem_set'] = '未分類'
-                    except:
-                        file_stat['problem_set'] = '未分類'
-
-            # 將分析輸出路徑加入結果中
-            results['vp_analyze_output_path'] = output_path if vp_analyze_success else None
-            results['vp_analyze_success'] = vp_analyze_success
-            results['vp_analyze_error'] = vp_analyze_error
-            
-            # 檢查 all_anr_tombstone_result.xlsx 是否存在
-            results['has_all_excel'] = os.path.exists(all_excel_path_in_output)
-            results['all_excel_path'] = all_excel_path_in_output if results['has_all_excel'] else None
-            
-            # print(f"最終檢查 all_anr_tombstone_result.xlsx: {results['has_all_excel']}")
+                    'error': '此路徑已有分析工作排隊或執行中，請等待完成後再試。',
+                    'locked': True
+                }), 423
             
-            # 使用新的 cache
-            analysis_cache.set(analysis_id, results)
-            
-            # Return results
-            return jsonify({
-                'analysis_id': analysis_id,
-                'total_files': results['total_files'],
-                'files_with_cmdline': results['files_with_cmdline'],
-                'anr_folders': results['anr_folders'],
-                'tombstone_folders': results['tombstone_folders'],
-                'statistics': results['statistics'],
-                'file_statistics': results['file_statistics'],
-                'logs': results['logs'],
-                'analysis_time': results['analysis_time'],
-                'used_grep': results['used_grep'],
-                'zip_files_extracted': results.get('zip_files_extracted', 0),
-                'anr_subject_count': results.get('anr_subject_count', 0),
-                'vp_analyze_output_path': results.get('vp_analyze_output_path'),
-                'vp_analyze_success': results.get('vp_analyze_success', False),
-                'vp_analyze_error': results.get('vp_analyze_error'),
-                'has_all_excel': results.get('has_all_excel', False),
-                'all_excel_path': results.get('all_excel_path')
-            })
+            payload, status_code = _run_analyze_pipeline(path)
+            return jsonify(payload), status_code
         finally:
             # === 重要：確保釋放鎖 ===
-            analysis_lock_manager.release_lock(path, owner_id)
+            analysis_lock_manager.release_lock(lock_path, owner_id)
 
     except Exception as e:
         # === 發生異常時也要釋放鎖 ===
-        if 'path' in locals():
-            analysis_lock_manager.release_lock(path, owner_id)
+        if 'lock_path' in locals():
+            analysis_lock_manager.release_lock(lock_path, owner_id)
 
         print(f"Error in analyze endpoint: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@main_page_bp.route('/analyze-async', methods=['POST'])
+def analyze_async():
+    """提交背景分析工作，立即回傳工作 ID"""
+    data = request.json
+    if not data:
+        return jsonify({'error': 'No JSON data received'}), 400
+    
+    path = data.get('path', '')
+    if not path:
+        return jsonify({'error': 'Path is required'}), 400
+    
+    resolved_path, error_response = _resolve_analyze_path(path)
+    if error_response:
+        return error_response
+    
+    # 同一路徑（不同寫法也算）的工作仍在排隊或執行中
+    if analysis_job_manager.has_active_job(resolved_path):
+        return jsonify({
+            'error': '此路徑已有分析工作排隊或執行中，請等待完成後再試。',
+            'locked': True,
+            'lock_info': _lock_info_payload(path)
+        }), 423
+    
+    # 工作排隊或執行期間鎖不會因超時而失效，避免同一路徑的分析在執行中被重新開始
+    owner_id = request.remote_addr
+    lock_acquired, error_message = analysis_lock_manager.acquire_lock(
+        path, owner_id, keep_alive=lambda: analysis_job_manager.has_active_job(resolved_path))
+    if not lock_acquired:
+        return jsonify({
+            'error': error_message,
+            'locked': True,
+            'lock_info': _lock_info_payload(path)
+        }), 423
+    
+    try:
+        # 鎖由工作結束時釋放
+        job_id, error_message = analysis_job_manager.submit(_analyze_job, resolved_path, owner_id, path,
+                                                            job_key=resolved_path)
+        if not job_id:
+            analysis_lock_manager.release_lock(path, owner_id)
+            return jsonify({'error': error_message}), 503
+        
+        return jsonify({
+            'job_id': job_id,
+            'progress_url': url_for('main_page_bp.analyze_progress', job_id=job_id),
+            'result_url': url_for('main_page_bp.analyze_job_result', job_id=job_id)
+        }), 202
+    except Exception as e:
+        analysis_lock_manager.release_lock(path, owner_id)
+        print(f"Error in analyze-async endpoint: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@main_page_bp.route('/analyze-progress/<job_id>')
+def analyze_progress(job_id):
+    """以 Server-Sent Events 串流分析工作進度"""
+    if not analysis_job_manager.get_job(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return Response(
+        analysis_job_manager.stream_events(job_id),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@main_page_bp.route('/analyze-job/<job_id>')
+def analyze_job_result(job_id):
+    """查詢分析工作狀態，完成時回傳與 /analyze 相同的結果"""
+    job = analysis_job_manager.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if job['status'] == 'done':
+        payload = dict(job['result'] or {})
+        status_code = payload.pop('status_code', 200)
+        return jsonify(payload), status_code
+    
+    if job['status'] == 'error':
+        return jsonify({'job_id': job_id, 'status': 'error', 'error': job['error']}), 500
+    
+    return jsonify({
+        'job_id': job_id,
+        'status': job['status'],
+        'stage': job['stage'],
+        'done': job['done'],
+        'total': job['total'],
+        'message': job['message'],
+        'eta': job['eta']
+    }), 202
+
 def _extract_javascript_functions(self):
     """從 HTML_TEMPLATE 中提取所有 JavaScript 函數"""
     # 這裡應該返回所有必要的 JavaScript 函數
@@ -9019,6 +9191,13 @@ def view_analysis_report():
     if '..' in file_path:
         return "Invalid file path", 403
     
+    # 共用報告資源 (report_assets/)：以報告所在資料夾解析相對路徑
+    asset = request.args.get('asset')
+    if asset:
+        file_path = resolve_asset_path(file_path, asset)
+        if file_path is None:
+            return "Invalid asset path", 403
+    
     # Check if file exists
     if not os.path.exists(file_path):
         return f"File not found: {file_path}", 404
@@ -9490,6 +9669,13 @@ def download_file():
     """下載檔案"""
     file_path = request.args.get('path')
     
+    # 壓縮檔內的檔案：先寫出實體檔案
+    if file_path and '..' not in file_path and is_zip_member_path(file_path):
+        try:
+            file_path = materialize_zip_member(file_path)
+        except Exception:
+            return "File not found", 404
+    
     if not file_path or not os.path.exists(file_path):
         return "File not found", 404
     
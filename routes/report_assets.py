@@ -0,0 +1,133 @@
+"""
+分析報告共用靜態資源 - 將每份 .analyzed.html 都相同的 CSS/JS 寫成共用檔案，
+每個輸出資料夾只寫一次，檔名含內容摘要（內容變更時檔名跟著變，瀏覽器快取不會拿到舊版）
+
+    <輸出資料夾>/report_assets/analysis-report-<摘要>.css
+    <輸出資料夾>/report_assets/analysis-report-<摘要>.js
+
+報告只記錄資源相對於報告的路徑。透過 /view-analysis (iframe srcdoc) 或 /view-analysis-report
+開啟時相對路徑無法對應到磁碟上的檔案，因此資源網址在頁面載入時依協定決定：
+file:// 直接開啟時使用相對路徑，經由伺服器時改走 /view-analysis-report?path=<報告路徑>&asset=<相對路徑>，
+由路由以報告所在資料夾解析（報告內不含任何絕對路徑，輸出資料夾搬移後仍可開啟）。
+預設使用 inline 模式，CSS/JS 直接內嵌在 HTML 中（單檔報告，例如上傳 JIRA）；共用資源需明確指定 shared。
+"""
+
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Optional
+
+REPORT_ASSETS_DIR = 'report_assets'
+
+# 資源模式：shared = 共用檔案，inline = 內嵌在每份報告
+ASSET_MODE_SHARED = 'shared'
+ASSET_MODE_INLINE = 'inline'
+ASSET_MODES = (ASSET_MODE_SHARED, ASSET_MODE_INLINE)
+
+# 經由伺服器開啟時讀取資源的路由（path = 報告路徑，asset = 資源相對於報告的路徑）
+ASSET_ROUTE = '/view-analysis-report'
+
+
+def resolve_asset_path(report_path: str, asset: str) -> Optional[str]:
+    """以報告所在資料夾解析資源相對路徑
+
+    只接受報告所在資料夾或其上層資料夾中 report_assets/ 下的 .css/.js 檔案，其他路徑回傳 None
+    """
+    report_dir = os.path.dirname(os.path.abspath(report_path))
+    path = os.path.normpath(os.path.join(report_dir, asset))
+    assets_dir = os.path.dirname(path)
+    if os.path.basename(assets_dir) != REPORT_ASSETS_DIR or os.path.splitext(path)[1] not in ('.css', '.js'):
+        return None
+    output_folder = os.path.dirname(assets_dir)
+    if os.path.commonpath([output_folder, report_dir]) != output_folder:
+        return None
+    return path
+
+
+class ReportAssetStore:
+    """管理輸出資料夾下的共用報告資源
+
+    資源內容以 (名稱, 副檔名) 為單位寫入，同內容只寫一次；
+    先寫暫存檔再改名，多個工作進程同時寫入也不會留下不完整的檔案。
+    """
+
+    def __init__(self, output_folder: str, mode: str = ASSET_MODE_INLINE):
+        if mode not in ASSET_MODES:
+            raise ValueError(f"未知的報告資源模式: {mode}")
+        self.output_folder = output_folder
+        self.mode = mode
+        self._paths: Dict[tuple, str] = {}  # (名稱, 副檔名, 摘要) -> 絕對路徑
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self) -> bool:
+        return self.mode == ASSET_MODE_SHARED
+
+    @property
+    def assets_dir(self) -> str:
+        return os.path.join(os.path.abspath(self.output_folder), REPORT_ASSETS_DIR)
+
+    def ensure_asset(self, name: str, ext: str, content: str) -> str:
+        """確保資源檔存在並回傳絕對路徑"""
+        data = content.encode('utf-8')
+        digest = hashlib.sha1(data).hexdigest()[:12]
+        key = (name, ext, digest)
+        with self._lock:
+            cached = self._paths.get(key)
+        if cached and os.path.exists(cached):
+            return cached
+
+        path = os.path.join(self.assets_dir, f"{name}-{digest}.{ext}")
+        if not os.path.exists(path):
+            os.makedirs(self.assets_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        with self._lock:
+            self._paths[key] = path
+        return path
+
+    def style_tag(self, name: str, css: str, report_dir: Optional[str] = None) -> str:
+        """產生 CSS 引用（inline 模式直接內嵌 <style>）"""
+        if not self.shared:
+            return f"<style>\n{css}\n</style>"
+        return self._loader_tag('css', self.ensure_asset(name, 'css', css), report_dir)
+
+    def script_tag(self, name: str, js: str, report_dir: Optional[str] = None) -> str:
+        """產生 JS 引用（inline 模式直接內嵌 <script>）"""
+        if not self.shared:
+            return f"<script>\n{js}\n</script>"
+        return self._loader_tag('js', self.ensure_asset(name, 'js', js), report_dir)
+
+    def _loader_tag(self, kind: str, asset_path: str, report_dir: Optional[str]) -> str:
+        """產生在頁面解析時依協定選擇網址的載入片段
+
+        片段只含資源相對於報告的路徑；經由伺服器開啟時，報告路徑取自頁面網址的 path 參數
+        （srcdoc iframe 的 document.baseURI 為外層 /view-analysis 頁面）。
+        document.write 插入的 <link>/<script> 仍會依文件順序載入與執行，
+        因此後面的內嵌腳本與 DOMContentLoaded 處理可以直接使用共用 JS 定義的函數。
+        """
+        base_dir = os.path.abspath(report_dir or self.output_folder)
+        relative = os.path.relpath(asset_path, base_dir).replace(os.sep, '/')
+        if kind == 'css':
+            template = '<link rel="stylesheet" href="@URL@">'
+        else:
+            template = '<script src="@URL@"></script>'
+        # 字串中的 </ 需要跳脫，避免內嵌腳本提早結束
+        template_js = json.dumps(template).replace('</', '<\\/')
+        return (
+            "<script>(function () {"
+            f"var rel = {json.dumps(relative)}, url = rel;"
+            "var report = location.protocol === 'file:' ? null : new URL(document.baseURI).searchParams.get('path');"
+            f"if (report) url = {json.dumps(ASSET_ROUTE)} + '?path=' + encodeURIComponent(report)"
+            " + '&asset=' + encodeURIComponent(rel);"
+            f"document.write({template_js}.replace('@URL@', url.replace(/\"/g, '&quot;')));"
+            "})();</script>"
+        )
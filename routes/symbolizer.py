@@ -0,0 +1,484 @@
+"""
+離線符號解析 - 以本機符號資料夾批次解析 tombstone 原生堆疊的 pc
+
+    1. 收集整批 tombstone 的原生堆疊幀，依 (函式庫, BuildId) 分組
+    2. 每組在符號資料夾中找到對應的未裁剪函式庫，交給常駐的 llvm-symbolizer
+       （找不到時改用 addr2line，函式名稱再經常駐的 c++filt 還原）一次送出該組所有 pc
+    3. 結果寫入持久快取 (BuildId, offset) → (函式, 檔案:行號)，重複出現的崩潰直接命中快取
+
+符號資料夾沿用 Android 的 symbols/ 結構（/system/lib64/libfoo.so → <symbols>/system/lib64/libfoo.so），
+找不到時再以 .build-id/ab/cdef....debug 與檔名比對；tombstone 有 BuildId 時只使用 ELF GNU build-id
+相同的符號檔。沒有 BuildId 的函式庫以符號檔的檔名、大小與修改時間代替。
+找不到工具或符號檔時只略過解析，不影響分析。
+"""
+
+import os
+import re
+import shutil
+import sqlite3
+import struct
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+NATIVE_FRAME = re.compile(r'#(\d+)\s+pc\s+([0-9a-fA-F]+)\s+(\S+)([^\n]*)')
+BUILD_ID = re.compile(r'\(BuildId:\s*([0-9a-fA-F]+)\)')
+LLVM_LOCATION = re.compile(r'^(.*):(\d+):\d+$')
+DISCRIMINATOR = re.compile(r'\s+\(discriminator \d+\)$')
+
+# 每批送出的位址數；送完一批才讀回結果，避免工具輸出塞滿管線
+BATCH_SIZE = 256
+
+
+@dataclass(frozen=True)
+class NativeFrame:
+    """tombstone 中的一個原生堆疊幀"""
+    num: int
+    pc: int
+    library: str
+    build_id: str
+
+
+def read_build_id(path: str) -> str:
+    """讀取 ELF 檔案的 GNU build-id（十六進位小寫），不是 ELF 或沒有 build-id 時回傳空字串
+
+    先找 SHT_NOTE 區段，沒有區段表時（例如已裁剪的檔案）再找 PT_NOTE 程式標頭。
+    """
+    try:
+        with open(path, 'rb') as f:
+            ident = f.read(16)
+            if len(ident) < 16 or ident[:4] != b'\x7fELF' or ident[4] not in (1, 2) or ident[5] not in (1, 2):
+                return ''
+            is_64 = ident[4] == 2
+            endian = '<' if ident[5] == 1 else '>'
+            if is_64:
+                header = struct.unpack(endian + 'HHIQQQIHHHHHH', f.read(48))
+            else:
+                header = struct.unpack(endian + 'HHIIIIIHHHHHH', f.read(36))
+            phoff, shoff = header[4], header[5]
+            phentsize, phnum, shentsize, shnum = header[8], header[9], header[10], header[11]
+
+            notes = []  # (檔案位移, 大小)
+            for index in range(shnum if shoff else 0):
+                f.seek(shoff + index * shentsize)
+                if is_64:
+                    _, sh_type, _, _, sh_offset, sh_size = struct.unpack(endian + 'IIQQQQ', f.read(40))
+                else:
+                    _, sh_type, _, _, sh_offset, sh_size = struct.unpack(endian + 'IIIIII', f.read(24))
+                if sh_type == 7:  # SHT_NOTE
+                    notes.append((sh_offset, sh_size))
+            if not notes:
+                for index in range(phnum if phoff else 0):
+                    f.seek(phoff + index * phentsize)
+                    if is_64:
+                        p_type, _, p_offset, _, _, p_filesz = struct.unpack(endian + 'IIQQQQ', f.read(40))
+                    else:
+                        p_type, p_offset, _, _, p_filesz = struct.unpack(endian + 'IIIII', f.read(20))
+                    if p_type == 4:  # PT_NOTE
+                        notes.append((p_offset, p_filesz))
+
+            for offset, size in notes:
+                f.seek(offset)
+                data = f.read(min(size, 64 * 1024))
+                pos = 0
+                while pos + 12 <= len(data):
+                    namesz, descsz, note_type = struct.unpack_from(endian + 'III', data, pos)
+                    name_start = pos + 12
+                    desc_start = name_start + ((namesz + 3) & ~3)
+                    if note_type == 3 and data[name_start:name_start + namesz].rstrip(b'\0') == b'GNU':
+                        return data[desc_start:desc_start + descsz].hex()
+                    pos = desc_start + ((descsz + 3) & ~3)
+    except (OSError, struct.error):
+        pass
+    return ''
+
+
+def extract_native_frames(text: str) -> List[NativeFrame]:
+    """提取文字中所有 '#NN pc <offset> <函式庫> ... (BuildId: ...)' 形式的堆疊幀"""
+    frames = []
+    for match in NATIVE_FRAME.finditer(text):
+        build_id_match = BUILD_ID.search(match.group(4))
+        frames.append(NativeFrame(
+            int(match.group(1)),
+            int(match.group(2), 16),
+            match.group(3),
+            build_id_match.group(1).lower() if build_id_match else ''
+        ))
+    return frames
+
+
+class SymbolCache:
+    """持久的符號快取 (SQLite)：(BuildId, offset) → (函式, 檔案:行號)
+
+    只記錄解析成功的位址；解析不到的位址下次執行會再查詢（例如之後才補上正確的符號檔）。
+    """
+
+    DB_FILENAME = 'symbol_cache.db'
+
+    def __init__(self, data_dir: str):
+        os.makedirs(data_dir, exist_ok=True)
+        self.db_path = os.path.join(data_dir, self.DB_FILENAME)
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS symbols (
+                cache_id TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                function TEXT NOT NULL,
+                location TEXT NOT NULL,
+                PRIMARY KEY (cache_id, offset)
+            )
+        """)
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, cache_id: str, offset: int) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT function, location FROM symbols WHERE cache_id = ? AND offset = ?',
+                (cache_id, offset)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def get_many(self, cache_id: str, offsets: Iterable[int]) -> Dict[int, Tuple[str, str]]:
+        """查詢多個位址，只回傳已快取的項目（略過舊版快取留下的空白結果）"""
+        offsets = list(offsets)
+        found = {}
+        with self._lock:
+            for start in range(0, len(offsets), 500):
+                chunk = offsets[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT offset, function, location FROM symbols WHERE cache_id = ? "
+                    f"AND offset IN ({','.join('?' * len(chunk))}) AND (function != '' OR location != '')",
+                    [cache_id, *chunk]
+                )
+                for offset, function, location in rows:
+                    found[offset] = (function, location)
+        return found
+
+    def put_many(self, cache_id: str, results: Dict[int, Tuple[str, str]]):
+        with self._lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO symbols (cache_id, offset, function, location) VALUES (?, ?, ?, ?)',
+                [(cache_id, offset, function, location) for offset, (function, location) in results.items()]
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class _LineWorker:
+    """常駐的命令列工具進程：每行輸入一個查詢，從標準輸出逐行讀回結果"""
+
+    def __init__(self, argv: List[str]):
+        self.proc = subprocess.Popen(
+            argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, bufsize=1, errors='replace'
+        )
+
+    def send(self, lines: List[str]):
+        self.proc.stdin.write(''.join(line + '\n' for line in lines))
+        self.proc.stdin.flush()
+
+    def readline(self) -> str:
+        line = self.proc.stdout.readline()
+        if not line:
+            raise OSError('符號解析工具已結束')
+        return line.rstrip('\n')
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+
+
+def _clean_result(function: str, location: str) -> Tuple[str, str]:
+    """統一工具輸出：解析不到時為空字串，位置只保留 檔案:行號"""
+    function = '' if function == '??' else function
+    location = DISCRIMINATOR.sub('', location)
+    match = LLVM_LOCATION.match(location)
+    if match:
+        location = f"{match.group(1)}:{match.group(2)}"
+    if location.startswith('??') or location.endswith(':0'):
+        location = ''
+    return function, location
+
+
+class Demangler:
+    """常駐的 c++filt 進程（每個 mangled 名稱只還原一次）"""
+
+    def __init__(self, tool: Optional[str] = None):
+        self.tool = tool or shutil.which('c++filt')
+        self._worker = None
+        self._cache: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return bool(self.tool)
+
+    def demangle_many(self, symbols: Iterable[str]) -> Dict[str, str]:
+        """批次還原 C++ 符號名稱；工具不存在或失敗時原樣回傳"""
+        symbols = list(dict.fromkeys(symbols))
+        with self._lock:
+            pending = [symbol for symbol in symbols if symbol not in self._cache]
+            if pending and self.tool:
+                try:
+                    if self._worker is None:
+                        self._worker = _LineWorker([self.tool])
+                    for start in range(0, len(pending), BATCH_SIZE):
+                        batch = pending[start:start + BATCH_SIZE]
+                        self._worker.send(batch)
+                        for symbol in batch:
+                            self._cache[symbol] = self._worker.readline()
+                except OSError:
+                    self.tool = None
+            return {symbol: self._cache.get(symbol, symbol) for symbol in symbols}
+
+    def demangle(self, symbol: str) -> Optional[str]:
+        """還原單一符號，無法還原時回傳 None"""
+        if not self.tool or '\n' in symbol:
+            return None
+        demangled = self.demangle_many([symbol])[symbol]
+        return demangled if demangled != symbol else None
+
+    def close(self):
+        with self._lock:
+            if self._worker is not None:
+                self._worker.close()
+                self._worker = None
+
+
+class LLVMSymbolizerBackend:
+    """常駐的 llvm-symbolizer：一個進程處理所有函式庫，輸出已 demangle"""
+
+    name = 'llvm-symbolizer'
+
+    def __init__(self, tool: str):
+        self._worker = _LineWorker([tool, '--demangle'])
+
+    def resolve(self, symbol_file: str, offsets: List[int]) -> Dict[int, Tuple[str, str]]:
+        results = {}
+        for start in range(0, len(offsets), BATCH_SIZE):
+            batch = offsets[start:start + BATCH_SIZE]
+            self._worker.send([f'"{symbol_file}" 0x{offset:x}' for offset in batch])
+            for offset in batch:
+                # 每個位址輸出 (函式, 位置) 對（含內聯時有多對），以空行結束；取最內層
+                pairs = []
+                line = self._worker.readline()
+                while line:
+                    pairs.append(line)
+                    line = self._worker.readline()
+                function, location = (pairs + ['??', '??:0:0'])[:2]
+                results[offset] = _clean_result(function, location)
+        return results
+
+    def close(self):
+        self._worker.close()
+
+
+class Addr2LineBackend:
+    """addr2line 後備方案：每個符號檔一個常駐進程，函式名稱交給 c++filt 還原"""
+
+    name = 'addr2line'
+
+    def __init__(self, tool: str, demangler: Demangler):
+        self.tool = tool
+        self.demangler = demangler
+        self._workers: Dict[str, _LineWorker] = {}
+
+    def resolve(self, symbol_file: str, offsets: List[int]) -> Dict[int, Tuple[str, str]]:
+        worker = self._workers.get(symbol_file)
+        if worker is None:
+            worker = self._workers[symbol_file] = _LineWorker([self.tool, '-f', '-e', symbol_file])
+
+        raw = {}
+        for start in range(0, len(offsets), BATCH_SIZE):
+            batch = offsets[start:start + BATCH_SIZE]
+            worker.send([f"0x{offset:x}" for offset in batch])
+            for offset in batch:
+                raw[offset] = _clean_result(worker.readline(), worker.readline())
+
+        demangled = self.demangler.demangle_many(function for function, _ in raw.values() if function)
+        return {
+            offset: (demangled.get(function, function), location)
+            for offset, (function, location) in raw.items()
+        }
+
+    def close(self):
+        for worker in self._workers.values():
+            worker.close()
+        self._workers.clear()
+
+
+class Symbolizer:
+    """批次離線符號解析
+
+    symbolize() 在分析前對整批 tombstone 的堆疊幀執行一次，結果寫入持久快取；
+    分析各個 tombstone 時 annotate() 只查詢快取，工作進程不會啟動解析工具。
+    """
+
+    def __init__(self, symbols_dir: str, cache_dir: str, tool: Optional[str] = None):
+        self.symbols_dir = os.path.abspath(symbols_dir)
+        self.cache = SymbolCache(cache_dir)
+        self.demangler = Demangler()
+        self.tool = tool
+        self._backend = None
+        self._by_name: Optional[Dict[str, List[str]]] = None
+        self._build_ids: Dict[str, str] = {}  # 符號檔 -> GNU build-id
+        self._symbol_files: Dict[Tuple[str, str], Optional[str]] = {}
+        self._cache_ids: Dict[Tuple[str, str], Optional[str]] = {}
+        self.stats = {'frames': 0, 'libraries': 0, 'cached': 0, 'resolved': 0, 'missing_symbols': 0}
+
+    def _get_backend(self):
+        """延遲啟動解析工具：優先 llvm-symbolizer，其次 addr2line"""
+        if self._backend is None:
+            tool = self.tool or shutil.which('llvm-symbolizer') or shutil.which('addr2line')
+            if not tool:
+                return None
+            if 'addr2line' in os.path.basename(tool):
+                self._backend = Addr2LineBackend(tool, self.demangler)
+            else:
+                self._backend = LLVMSymbolizerBackend(tool)
+        return self._backend
+
+    def find_symbol_file(self, library: str, build_id: str = '') -> Optional[str]:
+        """在符號資料夾中找出函式庫對應的未裁剪檔案
+
+        依序嘗試相同路徑、.build-id/ 與相同檔名的檔案；有 build_id 時只接受 ELF build-id 相同的檔案。
+        """
+        key = (library, build_id)
+        if key in self._symbol_files:
+            return self._symbol_files[key]
+
+        candidates = [os.path.join(self.symbols_dir, library.lstrip('/'))]
+        if build_id:
+            candidates.append(os.path.join(self.symbols_dir, '.build-id', build_id[:2], f"{build_id[2:]}.debug"))
+        if self._by_name is None:
+            self._by_name = {}
+            for root, dirs, files in os.walk(self.symbols_dir):
+                for file in files:
+                    self._by_name.setdefault(file, []).append(os.path.join(root, file))
+        candidates += self._by_name.get(os.path.basename(library), [])
+
+        symbol_file = None
+        mismatched = None
+        for candidate in dict.fromkeys(candidates):
+            if not os.path.isfile(candidate):
+                continue
+            if build_id and self._read_build_id(candidate) != build_id:
+                mismatched = mismatched or candidate
+                continue
+            symbol_file = candidate
+            break
+        if symbol_file is None and mismatched:
+            print(f"⚠️ 符號檔 BuildId 與 tombstone 不符，略過 {library}: {mismatched}")
+        self._symbol_files[key] = symbol_file
+        return symbol_file
+
+    def _read_build_id(self, path: str) -> str:
+        if path not in self._build_ids:
+            self._build_ids[path] = read_build_id(path)
+        return self._build_ids[path]
+
+    def cache_id(self, library: str, build_id: str) -> Optional[str]:
+        """快取鍵：BuildId；沒有 BuildId 時以符號檔的檔名、大小與修改時間代替"""
+        key = (library, build_id)
+        if key not in self._cache_ids:
+            cache_id = build_id or None
+            if not cache_id:
+                symbol_file = self.find_symbol_file(library)
+                if symbol_file:
+                    stat = os.stat(symbol_file)
+                    cache_id = f"{os.path.basename(symbol_file)}:{stat.st_size}:{int(stat.st_mtime)}"
+            self._cache_ids[key] = cache_id
+        return self._cache_ids[key]
+
+    def symbolize(self, frames: Iterable[NativeFrame]) -> int:
+        """依 (函式庫, BuildId) 分組批次解析，回傳本次新解析的位址數"""
+        groups: Dict[Tuple[str, str], set] = {}
+        for frame in frames:
+            groups.setdefault((frame.library, frame.build_id), set()).add(frame.pc)
+            self.stats['frames'] += 1
+        self.stats['libraries'] += len(groups)
+
+        resolved = 0
+        for (library, build_id), offsets in groups.items():
+            cache_id = self.cache_id(library, build_id)
+            if not cache_id:
+                self.stats['missing_symbols'] += 1
+                continue
+
+            cached = self.cache.get_many(cache_id, offsets)
+            self.stats['cached'] += len(cached)
+            missing = sorted(offsets - cached.keys())
+            if not missing:
+                continue
+
+            symbol_file = self.find_symbol_file(library, build_id)
+            backend = self._get_backend() if symbol_file else None
+            if backend is None:
+                self.stats['missing_symbols'] += 1
+                continue
+
+            try:
+                results = backend.resolve(symbol_file, missing)
+            except OSError as e:
+                print(f"⚠️ 符號解析失敗 {library}: {str(e)}")
+                # 關閉常駐進程，下一組重新啟動
+                self._backend = None
+                backend.close()
+                continue
+            # 解析不到的位址不寫入快取，之後提供正確的符號檔時可以重新解析
+            results = {offset: result for offset, result in results.items() if any(result)}
+            self.cache.put_many(cache_id, results)
+            resolved += len(results)
+
+        self.stats['resolved'] += resolved
+        return resolved
+
+    def lookup(self, library: str, build_id: str, pc: int) -> Optional[Tuple[str, str]]:
+        """查詢快取中的 (函式, 檔案:行號)，未解析或解析不到時回傳 None"""
+        cache_id = self.cache_id(library, build_id)
+        if not cache_id:
+            return None
+        result = self.cache.get(cache_id, pc)
+        if not result or not any(result):
+            return None
+        return result
+
+    def annotate(self, backtrace: List[Dict], content: str) -> int:
+        """以快取結果補上堆疊幀的 resolved_function / source_location，回傳補上的幀數"""
+        build_ids = {frame.library: frame.build_id for frame in extract_native_frames(content) if frame.build_id}
+        annotated = 0
+        for frame in backtrace:
+            try:
+                pc = int(frame.get('pc') or '', 16)
+            except ValueError:
+                continue
+            location = frame.get('location', '')
+            result = self.lookup(location, build_ids.get(location, ''), pc)
+            if result:
+                frame['resolved_function'], frame['source_location'] = result
+                # 沒有符號的幀（或只擷取到 BuildId）以解析出的函式補上
+                symbol = frame.get('symbol') or ''
+                if result[0] and (not symbol or symbol.startswith('BuildId:')):
+                    frame['symbol'] = result[0]
+                annotated += 1
+        return annotated
+
+    def demangle(self, symbol: str) -> Optional[str]:
+        return self.demangler.demangle(symbol)
+
+    def close(self):
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+        self.demangler.close()
+        self.cache.close()
@@ -21,6 +21,7 @@ import uuid
 import asyncio
 import queue
 from routes.grep_analyzer import AndroidLogAnalyzer
+from routes.zip_scanner import is_zip_member_path, materialize_zip_member
 
 # 創建一個藍圖實例
 view_file_bp = Blueprint('view_file_bp', __name__)
@@ -46,6 +47,13 @@ def search_in_file():
         if '..' in file_path:
             return jsonify({'error': 'Invalid file path'}), 403
         
+        # 壓縮檔內的檔案：先寫出實體檔案再搜尋
+        if is_zip_member_path(file_path):
+            try:
+                file_path = materialize_zip_member(file_path)
+            except Exception:
+                return jsonify({'error': 'File not found'}), 404
+        
         if not os.path.exists(file_path):
             return jsonify({'error': 'File not found'}), 404
         
@@ -87,6 +95,13 @@ def view_file():
     # Security check - prevent directory traversal
     if '..' in file_path:
         return "Invalid file path", 403
+    # 壓縮檔內的檔案：第一次開啟時才寫出實體檔案，畫面上仍顯示原本的路徑
+    display_path = file_path
+    if is_zip_member_path(file_path):
+        try:
+            file_path = materialize_zip_member(file_path)
+        except Exception:
+            return f"File not found: {display_path}", 404
     # Check if file exists
     if not os.path.exists(file_path):
         return f"File not found: {file_path}", 404
@@ -111,7 +126,7 @@ def view_file():
             # Escape content for JavaScript - CRITICAL for preventing syntax errors
             escaped_content = json.dumps(content)
             escaped_filename = json.dumps(os.path.basename(file_path))
-            escaped_file_path = json.dumps(file_path)
+            escaped_file_path = json.dumps(display_path)
             response = render_template('view_file.html', file_path=html.escape(os.path.basename(file_path)), escaped_content=escaped_content, escaped_filename=escaped_filename, escaped_file_path=escaped_file_path)
             
         return response
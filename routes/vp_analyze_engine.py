@@ -0,0 +1,266 @@
+"""
+進程內分析引擎 - 在 Flask 路由與 CLI 中直接執行 vp_analyze_logs，
+避免每次請求都啟動新的 Python 進程並重新載入模組
+"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+import traceback
+from typing import Callable, Dict, Optional
+
+# vp_analyze_logs 以頂層模組方式互相引入 (from vp_analyze_logs_base import ...)
+ROUTES_DIR = os.path.dirname(os.path.abspath(__file__))
+if ROUTES_DIR not in sys.path:
+    sys.path.insert(0, ROUTES_DIR)
+
+from report_assets import ASSET_MODE_SHARED
+
+# 進度回呼: (階段, 已完成數, 總數, 訊息)
+ProgressCallback = Callable[[str, int, int, str], None]
+
+
+class VPAnalyzeEngine:
+    """vp_analyze_logs 的進程內執行引擎
+
+    模組與分析器實例在第一次使用後保持載入（分析器依執行緒各自保存），
+    後續請求不需重新啟動直譯器與載入 numpy/sklearn。
+    isolation=True 或環境變數 VP_ANALYZE_ISOLATION=1 時改用子進程執行；
+    載入模組或建立分析系統失敗時改以子進程執行（分析本身失敗不重試，避免重複寫入輸出資料夾）。
+    進程內分析在工作執行緒中執行，超過 timeout 秒即視為失敗。
+    """
+
+    def __init__(self, workers: int = 1, isolation: Optional[bool] = None,
+                 python_executable: str = 'python3.12', timeout: int = 1000):
+        self.workers = workers
+        if isolation is None:
+            isolation = os.environ.get('VP_ANALYZE_ISOLATION', '') in ('1', 'true', 'yes')
+        self.isolation = isolation
+        self.python_executable = python_executable
+        self.timeout = timeout
+        self.script_path = os.path.join(ROUTES_DIR, 'vp_analyze_logs.py')
+
+        self._module = None
+        self._module_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _load_module(self):
+        """載入 vp_analyze_logs 模組（只載入一次）"""
+        if self._module is None:
+            with self._module_lock:
+                if self._module is None:
+                    import vp_analyze_logs
+                    self._module = vp_analyze_logs
+        return self._module
+
+    def _get_analyzers(self) -> Dict:
+        """取得本執行緒保存的分析器實例"""
+        analyzers = getattr(self._local, 'analyzers', None)
+        if analyzers is None:
+            analyzers = {}
+            self._local.analyzers = analyzers
+        return analyzers
+
+    def warm_up(self):
+        """預先載入分析模組與分析器，讓第一個請求不必等待"""
+        module = self._load_module()
+        analyzers = self._get_analyzers()
+        for file_type in ('anr', 'tombstone'):
+            if file_type not in analyzers:
+                analyzers[file_type] = module.AnalyzerFactory.create_analyzer(file_type)
+
+    def run(self, input_folder: str, output_folder: str,
+            progress_callback: Optional[ProgressCallback] = None, **options) -> Dict:
+        """執行分析
+
+        Args:
+            input_folder: 輸入資料夾
+            output_folder: 輸出資料夾
+            progress_callback: 進度回呼 (階段, 已完成數, 總數, 訊息)
+            **options: 傳給 LogAnalyzerSystem 的其他參數 (low_memory 等)
+
+        Returns:
+            {'success', 'error', 'mode', 'elapsed', 'stats', 'stdout', 'stderr'}
+        """
+        if self.isolation:
+            return self._run_subprocess(input_folder, output_folder, progress_callback, **options)
+
+        start_time = time.time()
+        expired = threading.Event()
+
+        def report_progress(stage, done, total, message=''):
+            # 超時後放棄的分析不再回報進度
+            if progress_callback and not expired.is_set():
+                progress_callback(stage, done, total, message)
+
+        workers = options.pop('workers', self.workers)
+        try:
+            module = self._load_module()
+            system = module.LogAnalyzerSystem(
+                input_folder, output_folder,
+                workers=workers,
+                analyzers=self._get_analyzers(),
+                progress_callback=report_progress,
+                **options
+            )
+        except Exception as e:
+            print(f"進程內分析引擎無法使用，改用子進程執行: {str(e)}")
+            traceback.print_exc()
+            # 分析器可能處於異常狀態，丟棄後重新建立
+            self._local.analyzers = None
+            return self._run_subprocess(input_folder, output_folder, progress_callback, workers=workers, **options)
+
+        result = {
+            'success': False,
+            'error': None,
+            'mode': 'in_process',
+            'elapsed': 0,
+            'stats': {},
+            'stdout': '',
+            'stderr': '',
+        }
+        errors = []
+
+        def analyze():
+            try:
+                system.analyze()
+            except Exception as e:
+                traceback.print_exc()
+                errors.append(e)
+
+        worker = threading.Thread(target=analyze, name='vp-analyze', daemon=True)
+        worker.start()
+        worker.join(self.timeout or None)
+
+        if worker.is_alive():
+            # 執行緒無法強制停止：放棄這次分析，分析器仍可能被使用，改用新的實例
+            expired.set()
+            self._local.analyzers = None
+            result['error'] = f"vp_analyze_logs 執行超時 (超過 {self.timeout} 秒)"
+        elif errors:
+            self._local.analyzers = None
+            result['error'] = f"vp_analyze_logs 分析失敗: {str(errors[0])}"
+        else:
+            result['success'] = True
+            result['stats'] = dict(system.stats)
+
+        result['elapsed'] = time.time() - start_time
+        return result
+
+    # LogAnalyzerSystem 參數 -> vp_analyze_logs.py 命令列參數
+    _VALUE_FLAGS = {
+        'data_dir': '--data-dir',
+        'signature_db_dir': '--signature-db',
+        'result_cache_dir': '--cache-dir',
+        'result_cache_max_mb': '--cache-max-mb',
+        'original_placement': '--original',
+        'symbols_dir': '--symbols-dir',
+    }
+    _SWITCH_FLAGS = {
+        # 參數: (觸發的值, 命令列參數)
+        'low_memory': (True, '--low-memory'),
+        'full_index_rebuild': (True, '--full-index'),
+        'use_signature_db': (False, '--no-signature-db'),
+        'use_result_cache': (False, '--no-cache'),
+        'scan_zip': (False, '--no-zip'),
+        'report_assets': (ASSET_MODE_SHARED, '--shared-assets'),
+    }
+
+    @classmethod
+    def _subprocess_args(cls, options: Dict) -> list:
+        """把 run() 的參數轉成命令列參數，無法以命令列傳遞的參數拋出 ValueError"""
+        args = []
+        for key, value in options.items():
+            if value is None:
+                continue
+            if key in cls._VALUE_FLAGS:
+                args += [cls._VALUE_FLAGS[key], str(value)]
+            elif key in cls._SWITCH_FLAGS:
+                trigger, flag = cls._SWITCH_FLAGS[key]
+                if value == trigger:
+                    args.append(flag)
+            else:
+                raise ValueError(f"參數 {key} 無法傳給子進程")
+        return args
+
+    def _run_subprocess(self, input_folder: str, output_folder: str,
+                        progress_callback: Optional[ProgressCallback] = None, **options) -> Dict:
+        """以子進程執行 vp_analyze_logs.py（隔離模式）"""
+        start_time = time.time()
+        result = {
+            'success': False,
+            'error': None,
+            'mode': 'subprocess',
+            'elapsed': 0,
+            'stats': {},
+            'stdout': '',
+            'stderr': '',
+        }
+
+        if not os.path.exists(self.script_path):
+            result['error'] = f"找不到 vp_analyze_logs.py: {self.script_path}"
+            return result
+
+        workers = options.pop('workers', self.workers)
+        try:
+            extra_args = self._subprocess_args(options)
+        except ValueError as e:
+            result['error'] = str(e)
+            return result
+
+        if progress_callback:
+            progress_callback('analyze', 0, 0, '子進程分析中')
+
+        cmd = [self.python_executable, self.script_path, input_folder, output_folder]
+        if workers != 1:
+            cmd += ['-j', str(workers)]
+        cmd += extra_args
+
+        try:
+            completed = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+                cwd=ROUTES_DIR
+            )
+            result['stdout'] = completed.stdout
+            result['stderr'] = completed.stderr
+            if completed.returncode == 0:
+                result['success'] = True
+            else:
+                result['error'] = (f"vp_analyze_logs.py 執行失敗 (return code: {completed.returncode})\n"
+                                   f"STDERR: {completed.stderr}\nSTDOUT: {completed.stdout}")
+        except subprocess.TimeoutExpired:
+            result['error'] = f"vp_analyze_logs.py 執行超時 (超過 {self.timeout} 秒)"
+        except FileNotFoundError:
+            result['error'] = f"找不到 {self.python_executable} 命令，請確認已安裝 Python 3.12"
+        except Exception as e:
+            result['error'] = f"執行 vp_analyze_logs.py 時發生錯誤: {str(e)}"
+
+        result['elapsed'] = time.time() - start_time
+        if result['success'] and progress_callback:
+            progress_callback('done', 1, 1, '分析完成')
+        return result
+
+
+_default_engine: Optional[VPAnalyzeEngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_engine() -> VPAnalyzeEngine:
+    """取得共用的分析引擎（整個進程只建立一個）"""
+    global _default_engine
+    if _default_engine is None:
+        with _default_engine_lock:
+            if _default_engine is None:
+                _default_engine = VPAnalyzeEngine()
+    return _default_engine
+
+
+def run_analysis(input_folder: str, output_folder: str,
+                 progress_callback: Optional[ProgressCallback] = None, **options) -> Dict:
+    """使用共用引擎執行分析"""
+    return get_engine().run(input_folder, output_folder, progress_callback, **options)
@@ -10,22 +10,48 @@ import re
 import sys
 import html
 import shutil
+import tempfile
 import time
 import json
+import hashlib
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple, Set
+from typing import List, Dict, Optional, Tuple, Set, Callable, Iterable
 from enum import Enum
 import traceback
 import base64
+import io
 
 # 導入基礎類別
 from vp_analyze_logs_base import (
-    SourceLink, SourceLinker, ANRTimeouts, ThreadInfo, ANRType, CrashSignal, ThreadState, ANRInfo, TombstoneInfo
+    SourceLink, SourceLinker, ANRTimeouts, ThreadInfo, ANRType, CrashSignal, ThreadState, ANRInfo, TombstoneInfo,
+    Backtrace, MemoryMap
 )
 
+from vp_analyze_logs_ext import (
+    SignatureClusteringEngine, ANRSignatureFeatures, CrashSignatureIndex, AnalysisResultCache, FrameIndex,
+    analysis_frame_scope
+)
+from zip_scanner import ZipArchiveReader, ZIP_MEMBER_SEPARATOR, can_scan_in_place, is_zip_member_path, member_path_parts
+from report_assets import ReportAssetStore, ASSET_MODE_SHARED, ASSET_MODE_INLINE
+from file_placement import place_file, PLACEMENT_AUTO, PLACEMENT_MODES
+from symbolizer import Symbolizer, extract_native_frames
+import vp_analyze_logs_patterns as patterns_registry
+from vp_analyze_logs_patterns import compiled, combined, compile_pattern_groups, FirstMatchScanner
 from vp_analyze_logs_ext import PerformanceBottleneckDetector, BinderCallChainAnalyzer, ThreadDependencyAnalyzer, TimelineAnalyzer,CrossProcessAnalyzer,MLAnomalyDetector,RootCausePredictor,RiskAssessmentEngine,TrendAnalyzer,SystemMetricsIntegrator,SourceCodeAnalyzer,CodeFixGenerator,ConfigurationOptimizer,ComparativeAnalyzer,ParallelAnalyzer,IncrementalAnalyzer,VisualizationGenerator,ExecutiveSummaryGenerator
 
+# 分析器版本：分析邏輯或報告格式改變時遞增，結果快取以此與原始碼摘要判斷是否失效
+ANALYZER_VERSION = '1.0'
+_ANALYZER_SOURCE_DIGEST = None
+
+# 增量索引狀態（預設資料目錄下的子資料夾，每個輸出資料夾一個檔案）與其格式版本；
+# 不放在輸出資料夾內，網頁流程每次分析前刪除輸出資料夾後仍可增量更新
+INDEX_STATE_DIR = 'index_state'
+INDEX_STATE_VERSION = 1
+# 索引頁資料分塊（輸出資料夾中的子資料夾）與每個分塊的項目數
+INDEX_DATA_DIR = 'index_data'
+INDEX_CHUNK_SIZE = 2000
+
 # ============= 工具函數 =============
 
 def time_tracker(func_name: str):
@@ -45,8 +71,15 @@ def time_tracker(func_name: str):
 class BaseAnalyzer(ABC):
     """基礎分析器抽象類別"""
     
+    # 跨執行的崩潰簽名索引（由 LogAnalyzerSystem 設定，趨勢分析以此查詢歷史出現次數）
+    signature_index: Optional[CrashSignatureIndex] = None
+    
     def __init__(self):
         self.patterns = self._init_patterns()
+        # 預先編譯的模式（與 self.patterns 同名、同順序）
+        self.compiled_patterns = compile_pattern_groups(self.patterns)
+        # 最近一次分析產生的結構化記錄（供索引與相似度分群使用）
+        self.last_record: Optional[Dict] = None
     
     @abstractmethod
     def _init_patterns(self) -> Dict:
@@ -62,6 +95,12 @@ class BaseAnalyzer(ABC):
 class ANRAnalyzer(BaseAnalyzer):
     """ANR 分析器"""
     
+    def __init__(self):
+        super().__init__()
+        # 逐行判斷用的合併模式：線程開頭（前 3 個線程模式）與任一線程格式
+        self._thread_start_regex = combined(self.patterns['thread_patterns'][:3])
+        self._thread_any_regex = combined(self.patterns['thread_patterns'])
+    
     def _init_patterns(self) -> Dict:
         """初始化 ANR 分析模式"""
         return {
@@ -140,17 +179,18 @@ class ANRAnalyzer(BaseAnalyzer):
     @time_tracker("解析 ANR 檔案")
     def analyze(self, file_path: str) -> str:
         """分析 ANR 檔案"""
+        self.last_record = None
         try:
             print(f"開始分析檔案: {file_path}")
             
+            # 逐行串流解析 ANR 資訊（同時保留內容給報告產生器）
+            parser = ANRTraceParser(self)
             with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
+                anr_info = parser.parse(f)
+            content = parser.content
             
             print(f"檔案大小: {len(content)} 字符")
             
-            # 解析 ANR 資訊
-            anr_info = self._parse_anr_info(content)
-            
             print(f"解析結果 - 進程名: {anr_info.process_name}, PID: {anr_info.pid}")
             print(f"ANR 類型: {anr_info.anr_type.value}")
             print(f"線程數量: {len(anr_info.all_threads)}")
@@ -165,7 +205,7 @@ class ANRAnalyzer(BaseAnalyzer):
                     IncrementalAnalyzer, VisualizationGenerator, ExecutiveSummaryGenerator
                 )
                 
-                intelligent_engine = IntelligentAnalysisEngine()
+                intelligent_engine = IntelligentAnalysisEngine(signature_index=self.signature_index)
             except Exception as e:
                 print(f"創建智能分析引擎失敗: {e}")
                 intelligent_engine = None
@@ -174,51 +214,17 @@ class ANRAnalyzer(BaseAnalyzer):
             report = self._generate_report(anr_info, content, intelligent_engine)
             
             return report
-            
+        
         except Exception as e:
             error_msg = f"❌ 分析 ANR 檔案時發生錯誤: {str(e)}\n{traceback.format_exc()}"
             print(error_msg)
             return error_msg
     
     def _parse_anr_info(self, content: str) -> ANRInfo:
-        """解析 ANR 資訊"""
-        lines = content.splitlines()
-        
-        # 識別 ANR 類型和基本資訊
-        anr_type = self._identify_anr_type(content)
-        process_info = self._extract_process_info(content)
-        
-        # 解析所有線程資訊
-        all_threads = self._extract_all_threads(lines, content)
-        
-        # 找出主線程
-        main_thread = self._find_main_thread(all_threads)
-        
-        # 解析額外資訊
-        cpu_usage = self._extract_cpu_usage(content)
-        memory_info = self._extract_memory_info(content)
-        
-        # 新增：解析 ANR 超時時間
-        timeout_info = self._extract_timeout_info(content)
-        
-        anr_info = ANRInfo(
-            anr_type=anr_type,
-            process_name=process_info.get('process_name', 'Unknown'),
-            pid=process_info.get('pid', 'Unknown'),
-            timestamp=process_info.get('timestamp'),
-            reason=process_info.get('reason'),
-            main_thread=main_thread,
-            all_threads=all_threads,
-            cpu_usage=cpu_usage,
-            memory_info=memory_info
-        )
-        
-        # 新增：將超時資訊加入 ANRInfo
-        anr_info.timeout_info = timeout_info
-        
-        return anr_info
+        """解析 ANR 資訊（已讀入記憶體的內容）"""
+        return ANRTraceParser(self).parse(io.StringIO(content))
     
-    def _identify_anr_type(self, content: str) -> ANRType:
+    def _identify_anr_type(self, trace: FirstMatchScanner) -> ANRType:
         """識別 ANR 類型 - 增強版"""
         type_mappings = {
             # 原有的映射
@@ -237,17 +243,17 @@ class ANRAnalyzer(BaseAnalyzer):
         }
         
         # 檢查是否有 Watchdog 超時
-        if any(re.search(pattern, content) for pattern in self.patterns['watchdog_patterns']):
+        if trace.search(combined(self.patterns['watchdog_patterns'])):
             # Watchdog 通常是系統服務問題
             return ANRType.SERVICE
         
         for pattern, anr_type in type_mappings.items():
-            if pattern in content:
+            if trace.contains(pattern):
                 return anr_type
         
         return ANRType.UNKNOWN
     
-    def _extract_process_info(self, content: str) -> Dict:
+    def _extract_process_info(self, trace: FirstMatchScanner) -> Dict:
         """提取進程資訊"""
         info = {}
         
@@ -259,7 +265,7 @@ class ANRAnalyzer(BaseAnalyzer):
         ]
         
         for pattern in pid_patterns:
-            match = re.search(pattern, content)
+            match = trace.search(pattern)
             if match:
                 info['pid'] = match.group(1)
                 if len(match.groups()) > 1:  # 如果有時間戳
@@ -269,17 +275,17 @@ class ANRAnalyzer(BaseAnalyzer):
                 break
         
         # 2. 提取進程名（從 Cmd line）
-        cmdline_match = re.search(r'Cmd line:\s*([^\s\n]+)', content)
+        cmdline_match = trace.search(r'Cmd line:\s*([^\s\n]+)')
         if cmdline_match:
             info['process_name'] = cmdline_match.group(1)
         
         # 3. 提取 Build fingerprint
-        fingerprint_match = re.search(r"Build fingerprint:\s*'([^']+)'", content)
+        fingerprint_match = trace.search(r"Build fingerprint:\s*'([^']+)'")
         if fingerprint_match:
             info['build_fingerprint'] = fingerprint_match.group(1)
         
         # 4. 提取 ABI
-        abi_match = re.search(r"ABI:\s*'([^']+)'", content)
+        abi_match = trace.search(r"ABI:\s*'([^']+)'")
         if abi_match:
             info['abi'] = abi_match.group(1)
         
@@ -305,7 +311,7 @@ class ANRAnalyzer(BaseAnalyzer):
         ]
         
         for pattern in patterns:
-            match = re.search(pattern, content, re.MULTILINE)
+            match = trace.search(pattern, re.MULTILINE)
             if match:
                 groups = match.groups()
                 if len(groups) >= 2:
@@ -332,7 +338,7 @@ class ANRAnalyzer(BaseAnalyzer):
         # 如果還是沒有找到，嘗試從內容中提取
         if 'process_name' not in info:
             # 嘗試找包名格式 (com.example.app)
-            package_match = re.search(r'(com\.[a-zA-Z0-9._]+)', content)
+            package_match = trace.search(r'(com\.[a-zA-Z0-9._]+)')
             if package_match:
                 info['process_name'] = package_match.group(1)
         
@@ -345,7 +351,7 @@ class ANRAnalyzer(BaseAnalyzer):
             ]
             
             for pattern in timestamp_patterns:
-                timestamp_match = re.search(pattern, content)
+                timestamp_match = trace.search(pattern)
                 if timestamp_match:
                     info['timestamp'] = timestamp_match.group(1)
                     break
@@ -358,7 +364,7 @@ class ANRAnalyzer(BaseAnalyzer):
         ]
         
         for pattern in reason_patterns:
-            reason_match = re.search(pattern, content)
+            reason_match = trace.search(pattern)
             if reason_match:
                 info['reason'] = reason_match.group(1).strip()
                 break
@@ -366,7 +372,7 @@ class ANRAnalyzer(BaseAnalyzer):
         print(f"提取的進程資訊: {info}")
         return info
     
-    def _extract_timeout_info(self, content: str) -> Dict:
+    def _extract_timeout_info(self, trace: FirstMatchScanner) -> Dict:
         """提取 ANR 超時資訊"""
         timeout_info = {
             'wait_time': None,
@@ -375,61 +381,43 @@ class ANRAnalyzer(BaseAnalyzer):
         }
         
         # 提取等待時間
-        wait_match = re.search(r'Waited\s+(\d+)ms', content)
+        wait_match = trace.search(r'Waited\s+(\d+)ms')
         if wait_match:
             timeout_info['wait_time'] = int(wait_match.group(1))
         
         # 判斷是否為前台/背景
-        if 'background' in content.lower() or 'bg anr' in content.lower():
+        if trace.contains_lower('background') or trace.contains_lower('bg anr'):
             timeout_info['is_foreground'] = False
         
         # 根據 ANR 類型設定閾值
-        if 'Input' in content:
+        if trace.contains('Input'):
             timeout_info['timeout_threshold'] = ANRTimeouts.INPUT_DISPATCHING
-        elif 'Service' in content:
+        elif trace.contains('Service'):
             if timeout_info['is_foreground']:
                 timeout_info['timeout_threshold'] = ANRTimeouts.SERVICE_TIMEOUT
             else:
                 timeout_info['timeout_threshold'] = ANRTimeouts.SERVICE_BACKGROUND_TIMEOUT
-        elif 'Broadcast' in content:
+        elif trace.contains('Broadcast'):
             if timeout_info['is_foreground']:
                 timeout_info['timeout_threshold'] = ANRTimeouts.BROADCAST_TIMEOUT
             else:
                 timeout_info['timeout_threshold'] = ANRTimeouts.BROADCAST_BACKGROUND_TIMEOUT
-        elif 'JobScheduler' in content or 'JobService' in content:
+        elif trace.contains('JobScheduler') or trace.contains('JobService'):
             timeout_info['timeout_threshold'] = ANRTimeouts.JOB_SCHEDULER_TIMEOUT
-        elif 'ContentProvider' in content:
+        elif trace.contains('ContentProvider'):
             timeout_info['timeout_threshold'] = ANRTimeouts.CONTENT_PROVIDER_TIMEOUT
         
         return timeout_info
     
-    def _extract_all_threads(self, lines: List[str], content: str) -> List[ThreadInfo]:
-        """提取所有線程資訊 - 增強版"""
-        threads = []
-        
-        for idx, line in enumerate(lines):
-            thread_info = self._try_parse_thread(line, idx, lines)
-            if thread_info:
-                # 提取堆疊資訊
-                thread_info.backtrace = self._extract_backtrace(lines, idx)
-                
-                # 提取鎖資訊
-                self._extract_lock_info(thread_info, lines, idx)
-                
-                # 新增：檢測跨進程鎖
-                self._extract_cross_process_lock_info(thread_info, lines, idx)
-                
-                # 新增：提取線程 CPU 時間
-                self._extract_thread_cpu_time(thread_info, lines, idx)
-                
-                threads.append(thread_info)
+    def _parse_thread_header(self, line: str) -> Optional[Tuple[ThreadInfo, bool]]:
+        """嘗試將一行解析為線程標頭
         
-        return threads
-    
-    def _try_parse_thread(self, line: str, idx: int, lines: List[str]) -> Optional[ThreadInfo]:
-        """嘗試解析線程資訊"""
+        Returns:
+            (線程資訊, 是否為標準標頭格式) 或 None；
+            只有標準格式 ("name" prio=5 tid=46 Waiting) 會再從後續行讀取 sysTid 與詳細狀態
+        """
         # 您的日誌格式: "GmsDynamite" prio=5 tid=46 Waiting
-        thread_match = re.match(r'"([^"]+)"\s+prio=(\d+)\s+tid=(\d+)\s+(\w+)', line)
+        thread_match = patterns_registry.ANR_THREAD_HEADER.match(line)
         if thread_match:
             name = thread_match.group(1)
             prio = thread_match.group(2)
@@ -442,48 +430,17 @@ class ANRAnalyzer(BaseAnalyzer):
                 prio=prio,
                 state=self._parse_thread_state(state_str)
             )
-            
-            # 從後續行提取 sysTid 和其他資訊
-            for i in range(idx + 1, min(idx + 5, len(lines))):
-                next_line = lines[i]
-                
-                # 提取 sysTid
-                systid_match = re.search(r'sysTid=(\d+)', next_line)
-                if systid_match:
-                    thread_info.sysTid = systid_match.group(1)
-                
-                # 提取 state (更詳細的狀態)
-                state_match = re.search(r'\|\s+state=([A-Z])', next_line)
-                if state_match:
-                    # 如果有更詳細的狀態，更新它
-                    detailed_state = self._parse_thread_state(state_match.group(1))
-                    if detailed_state != ThreadState.UNKNOWN:
-                        thread_info.state = detailed_state
-                
-                # 提取 utm 和 stm
-                utm_match = re.search(r'utm=(\d+)', next_line)
-                stm_match = re.search(r'stm=(\d+)', next_line)
-                if utm_match:
-                    thread_info.utm = utm_match.group(1)
-                if stm_match:
-                    thread_info.stm = stm_match.group(1)
-                
-                # 提取 schedstat
-                schedstat_match = re.search(r'schedstat=\(\s*(\d+)\s+(\d+)\s+(\d+)\s*\)', next_line)
-                if schedstat_match:
-                    runtime = int(schedstat_match.group(1)) / 1000000  # 轉換為毫秒
-                    waittime = int(schedstat_match.group(2)) / 1000000
-                    thread_info.schedstat = f"運行:{runtime:.1f}ms 等待:{waittime:.1f}ms"
-                
-                # 如果遇到下一個線程，停止
-                if re.match(r'"[^"]+".*tid=\d+', next_line):
-                    break
-            
-            return thread_info
+            return thread_info, True
+        
+        # 嘗試其他格式（先以合併的模式快速排除大多數的行）
+        # 所有線程模式都包含 tid=（Native thread 格式為 State:），先以字串搜尋排除大多數的行
+        if 'tid=' not in line and 'State:' not in line:
+            return None
+        if not self._thread_any_regex.search(line):
+            return None
         
-        # 嘗試其他格式
-        for pattern in self.patterns['thread_patterns']:
-            match = re.search(pattern, line)
+        for pattern, regex in zip(self.patterns['thread_patterns'], self.compiled_patterns['thread_patterns']):
+            match = regex.search(line)
             if match:
                 groups = match.groups()
                 
@@ -495,15 +452,15 @@ class ANRAnalyzer(BaseAnalyzer):
                         tid=tid,
                         prio=prio,
                         state=self._parse_thread_state(state)
-                    )
+                    ), False
                 elif len(groups) == 3:
                     name, tid, state = groups
                     return ThreadInfo(
                         name=name,
                         tid=tid,
                         state=self._parse_thread_state(state)
-                    )
-                
+                    ), False
+        
         return None
     
     def _parse_thread_state(self, state_str: str) -> ThreadState:
@@ -529,105 +486,22 @@ class ANRAnalyzer(BaseAnalyzer):
         
         return state_mappings.get(state_str.upper(), ThreadState.UNKNOWN)
     
-    def _extract_backtrace(self, lines: List[str], start_idx: int) -> List[str]:
-        """提取堆疊追蹤"""
-        backtrace = []
-        
-        for i in range(start_idx + 1, len(lines)):
-            line = lines[i]
-            
-            # 檢測下一個線程或結束
-            if self._is_thread_start(line):
-                break
-            
-            # 提取堆疊行
-            if self._is_stack_frame(line):
-                frame = self._clean_stack_frame(line)
-                if frame:
-                    backtrace.append(frame)
-        
-        return backtrace
-    
     def _is_thread_start(self, line: str) -> bool:
         """檢查是否為線程開始"""
-        return any(re.search(pattern, line) for pattern in self.patterns['thread_patterns'][:3])
+        # 前 3 個線程模式都包含 tid=
+        return 'tid=' in line and self._thread_start_regex.search(line) is not None
     
     def _is_stack_frame(self, line: str) -> bool:
         """檢查是否為堆疊框架"""
-        patterns = [
-            r'^\s*at\s+',
-            r'^\s*#\d+\s+',
-            r'\([^)]+\.java:\d+\)',
-            r'\([^)]+\.kt:\d+\)',
-            r'^\s*-\s+(locked|waiting)',
-            r'Native Method',
-        ]
-        return any(re.search(pattern, line) for pattern in patterns)
+        return patterns_registry.ANR_STACK_FRAME.search(line) is not None
     
     def _clean_stack_frame(self, line: str) -> str:
         """清理堆疊框架"""
         # 移除前綴
-        line = re.sub(r'^\s*at\s+', '', line)
-        line = re.sub(r'^\s*#\d+\s+', '', line)
+        line = patterns_registry.ANR_FRAME_AT_PREFIX.sub('', line)
+        line = patterns_registry.ANR_FRAME_NUM_PREFIX.sub('', line)
         return line.strip()
     
-    def _extract_lock_info(self, thread: ThreadInfo, lines: List[str], start_idx: int) -> None:
-        """提取鎖資訊"""
-        for i in range(start_idx + 1, min(start_idx + 20, len(lines))):
-            line = lines[i]
-            
-            # 檢查持有的鎖
-            locked_match = re.search(r'- locked\s+<([^>]+)>', line)
-            if locked_match:
-                thread.held_locks.append(locked_match.group(1))
-            
-            # 檢查等待的鎖
-            waiting_match = re.search(r'- waiting (?:on|to lock)\s+<([^>]+)>', line)
-            if waiting_match:
-                thread.waiting_locks.append(waiting_match.group(1))
-                
-                # 提取等待資訊
-                held_by_match = re.search(r'held by (?:thread\s+)?(\d+)', line)
-                if held_by_match:
-                    thread.waiting_info = f"等待鎖 {waiting_match.group(1)}，被線程 {held_by_match.group(1)} 持有"
-            
-            # 檢查 parking 狀態
-            if 'parking to wait for' in line:
-                park_match = re.search(r'parking to wait for\s+<([^>]+)>', line)
-                if park_match:
-                    thread.waiting_info = f"Parking 等待: {park_match.group(1)}"
-    
-    def _extract_cross_process_lock_info(self, thread: ThreadInfo, lines: List[str], start_idx: int) -> None:
-        """提取跨進程鎖資訊"""
-        for i in range(start_idx + 1, min(start_idx + 20, len(lines))):
-            line = lines[i]
-            
-            # 檢查跨進程等待
-            cross_process_match = re.search(r'held by tid=(\d+) in process (\d+)', line)
-            if cross_process_match:
-                thread.waiting_info = f"等待跨進程鎖，被進程 {cross_process_match.group(2)} 的線程 {cross_process_match.group(1)} 持有"
-                break
-    
-    def _extract_thread_cpu_time(self, thread: ThreadInfo, lines: List[str], start_idx: int) -> None:
-        """提取線程 CPU 時間"""
-        # 查找 schedstat 資訊
-        for i in range(start_idx, min(start_idx + 5, len(lines))):
-            line = lines[i]
-            
-            # schedstat 格式: schedstat=( 運行時間 等待時間 時間片次數 )
-            schedstat_match = re.search(r'schedstat=\(\s*(\d+)\s+(\d+)\s+(\d+)\s*\)', line)
-            if schedstat_match:
-                thread.schedstat = f"運行:{int(schedstat_match.group(1))/1000000:.1f}ms " \
-                                  f"等待:{int(schedstat_match.group(2))/1000000:.1f}ms"
-            
-            # utm/stm 格式
-            utm_match = re.search(r'utm=(\d+)', line)
-            stm_match = re.search(r'stm=(\d+)', line)
-            if utm_match:
-                thread.utm = utm_match.group(1)
-            if stm_match:
-                thread.stm = stm_match.group(1)
-    
     def _find_main_thread(self, threads: List[ThreadInfo]) -> Optional[ThreadInfo]:
         """找出主線程"""
         # 優先查找名為 "main" 的線程
@@ -647,7 +521,7 @@ class ANRAnalyzer(BaseAnalyzer):
         
         return None
     
-    def _extract_cpu_usage(self, content: str) -> Optional[Dict]:
+    def _extract_cpu_usage(self, trace: FirstMatchScanner) -> Optional[Dict]:
         """提取 CPU 使用率資訊"""
         cpu_info = {}
         
@@ -659,7 +533,7 @@ class ANRAnalyzer(BaseAnalyzer):
         ]
         
         for pattern in cpu_patterns:
-            match = re.search(pattern, content)
+            match = trace.search(pattern)
             if match:
                 if 'usr' in pattern:
                     cpu_info['user'] = float(match.group(1))
@@ -673,7 +547,7 @@ class ANRAnalyzer(BaseAnalyzer):
         
         return cpu_info if cpu_info else None
     
-    def _extract_memory_info(self, content: str) -> Optional[Dict]:
+    def _extract_memory_info(self, trace: FirstMatchScanner) -> Optional[Dict]:
         """提取記憶體資訊"""
         memory_info = {}
         
@@ -689,7 +563,7 @@ class ANRAnalyzer(BaseAnalyzer):
         }
         
         for key, pattern in patterns.items():
-            match = re.search(pattern, content)
+            match = trace.search(pattern)
             if match:
                 memory_info[key] = int(match.group(1))
         
@@ -704,7 +578,12 @@ class ANRAnalyzer(BaseAnalyzer):
         """生成分析報告"""
         try:
             analyzer = ANRReportGenerator(anr_info, content, intelligent_engine)
-            return analyzer.generate()
+            report = analyzer.generate()
+            try:
+                self.last_record = analyzer.build_record()
+            except Exception as e:
+                print(f"建立結構化記錄失敗: {e}")
+            return report
         except Exception as e:
             # 如果報告生成失敗，返回基本信息
             import traceback
@@ -737,6 +616,195 @@ class ANRAnalyzer(BaseAnalyzer):
             
             return "\n".join(basic_report)
 
+class _ThreadWindow:
+    """線程標頭之後的讀取狀態"""
+    
+    __slots__ = ('thread', 'start', 'detail_open', 'cross_info')
+    
+    def __init__(self, thread: ThreadInfo, start: int, detail_open: bool):
+        self.thread = thread
+        self.start = start
+        self.detail_open = detail_open  # 仍在讀取 sysTid / 詳細狀態
+        self.cross_info = None          # 第一個跨進程鎖資訊
+
+
+class ANRTraceParser:
+    """單次掃描的 ANR trace 解析器
+    
+    逐行讀取（檔案物件或任何行的 iterable），每一行只看一次，以狀態機同時處理：
+        - 線程標頭，標準格式再讀取其後 4 行的 sysTid 與詳細狀態（遇到下一個線程停止）
+        - 堆疊：標頭的下一行收集到下一個線程開頭
+        - 鎖資訊與跨進程鎖：標頭之後 19 行
+        - CPU 時間 (schedstat / utm / stm)：標頭與其後 4 行
+    ANR 類型、進程資訊、CPU 使用率、記憶體與超時資訊由 FirstMatchScanner 隨區塊搜尋。
+    讀入的內容保留在 content，供報告產生器使用。
+    """
+    
+    BLOCK_SIZE = 256 * 1024
+    DETAIL_LINES = 4
+    LOCK_LINES = 19
+    
+    def __init__(self, analyzer: ANRAnalyzer):
+        self.analyzer = analyzer
+        self.content = ''
+    
+    def parse(self, lines: Iterable[str]) -> ANRInfo:
+        """解析 ANR trace 並回傳完整的 ANRInfo"""
+        analyzer = self.analyzer
+        trace = FirstMatchScanner()
+        blocks: List[str] = []
+        block: List[str] = []
+        block_size = 0
+        
+        threads: List[ThreadInfo] = []
+        collectors: List[ThreadInfo] = []   # 正在收集堆疊的線程
+        windows: List[_ThreadWindow] = []   # 標頭之後 LOCK_LINES 行內的線程
+        idx = -1
+        
+        # 熱點迴圈使用的方法先取出成區域變數
+        is_thread_start = analyzer._is_thread_start
+        is_stack_frame = analyzer._is_stack_frame
+        clean_stack_frame = analyzer._clean_stack_frame
+        parse_thread_header = analyzer._parse_thread_header
+        feed_window = self._feed_window
+        
+        for raw in lines:
+            block.append(raw)
+            block_size += len(raw)
+            if block_size >= self.BLOCK_SIZE:
+                chunk = ''.join(block)
+                trace.feed(chunk)
+                blocks.append(chunk)
+                block = []
+                block_size = 0
+            
+            # 與 content.splitlines() 的分行方式一致
+            for line in raw.splitlines():
+                idx += 1
+                
+                if windows:
+                    while windows and idx - windows[0].start > self.LOCK_LINES:
+                        self._close_window(windows.pop(0))
+                    for window in windows:
+                        feed_window(window, line, idx)
+                
+                if collectors:
+                    if is_thread_start(line):
+                        collectors = []
+                    elif is_stack_frame(line):
+                        frame = clean_stack_frame(line)
+                        if frame:
+                            for thread in collectors:
+                                thread.backtrace.append(frame)
+                
+                # 線程標頭以引號開頭，或包含 tid= / State:（其他格式）
+                if line[:1] != '"' and 'tid=' not in line and 'State:' not in line:
+                    continue
+                parsed = parse_thread_header(line)
+                if parsed:
+                    thread, is_primary = parsed
+                    self._apply_cpu_time(thread, line)
+                    threads.append(thread)
+                    collectors.append(thread)
+                    windows.append(_ThreadWindow(thread, idx, is_primary))
+        
+        if block:
+            chunk = ''.join(block)
+            trace.feed(chunk)
+            blocks.append(chunk)
+        for window in windows:
+            self._close_window(window)
+        self.content = ''.join(blocks)
+        
+        # 識別 ANR 類型和基本資訊
+        anr_type = analyzer._identify_anr_type(trace)
+        process_info = analyzer._extract_process_info(trace)
+        
+        anr_info = ANRInfo(
+            anr_type=anr_type,
+            process_name=process_info.get('process_name', 'Unknown'),
+            pid=process_info.get('pid', 'Unknown'),
+            timestamp=process_info.get('timestamp'),
+            reason=process_info.get('reason'),
+            main_thread=analyzer._find_main_thread(threads),
+            all_threads=threads,
+            cpu_usage=analyzer._extract_cpu_usage(trace),
+            memory_info=analyzer._extract_memory_info(trace)
+        )
+        anr_info.timeout_info = analyzer._extract_timeout_info(trace)
+        return anr_info
+    
+    def _feed_window(self, window: _ThreadWindow, line: str, idx: int) -> None:
+        """處理標頭之後的一行"""
+        thread = window.thread
+        
+        if idx - window.start <= self.DETAIL_LINES:
+            if window.detail_open:
+                systid_match = patterns_registry.ANR_SYSTID.search(line)
+                if systid_match:
+                    thread.sysTid = systid_match.group(1)
+                
+                # 如果有更詳細的狀態，更新它
+                state_match = patterns_registry.ANR_DETAILED_STATE.search(line)
+                if state_match:
+                    detailed_state = self.analyzer._parse_thread_state(state_match.group(1))
+                    if detailed_state != ThreadState.UNKNOWN:
+                        thread.state = detailed_state
+                
+                # 遇到下一個線程，停止
+                if patterns_registry.ANR_NEXT_THREAD.match(line):
+                    window.detail_open = False
+            self._apply_cpu_time(thread, line)
+        
+        # 持有與等待的鎖
+        if '- ' in line:
+            locked_match = patterns_registry.ANR_LOCKED.search(line)
+            if locked_match:
+                thread.held_locks.append(locked_match.group(1))
+            
+            waiting_match = patterns_registry.ANR_WAITING_LOCK.search(line)
+            if waiting_match:
+                thread.waiting_locks.append(waiting_match.group(1))
+                held_by_match = patterns_registry.ANR_HELD_BY.search(line)
+                if held_by_match:
+                    thread.waiting_info = f"等待鎖 {waiting_match.group(1)}，被線程 {held_by_match.group(1)} 持有"
+        
+        # parking 狀態
+        if 'parking to wait for' in line:
+            park_match = patterns_registry.ANR_PARKING.search(line)
+            if park_match:
+                thread.waiting_info = f"Parking 等待: {park_match.group(1)}"
+        
+        # 跨進程等待（只取第一個）
+        if window.cross_info is None and 'held by tid=' in line:
+            cross_process_match = patterns_registry.ANR_CROSS_PROCESS_LOCK.search(line)
+            if cross_process_match:
+                window.cross_info = f"等待跨進程鎖，被進程 {cross_process_match.group(2)} 的線程 {cross_process_match.group(1)} 持有"
+    
+    def _close_window(self, window: _ThreadWindow) -> None:
+        """視窗結束：跨進程鎖資訊優先於一般的等待資訊"""
+        if window.cross_info:
+            window.thread.waiting_info = window.cross_info
+    
+    def _apply_cpu_time(self, thread: ThreadInfo, line: str) -> None:
+        """提取線程 CPU 時間"""
+        # schedstat 格式: schedstat=( 運行時間 等待時間 時間片次數 )
+        if 'schedstat=' in line:
+            schedstat_match = patterns_registry.ANR_SCHEDSTAT.search(line)
+            if schedstat_match:
+                thread.schedstat = f"運行:{int(schedstat_match.group(1))/1000000:.1f}ms " \
+                                   f"等待:{int(schedstat_match.group(2))/1000000:.1f}ms"
+        
+        # utm/stm 格式
+        if 'utm=' in line:
+            utm_match = patterns_registry.ANR_UTM.search(line)
+            if utm_match:
+                thread.utm = utm_match.group(1)
+        if 'stm=' in line:
+            stm_match = patterns_registry.ANR_STM.search(line)
+            if stm_match:
+                thread.stm = stm_match.group(1)
+
 class SimilarityConfig:
     """相似度配置"""
     # 基礎閾值
@@ -755,17 +823,36 @@ class SimilarityConfig:
     TOMBSTONE_FUNC_WEIGHT = 0.25     # 崩潰函數權重
     TOMBSTONE_NATIVE_WEIGHT = 0.20   # Native/Java 權重
     
+    # 分群閾值 (0~100，對應 DBSCAN eps = 100 - 閾值)
+    TOMBSTONE_CLUSTER_THRESHOLD = 75
+    ANR_CLUSTER_THRESHOLD = 70
+    
+    # LSH 候選索引 (大量報告時只對可能相似的配對計算精確相似度)
+    LSH_MIN_REPORTS = 200          # 少於此數量時直接使用精確相似度矩陣
+    LSH_NUM_PERM = 64              # MinHash 雜湊函數數量
+    LSH_BANDS = 32                 # LSH 分段數 (每段 LSH_NUM_PERM / LSH_BANDS 個雜湊)
+    LSH_RECALL_TOLERANCE = 0.05    # 相對精確矩陣可容忍的同群召回率損失
+    LSH_VALIDATION_ANCHORS = 20    # 抽樣驗證的錨點報告數
+    LSH_MAX_BUCKET_SIZE = 50       # 超過此大小的桶只串接相鄰成員
+    
+    # 組內平均相似度最多計算的配對數
+    GROUP_SIMILARITY_MAX_PAIRS = 500
+    
 class ANRReportGenerator:
     """ANR 報告生成器"""
     
     def __init__(self, anr_info: ANRInfo, content: str, intelligent_engine=None, 
-                 output_format: str = 'text', source_linker: Optional[SourceLinker] = None):
+                 output_format: str = 'text', source_linker: Optional[SourceLinker] = None,
+                 asset_store: Optional[ReportAssetStore] = None, report_dir: Optional[str] = None):
         self.anr_info = anr_info
         self.content = content
         self.report_lines = []
         self.intelligent_engine = intelligent_engine or IntelligentAnalysisEngine()
         self.output_format = output_format
         self.source_linker = source_linker
+        # HTML 報告的 CSS/JS：未指定時內嵌（單檔報告），指定共用資源時引用 report_assets/ 下的檔案
+        self.asset_store = asset_store or ReportAssetStore('.', ASSET_MODE_INLINE)
+        self.report_dir = report_dir
         
         # 如果是 HTML 格式，創建 HTML 生成器
         if output_format == 'html' and source_linker:
@@ -823,6 +910,48 @@ class ANRReportGenerator:
             except:
                 return error_msg
 
+    def build_record(self) -> Dict:
+        """產生精簡的結構化記錄（根本原因、嚴重程度、關鍵堆疊等）"""
+        main = self.anr_info.main_thread
+        timeout_info = self.anr_info.timeout_info or {}
+        
+        record = {
+            'type': 'anr',
+            'root_cause': self._quick_root_cause(),
+            'severity': self._assess_severity(),
+            'process_name': self.anr_info.process_name,
+            'pid': self.anr_info.pid,
+            'timestamp': self.anr_info.timestamp,
+            'anr_type': self.anr_info.anr_type.value,
+            'wait_time': int(timeout_info.get('wait_time') or 0),
+            'thread_state': main.state.value if main else '',
+            'key_stack': '',
+            'key_stack_num': None,
+            'key_stack_reason': '',
+            'stack_marker': '',
+        }
+        
+        if main and main.backtrace:
+            frame_importances = self._analyze_frame_importance(main.backtrace)
+            key_frames = self._get_key_stack_frames(main.backtrace, frame_importances)
+            if key_frames:
+                frame_num, frame, importance = key_frames[0]
+                record['key_stack'] = frame
+                record['key_stack_num'] = frame_num
+                record['key_stack_reason'] = importance.get('explanation') or ''
+                record['stack_marker'] = importance['marker']
+        
+        # 分群特徵（主線程堆疊簽名、ANR 類型、鎖等待圖形狀、Binder 目標）
+        record['cluster_features'] = ANRSignatureFeatures.extract(self.anr_info)
+        
+        # 跨執行簽名索引使用的堆疊簽名
+        record['stack_signature'] = (
+            TrendAnalyzer()._generate_stack_signature(main.backtrace[:5])
+            if main and main.backtrace else ''
+        )
+        
+        return record
+
     def _generate_text_report(self) -> str:
         self._add_summary()
         self._add_basic_info()
@@ -852,9 +981,7 @@ class ANRReportGenerator:
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>ANR 分析報告 - {self.anr_info.process_name}</title>
-    <style>
-        {self._get_report_css()}
-    </style>
+    {self.asset_store.style_tag('anr-report', self._get_report_css(), self.report_dir)}
 </head>
 <body>
     <div class="container">
@@ -913,9 +1040,7 @@ class ANRReportGenerator:
         </footer>
     </div>
     
-    <script>
-        ''' + self._get_report_javascript() + '''
-    </script>
+    ''' + self.asset_store.script_tag('anr-report', self._get_report_javascript(), self.report_dir) + '''
 </body>
 </html>'''
         
@@ -2038,7 +2163,7 @@ class ANRReportGenerator:
         
         for thread in self.anr_info.all_threads:
             if thread.waiting_info and 'held by' in thread.waiting_info:
-                match = re.search(r'held by (?:thread\s+)?(\d+)', thread.waiting_info)
+                match = patterns_registry.ANR_HELD_BY.search(thread.waiting_info)
                 if match:
                     waiting_graph[thread.tid] = match.group(1)
         
@@ -3123,7 +3248,7 @@ class ANRReportGenerator:
         
         for thread in self.anr_info.all_threads:
             if thread.waiting_info and 'held by' in thread.waiting_info:
-                match = re.search(r'held by (?:thread\s+)?(\d+)', thread.waiting_info)
+                match = patterns_registry.ANR_HELD_BY.search(thread.waiting_info)
                 if match:
                     waiting_graph[thread.tid] = match.group(1)
         
@@ -3158,7 +3283,7 @@ class ANRReportGenerator:
         
         for thread in self.anr_info.all_threads:
             if thread.waiting_info and 'held by' in thread.waiting_info:
-                match = re.search(r'held by (?:thread\s+)?(\d+)', thread.waiting_info)
+                match = patterns_registry.ANR_HELD_BY.search(thread.waiting_info)
                 if match:
                     waiting_graph[thread.tid] = match.group(1)
         
@@ -3496,6 +3621,9 @@ class ANRReportGenerator:
 class TombstoneAnalyzer(BaseAnalyzer):
     """Tombstone 分析器"""
     
+    # 離線符號解析（由 LogAnalyzerSystem 在提供符號資料夾時設定，只查詢持久快取）
+    symbolizer: Optional[Symbolizer] = None
+    
     def _init_patterns(self) -> Dict:
         """初始化 Tombstone 分析模式"""
         return {
@@ -3556,6 +3684,7 @@ class TombstoneAnalyzer(BaseAnalyzer):
     @time_tracker("解析 Tombstone 檔案")
     def analyze(self, file_path: str) -> str:
         """分析 Tombstone 檔案"""
+        self.last_record = None
         try:
             with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
                 content = f.read()
@@ -3582,9 +3711,12 @@ class TombstoneAnalyzer(BaseAnalyzer):
         
         # 解析崩潰堆疊
         crash_backtrace = self._extract_backtrace(content)
+        if self.symbolizer is not None:
+            # 補上批次符號解析的結果（函式與 檔案:行號）
+            self.symbolizer.annotate(crash_backtrace, content)
         
-        # 解析記憶體映射
-        memory_map = self._extract_memory_map(content)
+        # 解析記憶體映射（完整解析為區間表，報告只顯示前 100 行）
+        memory_regions = self._extract_memory_map(content)
         
         # 解析打開的檔案
         open_files = self._extract_open_files(content)
@@ -3609,9 +3741,10 @@ class TombstoneAnalyzer(BaseAnalyzer):
             abort_message=abort_message,
             crash_backtrace=crash_backtrace,
             all_threads=all_threads,
-            memory_map=memory_map,
+            memory_map=memory_regions.lines[:100],
             open_files=open_files,
-            registers=registers
+            registers=registers,
+            memory_regions=memory_regions
         )
         
         # 新增：加入 Java 堆疊
@@ -3933,7 +4066,7 @@ class TombstoneAnalyzer(BaseAnalyzer):
         if backtrace_text:
             # 解析堆疊幀
             for pattern in self.patterns['backtrace_patterns']:
-                frames = re.findall(pattern, backtrace_text, re.MULTILINE)
+                frames = compiled(pattern, re.MULTILINE).findall(backtrace_text)
                 
                 for frame_match in frames:
                     if len(frame_match) >= 3:
@@ -3957,16 +4090,20 @@ class TombstoneAnalyzer(BaseAnalyzer):
     
     def _demangle_symbol(self, symbol: str) -> str:
         """嘗試 demangle C++ 符號"""
-        # 這是簡化版本，實際應該調用 c++filt
+        if symbol.startswith('_Z') and self.symbolizer is not None:
+            # 啟用符號解析時交給常駐的 c++filt
+            demangled = self.symbolizer.demangle(symbol)
+            if demangled:
+                return demangled
+        
+        # 沒有 c++filt 時只標記
         if symbol.startswith('_Z'):
             # C++ mangled symbol
             return f"{symbol} (C++ mangled)"
         return symbol
     
-    def _extract_memory_map(self, content: str) -> List[str]:
-        """提取記憶體映射"""
-        memory_map = []
-        
+    def _extract_memory_map(self, content: str) -> MemoryMap:
+        """提取記憶體映射（解析一次，建立依位址排序的區間表）"""
         # 查找 memory map 區段
         map_patterns = [
             r'memory map.*?:\s*\n(.*?)(?:\n\n|open files:|$)',
@@ -3977,17 +4114,12 @@ class TombstoneAnalyzer(BaseAnalyzer):
         for pattern in map_patterns:
             map_section = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
             if map_section:
-                map_text = map_section.group(1)
-                
-                # 解析記憶體映射行
-                for line in map_text.splitlines():
-                    if re.match(r'[0-9a-f]+-[0-9a-f]+\s+[rwxps-]+', line):
-                        memory_map.append(line.strip())
-                
-                if memory_map:
-                    break
+                # 解析記憶體映射行（含縮排與 tombstone 的 ' 分隔位址格式）
+                memory_regions = MemoryMap.parse(map_section.group(1).splitlines())
+                if memory_regions:
+                    return memory_regions
         
-        return memory_map[:100]  # 限制數量
+        return MemoryMap()
     
     def _extract_open_files(self, content: str) -> List[str]:
         """提取打開的檔案"""
@@ -4008,7 +4140,7 @@ class TombstoneAnalyzer(BaseAnalyzer):
                     line = line.strip()
                     if line and not line.startswith('-'):
                         # 解析文件描述符資訊
-                        fd_match = re.match(r'(\d+):\s+(.+)', line)
+                        fd_match = patterns_registry.TOMBSTONE_FD_LINE.match(line)
                         if fd_match:
                             open_files.append(f"fd {fd_match.group(1)}: {fd_match.group(2)}")
                         else:
@@ -4035,8 +4167,8 @@ class TombstoneAnalyzer(BaseAnalyzer):
                 reg_text = reg_section.group(1)
                 
                 # 解析寄存器
-                for reg_pattern in self.patterns['register_patterns']:
-                    matches = re.findall(reg_pattern, reg_text)
+                for reg_regex in self.compiled_patterns['register_patterns']:
+                    matches = reg_regex.findall(reg_text)
                     
                     for reg_name, reg_value in matches:
                         registers[reg_name] = reg_value
@@ -4073,7 +4205,7 @@ class TombstoneAnalyzer(BaseAnalyzer):
                 thread_text = thread_section.group(1)
                 
                 # 解析每個線程
-                thread_blocks = re.split(r'\n(?=tid=|Thread \d+)', thread_text)
+                thread_blocks = patterns_registry.TOMBSTONE_THREAD_SPLIT.split(thread_text)
                 
                 for block in thread_blocks:
                     if 'tid=' in block or 'Thread' in block:
@@ -4088,8 +4220,8 @@ class TombstoneAnalyzer(BaseAnalyzer):
     def _parse_thread_block(self, block: str) -> Optional[ThreadInfo]:
         """解析線程區塊"""
         # 提取線程資訊
-        tid_match = re.search(r'tid=(\d+)', block)
-        name_match = re.search(r'name=([^\s]+)', block)
+        tid_match = patterns_registry.TOMBSTONE_TID.search(block)
+        name_match = patterns_registry.TOMBSTONE_THREAD_NAME.search(block)
         
         if tid_match:
             thread = ThreadInfo(
@@ -4101,10 +4233,10 @@ class TombstoneAnalyzer(BaseAnalyzer):
             # 提取堆疊
             stack_lines = []
             for line in block.splitlines():
-                if re.match(r'\s*#\d+\s+pc', line):
+                if patterns_registry.TOMBSTONE_PC_FRAME.match(line):
                     stack_lines.append(line.strip())
             
-            thread.backtrace = stack_lines
+            thread.backtrace = Backtrace(stack_lines)
             return thread
         
         return None
@@ -4137,17 +4269,22 @@ class TombstoneAnalyzer(BaseAnalyzer):
     
     def _generate_report(self, info: TombstoneInfo, content: str) -> str:
         """生成 Tombstone 報告"""
-        generator = TombstoneReportGenerator(info, content)
-        return generator.generate()
+        generator = TombstoneReportGenerator(info, content, self.signature_index)
+        report = generator.generate()
+        try:
+            self.last_record = generator.build_record()
+        except Exception as e:
+            print(f"建立結構化記錄失敗: {e}")
+        return report
     
 class TombstoneReportGenerator:
     """Tombstone 報告生成器"""
     
-    def __init__(self, info: TombstoneInfo, content: str):
+    def __init__(self, info: TombstoneInfo, content: str, signature_index: Optional[CrashSignatureIndex] = None):
         self.info = info
         self.content = content
         self.report_lines = []
-        self.intelligent_engine = IntelligentAnalysisEngine()
+        self.intelligent_engine = IntelligentAnalysisEngine(signature_index=signature_index)
     
     def generate(self) -> str:
         """生成報告"""
@@ -4165,6 +4302,66 @@ class TombstoneReportGenerator:
         
         return "\n".join(self.report_lines)
     
+    def build_record(self) -> Dict:
+        """產生精簡的結構化記錄（信號、故障地址、崩潰點等）"""
+        signal_text = f"{self.info.signal.value[1]} (signal {self.info.signal.value[0]})"
+        
+        record = {
+            'type': 'tombstone',
+            'root_cause': self._quick_root_cause(),
+            'severity': self._assess_severity(),
+            'process_name': self.info.process_name,
+            'pid': self.info.pid,
+            'thread_name': self.info.thread_name,
+            'signal_name': self.info.signal.name,
+            'signal_type': signal_text,
+            'signal_code': self.info.signal_code,
+            'fault_addr': self.info.fault_addr,
+            'abort_message': '',
+            'key_stack': '',
+            'key_stack_num': None,
+            'key_stack_reason': '',
+            'stack_marker': '',
+            'crash_function': '',
+            'crash_lib': '',
+        }
+        
+        if self.info.abort_message:
+            abort_msg = self.info.abort_message.strip().strip('"\'')
+            if len(abort_msg) > 80:
+                abort_msg = abort_msg[:77] + "..."
+            record['abort_message'] = abort_msg
+        
+        # 崩潰點：與 _find_crash_point 相同，優先取前 5 幀中第一個有符號的幀
+        crash_frame = next((frame for frame in self.info.crash_backtrace[:5] if frame.get('symbol')), None)
+        if crash_frame is None and self.info.crash_backtrace:
+            crash_frame = self.info.crash_backtrace[0]
+        
+        if crash_frame:
+            symbol = crash_frame.get('symbol', '')
+            location = crash_frame.get('location', '')
+            record['key_stack'] = symbol or f"pc {crash_frame.get('pc', '')} {location}".strip()
+            record['key_stack_num'] = crash_frame.get('num')
+            record['key_stack_reason'] = self._get_frame_marker_tombstone(crash_frame)
+            record['stack_marker'] = '⚪'
+            record['crash_function'] = re.sub(r'\+\d+\s*$', '', symbol).strip()
+            record['crash_lib'] = os.path.basename(location) if location else ''
+        
+        # 正規化的堆疊幀 (庫名!符號，去除偏移量)，供簽名分群使用
+        record['backtrace_frames'] = []
+        for frame in self.info.crash_backtrace[:16]:
+            symbol = re.sub(r'\+\d+$', '', frame.get('symbol') or '') or frame.get('pc', '')
+            record['backtrace_frames'].append(f"{os.path.basename(frame.get('location', ''))}!{symbol}")
+        
+        # 跨執行簽名索引使用的崩潰簽名
+        try:
+            record['crash_signature'] = self.intelligent_engine._generate_crash_signature(self.info)
+        except Exception as e:
+            print(f"生成崩潰簽名失敗: {e}")
+            record['crash_signature'] = ''
+        
+        return record
+    
     def _add_summary(self):
         """添加摘要"""
         self.report_lines.extend([
@@ -4372,23 +4569,9 @@ class TombstoneReportGenerator:
             return None
         
         # 檢查是否在記憶體映射中
-        for mem_line in self.info.memory_map[:20]:
-            if '-' in mem_line:
-                parts = mem_line.split()
-                if parts:
-                    range_str = parts[0]
-                    if '-' in range_str:
-                        start_str, end_str = range_str.split('-')
-                        try:
-                            start = int(start_str, 16)
-                            end = int(end_str, 16)
-                            addr_int = int(addr, 16)
-                            if start <= addr_int <= end:
-                                # 找到對應的記憶體區域
-                                if len(parts) > 6:
-                                    return f"位於 {parts[6]}"
-                        except:
-                            pass
+        region = self.info.memory_regions.lookup(addr_int)
+        if region and region.path:
+            return f"位於 {region.path}"
         
         return None
     
@@ -4620,27 +4803,8 @@ class TombstoneReportGenerator:
     
     def _find_fault_memory_region(self) -> Optional[str]:
         """找出故障地址所在的記憶體區域"""
-        try:
-            fault_addr_int = int(self.info.fault_addr, 16)
-        except:
-            return None
-        
-        for mem_line in self.info.memory_map:
-            if '-' in mem_line:
-                parts = mem_line.split()
-                if parts:
-                    range_str = parts[0]
-                    if '-' in range_str:
-                        start_str, end_str = range_str.split('-')
-                        try:
-                            start = int(start_str, 16)
-                            end = int(end_str, 16)
-                            if start <= fault_addr_int <= end:
-                                return mem_line
-                        except:
-                            continue
-        
-        return None
+        region = self.info.memory_regions.lookup(self.info.fault_addr)
+        return region.line if region else None
     
     def _add_root_cause_analysis(self):
         """添加根本原因分析"""
@@ -4729,6 +4893,16 @@ class TombstoneReportGenerator:
                 self.report_lines.append("  • 附近區域:")
                 for region in ctx['nearby_regions'][:3]:
                     self.report_lines.append(f"    - {region}")
+            
+            if ctx.get('register_regions'):
+                self.report_lines.append("  • 指向已映射區域的暫存器:")
+                for reg_name, region in list(ctx['register_regions'].items())[:8]:
+                    self.report_lines.append(f"    - {reg_name}: {region.perms} {region.path or '[anon]'}")
+            
+            if ctx.get('non_exec_frames'):
+                self.report_lines.append("  • ⚠️ pc 位於不可執行區域的堆疊幀:")
+                for level, pc, region in ctx['non_exec_frames'][:3]:
+                    self.report_lines.append(f"    - #{level} pc {pc}: {region.line}")
         
         # 崩潰簽名
         if crash_analysis['crash_signature']:
@@ -4806,7 +4980,13 @@ class TombstoneReportGenerator:
         """添加符號解析指南"""
         self.report_lines.append("\n🔧 符號解析指南")
         
-        # 生成 addr2line 命令
+        resolved_count = sum(1 for frame in self.info.crash_backtrace if frame.get('source_location'))
+        if resolved_count:
+            self.report_lines.append(
+                f"\n✅ 已由符號資料夾解析 {resolved_count}/{len(self.info.crash_backtrace)} 個堆疊幀的源碼位置"
+            )
+        
+        # 生成 addr2line 命令（已解析的幀不需要）
         addr2line_cmds = self._generate_addr2line_commands(self.info)
         if addr2line_cmds:
             self.report_lines.append("\n📝 使用以下命令解析詳細符號:")
@@ -4834,6 +5014,8 @@ class TombstoneReportGenerator:
         for frame in tombstone_info.crash_backtrace:
             location = frame.get('location', '')
             pc = frame.get('pc', '')
+            if frame.get('source_location'):
+                continue
             
             # 只為 .so 文件生成命令
             if '.so' in location and location not in seen_libs:
@@ -4881,8 +5063,11 @@ class TombstoneReportGenerator:
             marker = self._get_frame_marker_tombstone(frame)
             self.report_lines.append(f"  #{i:02d} {frame_str} {marker}")
             
+            # 離線符號解析的源碼位置
+            if frame.get('source_location'):
+                self.report_lines.append(f"      📄 {frame['source_location']}")
             # 對關鍵幀添加額外分析
-            if i < 5 and not frame.get('symbol'):
+            elif i < 5 and not frame.get('symbol'):
                 self.report_lines.append(f"      💡 提示: 使用 addr2line 解析符號")
     
     def _generate_suggestions(self) -> Dict[str, List[str]]:
@@ -4986,14 +5171,77 @@ class AnalyzerFactory:
 class LogAnalyzerSystem:
     """日誌分析系統"""
     
-    def __init__(self, input_folder: str, output_folder: str):
+    def __init__(self, input_folder: str, output_folder: str, workers: int = 1,
+                 low_memory: bool = False, signature_db_dir: Optional[str] = None,
+                 use_signature_db: bool = True, result_cache_dir: Optional[str] = None,
+                 use_result_cache: bool = True, result_cache_max_mb: int = 2048,
+                 analyzers: Optional[Dict[str, 'BaseAnalyzer']] = None,
+                 progress_callback: Optional[Callable[[str, int, int, str], None]] = None,
+                 scan_zip: bool = True, incremental_index: bool = True,
+                 full_index_rebuild: bool = False, report_assets: str = ASSET_MODE_INLINE,
+                 original_placement: str = PLACEMENT_AUTO, symbols_dir: Optional[str] = None,
+                 symbol_cache_dir: Optional[str] = None, index_state_dir: Optional[str] = None,
+                 data_dir: Optional[str] = None):
         self.input_folder = input_folder
         self.output_folder = output_folder
+        # 並行分析的工作進程數 (1 = 單進程循序分析)
+        self.workers = max(1, workers or 1)
+        # 低記憶體模式：分析時不保留報告記錄（產生索引時讀取 .analyzed.json），
+        # 索引狀態只記錄摘要，分群完成後即釋放記錄
+        self.low_memory = low_memory
+        # 分析報告的結構化記錄 (分析報告絕對路徑 -> 記錄)
+        self.report_records: Dict[str, Dict] = {}
+        # 堆疊幀倒排索引 (正規化幀 -> 報告絕對路徑與線程)，每次產生索引時重建
+        self.frame_index = FrameIndex()
+        # 相似度分群引擎（延遲建立）
+        self._clustering_engine = None
+        # 跨執行資料（崩潰簽名索引、結果快取、索引狀態、符號快取）的資料目錄，
+        # 未指定時使用環境變數 ANR_SIGNATURE_DB_DIR；都未設定且沒有個別指定資料夾時不保存
+        self.data_dir = data_dir or CrashSignatureIndex.default_data_dir()
+        # 跨執行的崩潰簽名索引 (None 表示使用資料目錄)
+        self.signature_db_dir = signature_db_dir
+        self.use_signature_db = use_signature_db
+        self.signature_index = None
+        # 分析結果快取 (None 表示使用資料目錄下的 result_cache)
+        self.result_cache_dir = result_cache_dir
+        self.use_result_cache = use_result_cache
+        self.result_cache_max_mb = result_cache_max_mb
+        self._result_cache = None
+        # 可重複使用的分析器實例 (檔案類型 -> 分析器)，None 表示每個檔案建立新的分析器
+        self.analyzers = analyzers
+        # 進度回呼: (階段, 已完成數, 總數, 訊息)
+        self.progress_callback = progress_callback
+        # 直接分析 zip 壓縮檔內的 anr/tombstones 檔案（不需先解壓縮）
+        self.scan_zip = scan_zip
+        self._zip_reader = None
+        # 增量索引：沿用上一次的報告記錄與群組 (full_index_rebuild=True 時這次完整重建)
+        self.incremental_index = incremental_index
+        self.full_index_rebuild = full_index_rebuild
+        # 索引狀態資料夾 (None 表示使用資料目錄下的 index_state)
+        self.index_state_dir = index_state_dir
+        self._index_state = None
+        # 報告 CSS/JS：shared = 每個輸出資料夾寫一次共用檔案，inline = 內嵌在每份報告（單檔匯出）
+        self.report_assets = report_assets
+        self._report_asset_store = None
+        # 原始檔案放到輸出資料夾的方式：auto / hardlink / reflink / reference / copy
+        self.original_placement = original_placement
+        # 離線符號解析：本機符號資料夾 (None 表示停用) 與持久符號快取的資料夾 (None 表示使用資料目錄)
+        self.symbols_dir = symbols_dir
+        self.symbol_cache_dir = symbol_cache_dir
+        self._symbolizer = None
+        self._symbol_cache_tmp = None  # 沒有資料目錄時，這次執行使用的暫存符號快取
         self.stats = {
             'anr_count': 0,
             'tombstone_count': 0,
             'error_count': 0,
             'total_time': 0,
+            'signatures_new': 0,
+            'signatures_seen': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'cache_evicted': 0,
+            'original_placement': {},
+            'symbolized_frames': 0,
         }
 
     def _extract_key_stack_from_group(self, reports: List[Dict]) -> Dict:
@@ -5005,7 +5253,21 @@ class LogAnalyzerSystem:
             'reason': ''
         }
 
-        if not reports or not reports[0].get('content'):
+        if not reports:
+            return key_stack
+
+        # 結構化記錄直接提供關鍵堆疊
+        if not reports[0].get('content'):
+            report = reports[0]
+            if report.get('key_stack'):
+                marker = report.get('stack_marker') or '⚪'
+                frame_num = report.get('key_stack_num')
+                prefix = f"#{int(frame_num):02d} " if frame_num is not None and str(frame_num).isdigit() else ''
+                key_stack['frame'] = prefix + report['key_stack']
+                key_stack['marker'] = marker
+                key_stack['marker_class'] = {'🔴': 'critical', '🟡': 'important'}.get(marker, 'normal')
+                if report.get('key_stack_reason'):
+                    key_stack['reason'] = '  └─ ' + report['key_stack_reason']
             return key_stack
 
         content = reports[0]['content']
@@ -5060,8 +5322,73 @@ class LogAnalyzerSystem:
 
         return key_stack
         
+    def _build_report_record(self, file_info: Dict, analyzer_record: Optional[Dict],
+                             report_text: str, output_file: str) -> Optional[Dict]:
+        """由分析器的結構化記錄建立報告資訊（欄位與 _extract_report_info 相同，但不含 HTML 內容）"""
+        if not analyzer_record:
+            return None
+        
+        info = {
+            'path': os.path.abspath(output_file),
+            'filename': os.path.basename(output_file),
+            'type': file_info['type'],
+            'root_cause': '',
+            'severity': '',
+            'process_name': '',
+            'features': [],
+            'rel_path': os.path.relpath(output_file, self.input_folder),
+            'source_rel_path': file_info['rel_path'],
+            'key_stack': '',
+            'stack_marker': '',
+            'signal_type': '',
+            'fault_addr': '',
+            'crash_function': '',
+            'anr_type': '',
+            'wait_time': 0,
+            'thread_state': '',
+        }
+        info.update(analyzer_record)
+        info['type'] = file_info['type']
+        info['features'] = []
+        
+        if info['type'] == 'anr':
+            self._extract_anr_features(info, report_text)
+        else:
+            signal_name = info.get('signal_name', '').lower()
+            if signal_name in ['sigsegv', 'sigabrt', 'sigill', 'sigbus']:
+                info['features'].append(signal_name)
+            
+            if info.get('fault_addr') in ['0x0', '0', '00000000']:
+                info['features'].append('null_pointer')
+            elif info.get('fault_addr') == '0xdeadbaad':
+                info['features'].append('abort_marker')
+            
+            if info.get('abort_message'):
+                info['features'].append('has_abort_message')
+            
+            self._extract_tombstone_features(info, report_text)
+        
+        return info
+    
+    def _load_report_record(self, report_path: str) -> Optional[Dict]:
+        """讀取分析報告旁的 .json 結構化記錄"""
+        record_path = re.sub(r'\.analyzed\.(html|txt)$', '.analyzed.json', report_path)
+        if record_path == report_path or not os.path.exists(record_path):
+            return None
+        
+        try:
+            with open(record_path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except Exception as e:
+            print(f"讀取結構化記錄失敗: {record_path} - {e}")
+            return None
+        
+        record['path'] = os.path.abspath(report_path)
+        record['filename'] = os.path.basename(report_path)
+        return record
+    
     def _extract_report_info(self, html_content: str, file_path: str) -> Optional[Dict]:
-        """從 HTML 報告中提取關鍵信息"""
+        """從 HTML 報告中提取關鍵信息（無結構化記錄時的後備方案）"""
         
         info = {
             'path': file_path,
@@ -5287,7 +5614,7 @@ class LogAnalyzerSystem:
         
         return info if has_valid_info else None    
 
-    def _extract_anr_features(self, info: Dict, html_content: str):
+    def _extract_anr_features(self, info: Dict, content: str):
         """提取 ANR 特徵"""
         if info.get('key_stack'):
             stack_lower = info['key_stack'].lower()
@@ -5327,25 +5654,25 @@ class LogAnalyzerSystem:
             if '記憶體' in info['root_cause']:
                 info['features'].append('memory_issue')
 
-    def _extract_tombstone_features(self, info: Dict, html_content: str):
+    def _extract_tombstone_features(self, info: Dict, content: str):
         """提取 Tombstone 特徵"""
-        content_lower = html_content.lower()
+        content_lower = content.lower()
         
-        if '雙重釋放' in html_content or 'double free' in content_lower:
+        if '雙重釋放' in content or 'double free' in content_lower:
             info['features'].append('double_free')
-        if '堆損壞' in html_content or 'heap corruption' in content_lower:
+        if '堆損壞' in content or 'heap corruption' in content_lower:
             info['features'].append('heap_corruption')
-        if '緩衝區溢出' in html_content or 'buffer overflow' in content_lower:
+        if '緩衝區溢出' in content or 'buffer overflow' in content_lower:
             info['features'].append('buffer_overflow')
         if 'use-after-free' in content_lower:
             info['features'].append('use_after_free')
-        if 'FORTIFY' in html_content:
+        if 'FORTIFY' in content:
             info['features'].append('fortify_failure')
-        if 'Native' in html_content:
+        if 'Native' in content:
             info['features'].append('native_crash')
-        if 'libc.so' in html_content:
+        if 'libc.so' in content:
             info['features'].append('libc_crash')
-        if 'vendor' in html_content:
+        if 'vendor' in content:
             info['features'].append('vendor_lib_crash')
             
     def _extract_tombstone_group_feature(self, reports: List[Dict]) -> str:
@@ -5389,8 +5716,7 @@ class LogAnalyzerSystem:
         # for i, r in enumerate(reports):
         #     print(f"  {i+1}. [{r['type']}] {r.get('filename', 'Unknown')}")
         
-        # 使用 DBSCAN 聚類算法進行分組
-        from sklearn.cluster import DBSCAN
+        # 使用 DBSCAN 聚類算法進行分組（由 SignatureClusteringEngine 執行）
         import numpy as np
         
         # 設置隨機種子以確保結果一致
@@ -5411,32 +5737,18 @@ class LogAnalyzerSystem:
             # for i, r in enumerate(tombstone_reports):
             #     print(f"  {i+1}. {r.get('filename', 'Unknown')} - abort_msg: {r.get('abort_message', 'None')}")
             
-            n_tombstone = len(tombstone_reports)
-            tombstone_similarity_matrix = np.zeros((n_tombstone, n_tombstone))
-            
-            # 構建 tombstone 相似度矩陣
-            for i in range(n_tombstone):
-                for j in range(i + 1, n_tombstone):
-                    base_similarity = self._calculate_report_similarity(tombstone_reports[i], tombstone_reports[j])
-                    tombstone_similarity = self._calculate_tombstone_similarity(tombstone_reports[i], tombstone_reports[j])
-                    # Tombstone 更重視專門的相似度計算
-                    similarity = base_similarity * 0.3 + tombstone_similarity * 0.7
-                    
-                    tombstone_similarity_matrix[i, j] = similarity
-                    tombstone_similarity_matrix[j, i] = similarity
-                    
-                    print(f"    相似度 [{i},{j}]: {similarity:.2f}")
-            
-            # 對角線設為 100
-            np.fill_diagonal(tombstone_similarity_matrix, 100)
-            
-            # 轉換為距離矩陣
-            tombstone_distance_matrix = 100 - tombstone_similarity_matrix
-            
-            # Tombstone 使用較低的閾值（75分）
-            tombstone_clustering = DBSCAN(eps=25, min_samples=1, metric='precomputed')
-            tombstone_labels = tombstone_clustering.fit_predict(tombstone_distance_matrix)
+            # 透過 LSH 候選索引分群（報告數較少時使用精確矩陣）
+            engine = self._get_clustering_engine()
+            tombstone_labels = engine.cluster(
+                tombstone_reports,
+                self._tombstone_signature_tokens,
+                self._calculate_tombstone_pair_similarity,
+                SimilarityConfig.TOMBSTONE_CLUSTER_THRESHOLD
+            )
             
+            cluster_stats = engine.last_stats
+            print(f"\nTombstone 相似度計算: {cluster_stats['pairs_scored']}/{cluster_stats['total_pairs']} 組配對 "
+                  f"(模式: {cluster_stats['mode']})")
             print(f"\nTombstone 聚類結果: {tombstone_labels}")
             
             # 組織 tombstone 聚類結果
@@ -5447,31 +5759,77 @@ class LogAnalyzerSystem:
                 tombstone_clusters[label].append(tombstone_reports[idx])
             
             # 轉換 tombstone 組 - 保持原始順序
-            for label in sorted(tombstone_clusters.keys()):
-                group_reports = tombstone_clusters[label]
-                # 對組內報告排序
-                group_reports = sorted(group_reports, key=lambda r: r.get('filename', ''))
-                
-                group = self._create_similarity_group(group_reports, f"tombstone_group_{len(similarity_groups)}")
-                similarity_groups.append(group)
-                
-                print(f"\nTombstone 組 {label}:")
-                for r in group_reports:
-                    print(f"  - {r.get('filename', 'Unknown')}")
-            
-            print(f"Tombstone 分為 {len(tombstone_clusters)} 組")
+            similarity_groups.extend(self._build_similarity_groups(
+                [tombstone_clusters[label] for label in sorted(tombstone_clusters.keys())],
+                'tombstone', len(similarity_groups)
+            ))
         
         # 2. 處理 ANR 分群（類似邏輯）
         if anr_reports:
             print("\n處理 ANR 分群...")
-            # ... ANR 處理邏輯 ...
+            
+            engine = self._get_clustering_engine()
+            anr_labels = engine.cluster(
+                anr_reports,
+                self._anr_signature_tokens,
+                self._calculate_anr_pair_similarity,
+                SimilarityConfig.ANR_CLUSTER_THRESHOLD
+            )
+            
+            cluster_stats = engine.last_stats
+            print(f"\nANR 相似度計算: {cluster_stats['pairs_scored']}/{cluster_stats['total_pairs']} 組配對 "
+                  f"(模式: {cluster_stats['mode']})")
+            print(f"\nANR 聚類結果: {anr_labels}")
+            
+            # 組織 ANR 聚類結果
+            anr_clusters = {}
+            for idx, label in enumerate(anr_labels):
+                if label not in anr_clusters:
+                    anr_clusters[label] = []
+                anr_clusters[label].append(anr_reports[idx])
+            
+            similarity_groups.extend(self._build_similarity_groups(
+                [anr_clusters[label] for label in sorted(anr_clusters.keys())],
+                'anr', len(similarity_groups)
+            ))
         
-        # 按類型和數量排序（tombstone 優先，然後按數量）
-        def sort_key(group):
-            # tombstone 組優先級更高
-            is_tombstone = any(r['type'] == 'tombstone' for r in group['reports'])
-            # 獲取組內第一個報告的檔名用於次要排序
-            first_filename = group['reports'][0].get('filename', '') if group['reports'] else ''
+        return self._sort_similarity_groups(similarity_groups)
+    
+    def _build_similarity_groups(self, clusters: List[List[Dict]], report_type: str, start_index: int,
+                                 reusable_groups: Optional[Dict[Tuple[str, ...], Dict]] = None) -> List[Dict]:
+        """將分群結果（依群組第一個報告的順序排列）轉成相似度組
+        
+        reusable_groups: 成員完全相同時可直接沿用的組摘要 (成員路徑 tuple -> 不含 reports 的組資訊)
+        """
+        label = 'Tombstone' if report_type == 'tombstone' else 'ANR'
+        groups = []
+        for cluster in clusters:
+            # 對組內報告排序
+            group_reports = sorted(cluster, key=lambda r: r.get('filename', ''))
+            group_id = f"{report_type}_group_{start_index + len(groups)}"
+            
+            summary = (reusable_groups or {}).get(tuple(r.get('path', '') for r in group_reports))
+            if summary is not None:
+                group = dict(summary, reports=group_reports, group_id=group_id)
+            else:
+                group = self._create_similarity_group(group_reports, group_id)
+            groups.append(group)
+            
+            print(f"\n{label} 組 {len(groups) - 1}:")
+            for r in group_reports:
+                print(f"  - {r.get('filename', 'Unknown')}")
+        
+        print(f"{label} 分為 {len(clusters)} 組")
+        return groups
+    
+    def _sort_similarity_groups(self, similarity_groups: List[Dict]) -> List[Dict]:
+        """按類型和數量排序並輸出分組統計"""
+        # 按類型和數量排序（tombstone 優先，然後按數量）
+        def sort_key(group):
+            # tombstone 組優先級更高
+            is_tombstone = any(r['type'] == 'tombstone' for r in group['reports'])
+            # 獲取組內第一個報告的檔名用於次要排序
+            first_filename = group['reports'][0].get('filename', '') if group['reports'] else ''
             return (not is_tombstone, -group['count'], first_filename)
         
         similarity_groups.sort(key=sort_key)
@@ -5486,6 +5844,107 @@ class LogAnalyzerSystem:
         
         return similarity_groups
 
+    def _get_clustering_engine(self) -> SignatureClusteringEngine:
+        """取得簽名分群引擎"""
+        if self._clustering_engine is None:
+            self._clustering_engine = SignatureClusteringEngine(
+                num_perm=SimilarityConfig.LSH_NUM_PERM,
+                bands=SimilarityConfig.LSH_BANDS,
+                min_items_for_lsh=SimilarityConfig.LSH_MIN_REPORTS,
+                recall_tolerance=SimilarityConfig.LSH_RECALL_TOLERANCE,
+                validation_anchors=SimilarityConfig.LSH_VALIDATION_ANCHORS,
+                max_bucket_size=SimilarityConfig.LSH_MAX_BUCKET_SIZE,
+                # 低記憶體模式不載入 scikit-learn（約 100 MB），結果與 DBSCAN 相同
+                connected_components=self.low_memory,
+            )
+        return self._clustering_engine
+    
+    def _tombstone_signature_tokens(self, report: Dict) -> Set[str]:
+        """Tombstone 簽名 token：堆疊幀、Abort Message 與信號"""
+        tokens = set()
+        
+        for idx, frame in enumerate(report.get('backtrace_frames') or []):
+            tokens.add(f"frame:{frame}")
+            if idx < 3:
+                # 頂層幀額外帶位置資訊，提高崩潰點的權重
+                tokens.add(f"top{idx}:{frame}")
+        
+        if report.get('crash_function'):
+            tokens.add(f"func:{report['crash_function']}")
+        if report.get('crash_lib'):
+            tokens.add(f"lib:{report['crash_lib']}")
+        if report.get('key_stack') and not report.get('backtrace_frames'):
+            tokens.add(f"stack:{report['key_stack']}")
+        
+        abort_message = report.get('abort_message') or ''
+        for word in re.findall(r'[A-Za-z_][\w:.]+', abort_message.lower())[:20]:
+            tokens.add(f"abort:{word}")
+        
+        if report.get('signal_type'):
+            tokens.add(f"signal:{report['signal_type']}")
+        
+        return tokens
+    
+    def _calculate_tombstone_pair_similarity(self, report1: Dict, report2: Dict) -> float:
+        """Tombstone 配對相似度（通用相似度 30% + Tombstone 專屬相似度 70%）"""
+        base_similarity = self._calculate_report_similarity(report1, report2)
+        tombstone_similarity = self._calculate_tombstone_similarity(report1, report2)
+        return base_similarity * 0.3 + tombstone_similarity * 0.7
+    
+    def _anr_signature_tokens(self, report: Dict) -> Set[str]:
+        """ANR 簽名 token：主線程堆疊、ANR 類型、鎖等待圖形狀與 Binder 目標"""
+        features = report.get('cluster_features')
+        if features:
+            return ANRSignatureFeatures.tokens(features)
+        
+        # 舊版記錄沒有分群特徵時，以關鍵堆疊與 ANR 類型代替
+        tokens = set()
+        if report.get('key_stack'):
+            tokens.add(f"stack:{report['key_stack']}")
+        if report.get('anr_type'):
+            tokens.add(f"type:{report['anr_type']}")
+        for feature in report.get('features') or []:
+            tokens.add(f"feature:{feature}")
+        return tokens
+    
+    def _calculate_anr_pair_similarity(self, report1: Dict, report2: Dict) -> float:
+        """ANR 配對相似度（通用相似度 30% + ANR 分群特徵相似度 70%）"""
+        base_similarity = self._calculate_report_similarity(report1, report2)
+        features1 = report1.get('cluster_features')
+        features2 = report2.get('cluster_features')
+        if not features1 or not features2:
+            return base_similarity
+        
+        # 主線程堆疊的幀集合直接取自倒排索引
+        frame_sets = (
+            self.frame_index.frame_set(*self._report_stack_key(report1)),
+            self.frame_index.frame_set(*self._report_stack_key(report2)),
+        )
+        if None in frame_sets:
+            frame_sets = None
+        return base_similarity * 0.3 + ANRSignatureFeatures.similarity(features1, features2, frame_sets) * 0.7
+    
+    def _report_stack_key(self, report: Dict) -> Tuple[str, str]:
+        """報告在堆疊幀索引中的 (報告路徑, 線程)：ANR 為主線程，Tombstone 為崩潰線程"""
+        if report.get('type') == 'tombstone':
+            return report.get('path', ''), report.get('thread_name') or 'crash'
+        return report.get('path', ''), 'main'
+    
+    def _index_report_frames(self, report: Dict):
+        """將報告的正規化堆疊加入倒排索引（重複加入時以新的記錄取代）"""
+        path, thread = self._report_stack_key(report)
+        if not path:
+            return
+        
+        if report.get('type') == 'tombstone':
+            frames = report.get('backtrace_frames')
+        else:
+            frames = (report.get('cluster_features') or {}).get('main_stack')
+        
+        self.frame_index.remove(path)
+        if frames:
+            self.frame_index.add(path, thread, frames, normalized=True)
+    
     def _create_similarity_group(self, group_reports: List[Dict], group_id: str) -> Dict:
         """創建相似度組"""
         # 計算組內平均相似度
@@ -5754,7 +6213,11 @@ class LogAnalyzerSystem:
         return cause
 
     def _extract_stack_pattern(self, stack: str) -> str:
-        """從堆疊中提取模式"""
+        """從堆疊中提取模式（每個不同的關鍵堆疊只判斷一次）"""
+        return self.frame_index.symbols.derive('group_stack_pattern', stack, self._match_stack_pattern)
+    
+    def _match_stack_pattern(self, stack: str) -> str:
+        """比對堆疊所屬的問題模式"""
         # 優先匹配特定的模式
         patterns = {
             'Binder IPC 阻塞': ['BinderProxy.transact', 'Binder.transact'],
@@ -5985,11 +6448,18 @@ class LogAnalyzerSystem:
         if len(reports) < 2:
             return 100.0
         
+        pairs = [(i, j) for i in range(len(reports)) for j in range(i + 1, len(reports))]
+        
+        # 大型組只抽樣部分配對，避免 O(n²) 計算
+        max_pairs = SimilarityConfig.GROUP_SIMILARITY_MAX_PAIRS
+        if len(pairs) > max_pairs:
+            import random
+            pairs = random.Random(42).sample(pairs, max_pairs)
+        
         similarities = []
-        for i in range(len(reports)):
-            for j in range(i + 1, len(reports)):
-                sim = self._calculate_report_similarity(reports[i], reports[j])
-                similarities.append(sim)
+        for i, j in pairs:
+            sim = self._calculate_report_similarity(reports[i], reports[j])
+            similarities.append(sim)
         
         return sum(similarities) / len(similarities) if similarities else 0
 
@@ -6249,51 +6719,38 @@ class LogAnalyzerSystem:
         
         if stack1 == stack2:
             return 1.0
-
-        # 特別處理 tombstone 格式的堆疊
-        # 格式: pc 00085e64 libc.so (__ioctl+12)
-        tombstone_pattern = r'pc\s+([0-9a-fA-F]+)\s+([^\s]+)\s+\(([^)]+)\)'
         
-        match1 = re.match(tombstone_pattern, stack1)
-        match2 = re.match(tombstone_pattern, stack2)
+        # 每個不同的關鍵堆疊只解析一次，逐對比較只剩特徵比對
+        profile1 = self._stack_profile(stack1)
+        profile2 = self._stack_profile(stack2)
         
-        if match1 and match2:
+        native1 = profile1['native']
+        native2 = profile2['native']
+        if native1 and native2:
             # 比較各個組成部分
-            pc1, lib1, func1 = match1.groups()
-            pc2, lib2, func2 = match2.groups()
-            
             similarity_score = 0.0
             
             # 庫名相同（權重 40%）
-            if lib1 == lib2:
+            if native1['lib'] == native2['lib']:
                 similarity_score += 0.4
-            elif lib1.split('/')[-1] == lib2.split('/')[-1]:
+            elif native1['lib_name'] == native2['lib_name']:
                 similarity_score += 0.3
             
-            # 函數名相同（權重 50%）
-            # 移除偏移量比較
-            func1_clean = re.sub(r'\+\d+$', '', func1)
-            func2_clean = re.sub(r'\+\d+$', '', func2)
-            
-            if func1_clean == func2_clean:
+            # 函數名相同（權重 50%），已移除偏移量
+            if native1['func'] == native2['func']:
                 similarity_score += 0.5
-            elif func1_clean.split('::')[-1] == func2_clean.split('::')[-1]:
+            elif native1['func_name'] == native2['func_name']:
                 similarity_score += 0.3
             
             # PC 地址接近（權重 10%）
-            try:
-                pc1_int = int(pc1, 16)
-                pc2_int = int(pc2, 16)
-                if abs(pc1_int - pc2_int) < 0x1000:  # 4KB 範圍內
-                    similarity_score += 0.1
-            except:
-                pass
+            if abs(native1['pc'] - native2['pc']) < 0x1000:  # 4KB 範圍內
+                similarity_score += 0.1
             
             return similarity_score
-                    
+        
         # 提取關鍵元素
-        key_elements1 = self._extract_stack_elements(stack1)
-        key_elements2 = self._extract_stack_elements(stack2)
+        key_elements1 = profile1['elements']
+        key_elements2 = profile2['elements']
         
         # 多維度相似度計算
         similarity_scores = []
@@ -6310,20 +6767,48 @@ class LogAnalyzerSystem:
             similarity_scores.append(0.1)  # 完全不同
         
         # 2. 關鍵詞相似度
-        keywords1 = self._extract_stack_keywords(stack1)
-        keywords2 = self._extract_stack_keywords(stack2)
+        keywords1 = profile1['keywords']
+        keywords2 = profile2['keywords']
         if keywords1 and keywords2:
-            keyword_similarity = len(keywords1.intersection(keywords2)) / len(keywords1.union(keywords2))
+            keyword_similarity = len(keywords1 & keywords2) / len(keywords1 | keywords2)
             similarity_scores.append(keyword_similarity)
         
         # 3. 模式相似度（檢查是否都是同類型問題）
-        pattern1 = self._identify_stack_pattern(stack1)
-        pattern2 = self._identify_stack_pattern(stack2)
+        pattern1 = profile1['pattern']
+        pattern2 = profile2['pattern']
         if pattern1 == pattern2 and pattern1 != 'unknown':
             similarity_scores.append(0.8)
         
         # 返回加權平均
         return sum(similarity_scores) / len(similarity_scores) if similarity_scores else 0.0
+    
+    def _stack_profile(self, stack: str) -> Dict:
+        """取得關鍵堆疊的比對特徵（由整批共用的符號表快取）"""
+        return self.frame_index.symbols.derive('stack_profile', stack, self._build_stack_profile)
+    
+    def _build_stack_profile(self, stack: str) -> Dict:
+        """解析關鍵堆疊：tombstone 格式的組成部分、類別 / 方法、關鍵詞與模式"""
+        native = None
+        # 特別處理 tombstone 格式的堆疊
+        # 格式: pc 00085e64 libc.so (__ioctl+12)
+        tombstone_match = re.match(r'pc\s+([0-9a-fA-F]+)\s+([^\s]+)\s+\(([^)]+)\)', stack)
+        if tombstone_match:
+            pc, lib, func = tombstone_match.groups()
+            func_clean = re.sub(r'\+\d+$', '', func)
+            native = {
+                'pc': int(pc, 16),
+                'lib': lib,
+                'lib_name': lib.split('/')[-1],
+                'func': func_clean,
+                'func_name': func_clean.split('::')[-1],
+            }
+        
+        return {
+            'native': native,
+            'elements': self._extract_stack_elements(stack),
+            'keywords': frozenset(self._extract_stack_keywords(stack)),
+            'pattern': self._identify_stack_pattern(stack),
+        }
 
     def _extract_stack_keywords(self, stack: str) -> Set[str]:
         """提取堆疊關鍵詞"""
@@ -6388,7 +6873,12 @@ class LogAnalyzerSystem:
         return elements
                 
     def analyze(self):
-        """執行分析"""
+        """執行分析（整次執行共用堆疊幀表與符號表，結束後不再保留）"""
+        with analysis_frame_scope():
+            self._run_analysis()
+    
+    def _run_analysis(self):
+        """掃描、分析、產生索引並顯示統計"""
         start_time = time.time()
         
         print("🚀 啟動進階版 ANR/Tombstone 分析系統...")
@@ -6400,29 +6890,142 @@ class LogAnalyzerSystem:
         os.makedirs(self.output_folder, exist_ok=True)
         
         # 掃描檔案
+        self._report_progress('scan', 0, 0, '掃描檔案')
         files_to_analyze = self._scan_files()
         print(f"📊 找到 {len(files_to_analyze)} 個檔案需要分析")
         print("")
+        self._report_progress('scan', len(files_to_analyze), len(files_to_analyze),
+                              f"找到 {len(files_to_analyze)} 個檔案")
+        
+        # 開啟跨執行的崩潰簽名索引
+        self._open_signature_index()
+        
+        # 離線符號解析：分析前一次批次解析整批 tombstone 的 pc
+        if self.symbols_dir:
+            self._symbolize_tombstones(files_to_analyze)
         
         # 分析檔案
         index_data = {}
-        for file_info in files_to_analyze:
+        try:
+            if self.workers > 1 and len(files_to_analyze) > 1:
+                self._analyze_files_parallel(files_to_analyze, index_data)
+            else:
+                for done, file_info in enumerate(files_to_analyze, 1):
+                    try:
+                        self._analyze_file(file_info, index_data)
+                    except Exception as e:
+                        print(f"❌ 分析 {file_info['path']} 時發生錯誤: {str(e)}")
+                        self.stats['error_count'] += 1
+                    self._report_progress('analyze', done, len(files_to_analyze), file_info['name'])
+        finally:
+            self._close_signature_index()
+            if self._symbolizer is not None:
+                self._symbolizer.close()
+                self._symbolizer = None
+            if self._symbol_cache_tmp is not None:
+                shutil.rmtree(self._symbol_cache_tmp, ignore_errors=True)
+                self.symbol_cache_dir = self._symbol_cache_tmp = None
+            if self._zip_reader is not None:
+                self._zip_reader.close()
+                self._zip_reader = None
+        
+        # 快取超過容量上限時淘汰最舊的項目
+        cache = self._get_result_cache()
+        if cache is not None:
             try:
-                self._analyze_file(file_info, index_data)
-            except Exception as e:
-                print(f"❌ 分析 {file_info['path']} 時發生錯誤: {str(e)}")
-                self.stats['error_count'] += 1
+                self.stats['cache_evicted'] = cache.enforce_limit()
+            except OSError as e:
+                print(f"⚠️ 清理結果快取失敗: {str(e)}")
         
         # 生成索引
+        self._report_progress('index', 0, 1, '生成索引')
         self._generate_index(index_data)
+        self._report_progress('index', 1, 1, '索引完成')
         
         # 顯示統計
         self.stats['total_time'] = time.time() - start_time
         self._show_statistics()
+        self._report_progress('done', 1, 1, '分析完成')
+    
+    def _report_progress(self, stage: str, done: int, total: int, message: str = ''):
+        """回報進度（回呼失敗不影響分析）"""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(stage, done, total, message)
+        except Exception as e:
+            print(f"⚠️ 進度回呼失敗: {str(e)}")
+    
+    def _get_analyzer(self, file_type: str) -> 'BaseAnalyzer':
+        """取得分析器（有提供共用實例時重複使用）"""
+        if self.analyzers is None:
+            analyzer = AnalyzerFactory.create_analyzer(file_type)
+        else:
+            key = file_type.lower()
+            if key not in self.analyzers:
+                self.analyzers[key] = AnalyzerFactory.create_analyzer(file_type)
+            analyzer = self.analyzers[key]
+        
+        analyzer.signature_index = self.signature_index
+        if isinstance(analyzer, TombstoneAnalyzer):
+            analyzer.symbolizer = self._get_symbolizer()
+        return analyzer
+    
+    def _get_symbolizer(self) -> Optional[Symbolizer]:
+        """取得離線符號解析器（未提供符號資料夾或無法建立時回傳 None）"""
+        if not self.symbols_dir:
+            return None
+        
+        if self._symbolizer is None:
+            if not (self.symbol_cache_dir or self.data_dir):
+                # 沒有資料目錄：符號快取只在這次執行中使用（並行分析的工作進程共用同一個暫存資料夾）
+                self.symbol_cache_dir = self._symbol_cache_tmp = tempfile.mkdtemp(prefix='anr_symbol_cache_')
+            cache_dir = self.symbol_cache_dir or self.data_dir
+            try:
+                self._symbolizer = Symbolizer(self.symbols_dir, cache_dir)
+            except Exception as e:
+                print(f"⚠️ 無法開啟符號快取，略過符號解析: {str(e)}")
+                self.symbols_dir = None
+        return self._symbolizer
+    
+    def _symbolize_tombstones(self, files_to_analyze: List[Dict]):
+        """收集整批 tombstone 的原生堆疊幀，依 (函式庫, BuildId) 分組後批次解析並寫入符號快取"""
+        symbolizer = self._get_symbolizer()
+        if symbolizer is None:
+            return
+        
+        tombstones = [file_info for file_info in files_to_analyze if file_info['type'] == 'tombstone']
+        self._report_progress('symbolize', 0, len(tombstones), '收集堆疊幀')
+        
+        frames = []
+        for file_info in tombstones:
+            try:
+                if is_zip_member_path(file_info['path']):
+                    if self._zip_reader is None:
+                        self._zip_reader = ZipArchiveReader()
+                    with self._zip_reader.open(file_info['path']) as f:
+                        content = f.read().decode('utf-8', errors='ignore')
+                else:
+                    with open(file_info['path'], 'r', encoding='utf-8', errors='ignore') as f:
+                        content = f.read()
+            except OSError as e:
+                print(f"⚠️ 讀取 {file_info['path']} 失敗，略過符號解析: {str(e)}")
+                continue
+            frames.extend(extract_native_frames(content))
+        
+        start_time = time.time()
+        resolved = symbolizer.symbolize(frames)
+        self.stats['symbolized_frames'] = resolved
+        stats = symbolizer.stats
+        print(f"🔣 符號解析: {stats['frames']} 個堆疊幀, {stats['libraries']} 組 (函式庫, BuildId), "
+              f"快取命中 {stats['cached']} 個, 新解析 {resolved} 個, 缺少符號 {stats['missing_symbols']} 組 "
+              f"({time.time() - start_time:.2f} 秒)")
+        self._report_progress('symbolize', len(tombstones), len(tombstones), '符號解析完成')
     
     def _scan_files(self) -> List[Dict]:
         """掃描檔案"""
         files = []
+        zip_files = []
         
         # print(f"\n=== 開始掃描檔案 ===")
         # print(f"輸入資料夾: {self.input_folder}")
@@ -6436,6 +7039,9 @@ class LogAnalyzerSystem:
             # 對目錄進行排序，確保遍歷順序一致
             dirs.sort()
             
+            if self.scan_zip:
+                zip_files.extend(os.path.join(root, f) for f in sorted(filenames) if f.lower().endswith('.zip'))
+            
             base_dir = os.path.basename(root).lower()
             
             # print(f"\n掃描目錄: {root}")
@@ -6461,36 +7067,14 @@ class LogAnalyzerSystem:
                 # print(f"排序後檔案列表: {sorted_filenames}")
                 
                 for filename in sorted_filenames:
-                    # 跳過特定檔案
-                    if filename.endswith('.pb') or filename.endswith('.txt.analyzed'):
-                        print(f"  跳過檔案: {filename} (副檔名過濾)")
-                        continue
-                    if base_dir == "anr" and not filename.lower().startswith('anr'):
-                        print(f"  跳過檔案: {filename} (非 ANR 檔案)")
-                        continue
-
-                    file_path = os.path.join(root, filename)
-
-                    # 檢查檔案大小，排除 0KB 的檔案
-                    try:
-                        file_size = os.path.getsize(file_path)
-                        if file_size == 0:
-                            print(f"  跳過空檔案 (0KB): {filename}")
-                            continue
-                    except OSError as e:
-                        print(f"  無法讀取檔案大小: {filename} - {str(e)}")
-                        continue
-
-                    file_type = "anr" if base_dir == "anr" else "tombstone"
-                    
-                    files.append({
-                        'path': file_path,
-                        'type': file_type,
-                        'name': filename,
-                        'rel_path': os.path.relpath(file_path, self.input_folder)
-                    })
-                    
-                    # print(f"  添加檔案: {filename} (類型: {file_type})")
+                    file_info = self._build_file_info(os.path.join(root, filename))
+                    if file_info:
+                        files.append(file_info)
+                        # print(f"  添加檔案: {filename} (類型: {file_info['type']})")
+        
+        # 壓縮檔內的 anr/tombstones 檔案
+        if zip_files:
+            files.extend(self._scan_zip_members(zip_files))
         
         # 最終對整個檔案列表進行排序
         # 使用相同的自然排序邏輯
@@ -6522,18 +7106,214 @@ class LogAnalyzerSystem:
         
         return files
     
+    def _build_file_info(self, file_path: str, verbose: bool = True) -> Optional[Dict]:
+        """檢查 anr/tombstones 資料夾中的檔案是否需要分析，需要時回傳檔案資訊"""
+        filename = os.path.basename(file_path)
+        base_dir = os.path.basename(os.path.dirname(file_path)).lower()
+        if base_dir not in ["anr", "tombstones", "tombstone"]:
+            return None
+        
+        # 跳過特定檔案
+        if filename.endswith('.pb') or filename.endswith('.txt.analyzed'):
+            if verbose:
+                print(f"  跳過檔案: {filename} (副檔名過濾)")
+            return None
+        if base_dir == "anr" and not filename.lower().startswith('anr'):
+            if verbose:
+                print(f"  跳過檔案: {filename} (非 ANR 檔案)")
+            return None
+        
+        # 檢查檔案大小，排除 0KB 的檔案
+        try:
+            file_size = os.path.getsize(file_path)
+            if file_size == 0:
+                if verbose:
+                    print(f"  跳過空檔案 (0KB): {filename}")
+                return None
+        except OSError as e:
+            if verbose:
+                print(f"  無法讀取檔案大小: {filename} - {str(e)}")
+            return None
+        
+        return {
+            'path': file_path,
+            'type': "anr" if base_dir == "anr" else "tombstone",
+            'name': filename,
+            'rel_path': os.path.relpath(file_path, self.input_folder)
+        }
+    
+    def _scan_zip_members(self, zip_files: List[str]) -> List[Dict]:
+        """掃描 zip 壓縮檔（含巢狀 zip）內的 anr/tombstones 檔案
+        
+        已有 "<名稱>.zip_extracted" 資料夾的壓縮檔由目錄掃描處理；無法直接讀取的壓縮檔
+        （加密或不支援的壓縮方式）略過。輸出位置與解壓縮後的相對路徑相同。
+        """
+        files = []
+        for zip_path in zip_files:
+            if os.path.isdir(f"{zip_path}_extracted") or not can_scan_in_place(zip_path):
+                continue
+            
+            if self._zip_reader is None:
+                self._zip_reader = ZipArchiveReader()
+            
+            for member in self._zip_reader.iter_members(zip_path):
+                # 虛擬路徑 -> 解壓縮後的相對路徑 (x.zip!/anr/a -> x.zip_extracted/anr/a)
+                segments = member['path'].split(ZIP_MEMBER_SEPARATOR)
+                parts = member_path_parts(segments[-1])
+                if len(parts) < 2 or any(part.startswith('.') for part in parts[:-1]):
+                    continue
+                
+                base_dir = parts[-2].lower()
+                if base_dir not in ["anr", "tombstones", "tombstone"]:
+                    continue
+                
+                filename = parts[-1]
+                if filename.endswith('.pb') or filename.endswith('.txt.analyzed'):
+                    continue
+                if base_dir == "anr" and not filename.lower().startswith('anr'):
+                    continue
+                if member['size'] == 0:
+                    print(f"  跳過空檔案 (0KB): {filename}")
+                    continue
+                
+                # 成員名稱可能是絕對路徑或含 '..'，每一段都轉成相對路徑後再確認仍在輸出資料夾內
+                nested = [member_path_parts(segment) for segment in segments[1:-1]]
+                if any(not segment or '..' in segment for segment in nested):
+                    continue
+                rel_segments = [os.path.relpath(segments[0], self.input_folder) + '_extracted']
+                for segment in nested:
+                    rel_segments += segment[:-1] + [segment[-1] + '_extracted']
+                rel_segments += parts
+                rel_path = os.path.join(*rel_segments)
+                if not self._is_inside_output(rel_path):
+                    print(f"  跳過輸出位置不在輸出資料夾內的成員: {member['path']}")
+                    continue
+                
+                files.append({
+                    'path': member['path'],
+                    'type': "anr" if base_dir == "anr" else "tombstone",
+                    'name': filename,
+                    'rel_path': rel_path
+                })
+        
+        return files
+    
+    def _is_inside_output(self, rel_path: str) -> bool:
+        """檢查相對路徑對應的輸出位置是否仍在輸出資料夾內"""
+        output_root = os.path.abspath(self.output_folder)
+        dest_path = os.path.abspath(os.path.join(output_root, rel_path))
+        return os.path.commonpath([output_root, dest_path]) == output_root
+    
+    def _materialize_zip_member(self, virtual_path: str, dest_path: str):
+        """將壓縮檔內的檔案串流寫到 dest_path"""
+        if self._zip_reader is not None:
+            self._zip_reader.materialize(virtual_path, dest_path)
+        else:
+            # 工作進程中沒有共用的讀取器
+            with ZipArchiveReader() as reader:
+                reader.materialize(virtual_path, dest_path)
+    
+    def _analyze_files_parallel(self, files_to_analyze: List[Dict], index_data: Dict):
+        """使用多進程並行分析檔案
+        
+        各工作進程只負責分析與寫出報告，索引與統計一律在主進程中
+        依照 _scan_files 的自然排序順序合併，確保結果與循序模式一致。
+        """
+        import concurrent.futures
+        
+        workers = min(self.workers, len(files_to_analyze))
+        print(f"⚡ 使用 {workers} 個工作進程並行分析")
+        
+        worker_options = {
+            'data_dir': self.data_dir,
+            'signature_db_dir': self.signature_db_dir,
+            'use_signature_db': self.use_signature_db,
+            'result_cache_dir': self.result_cache_dir,
+            'use_result_cache': self.use_result_cache,
+            'result_cache_max_mb': self.result_cache_max_mb,
+            'report_assets': self.report_assets,
+            'original_placement': self.original_placement,
+            'symbols_dir': self.symbols_dir,
+            'symbol_cache_dir': self.symbol_cache_dir,
+        }
+        
+        results = [None] * len(files_to_analyze)
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_analysis_worker,
+                initargs=(self.input_folder, self.output_folder, worker_options)) as executor:
+            future_to_idx = {
+                executor.submit(_process_file_in_worker, file_info): idx
+                for idx, file_info in enumerate(files_to_analyze)
+            }
+            
+            # 依原始順序合併結果：前面的檔案都完成後立即合併，不必保留全部結果到最後
+            finished = [False] * len(files_to_analyze)
+            next_idx = 0
+            for done, future in enumerate(concurrent.futures.as_completed(future_to_idx), 1):
+                idx = future_to_idx[future]
+                try:
+                    results[idx] = future.result()
+                except Exception as e:
+                    print(f"❌ 分析 {files_to_analyze[idx]['path']} 時發生錯誤: {str(e)}")
+                    self.stats['error_count'] += 1
+                finished[idx] = True
+                self._report_progress('analyze', done, len(files_to_analyze), files_to_analyze[idx]['name'])
+                
+                while next_idx < len(files_to_analyze) and finished[next_idx]:
+                    if results[next_idx] is not None:
+                        self._merge_file_result(results[next_idx], index_data)
+                        results[next_idx] = None
+                    next_idx += 1
+    
     def _analyze_file(self, file_info: Dict, index_data: Dict):
         """分析單個檔案"""
+        result = self._process_file(file_info)
+        self._merge_file_result(result, index_data)
+    
+    def _process_file(self, file_info: Dict) -> Dict:
+        """分析單個檔案並寫出報告（不修改索引與統計，可在工作進程中執行）"""
         print(f"🔍 分析 {file_info['type'].upper()}: {file_info['name']}")
         
-        # 創建分析器
-        analyzer = AnalyzerFactory.create_analyzer(file_info['type'])
+        output_dir = os.path.join(self.output_folder, os.path.dirname(file_info['rel_path']))
+        original_copy = os.path.join(output_dir, file_info['name'])
         
-        # 執行分析
-        result = analyzer.analyze(file_info['path'])
+        # 壓縮檔內的檔案：直接串流寫到原始檔副本的位置，再從副本分析
+        source_path = file_info['path']
+        if is_zip_member_path(source_path):
+            if not self._is_inside_output(file_info['rel_path']):
+                raise ValueError(f"壓縮檔成員的輸出位置不在輸出資料夾內: {source_path}")
+            os.makedirs(output_dir, exist_ok=True)
+            self._materialize_zip_member(source_path, original_copy)
+            source_path = original_copy
+        
+        # 查詢結果快取（以內容摘要 + 分析器版本為鍵）
+        source_digest = self._file_digest(source_path)
+        cache = self._get_result_cache()
+        cache_type = file_info['type']
+        if self.symbols_dir and cache_type == 'tombstone':
+            # 報告含符號解析結果，不同符號資料夾的結果分開快取
+            cache_type = f"{cache_type}|symbols={os.path.abspath(self.symbols_dir)}"
+        cache_key = cache.make_key(source_digest, cache_type) if cache and source_digest else None
+        cached = cache.get(cache_key) if cache_key else None
+        
+        html_body = None
+        if cached:
+            print(f"♻️ 使用快取結果: {file_info['name']}")
+            result = cached['text']
+            analyzer_record = cached['record']
+            # HTML 標題與原始檔連結依檔名而定，檔名相同才直接重用；
+            # 快取的 HTML 不含 CSS/JS，寫出時依這次的資源模式與報告位置重新附上
+            if cached['name'] == file_info['name']:
+                html_body = cached['html']
+        else:
+            # 創建分析器
+            analyzer = self._get_analyzer(file_info['type'])
+            
+            # 執行分析
+            result = analyzer.analyze(source_path)
+            analyzer_record = analyzer.last_record
         
         # 保存結果
-        output_dir = os.path.join(self.output_folder, os.path.dirname(file_info['rel_path']))
         os.makedirs(output_dir, exist_ok=True)
         
         # 保存文字版本
@@ -6544,7 +7324,9 @@ class LogAnalyzerSystem:
         # 生成並保存 HTML 版本
         output_file_html = os.path.join(output_dir, file_info['name'] + '.analyzed.html')
         try:
-            html_content = self._generate_html_report(result, file_info)
+            if html_body is None:
+                html_body = self._generate_html_report_body(result, file_info)
+            html_content = self._attach_report_assets(html_body, output_dir)
             with open(output_file_html, 'w', encoding='utf-8') as f:
                 f.write(html_content)
             print(f"✅ HTML 報告已生成: {output_file_html}")
@@ -6557,23 +7339,209 @@ class LogAnalyzerSystem:
             traceback.print_exc()
             
             # 如果 HTML 生成失敗，使用文字版本
+            html_body = None
             output_file = output_file_txt
         
-        # 複製原始檔案
-        original_copy = os.path.join(output_dir, file_info['name'])
-        shutil.copy2(file_info['path'], original_copy)
+        # 放置原始檔案（硬連結 / reflink / 相對符號連結 / 複製；壓縮檔內的檔案已經寫出）
+        placement = None
+        if source_path != original_copy:
+            placement = place_file(source_path, original_copy, self.original_placement)
+        
+        # 結構化記錄 (.analyzed.json) 在合併時附上簽名歷史後才寫出，見 _merge_file_result
+        record = self._build_report_record(file_info, analyzer_record, result, output_file)
+        if record:
+            record['source_digest'] = source_digest
+        
+        # 只快取成功產生結構化記錄的分析結果
+        if cache_key and not cached and analyzer_record:
+            cache.put(cache_key, file_info['name'], result, html_body, analyzer_record)
         
+        return {
+            'rel_path': file_info['rel_path'],
+            'type': file_info['type'],
+            'output_file': output_file,
+            'original_copy': original_copy,
+            'record': record,
+            'record_file': os.path.join(output_dir, file_info['name'] + '.analyzed.json'),
+            'cache_hit': bool(cached) if cache_key else None,
+            'placement': placement,
+        }
+    
+    def _merge_file_result(self, result: Dict, index_data: Dict):
+        """將單個檔案的分析結果合併到索引與統計"""
         # 更新索引（保持原有結構）
-        self._update_index(index_data, file_info['rel_path'], output_file, original_copy)
+        self._update_index(index_data, result['rel_path'], result['output_file'], result['original_copy'])
+        
+        if result.get('record'):
+            # 先寫入簽名索引，結構化記錄才帶有這份報告的歷史 (是否見過 / 首次出現 / 次數)
+            self._record_signature_history(result['record'])
+            self._save_report_record(result['record'], result['record_file'])
+            # 低記憶體模式不保留記錄，產生索引時再讀取 .analyzed.json
+            if not self.low_memory:
+                self.report_records[os.path.abspath(result['output_file'])] = result['record']
         
         # 更新統計
-        if file_info['type'] == 'anr':
+        if result.get('cache_hit') is not None:
+            self.stats['cache_hits' if result['cache_hit'] else 'cache_misses'] += 1
+        if result.get('placement'):
+            placements = self.stats['original_placement']
+            placements[result['placement']] = placements.get(result['placement'], 0) + 1
+        
+        if result['type'] == 'anr':
             self.stats['anr_count'] += 1
         else:
             self.stats['tombstone_count'] += 1
     
-    def _generate_html_report(self, text_content: str, file_info: Dict) -> str:
-        """生成 HTML 格式的分析報告（支援分割視窗）"""
+    def _get_result_cache(self) -> Optional[AnalysisResultCache]:
+        """取得分析結果快取（停用或無法建立時回傳 None）"""
+        if not self.use_result_cache:
+            return None
+        
+        if self._result_cache is None:
+            cache_dir = self._data_path(self.result_cache_dir, 'result_cache')
+            if cache_dir is None:
+                self.use_result_cache = False
+                return None
+            try:
+                self._result_cache = AnalysisResultCache(
+                    cache_dir,
+                    self._get_analyzer_version(),
+                    max_bytes=self.result_cache_max_mb * 1024 * 1024
+                )
+            except OSError as e:
+                print(f"⚠️ 無法建立結果快取，停用快取: {str(e)}")
+                self.use_result_cache = False
+                return None
+        return self._result_cache
+    
+    @staticmethod
+    def _get_analyzer_version() -> str:
+        """分析器版本：版本號加上分析模組原始碼摘要，程式修改後舊快取自動失效"""
+        global _ANALYZER_SOURCE_DIGEST
+        if _ANALYZER_SOURCE_DIGEST is None:
+            digest = hashlib.sha1()
+            module_dir = os.path.dirname(os.path.abspath(__file__))
+            for module_file in ('vp_analyze_logs.py', 'vp_analyze_logs_base.py', 'vp_analyze_logs_ext.py',
+                                'vp_analyze_logs_patterns.py', 'symbolizer.py'):
+                try:
+                    with open(os.path.join(module_dir, module_file), 'rb') as f:
+                        digest.update(f.read())
+                except OSError:
+                    pass
+            _ANALYZER_SOURCE_DIGEST = digest.hexdigest()[:12]
+        return f"{ANALYZER_VERSION}-{_ANALYZER_SOURCE_DIGEST}"
+    
+    def _data_path(self, explicit_dir: Optional[str], name: str = '') -> Optional[str]:
+        """跨執行資料的資料夾：個別指定的資料夾，否則為資料目錄下的 name；都未設定時回傳 None"""
+        if explicit_dir:
+            return explicit_dir
+        if self.data_dir:
+            return os.path.join(self.data_dir, name) if name else self.data_dir
+        return None
+    
+    def _open_signature_index(self):
+        """開啟跨執行的崩潰簽名索引（停用、未設定資料目錄或失敗時略過，不影響分析）"""
+        db_dir = self._data_path(self.signature_db_dir)
+        if not self.use_signature_db or db_dir is None:
+            return
+        
+        try:
+            self.signature_index = CrashSignatureIndex(db_dir)
+            print(f"🗂️ 崩潰簽名索引: {self.signature_index.db_path}")
+        except Exception as e:
+            print(f"⚠️ 無法開啟崩潰簽名索引，略過歷史比對: {str(e)}")
+            self.signature_index = None
+    
+    def _close_signature_index(self):
+        """提交並關閉崩潰簽名索引"""
+        if self.signature_index is None:
+            return
+        
+        try:
+            self.signature_index.close()
+        except Exception as e:
+            print(f"⚠️ 保存崩潰簽名索引失敗: {str(e)}")
+        self.signature_index = None
+    
+    def _record_signature_history(self, record: Dict):
+        """將報告簽名寫入索引，並在記錄中附上歷史資訊 (是否見過 / 首次出現 / 次數)"""
+        if self.signature_index is None:
+            return
+        
+        if record.get('type') == 'anr':
+            signature = record.get('stack_signature')
+        else:
+            signature = record.get('crash_signature')
+        if not signature:
+            return
+        
+        try:
+            history = self.signature_index.record(
+                record['type'],
+                signature,
+                record.get('source_digest') or record.get('source_rel_path', ''),
+                report_path=os.path.join(self.input_folder, record.get('source_rel_path', ''))
+            )
+        except Exception as e:
+            print(f"⚠️ 寫入崩潰簽名索引失敗: {str(e)}")
+            return
+        
+        record['history'] = history
+        if history['seen_before']:
+            self.stats['signatures_seen'] += 1
+        else:
+            self.stats['signatures_new'] += 1
+    
+    @staticmethod
+    def _save_report_record(record: Dict, record_file: str):
+        """保存結構化記錄 (.analyzed.json)，索引與相似度分群直接使用，不再回讀 HTML"""
+        try:
+            with open(record_file, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, indent=1)
+        except Exception as e:
+            print(f"❌ 保存結構化記錄失敗: {str(e)}")
+    
+    @staticmethod
+    def _file_digest(file_path: str) -> str:
+        """計算檔案內容摘要 (SHA-1)"""
+        digest = hashlib.sha1()
+        try:
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        except OSError:
+            return ''
+        return digest.hexdigest()
+    
+    def _get_report_asset_store(self) -> ReportAssetStore:
+        """取得報告共用資源（延遲建立，工作進程中各自建立）"""
+        if self._report_asset_store is None:
+            self._report_asset_store = ReportAssetStore(self.output_folder, self.report_assets)
+        return self._report_asset_store
+    
+    # 報告 HTML 中 CSS/JS 的預留位置：樣式在 <head>（報告內容之前），腳本在報告內容之後
+    _REPORT_STYLE_SLOT = '<!--report-assets:style-->'
+    _REPORT_SCRIPT_SLOT = '<!--report-assets:script-->'
+    
+    def _attach_report_assets(self, html_body: str, report_dir: Optional[str] = None) -> str:
+        """在報告 HTML 的預留位置附上這次資源模式的 CSS/JS
+
+        共用資源模式下 CSS/JS 只寫一次到 report_assets/，報告本身只保留內容資料；
+        report_dir 為報告所在資料夾，用來計算 file:// 開啟時的相對路徑。
+        只替換樣式的第一個與腳本的最後一個預留位置，報告內容中出現相同字串也不受影響
+        """
+        assets = self._get_report_asset_store()
+        style_tag = assets.style_tag('analysis-report', self._get_analysis_report_css(), report_dir)
+        script_tag = assets.script_tag('analysis-report', self._get_analysis_report_javascript(), report_dir)
+        html_body = html_body.replace(self._REPORT_STYLE_SLOT, style_tag, 1)
+        head, slot, tail = html_body.rpartition(self._REPORT_SCRIPT_SLOT)
+        return head + script_tag + tail if slot else html_body
+    
+    def _generate_html_report_body(self, text_content: str, file_info: Dict) -> str:
+        """生成 HTML 格式的分析報告（支援分割視窗），CSS/JS 以預留位置代替
+
+        內容與資源模式、輸出位置無關，可存入結果快取；寫出前以 _attach_report_assets 附上 CSS/JS
+        """
         import json
         
         # 原始檔案的相對路徑
@@ -6582,6 +7550,8 @@ class LogAnalyzerSystem:
         # 將內容分行並進行 JSON 編碼（最安全的方式）
         lines = text_content.split('\n')
         json_lines = json.dumps(lines, ensure_ascii=False)
+        style_tag = self._REPORT_STYLE_SLOT
+        script_tag = self._REPORT_SCRIPT_SLOT
         
         return f"""<!DOCTYPE html>
     <html lang="zh-TW">
@@ -6589,216 +7559,17 @@ class LogAnalyzerSystem:
         <meta charset="utf-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>{html.escape(file_info['name'])} - 分析報告</title>
-        <style>
-            * {{
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }}
-            
-            body {{
-                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-                background: #1a1a1a;
-                color: #d4d4d4;
-                overflow: hidden;
-                height: 100vh;
-            }}
-            
-            /* 分割視窗容器 */
-            .split-container {{
-                display: flex;
-                height: 100vh;
-                position: relative;
-            }}
-            
-            /* 左側面板 - 分析報告 */
-            .left-panel {{
-                flex: 1;
-                overflow-y: auto;
-                background: #1e1e1e;
-                position: relative;
-            }}
-            
-            /* 右側面板 - 原始檔案 */
-            .right-panel {{
-                flex: 0;
-                width: 0;
-                overflow-y: auto;
-                background: #252526;
-                position: relative;
-                transition: width 0.3s ease;
-            }}
-            
-            .right-panel.open {{
-                flex: 1;
-                width: 50%;
-            }}
-            
-            /* 分割條 */
-            .splitter {{
-                width: 5px;
-                background: #333;
-                cursor: col-resize;
-                position: relative;
-                display: none;
-            }}
-            
-            .splitter.visible {{
-                display: block;
-            }}
-            
-            .splitter:hover {{
-                background: #007acc;
-            }}
-            
-            /* 面板內容 */
-            .panel-content {{
-                padding: 20px;
-                font-size: 14px;
-                line-height: 1.6;
-                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-            }}
-            
-            /* 標題欄 */
-            .panel-header {{
-                position: sticky;
-                top: 0;
-                background: #2d2d30;
-                padding: 10px 20px;
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-                border-bottom: 1px solid #3e3e42;
-                z-index: 10;
-            }}
-            
-            .panel-title {{
-                font-weight: bold;
-                color: #cccccc;
-            }}
+        {style_tag}
+    </head>
+    <body>
+        <div class="split-container">
+            <!-- 左側面板 - 分析報告 -->
+            <div class="left-panel" id="leftPanel">
+                <div class="panel-content" id="reportContent">載入中...</div>
+            </div>
             
-            /* 控制按鈕 */
-            .panel-controls {{
-                display: flex;
-                gap: 10px;
-            }}
-            
-            .control-btn {{
-                display: flex;
-                align-items: center;
-                gap: 8px;
-                padding: 10px 20px;
-                background: var(--bg-secondary);
-                border: 1px solid var(--border);
-                border-radius: var(--radius);
-                color: var(--text-primary);
-                font-size: 14px;
-                font-weight: 500;
-                cursor: pointer;
-                transition: all 0.2s ease;
-            }}
-            
-            # 新增複製摘要按鈕的特殊樣式（紫色系）
-            #copySummaryBtn {{
-                display: none;  /* 初始隱藏 */
-                background: rgba(147, 51, 234, 0.1);  /* 紫色背景 */
-                border-color: rgba(147, 51, 234, 0.3);
-                color: #9333ea;
-            }}
-
-            #copySummaryBtn:hover {{
-                background: rgba(147, 51, 234, 0.2);
-                border-color: #9333ea;
-                color: #a855f7;
-            }}
-
-            #copySummaryBtn.visible {{
-                display: flex;  /* 顯示時使用 flex */
-            }}
-
-            .control-btn:hover {{
-                background: #3e3e42;
-                color: #ffffff;
-            }}
-            
-            /* 查看原始檔案連結 */
-            .view-original {{
-                color: #4ec9b0;
-                text-decoration: underline;
-                cursor: pointer;
-            }}
-            
-            .view-original:hover {{
-                color: #6edcb8;
-            }}
-            
-            /* 全屏模式 */
-            .fullscreen {{
-                position: fixed !important;
-                top: 0 !important;
-                left: 0 !important;
-                right: 0 !important;
-                bottom: 0 !important;
-                width: 100% !important;
-                height: 100% !important;
-                z-index: 9999;
-                max-width: 100% !important;
-            }}
-            
-            /* Loading */
-            .loading {{
-                text-align: center;
-                padding: 50px;
-                color: #666;
-            }}
-            
-            /* 報告行樣式 */
-            .report-line {{
-                white-space: pre-wrap;
-                word-wrap: break-word;
-                margin: 0;
-                padding: 2px 0;
-            }}
-            
-            /* 高亮樣式 */
-            .anr-type {{
-                color: #ff9800;
-                font-weight: bold;
-            }}
-            
-            .process-name {{
-                color: #4ec9b0;
-                font-weight: bold;
-            }}
-            
-            .timestamp {{
-                color: #608b4e;
-            }}
-            
-            .separator {{
-                color: #565656;
-            }}
-            
-            .emoji {{
-                font-size: 1.1em;
-            }}
-            
-            /* 原始檔案內容 */
-            .original-content {{
-                white-space: pre;
-                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="split-container">
-            <!-- 左側面板 - 分析報告 -->
-            <div class="left-panel" id="leftPanel">
-                <div class="panel-content" id="reportContent">載入中...</div>
-            </div>
-            
-            <!-- 分割條 -->
-            <div class="splitter" id="splitter"></div>
+            <!-- 分割條 -->
+            <div class="splitter" id="splitter"></div>
             
             <!-- 右側面板 - 原始檔案 -->
             <div class="right-panel" id="rightPanel">
@@ -6818,136 +7589,343 @@ class LogAnalyzerSystem:
         <script>
             // 報告內容（使用 JSON 格式最安全）
             const reportLines = {json_lines};
-            
-            // 初始化
-            document.addEventListener('DOMContentLoaded', function() {{
-                processReportContent();
-            }});
-            
-            // 處理報告內容
-            function processReportContent() {{
-                const container = document.getElementById('reportContent');
-                container.innerHTML = '';
-                
-                reportLines.forEach(function(line) {{
-                    const div = document.createElement('div');
-                    div.className = 'report-line';
-                    
-                    // 處理特殊格式
-                    let processedLine = line;
-                    
-                    // 將 "查看原始檔案" 轉換為連結
-                    if (line.includes('🔗 查看原始檔案:')) {{
-                        processedLine = line.replace(
-                            /🔗 查看原始檔案: (.+)/,
-                            '🔗 <a class="view-original" onclick="openOriginalFile()">查看原始檔案: $1</a>'
-                        );
-                    }}
-                    
-                    // 高亮關鍵字
-                    processedLine = processedLine.replace(/ANR 類型: (.+)/, 'ANR 類型: <span class="anr-type">$1</span>');
-                    processedLine = processedLine.replace(/進程名稱: (.+)/, '進程名稱: <span class="process-name">$1</span>');
-                    processedLine = processedLine.replace(/發生時間: (.+)/, '發生時間: <span class="timestamp">$1</span>');
-                    
-                    // 處理分隔線
-                    if (/^=+$/.test(processedLine)) {{
-                        processedLine = '<span class="separator">' + processedLine + '</span>';
-                    }}
-                    
-                    div.innerHTML = processedLine;
-                    container.appendChild(div);
-                }});
-            }}
-            
-            // 開啟原始檔案
-            function openOriginalFile() {{
-                const rightPanel = document.getElementById('rightPanel');
-                const splitter = document.getElementById('splitter');
-                
-                rightPanel.classList.add('open');
-                splitter.classList.add('visible');
-                
-                loadOriginalFile();
-            }}
-            
-            // 載入原始檔案
-            async function loadOriginalFile() {{
-                try {{
-                    const response = await fetch('{original_file}');
-                    const text = await response.text();
-                    
-                    const contentDiv = document.getElementById('originalContent');
-                    contentDiv.innerHTML = '';
-                    
-                    const pre = document.createElement('pre');
-                    pre.className = 'original-content';
-                    pre.textContent = text;
-                    
-                    contentDiv.appendChild(pre);
-                }} catch (error) {{
-                    document.getElementById('originalContent').innerHTML = 
-                        '<div class="loading">載入失敗: ' + error.message + '</div>';
-                }}
-            }}
-            
-            // 關閉右側面板
-            function closeRightPanel() {{
-                const rightPanel = document.getElementById('rightPanel');
-                const splitter = document.getElementById('splitter');
-                
-                rightPanel.classList.remove('open');
-                splitter.classList.remove('visible');
-            }}
-            
-            // 全屏切換
-            function toggleFullscreen(panelId) {{
-                const panel = document.getElementById(panelId);
-                panel.classList.toggle('fullscreen');
-            }}
-            
-            // 分割條拖動
-            let isResizing = false;
-            
-            document.getElementById('splitter').addEventListener('mousedown', function(e) {{
-                isResizing = true;
-                document.body.style.cursor = 'col-resize';
-                e.preventDefault();
-            }});
-            
-            document.addEventListener('mousemove', function(e) {{
-                if (!isResizing) return;
-                
-                const container = document.querySelector('.split-container');
-                const leftPanel = document.getElementById('leftPanel');
-                const rightPanel = document.getElementById('rightPanel');
-                
-                const containerWidth = container.offsetWidth;
-                const leftWidth = e.clientX;
-                const leftPercent = (leftWidth / containerWidth) * 100;
-                
-                if (leftPercent > 20 && leftPercent < 80) {{
-                    leftPanel.style.flex = '0 0 ' + leftPercent + '%';
-                    rightPanel.style.flex = '0 0 ' + (100 - leftPercent) + '%';
-                }}
-            }});
-            
-            document.addEventListener('mouseup', function() {{
-                isResizing = false;
-                document.body.style.cursor = 'default';
-            }});
-            
-            // ESC 退出全屏
-            document.addEventListener('keydown', function(e) {{
-                if (e.key === 'Escape') {{
-                    document.querySelectorAll('.fullscreen').forEach(function(el) {{
-                        el.classList.remove('fullscreen');
-                    }});
-                }}
-            }});
+            const originalFile = {json.dumps(original_file)};
         </script>
+        {script_tag}
     </body>
     </html>"""
 
+    def _get_analysis_report_css(self) -> str:
+        """分割視窗分析報告的樣式（所有報告共用）"""
+        return '''* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+body {
+    font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+    background: #1a1a1a;
+    color: #d4d4d4;
+    overflow: hidden;
+    height: 100vh;
+}
+
+/* 分割視窗容器 */
+.split-container {
+    display: flex;
+    height: 100vh;
+    position: relative;
+}
+
+/* 左側面板 - 分析報告 */
+.left-panel {
+    flex: 1;
+    overflow-y: auto;
+    background: #1e1e1e;
+    position: relative;
+}
+
+/* 右側面板 - 原始檔案 */
+.right-panel {
+    flex: 0;
+    width: 0;
+    overflow-y: auto;
+    background: #252526;
+    position: relative;
+    transition: width 0.3s ease;
+}
+
+.right-panel.open {
+    flex: 1;
+    width: 50%;
+}
+
+/* 分割條 */
+.splitter {
+    width: 5px;
+    background: #333;
+    cursor: col-resize;
+    position: relative;
+    display: none;
+}
+
+.splitter.visible {
+    display: block;
+}
+
+.splitter:hover {
+    background: #007acc;
+}
+
+/* 面板內容 */
+.panel-content {
+    padding: 20px;
+    font-size: 14px;
+    line-height: 1.6;
+    font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+}
+
+/* 標題欄 */
+.panel-header {
+    position: sticky;
+    top: 0;
+    background: #2d2d30;
+    padding: 10px 20px;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    border-bottom: 1px solid #3e3e42;
+    z-index: 10;
+}
+
+.panel-title {
+    font-weight: bold;
+    color: #cccccc;
+}
+
+/* 控制按鈕 */
+.panel-controls {
+    display: flex;
+    gap: 10px;
+}
+
+.control-btn {
+    display: flex;
+    align-items: center;
+    gap: 8px;
+    padding: 10px 20px;
+    background: var(--bg-secondary);
+    border: 1px solid var(--border);
+    border-radius: var(--radius);
+    color: var(--text-primary);
+    font-size: 14px;
+    font-weight: 500;
+    cursor: pointer;
+    transition: all 0.2s ease;
+}
+
+# 新增複製摘要按鈕的特殊樣式（紫色系）
+#copySummaryBtn {
+    display: none;  /* 初始隱藏 */
+    background: rgba(147, 51, 234, 0.1);  /* 紫色背景 */
+    border-color: rgba(147, 51, 234, 0.3);
+    color: #9333ea;
+}
+
+#copySummaryBtn:hover {
+    background: rgba(147, 51, 234, 0.2);
+    border-color: #9333ea;
+    color: #a855f7;
+}
+
+#copySummaryBtn.visible {
+    display: flex;  /* 顯示時使用 flex */
+}
+
+.control-btn:hover {
+    background: #3e3e42;
+    color: #ffffff;
+}
+
+/* 查看原始檔案連結 */
+.view-original {
+    color: #4ec9b0;
+    text-decoration: underline;
+    cursor: pointer;
+}
+
+.view-original:hover {
+    color: #6edcb8;
+}
+
+/* 全屏模式 */
+.fullscreen {
+    position: fixed !important;
+    top: 0 !important;
+    left: 0 !important;
+    right: 0 !important;
+    bottom: 0 !important;
+    width: 100% !important;
+    height: 100% !important;
+    z-index: 9999;
+    max-width: 100% !important;
+}
+
+/* Loading */
+.loading {
+    text-align: center;
+    padding: 50px;
+    color: #666;
+}
+
+/* 報告行樣式 */
+.report-line {
+    white-space: pre-wrap;
+    word-wrap: break-word;
+    margin: 0;
+    padding: 2px 0;
+}
+
+/* 高亮樣式 */
+.anr-type {
+    color: #ff9800;
+    font-weight: bold;
+}
+
+.process-name {
+    color: #4ec9b0;
+    font-weight: bold;
+}
+
+.timestamp {
+    color: #608b4e;
+}
+
+.separator {
+    color: #565656;
+}
+
+.emoji {
+    font-size: 1.1em;
+}
+
+/* 原始檔案內容 */
+.original-content {
+    white-space: pre;
+    font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+}
+'''
+
+    def _get_analysis_report_javascript(self) -> str:
+        """分割視窗分析報告的腳本（所有報告共用，報告內容由頁面中的 reportLines 提供）"""
+        return '''// 初始化
+document.addEventListener('DOMContentLoaded', function() {
+    processReportContent();
+});
+
+// 處理報告內容
+function processReportContent() {
+    const container = document.getElementById('reportContent');
+    container.innerHTML = '';
+    
+    reportLines.forEach(function(line) {
+        const div = document.createElement('div');
+        div.className = 'report-line';
+        
+        // 處理特殊格式
+        let processedLine = line;
+        
+        // 將 "查看原始檔案" 轉換為連結
+        if (line.includes('🔗 查看原始檔案:')) {
+            processedLine = line.replace(
+                /🔗 查看原始檔案: (.+)/,
+                '🔗 <a class="view-original" onclick="openOriginalFile()">查看原始檔案: $1</a>'
+            );
+        }
+        
+        // 高亮關鍵字
+        processedLine = processedLine.replace(/ANR 類型: (.+)/, 'ANR 類型: <span class="anr-type">$1</span>');
+        processedLine = processedLine.replace(/進程名稱: (.+)/, '進程名稱: <span class="process-name">$1</span>');
+        processedLine = processedLine.replace(/發生時間: (.+)/, '發生時間: <span class="timestamp">$1</span>');
+        
+        // 處理分隔線
+        if (/^=+$/.test(processedLine)) {
+            processedLine = '<span class="separator">' + processedLine + '</span>';
+        }
+        
+        div.innerHTML = processedLine;
+        container.appendChild(div);
+    });
+}
+
+// 開啟原始檔案
+function openOriginalFile() {
+    const rightPanel = document.getElementById('rightPanel');
+    const splitter = document.getElementById('splitter');
+    
+    rightPanel.classList.add('open');
+    splitter.classList.add('visible');
+    
+    loadOriginalFile();
+}
+
+// 載入原始檔案
+async function loadOriginalFile() {
+    try {
+        const response = await fetch(originalFile);
+        const text = await response.text();
+        
+        const contentDiv = document.getElementById('originalContent');
+        contentDiv.innerHTML = '';
+        
+        const pre = document.createElement('pre');
+        pre.className = 'original-content';
+        pre.textContent = text;
+        
+        contentDiv.appendChild(pre);
+    } catch (error) {
+        document.getElementById('originalContent').innerHTML = 
+            '<div class="loading">載入失敗: ' + error.message + '</div>';
+    }
+}
+
+// 關閉右側面板
+function closeRightPanel() {
+    const rightPanel = document.getElementById('rightPanel');
+    const splitter = document.getElementById('splitter');
+    
+    rightPanel.classList.remove('open');
+    splitter.classList.remove('visible');
+}
+
+// 全屏切換
+function toggleFullscreen(panelId) {
+    const panel = document.getElementById(panelId);
+    panel.classList.toggle('fullscreen');
+}
+
+// 分割條拖動
+let isResizing = false;
+
+document.getElementById('splitter').addEventListener('mousedown', function(e) {
+    isResizing = true;
+    document.body.style.cursor = 'col-resize';
+    e.preventDefault();
+});
+
+document.addEventListener('mousemove', function(e) {
+    if (!isResizing) return;
+    
+    const container = document.querySelector('.split-container');
+    const leftPanel = document.getElementById('leftPanel');
+    const rightPanel = document.getElementById('rightPanel');
+    
+    const containerWidth = container.offsetWidth;
+    const leftWidth = e.clientX;
+    const leftPercent = (leftWidth / containerWidth) * 100;
+    
+    if (leftPercent > 20 && leftPercent < 80) {
+        leftPanel.style.flex = '0 0 ' + leftPercent + '%';
+        rightPanel.style.flex = '0 0 ' + (100 - leftPercent) + '%';
+    }
+});
+
+document.addEventListener('mouseup', function() {
+    isResizing = false;
+    document.body.style.cursor = 'default';
+});
+
+// ESC 退出全屏
+document.addEventListener('keydown', function(e) {
+    if (e.key === 'Escape') {
+        document.querySelectorAll('.fullscreen').forEach(function(el) {
+            el.classList.remove('fullscreen');
+        });
+    }
+});
+'''
+
     def _update_index(self, index_data: Dict, rel_path: str, analyzed_file: str, original_file: str):
         """更新索引 - 使用絕對路徑"""
         parts = rel_path.split(os.sep)
@@ -6973,34 +7951,71 @@ class LogAnalyzerSystem:
         }
     
     def _generate_index(self, index_data: Dict):
-        """生成 HTML 索引"""
+        """生成 HTML 索引
+        
+        有上一次的索引狀態 (見 _index_state_file) 時沿用未變更報告的記錄與群組，
+        只重新分群受新增、變更或刪除的報告影響的群組；full_index_rebuild=True 時完整重建
+        """
         print(f"\n📊 最終索引數據結構:")
         print(json.dumps(index_data, indent=2, ensure_ascii=False)[:1000])
         print("...")
         
+        # 分析時保留的記錄在這裡交給 analyzed_reports，之後不再保留
+        report_records, self.report_records = self.report_records, {}
+        state = self._load_index_state()
+        previous_reports = state['reports'] if state else {}
+        
+        # 堆疊幀索引每次產生索引時重建，符號表的快取不會在長時間執行的監看模式中累積
+        self.frame_index = FrameIndex()
+        
         # 統計實際的 HTML 檔案
         anr_html_count = 0
         tombstone_html_count = 0
         
         # 收集所有分析報告用於相似度分析
         analyzed_reports = []
+        report_stats = {}  # 分析報告絕對路徑 -> (修改時間, 大小)
+        changed_paths = set()  # 與上一次索引相比新增或變更的報告
         
         for root, dirs, files in os.walk(self.output_folder):
             for file in files:
                 if file.endswith('.analyzed.html'):
                     full_path = os.path.join(root, file)
+                    abs_path = os.path.abspath(full_path)
                     rel_path = os.path.relpath(root, self.output_folder).lower()
                     
-                    # 讀取分析報告內容
                     try:
-                        with open(full_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            # 提取分析報告的關鍵信息
-                            report_info = self._extract_report_info(content, full_path)
-                            if report_info:
-                                analyzed_reports.append(report_info)
-                    except Exception as e:
-                        print(f"讀取報告失敗: {full_path} - {e}")
+                        stat = os.stat(full_path)
+                        report_stats[abs_path] = (stat.st_mtime, stat.st_size)
+                    except OSError:
+                        continue
+                    
+                    # 優先使用結構化記錄，僅在缺少記錄時才回讀 HTML 解析
+                    report_info = report_records.pop(abs_path, None)
+                    previous = previous_reports.get(abs_path)
+                    if (report_info is None and previous and 'record' in previous
+                            and (previous['mtime'], previous['size']) == report_stats[abs_path]):
+                        # 上一次索引後沒有變更，直接沿用記錄（低記憶體模式的狀態只有摘要，改讀 .analyzed.json）
+                        report_info = dict(previous['record'])
+                    if report_info is None:
+                        report_info = self._load_report_record(full_path)
+                    if report_info is None:
+                        try:
+                            with open(full_path, 'r', encoding='utf-8') as f:
+                                content = f.read()
+                                # 提取分析報告的關鍵信息
+                                report_info = self._extract_report_info(content, full_path)
+                            if report_info and self.low_memory:
+                                # 只保留特徵欄位，報告內容以 path 引用
+                                report_info.pop('content', None)
+                            del content
+                        except Exception as e:
+                            print(f"讀取報告失敗: {full_path} - {e}")
+                    if report_info:
+                        analyzed_reports.append(report_info)
+                        self._index_report_frames(report_info)
+                        if not previous or not self._same_index_record(report_info, previous):
+                            changed_paths.add(report_info.get('path', abs_path))
                     
                     if 'anr' in rel_path:
                         anr_html_count += 1
@@ -7011,17 +8026,238 @@ class LogAnalyzerSystem:
         self.stats['anr_count'] = anr_html_count
         self.stats['tombstone_count'] = tombstone_html_count
         
-        # 進行相似度分析
-        similarity_groups = self._analyze_similarity(analyzed_reports)
+        # 進行相似度分析（有上一次的群組時增量更新）
+        if state is not None:
+            similarity_groups = self._update_similarity_groups(analyzed_reports, state, changed_paths)
+        else:
+            similarity_groups = self._analyze_similarity(analyzed_reports)
+        
+        histories = {report.get('path'): report['history'] for report in analyzed_reports if report.get('history')}
+        index_manifest = self._write_index_data(self._build_index_payload(index_data, similarity_groups, histories))
+        self._save_index_state(analyzed_reports, report_stats, similarity_groups)
         
-        html_content = self._generate_html_index(index_data, similarity_groups)
+        # 索引頁只需要分塊清單：先釋放報告記錄、群組與堆疊幀索引，再產生索引頁
+        del analyzed_reports, similarity_groups, histories, state, previous_reports
+        self._index_state = None
+        if self.low_memory:
+            self.frame_index = FrameIndex()
         
+        html_content = self._generate_html_index(index_manifest)
         index_file = os.path.join(self.output_folder, 'index.html')
         with open(index_file, 'w', encoding='utf-8') as f:
             f.write(html_content)
         
         print(f"\n📝 已生成索引檔案: {index_file}")
     
+    # 不保存到索引狀態的欄位（報告內容）
+    _INDEX_STATE_VOLATILE_KEYS = ('content',)
+    # 保存到索引狀態、但不用來判斷報告是否變更的欄位（每次重新分析都會更新的簽名歷史）
+    _INDEX_STATE_UNCOMPARED_KEYS = ('history',)
+    
+    def _index_state_version(self) -> str:
+        """索引狀態版本：分析器、分群閾值或輸入資料夾改變時不沿用舊狀態"""
+        return (f"{INDEX_STATE_VERSION}:{self._get_analyzer_version()}:"
+                f"{SimilarityConfig.TOMBSTONE_CLUSTER_THRESHOLD}:{SimilarityConfig.ANR_CLUSTER_THRESHOLD}:"
+                f"{os.path.abspath(self.input_folder)}")
+    
+    def _index_state_record(self, record: Dict) -> Dict:
+        """報告記錄在索引狀態中的形式（JSON 正規化，不含易變欄位）"""
+        compact = {key: value for key, value in record.items() if key not in self._INDEX_STATE_VOLATILE_KEYS}
+        return json.loads(json.dumps(compact, ensure_ascii=False, default=str))
+    
+    def _same_index_record(self, record: Dict, previous: Dict) -> bool:
+        """報告記錄與上一次索引狀態中的項目是否相同（忽略簽名歷史；低記憶體模式的狀態以摘要比較）"""
+        if 'record' not in previous:
+            return self._index_record_digest(record) == previous.get('digest')
+        current = self._index_state_record(record)
+        for key in self._INDEX_STATE_UNCOMPARED_KEYS:
+            current.pop(key, None)
+        return current == {key: value for key, value in previous['record'].items()
+                           if key not in self._INDEX_STATE_UNCOMPARED_KEYS}
+    
+    def _index_record_digest(self, record: Dict) -> str:
+        """報告記錄的摘要（不含易變與不比較的欄位）"""
+        current = self._index_state_record(record)
+        for key in self._INDEX_STATE_UNCOMPARED_KEYS:
+            current.pop(key, None)
+        return hashlib.sha1(json.dumps(current, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def _index_state_file(self) -> Optional[str]:
+        """輸出資料夾的索引狀態檔路徑（以輸出資料夾的絕對路徑命名），停用增量索引或未設定資料目錄時回傳 None"""
+        state_dir = self._data_path(self.index_state_dir, INDEX_STATE_DIR)
+        if not self.incremental_index or state_dir is None:
+            return None
+        key = hashlib.sha1(os.path.abspath(self.output_folder).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(state_dir, f"{key}.json")
+    
+    def _load_index_state(self) -> Optional[Dict]:
+        """讀取上一次的索引狀態（停用增量索引、要求完整重建或版本不符時回傳 None）"""
+        if not self.incremental_index or self.full_index_rebuild:
+            return None
+        
+        if self._index_state is None:
+            state_file = self._index_state_file()
+            if state_file is None or not os.path.exists(state_file):
+                return None
+            try:
+                with open(state_file, 'r', encoding='utf-8') as f:
+                    self._index_state = json.load(f)
+            except Exception as e:
+                print(f"⚠️ 讀取索引狀態失敗，完整重建索引: {str(e)}")
+                return None
+        
+        if self._index_state.get('version') != self._index_state_version():
+            print("♻️ 分析器或分群設定已變更，完整重建索引")
+            self._index_state = None
+            return None
+        return self._index_state
+    
+    def _save_index_state(self, reports: List[Dict], report_stats: Dict[str, Tuple[float, int]],
+                          similarity_groups: List[Dict]):
+        """逐項寫出本次索引的狀態：報告記錄（低記憶體模式只寫摘要）、群組成員與群組摘要
+        
+        狀態不在記憶體中組成完整的字典，先寫暫存檔再改名；下一次產生索引時重新讀取
+        """
+        state_file = self._index_state_file()
+        if state_file is None:
+            return
+        tmp_file = f"{state_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(state_file), exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write('{"version": ' + json.dumps(self._index_state_version(), ensure_ascii=False))
+                f.write(', "reports": {')
+                first = True
+                for report in reports:
+                    path = report.get('path')
+                    if path not in report_stats:
+                        continue
+                    mtime, size = report_stats[path]
+                    entry = {'mtime': mtime, 'size': size}
+                    if self.low_memory:
+                        entry['digest'] = self._index_record_digest(report)
+                    else:
+                        entry['record'] = self._index_state_record(report)
+                    f.write(('' if first else ', ') + json.dumps(path, ensure_ascii=False) + ': '
+                            + json.dumps(entry, ensure_ascii=False))
+                    first = False
+                
+                f.write('}, "groups": [')
+                first = True
+                for group in similarity_groups:
+                    if not group['reports']:
+                        continue
+                    summary = {key: value for key, value in group.items() if key not in ('reports', 'group_id')}
+                    entry = {
+                        'type': group['reports'][0]['type'],
+                        'members': [report.get('path', '') for report in group['reports']],
+                        'summary': summary,
+                    }
+                    f.write(('' if first else ', ') + json.dumps(entry, ensure_ascii=False, default=str))
+                    first = False
+                f.write(']}')
+            os.replace(tmp_file, state_file)
+            # 完整重建只作用於這一次，之後（例如監看模式）改為增量更新
+            self.full_index_rebuild = False
+        except OSError as e:
+            print(f"⚠️ 保存索引狀態失敗: {str(e)}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+    
+    def _update_similarity_groups(self, reports: List[Dict], state: Dict, changed_paths: Set[str]) -> List[Dict]:
+        """以上一次的群組為基礎增量分群
+        
+        成員都沒有變更的群組直接沿用（含組摘要）；含有變更或已刪除報告的群組解散，
+        其餘成員與新增/變更的報告逐一和沿用的群組及彼此比較精確相似度，以 union-find 合併。
+        
+        只有完整重建使用精確相似度矩陣時（報告數少於 SimilarityConfig.LSH_MIN_REPORTS），
+        結果才與完整重建 (DBSCAN, min_samples=1 的連通分量) 一致。完整重建改用 LSH 候選時，
+        本身只是精確連通分量的近似（可能拆開群組），增量結果同樣是近似，兩者不保證相同。
+        """
+        # 與完整分群相同的報告順序，群組依第一個成員的順序編號
+        reports = sorted(reports, key=lambda r: (
+            r['type'],
+            r.get('filename', ''),
+            r.get('path', '')
+        ))
+        by_path = {report.get('path'): report for report in reports}
+        order = {report.get('path'): idx for idx, report in enumerate(reports)}
+        
+        similarity_groups = []
+        reusable_groups = {}
+        kept_count = 0
+        placed_count = 0
+        pairs_scored = 0
+        
+        for report_type, similarity_fn, threshold in (
+            ('tombstone', self._calculate_tombstone_pair_similarity, SimilarityConfig.TOMBSTONE_CLUSTER_THRESHOLD),
+            ('anr', self._calculate_anr_pair_similarity, SimilarityConfig.ANR_CLUSTER_THRESHOLD),
+        ):
+            type_paths = [report.get('path') for report in reports if report['type'] == report_type]
+            if not type_paths:
+                continue
+            
+            kept = []  # 沿用的群組（成員報告）
+            pending = []  # 需要重新放入群組的報告路徑
+            grouped = set()
+            for group in state.get('groups', []):
+                if group['type'] != report_type:
+                    continue
+                members = group['members']
+                grouped.update(members)
+                if all(path in by_path and path not in changed_paths for path in members):
+                    kept.append([by_path[path] for path in members])
+                    reusable_groups[tuple(members)] = group['summary']
+                else:
+                    pending.extend(path for path in members if path in by_path)
+            pending.extend(path for path in type_paths if path not in grouped)
+            pending = [path for path in dict.fromkeys(pending) if by_path[path]['type'] == report_type]
+            
+            # union-find：節點 0..K-1 為沿用的群組，K 之後為待放入的報告
+            parent = list(range(len(kept) + len(pending)))
+            
+            def find(node):
+                while parent[node] != node:
+                    parent[node] = parent[parent[node]]
+                    node = parent[node]
+                return node
+            
+            items = [by_path[path] for path in pending]
+            for i, item in enumerate(items):
+                node = len(kept) + i
+                for k, members in enumerate(kept):
+                    if find(node) == find(k):
+                        continue
+                    for other in members:
+                        pairs_scored += 1
+                        if similarity_fn(item, other) >= threshold:
+                            parent[find(k)] = find(node)
+                            break
+                for j in range(i + 1, len(items)):
+                    other_node = len(kept) + j
+                    if find(node) == find(other_node):
+                        continue
+                    pairs_scored += 1
+                    if similarity_fn(item, items[j]) >= threshold:
+                        parent[find(other_node)] = find(node)
+            
+            components = {}
+            for k, members in enumerate(kept):
+                components.setdefault(find(k), []).extend(members)
+            for i, item in enumerate(items):
+                components.setdefault(find(len(kept) + i), []).append(item)
+            
+            clusters = sorted(components.values(),
+                              key=lambda cluster: min(order[report.get('path')] for report in cluster))
+            similarity_groups.extend(self._build_similarity_groups(
+                clusters, report_type, len(similarity_groups), reusable_groups
+            ))
+            kept_count += len(kept)
+            placed_count += len(items)
+        
+        print(f"\n♻️ 增量分群: 沿用 {kept_count} 組，重新分群 {placed_count} 份報告，計算 {pairs_scored} 組配對")
+        return self._sort_similarity_groups(similarity_groups)
+    
     def _get_original_styles(self) -> str:
         """獲取原始樣式（保持不變）"""
         return """
@@ -7360,406 +8596,1251 @@ class LogAnalyzerSystem:
             }
         """
             
-    def _generate_html_index(self, index_data: Dict, similarity_groups: List[Dict] = None) -> str:
-        """生成 HTML 索引內容 - 增強美化版"""
+    def _build_index_payload(self, index_data: Dict, similarity_groups: Optional[List[Dict]],
+                             histories: Optional[Dict[str, Dict]] = None) -> Dict[str, List]:
+        """將檔案樹與相似度組轉成索引頁使用的精簡資料
+        
+        histories: 分析報告絕對路徑 -> 崩潰簽名歷史 (見 _record_signature_history)，
+        有歷史的檔案與報告附上 h = {'b': 是否見過, 'f': 首次出現, 'c': 累計次數}
+        
+        Returns:
+            {'tree': 依深度優先順序排列的資料夾/檔案節點,
+             'reports': 相似度組內的報告, 'groups': 相似度組（報告以 reports 的索引引用）}
+        """
+        histories = histories or {}
         
-        def render_tree(data, prefix=""):
-            html_str = ""
+        def history_of(path):
+            history = histories.get(path)
+            if not history:
+                return None
+            return {'b': 1 if history.get('seen_before') else 0,
+                    'f': history.get('first_seen', ''), 'c': history.get('count', 0)}
+        
+        tree = []
+        
+        def walk(data, depth):
+            count = 0
             for name, value in sorted(data.items()):
-                if isinstance(value, dict) and 'analyzed_file' in value:
-                    # 檔案項目
-                    analyzed_path = value['analyzed_file']
-                    original_path = value['original_file']
-                    
-                    # 檢查是否有 HTML 版本
-                    is_html = analyzed_path.endswith('.html')
-                    file_type = 'anr' if 'anr' in name.lower() else 'tombstone'
-                    icon = '⚠️' if file_type == 'anr' else '💥'
-                    
-                    # 使用新的查看器，傳遞絕對路徑
-                    html_str += f'''
-                    <div class="file-item {file_type}-item" data-path="{html.escape(analyzed_path)}">
-                        <a href="/view-analysis?path={html.escape(analyzed_path)}" class="file-link">
-                            <div class="file-content">
-                                <span class="file-icon">{icon}</span>
-                                <div class="file-info">
-                                    <div class="file-name">
-                                        {html.escape(name)}
-                                    </div>
-                                    <div class="file-meta">
-                                        <span class="file-type file-type-{file_type}">{file_type.upper()}</span>
-                                        <span class="file-size">點擊查看分析</span>
-                                    </div>
-                                </div>
-                            </div>
-                        </a>
-                        <div class="file-actions">
-                            <button class="action-icon-btn" onclick="event.stopPropagation(); copyPath(this)" data-path="{html.escape(analyzed_path)}" title="複製檔案路徑">
-                                <svg width="16" height="16" viewBox="0 0 16 16" fill="none">
-                                    <path d="M6 1.5h7.5a1 1 0 011 1v8.5a1 1 0 01-1 1H6a1 1 0 01-1-1V2.5a1 1 0 011-1z" stroke="currentColor" stroke-width="1.5" fill="none"/>
-                                    <path d="M2.5 4.5H3v8.5a1 1 0 001 1h7.5v.5" stroke="currentColor" stroke-width="1.5" fill="none"/>
-                                </svg>
-                            </button>
-                            <a href="/view-analysis?path={html.escape(original_path)}.analyzed.html" target="_blank" class="action-icon-btn" title="查看原始檔案">
-                                <svg width="16" height="16" viewBox="0 0 16 16" fill="none">
-                                    <path d="M6.5 2.5h-3a1 1 0 00-1 1v9a1 1 0 001 1h9a1 1 0 001-1v-3M10.5 2.5h3v3M6.5 9.5l7-7" stroke="currentColor" stroke-width="1.5" stroke-linecap="round" stroke-linejoin="round" fill="none"/>
-                                </svg>
-                            </a>
-                        </div>
-                    </div>
-                    '''
-                elif isinstance(value, dict):
-                    # 目錄項目 - 添加類型標識
-                    folder_id = f"folder-{prefix}-{name}".replace('/', '-').replace(' ', '-')
-                    file_count = _count_files(value)
-                    
-                    # 判斷文件夾類型
-                    folder_class = "folder-item"
-                    if name.lower() == "anr":
-                        folder_class += " anr-folder"
-                    elif name.lower() in ["tombstone", "tombstones"]:
-                        folder_class += " tombstone-folder"
-                    
-                    html_str += f'''
-                    <div class="{folder_class}">
-                        <div class="folder-header" onclick="toggleFolder('{folder_id}')">
-                            <svg class="folder-arrow" id="arrow-{folder_id}" width="16" height="16" viewBox="0 0 16 16">
-                                <path d="M6 4l4 4-4 4" stroke="currentColor" stroke-width="1.5" fill="none"/>
-                            </svg>
-                            <span class="folder-icon">📁</span>
-                            <span class="folder-name">{html.escape(name)}</span>
-                            <span class="folder-count">{file_count}</span>
-                        </div>
-                        <div class="folder-content" id="{folder_id}">
-                            {render_tree(value, prefix + '/' + name)}
-                        </div>
-                    </div>
-                    '''
-            return html_str
-        
-        def render_similarity_groups(groups):
-            if not groups:
-                return '<p>沒有發現相似問題</p>'
-            
-            def get_confidence_class(confidence):
-                """根據信心度返回對應的 CSS 類別"""
-                if confidence >= 90:
-                    return 'confidence-high'
-                elif confidence >= 70:
-                    return 'confidence-medium-high'
-                elif confidence >= 50:
-                    return 'confidence-medium'
-                elif confidence >= 30:
-                    return 'confidence-low'
-                else:
-                    return 'confidence-very-low'
-            
-            def get_confidence_icon(confidence):
-                """根據信心度返回對應的圖標"""
-                if confidence >= 90:
-                    return '✨'
-                elif confidence >= 70:
-                    return '⭐'
-                elif confidence >= 50:
-                    return '💫'
-                elif confidence >= 30:
-                    return '⚡'
+                if not isinstance(value, dict):
+                    continue
+                if 'analyzed_file' in value:
+                    # 檔案節點
+                    node = {
+                        't': 'f', 'd': depth, 'n': name,
+                        'k': 'anr' if 'anr' in name.lower() else 'tombstone',
+                        'a': value['analyzed_file'], 'o': value['original_file'],
+                    }
+                    history = history_of(value['analyzed_file'])
+                    if history:
+                        node['h'] = history
+                    tree.append(node)
+                    count += 1
                 else:
-                    return '❓'
-            
-            html_str = ''
-            report_counter = 0
-            
-            for group_idx, group in enumerate(groups):
-                # 獲取信心度樣式
-                confidence_class = get_confidence_class(group['similarity'])
-                confidence_icon = get_confidence_icon(group['similarity'])
-                
-                # 處理問題集標籤
-                problem_sets_html = ''
-                if group.get('problem_sets'):
-                    sets_list = ', '.join(group['problem_sets'])
-                    problem_sets_html = f'<span class="sets-list">{html.escape(sets_list)}</span>'
-
-                # 處理嚴重程度
-                severity_html = ''
-                if group.get('severity'):
-                    severity_class = 'critical' if '極其嚴重' in group['severity'] else 'high' if '嚴重' in group['severity'] else 'medium' if '中等' in group['severity'] else 'low'
-                    severity_html = f'<span class="severity-badge severity-{severity_class}">{group["severity"]}</span>'
-
-                # 處理影響的進程
-                processes_html = ''
-                if group.get('affected_processes'):
-                    processes_html = '<span class="affected-processes">影響進程: ' + ', '.join(group['affected_processes']) + '</span>'
-
-                # 處理問題詳情
-                details = group.get('problem_details', {})
-
-                # 準備進程名稱資料
-                unique_processes = set()
-                for report in group['reports']:
-                    if report.get('process_name'):
-                        unique_processes.add(report['process_name'])
-
-                processes_html = '<br>'.join([f'{html.escape(p)}' for p in sorted(unique_processes)])
-                if not processes_html:
-                    processes_html = '無進程資訊'
-
-                # 準備關鍵堆疊資料
-                key_stack_info = self._extract_key_stack_from_group(group['reports'])
-
-                # 判斷群組類型
-                group_type = 'anr' if all(r['type'] == 'anr' for r in group['reports']) else 'tombstone'
-                type_label = 'ANR' if group_type == 'anr' else 'Tombstone'
-                type_class = 'anr-type' if group_type == 'anr' else 'tombstone-type'
-                
-                # 處理問題集標籤 - 統一格式
-                problem_sets_html = ''
-                if group.get('problem_sets'):
-                    # 提取所有唯一的問題集
-                    unique_sets = sorted(set(group['problem_sets']))
-                    if unique_sets:
-                        sets_display = ', '.join(unique_sets)
-                        problem_sets_html = f'''
-                        <span class="problem-set-badge">
-                            <span class="set-label">問題 set:</span>
-                            <span class="set-value">{html.escape(sets_display)}</span>
-                        </span>
-                        '''
-
-                html_str += f'''
-                <div class="similarity-group {group_type}-group" id="{group['group_id']}">
-                    <!-- 第一區：標題和功能按鈕 -->
-                    <div class="group-header-section" onclick="toggleSimilarityGroup('{group['group_id']}')">
-                        <div class="group-header-left">
-                            <div class="group-title-wrapper">
-                                <h3 class="group-title">
-                                    {severity_html} 
-                                    <span class="type-badge {type_class}">{type_label}</span>
-                                    {html.escape(group['title'])}
-                                </h3>
-                                <div class="group-subtitle">
-                                    <span class="file-count-badge">{group['count']} 個相似檔案</span>
-                                    <span class="confidence-badge {confidence_class}">
-                                        <span class="confidence-icon">{confidence_icon}</span>
-                                        信心度: {group['similarity']:.0f}%
-                                    </span>
-                                    {problem_sets_html}
-                                </div>
-                            </div>
-                        </div>
-                        <div class="group-header-right">
-                            <button class="action-btn collapse-btn" onclick="toggleGroupCollapse('{group['group_id']}')" title="展開/收合">
-                                <svg class="collapse-icon" id="collapse-{group['group_id']}" width="14" height="14" viewBox="0 0 16 16">
-                                    <path d="M3 6l5 5 5-5" stroke="currentColor" stroke-width="1.5" fill="none"/>
-                                </svg>
-                            </button>
-                            <button class="action-btn copy-btn" onclick="event.stopPropagation(); copyGroupInfo('{group['group_id']}')" title="複製群組資訊">
-                                <svg width="14" height="14" viewBox="0 0 16 16" fill="none">
-                                    <path d="M0 6.75C0 5.784.784 5 1.75 5h1.5a.75.75 0 010 1.5h-1.5a.25.25 0 00-.25.25v7.5c0 .138.112.25.25.25h7.5a.25.25 0 00.25-.25v-1.5a.75.75 0 011.5 0v1.5A1.75 1.75 0 019.25 16h-7.5A1.75 1.75 0 010 14.25v-7.5z" fill="currentColor"/>
-                                    <path d="M5 1.75C5 .784 5.784 0 6.75 0h7.5C15.216 0 16 .784 16 1.75v7.5A1.75 1.75 0 0114.25 11h-7.5A1.75 1.75 0 015 9.25v-7.5zm1.75-.25a.25.25 0 00-.25.25v7.5c0 .138.112.25.25.25h7.5a.25.25 0 00.25-.25v-7.5a.25.25 0 00-.25-.25h-7.5z" fill="currentColor"/>
-                                </svg>
-                            </button>
-                        </div>
-                    </div>
-                    
-                    <!-- 第二區：卡片橫向排列 -->
-                    <div class="group-cards-section" id="cards-{group['group_id']}">
-                        <div class="problem-cards">
-                            <div class="problem-card">
-                                <h4>📋 描述</h4>
-                                {html.escape(details.get('description', ''))}
-                            </div>
-                            <div class="problem-card">
-                                <h4>🎯 影響範圍</h4>
-                                {html.escape(details.get('impact', ''))}
-                            </div>
-                            <div class="problem-card">
-                                <h4>⚡ 優先級</h4>
-                                <div class="priority-{details.get('priority', '').replace('極', 'very-')}">{html.escape(details.get('priority', ''))}</div>
-                            </div>
-                            <div class="problem-card">
-                                <h4>💡 建議</h4>
-                                {html.escape(details.get('recommendation', ''))}
-                            </div>
-                            <div class="problem-card">
-                                <h4>📱 進程名稱</h4>
-                                <div>{processes_html}</div>
-                            </div>
-                            <div class="problem-card">
-                                <h4>🔍 關鍵堆疊</h4>
-                                <div class="key-stack">
-                                    <div class="stack-marker {key_stack_info['marker_class']}">{key_stack_info['marker']}</div>
-                                    <div class="stack-frame">{html.escape(key_stack_info['frame'])}</div>
-                                    <div class="stack-reason">{html.escape(key_stack_info['reason'])}</div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <!-- 第三區：檔案列表 -->
-                    <div class="group-content" id="content-{group['group_id']}">
-                '''
-                
-                # 渲染組內的報告
-                for report_idx, report in enumerate(group['reports']):
-                    report_counter += 1
-                    report_id = f"report_{group_idx}_{report_idx}_{report_counter}"
-                    escaped_filename = html.escape(report['filename'])
-                    
-                    # 提取第二層目錄名稱
-                    second_dir = None
-                    if 'path' in report:
-                        path_parts = report['path'].split(os.sep)
-                        if self.input_folder:
-                            input_parts = self.input_folder.rstrip(os.sep).split(os.sep)
-                            if len(path_parts) > len(input_parts) + 2:
-                                second_dir = path_parts[len(input_parts) + 1]
-                            elif len(path_parts) > len(input_parts) + 1:
-                                second_dir = path_parts[len(input_parts)]
-                    
-                    # 顯示檔案名稱和問題集
-                    display_name = escaped_filename
-                    if second_dir and second_dir not in ['.', '..', '']:
-                        display_name = f'{escaped_filename} <span class="problem-set">(問題 set: {second_dir})</span>'
-                    
-                    # 讀取檔案內容並轉換為 data URL
-                    try:
-                        if 'content' in report and report['content']:
-                            report_content = report['content']
-                        else:
-                            with open(report['path'], 'r', encoding='utf-8') as f:
-                                report_content = f.read()
-                        
-                        # 注入統一的 scrollbar 樣式
-                        scrollbar_style = '''
-                        <style>
-                        /* 統一 iframe 內部的 scrollbar 樣式 */
-                        ::-webkit-scrollbar {
-                            width: 10px;
-                            height: 10px;
-                        }
-                        
-                        ::-webkit-scrollbar-track {
-                            background: rgba(88, 166, 255, 0.08);
-                            border-radius: 10px;
+                    # 資料夾節點：c = 檔案數，e = 子樹結束位置（收合時直接跳過）
+                    folder = {'t': 'd', 'd': depth, 'n': name, 'c': 0, 'e': 0}
+                    tree.append(folder)
+                    folder['c'] = walk(value, depth + 1)
+                    folder['e'] = len(tree)
+                    count += folder['c']
+            return count
+        
+        walk(index_data, 0)
+        
+        reports = []
+        groups = []
+        for group in similarity_groups or []:
+            member_ids = []
+            unique_processes = set()
+            for report in group['reports']:
+                member_ids.append(len(reports))
+                entry = {
+                    'n': report.get('filename', ''),
+                    'p': report.get('path', ''),
+                    's': self._index_problem_set(report.get('path', '')),
+                }
+                history = history_of(report.get('path', ''))
+                if history:
+                    entry['h'] = history
+                reports.append(entry)
+                if report.get('process_name'):
+                    unique_processes.add(report['process_name'])
+            
+            severity = group.get('severity') or ''
+            severity_class = 'critical' if '極其嚴重' in severity else 'high' if '嚴重' in severity else 'medium' if '中等' in severity else 'low'
+            details = group.get('problem_details', {})
+            key_stack_info = self._extract_key_stack_from_group(group['reports'])
+            
+            groups.append({
+                'id': group['group_id'],
+                'type': 'anr' if all(r['type'] == 'anr' for r in group['reports']) else 'tombstone',
+                'title': group['title'],
+                'count': group['count'],
+                'similarity': f"{group['similarity']:.0f}",
+                'confidence_class': self._index_confidence_class(group['similarity']),
+                'confidence_icon': self._index_confidence_icon(group['similarity']),
+                'severity': severity,
+                'severity_class': severity_class,
+                'sets': sorted(set(group.get('problem_sets') or [])),
+                'details': {
+                    'description': details.get('description', ''),
+                    'impact': details.get('impact', ''),
+                    'priority': details.get('priority', ''),
+                    'recommendation': details.get('recommendation', ''),
+                },
+                'priority_class': details.get('priority', '').replace('極', 'very-'),
+                'processes': sorted(unique_processes),
+                'stack': {
+                    'marker': key_stack_info['marker'],
+                    'marker_class': key_stack_info['marker_class'],
+                    'frame': key_stack_info['frame'],
+                    'reason': key_stack_info['reason'],
+                },
+                'reports': member_ids,
+            })
+        
+        return {'tree': tree, 'reports': reports, 'groups': groups}
+    
+    def _index_problem_set(self, path: str) -> str:
+        """報告路徑的第二層目錄名稱（問題 set）"""
+        if not path or not self.input_folder:
+            return ''
+        path_parts = path.split(os.sep)
+        input_parts = self.input_folder.rstrip(os.sep).split(os.sep)
+        second_dir = ''
+        if len(path_parts) > len(input_parts) + 2:
+            second_dir = path_parts[len(input_parts) + 1]
+        elif len(path_parts) > len(input_parts) + 1:
+            second_dir = path_parts[len(input_parts)]
+        return '' if second_dir in ('.', '..') else second_dir
+    
+    @staticmethod
+    def _index_confidence_class(confidence: float) -> str:
+        """根據信心度返回對應的 CSS 類別"""
+        if confidence >= 90:
+            return 'confidence-high'
+        elif confidence >= 70:
+            return 'confidence-medium-high'
+        elif confidence >= 50:
+            return 'confidence-medium'
+        elif confidence >= 30:
+            return 'confidence-low'
+        else:
+            return 'confidence-very-low'
+    
+    @staticmethod
+    def _index_confidence_icon(confidence: float) -> str:
+        """根據信心度返回對應的圖標"""
+        if confidence >= 90:
+            return '✨'
+        elif confidence >= 70:
+            return '⭐'
+        elif confidence >= 50:
+            return '💫'
+        elif confidence >= 30:
+            return '⚡'
+        else:
+            return '❓'
+    
+    def _write_index_data(self, payload: Dict[str, List]) -> Dict:
+        """將索引資料分塊寫入 index_data/，內容沒有變更的分塊不重寫
+        
+        分塊是呼叫 loadIndexChunk(...) 的 .js 檔，直接以 file:// 開啟 index.html 時也能載入
+        
+        Returns:
+            索引頁內嵌的分塊清單 {'root', 'counts', 'chunks': [{'file', 'digest'}, ...]}
+        """
+        data_dir = os.path.join(self.output_folder, INDEX_DATA_DIR)
+        os.makedirs(data_dir, exist_ok=True)
+        
+        chunks = []
+        rewritten = 0
+        for kind in ('tree', 'reports', 'groups'):
+            items = payload[kind]
+            for offset in range(0, len(items), INDEX_CHUNK_SIZE):
+                name = f"{kind}-{offset // INDEX_CHUNK_SIZE:04d}.js"
+                data = json.dumps(items[offset:offset + INDEX_CHUNK_SIZE], ensure_ascii=False, separators=(',', ':'))
+                content = f"loadIndexChunk({json.dumps(kind)}, {offset}, {data});\n".encode('utf-8')
+                chunk_path = os.path.join(data_dir, name)
+                
+                unchanged = False
+                if os.path.exists(chunk_path) and os.path.getsize(chunk_path) == len(content):
+                    with open(chunk_path, 'rb') as f:
+                        unchanged = f.read() == content
+                if not unchanged:
+                    tmp_path = chunk_path + '.tmp'
+                    with open(tmp_path, 'wb') as f:
+                        f.write(content)
+                    os.replace(tmp_path, chunk_path)
+                    rewritten += 1
+                
+                chunks.append({
+                    'file': f"{INDEX_DATA_DIR}/{name}",
+                    'digest': hashlib.sha1(content).hexdigest()[:12],
+                })
+        
+        # 移除上一次多出來的分塊
+        current = {os.path.basename(chunk['file']) for chunk in chunks}
+        for name in os.listdir(data_dir):
+            if name not in current and re.match(r'(tree|reports|groups)-\d{4}\.js$', name):
+                os.remove(os.path.join(data_dir, name))
+        
+        print(f"🗂️ 索引資料: {len(chunks)} 個分塊，重寫 {rewritten} 個")
+        return {
+            'root': os.path.abspath(self.output_folder),
+            'counts': {kind: len(payload[kind]) for kind in ('tree', 'reports', 'groups')},
+            'chunks': chunks,
+        }
+    
+    def _get_index_virtual_styles(self) -> str:
+        """索引頁虛擬捲動清單的樣式（相似度組拆成組標題列與報告列）"""
+        return """
+            .vrow {
+                display: flow-root;
+            }
+            
+            .signature-history {
+                font-size: 12px;
+                margin-left: 8px;
+                padding: 1px 8px;
+                border-radius: 10px;
+                display: inline-block;
+                vertical-align: middle;
+            }
+            
+            .signature-new {
+                color: #3fb950;
+                border: 1px solid rgba(63, 185, 80, 0.4);
+            }
+            
+            .signature-seen {
+                color: #d29922;
+                border: 1px solid rgba(210, 153, 34, 0.4);
+            }
+            
+            .index-loading {
+                padding: 24px;
+                color: var(--text-secondary);
+            }
+            
+            .similarity-group.vgroup-head {
+                margin-bottom: 0;
+                border-bottom-left-radius: 0;
+                border-bottom-right-radius: 0;
+            }
+            
+            .similarity-group.vgroup-head:hover {
+                transform: none;
+            }
+            
+            .vrow-last > .similarity-group.vgroup-head {
+                margin-bottom: 24px;
+                border-radius: 16px;
+            }
+            
+            .vgroup-body {
+                display: flow-root;
+                background: var(--bg-secondary);
+                border-left: 1px solid var(--border);
+                border-right: 1px solid var(--border);
+            }
+            
+            .vrow-last > .vgroup-body {
+                border-bottom: 1px solid var(--border);
+                border-radius: 0 0 16px 16px;
+                margin-bottom: 24px;
+                padding-bottom: 4px;
+            }
+        """
+    
+    def _get_index_app_script(self) -> str:
+        """索引頁的資料載入、虛擬捲動、搜尋與複製功能"""
+        return r"""
+            // ===== 索引資料（分塊載入）與虛擬捲動 =====
+            const INDEX_ROW_OVERSCAN = 800;  // 視窗上下額外渲染的像素
+
+            let currentView = 'file';
+            let isExpanded = true; // 追蹤展開/收合狀態
+            let indexData = null;
+            let pendingChunks = 0;
+            let fileList = null;
+            let similarityList = null;
+            let searchQuery = '';
+            const closedFolders = new Set();     // 收合的資料夾 (tree 索引)
+            const collapsedGroups = new Set();   // 收合的相似度組 (組索引)
+            const collapsedReports = new Set();  // 收合的報告 (報告列 ID)
+            const iframeHeights = new Map();     // 報告 iframe 調整後的高度 (報告列 ID -> px)
+
+            function escapeHtml(value) {
+                const entities = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+                return String(value == null ? '' : value).replace(/[&<>"']/g, ch => entities[ch]);
+            }
+
+            // 報告連結：透過伺服器時使用 /view-analysis，直接以 file:// 開啟時改用相對路徑
+            function viewAnalysisUrl(path) {
+                if (location.protocol === 'file:') {
+                    const root = INDEX_MANIFEST.root.replace(/[\\/]+$/, '');
+                    if (path.startsWith(root)) {
+                        return path.slice(root.length + 1).split(/[\\/]/).map(encodeURIComponent).join('/');
+                    }
+                    return 'file://' + path;
+                }
+                return '/view-analysis?path=' + encodeURIComponent(path);
+            }
+
+            function indexChunkUrl(chunk) {
+                if (location.protocol === 'file:') {
+                    return chunk.file + '?v=' + chunk.digest;
+                }
+                const path = INDEX_MANIFEST.root.replace(/[\\/]+$/, '') + '/' + chunk.file;
+                return '/view-analysis-report?path=' + encodeURIComponent(path) + '&v=' + chunk.digest;
+            }
+
+            // 只渲染視窗附近的列；列高以實際量測為準（未量測前使用估計值）
+            class VirtualList {
+                constructor(container, renderRow, estimateHeight) {
+                    this.container = container;
+                    this.renderRow = renderRow;
+                    this.estimateHeight = estimateHeight;
+                    this.rows = [];
+                    this.offsets = new Float64Array(1);
+                    this.heights = new Map();   // 列 key -> 量測到的高度
+                    this.mounted = new Map();   // 列 key -> 目前在 DOM 中的元素
+                    this.start = 0;
+                    this.end = 0;
+                    this.frame = null;
+                    this.topSpacer = document.createElement('div');
+                    this.body = document.createElement('div');
+                    this.bottomSpacer = document.createElement('div');
+                    container.replaceChildren(this.topSpacer, this.body, this.bottomSpacer);
+                    this.resizeObserver = window.ResizeObserver ? new ResizeObserver(() => this.measure()) : null;
+                    window.addEventListener('scroll', () => this.schedule(), { passive: true });
+                    window.addEventListener('resize', () => this.schedule());
+                }
+
+                // preserve = true 時保留 key 不變的已渲染列（例如展開/收合），避免 iframe 重新載入
+                setRows(rows, preserve) {
+                    if (!preserve) {
+                        this.unmount(Array.from(this.mounted.keys()));
+                    }
+                    this.rows = rows;
+                    this.computeOffsets();
+                    this.render(true);
+                }
+
+                unmount(keys) {
+                    for (const key of keys) {
+                        const el = this.mounted.get(key);
+                        if (this.resizeObserver) this.resizeObserver.unobserve(el);
+                        el.remove();
+                        this.mounted.delete(key);
+                    }
+                }
+
+                rowHeight(i) {
+                    const row = this.rows[i];
+                    const height = this.heights.get(row.key);
+                    return height === undefined ? this.estimateHeight(row) : height;
+                }
+
+                computeOffsets() {
+                    const n = this.rows.length;
+                    this.offsets = new Float64Array(n + 1);
+                    for (let i = 0; i < n; i++) {
+                        this.offsets[i + 1] = this.offsets[i] + this.rowHeight(i);
+                    }
+                }
+
+                // 第一個底部超過 y 的列
+                indexAt(y) {
+                    let lo = 0;
+                    let hi = this.rows.length;
+                    while (lo < hi) {
+                        const mid = (lo + hi) >> 1;
+                        if (this.offsets[mid + 1] <= y) lo = mid + 1;
+                        else hi = mid;
+                    }
+                    return lo;
+                }
+
+                schedule() {
+                    if (this.frame !== null) return;
+                    this.frame = requestAnimationFrame(() => {
+                        this.frame = null;
+                        this.render(false);
+                    });
+                }
+
+                render(force) {
+                    // 視圖隱藏時不渲染，切換視圖時再 render(true)
+                    if (this.container.getClientRects().length === 0) return;
+
+                    const n = this.rows.length;
+                    const listTop = this.container.getBoundingClientRect().top + window.scrollY;
+                    const viewTop = window.scrollY - listTop - INDEX_ROW_OVERSCAN;
+                    const viewBottom = window.scrollY + window.innerHeight - listTop + INDEX_ROW_OVERSCAN;
+                    const start = Math.min(this.indexAt(Math.max(0, viewTop)), n);
+                    const end = Math.min(n, Math.max(start, this.indexAt(viewBottom) + 1));
+                    if (!force && start === this.start && end === this.end) return;
+                    this.start = start;
+                    this.end = end;
+
+                    const wanted = new Set();
+                    for (let i = start; i < end; i++) wanted.add(this.rows[i].key);
+                    this.unmount(Array.from(this.mounted.keys()).filter(key => !wanted.has(key)));
+
+                    // 保留的列不移動（移動 iframe 會重新載入），新列插在前一列之後
+                    let cursor = null;
+                    for (let i = start; i < end; i++) {
+                        const row = this.rows[i];
+                        let el = this.mounted.get(row.key);
+                        if (!el) {
+                            el = document.createElement('div');
+                            el.className = 'vrow';
+                            el.innerHTML = this.renderRow(row);
+                            this.body.insertBefore(el, cursor ? cursor.nextSibling : this.body.firstChild);
+                            this.mounted.set(row.key, el);
+                            if (this.resizeObserver) this.resizeObserver.observe(el);
                         }
-                        
-                        ::-webkit-scrollbar-thumb {
-                            background: linear-gradient(180deg, #58a6ff 0%, #4a96ef 100%);
-                            border-radius: 10px;
-                            border: 1px solid rgba(88, 166, 255, 0.2);
-                            box-shadow: inset 0 0 3px rgba(88, 166, 255, 0.1);
+                        el.classList.toggle('vrow-last', !!row.last);
+                        cursor = el;
+                    }
+
+                    this.updateSpacers();
+                    this.measure();
+                }
+
+                updateSpacers() {
+                    const n = this.rows.length;
+                    this.topSpacer.style.height = this.offsets[this.start] + 'px';
+                    this.bottomSpacer.style.height = (this.offsets[n] - this.offsets[Math.min(this.end, n)]) + 'px';
+                }
+
+                measure() {
+                    let changed = false;
+                    for (const [key, el] of this.mounted) {
+                        const height = el.offsetHeight;
+                        if (height && this.heights.get(key) !== height) {
+                            this.heights.set(key, height);
+                            changed = true;
                         }
-                        
-                        ::-webkit-scrollbar-thumb:hover {
-                            background: linear-gradient(180deg, #79c0ff 0%, #58a6ff 100%);
-                            border-color: rgba(88, 166, 255, 0.4);
-                            box-shadow: 0 0 8px rgba(88, 166, 255, 0.4);
+                    }
+                    if (changed) {
+                        this.computeOffsets();
+                        this.updateSpacers();
+                        this.start = this.end = -1;  // 高度改變後重新計算可見範圍
+                        this.schedule();
+                    }
+                }
+            }
+
+            // ----- 分塊載入 -----
+            function loadIndexChunk(kind, offset, items) {
+                const target = indexData[kind];
+                for (let i = 0; i < items.length; i++) {
+                    target[offset + i] = items[i];
+                }
+                pendingChunks--;
+                if (pendingChunks === 0) {
+                    onIndexDataReady();
+                }
+            }
+
+            function loadIndexData() {
+                // 匯出的單一 HTML 檔已內嵌全部資料
+                if (window.INDEX_INLINE_DATA) {
+                    indexData = window.INDEX_INLINE_DATA;
+                    onIndexDataReady();
+                    return;
+                }
+
+                const counts = INDEX_MANIFEST.counts;
+                indexData = {
+                    tree: new Array(counts.tree),
+                    reports: new Array(counts.reports),
+                    groups: new Array(counts.groups)
+                };
+                pendingChunks = INDEX_MANIFEST.chunks.length;
+                if (pendingChunks === 0) {
+                    onIndexDataReady();
+                    return;
+                }
+
+                INDEX_MANIFEST.chunks.forEach(chunk => {
+                    const script = document.createElement('script');
+                    script.className = 'index-chunk';
+                    script.async = false;
+                    script.src = indexChunkUrl(chunk);
+                    script.onerror = () => showIndexError('無法載入索引資料: ' + chunk.file);
+                    document.head.appendChild(script);
+                });
+            }
+
+            function showIndexError(message) {
+                ['fileList', 'similarityList'].forEach(id => {
+                    document.getElementById(id).innerHTML = '<p class="index-loading">' + escapeHtml(message) + '</p>';
+                });
+            }
+
+            function onIndexDataReady() {
+                fileList = new VirtualList(document.getElementById('fileList'), renderFileRow, estimateFileRow);
+                if (indexData.groups.length) {
+                    similarityList = new VirtualList(document.getElementById('similarityList'), renderSimilarityRow, estimateSimilarityRow);
+                } else {
+                    document.getElementById('similarityList').innerHTML = '<p>沒有發現相似問題</p>';
+                }
+                refreshViews(false);
+            }
+
+            function refreshViews(preserve) {
+                if (fileList) fileList.setRows(buildFileRows(), preserve);
+                if (similarityList) similarityList.setRows(buildSimilarityRows(), preserve);
+            }
+
+            // ----- 檔案視圖 -----
+            function buildFileRows() {
+                const tree = indexData.tree;
+                const query = searchQuery;
+                const rows = [];
+
+                // 搜尋時標記符合的檔案與包含符合檔案的資料夾
+                let matched = null;
+                if (query) {
+                    matched = new Uint8Array(tree.length);
+                    const stack = [];
+                    for (let i = 0; i < tree.length; i++) {
+                        while (stack.length && tree[stack[stack.length - 1]].e <= i) stack.pop();
+                        const node = tree[i];
+                        if (node.t === 'd') {
+                            stack.push(i);
+                        } else if (node.n.toLowerCase().includes(query)) {
+                            matched[i] = 1;
+                            for (let s = stack.length - 1; s >= 0 && !matched[stack[s]]; s--) {
+                                matched[stack[s]] = 1;
+                            }
                         }
-                        
-                        ::-webkit-scrollbar-corner {
-                            background: transparent;
+                    }
+                }
+
+                let i = 0;
+                while (i < tree.length) {
+                    const node = tree[i];
+                    if (node.t === 'd') {
+                        if (query && !matched[i] && !node.n.toLowerCase().includes(query)) {
+                            i = node.e;
+                            continue;
                         }
-                        
-                        /* Firefox Scrollbar */
-                        * {
-                            scrollbar-width: thin;
-                            scrollbar-color: #58a6ff rgba(88, 166, 255, 0.08);
+                        // 包含符合項目的資料夾自動展開
+                        const open = (query && matched[i]) ? true : !closedFolders.has(i);
+                        rows.push({ key: 'd' + i + (open ? 'o' : 'c'), kind: 'folder', i: i, open: open });
+                        i = open ? i + 1 : node.e;
+                    } else {
+                        if (!query || matched[i]) {
+                            rows.push({ key: 'f' + i, kind: 'file', i: i });
                         }
-                        </style>
-                        '''
-                        
-                        # 在 </head> 標籤前插入樣式
-                        if '</head>' in report_content:
-                            report_content = report_content.replace('</head>', scrollbar_style + '</head>')
-                        else:
-                            report_content = scrollbar_style + report_content
-                        
-                        # Base64 編碼
-                        import base64
-                        encoded_content = base64.b64encode(report_content.encode('utf-8')).decode('utf-8')
-                        iframe_src = f"data:text/html;charset=utf-8;base64,{encoded_content}"
-                        
-                        # 使用實際檔案路徑作為新視窗連結
-                        view_link = f"/view-analysis?path={html.escape(report['path'])}"
-                        
-                    except Exception as e:
-                        print(f"無法讀取檔案 {report['path']}: {e}")
-                        error_html = f'''
-                        <html>
-                        <head>
-                            <meta charset="utf-8">
-                            <style>
-                                body {{
-                                    font-family: Arial, sans-serif;
-                                    padding: 20px;
-                                    color: #d32f2f;
-                                }}
-                                {scrollbar_style}
-                            </style>
-                        </head>
-                        <body>
-                            <h3>無法載入檔案</h3>
-                            <p>檔案名稱: {escaped_filename}</p>
-                            <p>路徑: {report.get('path', 'Unknown')}</p>
-                            <p>錯誤: {str(e)}</p>
-                        </body>
-                        </html>
-                        '''
-                        encoded_error = base64.b64encode(error_html.encode('utf-8')).decode('utf-8')
-                        iframe_src = f"data:text/html;charset=utf-8;base64,{encoded_error}"
-                        view_link = "#"
-                    
-                    html_str += f'''
-                    <div class="similarity-item">
-                        <div class="report-header" onclick="toggleReport('{report_id}')" data-path="{html.escape(report.get('path', ''))}">
-                            <svg class="report-arrow open" id="arrow-{report_id}" width="16" height="16" viewBox="0 0 16 16">
+                        i++;
+                    }
+                }
+                return rows;
+            }
+
+            function estimateFileRow(row) {
+                return row.kind === 'folder' ? 57 : 77;
+            }
+
+            // 崩潰簽名歷史：h = {b: 是否見過, f: 首次出現, c: 累計次數}
+            function historyBadge(h) {
+                if (!h) {
+                    return '';
+                }
+                if (!h.b) {
+                    return ' <span class="signature-history signature-new" title="崩潰簽名首次出現">🆕 新簽名</span>';
+                }
+                return ` <span class="signature-history signature-seen" title="首次出現: ${escapeHtml(h.f)}">🔁 曾出現 ${h.c} 次 (首次 ${escapeHtml(h.f.slice(0, 10))})</span>`;
+            }
+
+            function renderFileRow(row) {
+                const node = indexData.tree[row.i];
+                if (row.kind === 'folder') {
+                    const lower = node.n.toLowerCase();
+                    let folderClass = 'folder-item';
+                    if (lower === 'anr') {
+                        folderClass += ' anr-folder';
+                    } else if (lower === 'tombstone' || lower === 'tombstones') {
+                        folderClass += ' tombstone-folder';
+                    }
+                    return `
+                    <div class="${folderClass}">
+                        <div class="folder-header" style="padding-left: ${20 + node.d * 16}px" onclick="toggleFolder(${row.i})">
+                            <svg class="folder-arrow${row.open ? ' open' : ''}" width="16" height="16" viewBox="0 0 16 16">
+                                <path d="M6 4l4 4-4 4" stroke="currentColor" stroke-width="1.5" fill="none"/>
+                            </svg>
+                            <span class="folder-icon">📁</span>
+                            <span class="folder-name">${escapeHtml(node.n)}</span>
+                            <span class="folder-count">${node.c}</span>
+                        </div>
+                    </div>`;
+                }
+
+                const fileType = node.k;
+                const icon = fileType === 'anr' ? '⚠️' : '💥';
+                const indent = node.d > 0 ? `style="margin-left: ${36 + (node.d - 1) * 16}px"` : '';
+                const item = `
+                    <div class="file-item ${fileType}-item${searchQuery ? ' search-highlight' : ''}" data-path="${escapeHtml(node.a)}" ${indent}>
+                        <a href="${escapeHtml(viewAnalysisUrl(node.a))}" class="file-link">
+                            <div class="file-content">
+                                <span class="file-icon">${icon}</span>
+                                <div class="file-info">
+                                    <div class="file-name">
+                                        ${escapeHtml(node.n)}
+                                    </div>
+                                    <div class="file-meta">
+                                        <span class="file-type file-type-${fileType}">${fileType.toUpperCase()}</span>
+                                        <span class="file-size">點擊查看分析</span>
+                                        ${historyBadge(node.h)}
+                                    </div>
+                                </div>
+                            </div>
+                        </a>
+                        <div class="file-actions">
+                            <button class="action-icon-btn" onclick="event.stopPropagation(); copyPath(this)" data-path="${escapeHtml(node.a)}" title="複製檔案路徑">
+                                <svg width="16" height="16" viewBox="0 0 16 16" fill="none">
+                                    <path d="M6 1.5h7.5a1 1 0 011 1v8.5a1 1 0 01-1 1H6a1 1 0 01-1-1V2.5a1 1 0 011-1z" stroke="currentColor" stroke-width="1.5" fill="none"/>
+                                    <path d="M2.5 4.5H3v8.5a1 1 0 001 1h7.5v.5" stroke="currentColor" stroke-width="1.5" fill="none"/>
+                                </svg>
+                            </button>
+                            <a href="${escapeHtml(viewAnalysisUrl(node.o + '.analyzed.html'))}" target="_blank" class="action-icon-btn" title="查看原始檔案">
+                                <svg width="16" height="16" viewBox="0 0 16 16" fill="none">
+                                    <path d="M6.5 2.5h-3a1 1 0 00-1 1v9a1 1 0 001 1h9a1 1 0 001-1v-3M10.5 2.5h3v3M6.5 9.5l7-7" stroke="currentColor" stroke-width="1.5" stroke-linecap="round" stroke-linejoin="round" fill="none"/>
+                                </svg>
+                            </a>
+                        </div>
+                    </div>`;
+                return node.d > 0 ? `<div class="folder-content">${item}</div>` : item;
+            }
+
+            // ----- 相似問題視圖 -----
+            function buildSimilarityRows() {
+                const query = searchQuery;
+                const rows = [];
+                indexData.groups.forEach((group, groupIndex) => {
+                    let members = group.reports;
+                    if (query) {
+                        members = members.filter(ri => indexData.reports[ri].n.toLowerCase().includes(query));
+                        if (!members.length) return;
+                    }
+                    // 搜尋時展開包含符合報告的組
+                    const collapsed = !query && collapsedGroups.has(groupIndex);
+                    rows.push({ key: 'g' + groupIndex + (collapsed ? 'c' : 'o'), kind: 'group', g: groupIndex, collapsed: collapsed });
+                    if (!collapsed) {
+                        members.forEach(ri => {
+                            const id = 'r' + groupIndex + '_' + ri;
+                            const open = !collapsedReports.has(id);
+                            rows.push({ key: id + (open ? 'o' : 'c'), kind: 'report', id: id, g: groupIndex, r: ri, open: open });
+                        });
+                    }
+                    rows[rows.length - 1].last = true;
+                });
+                return rows;
+            }
+
+            function estimateSimilarityRow(row) {
+                if (row.kind === 'group') {
+                    return row.collapsed ? 110 : 420;
+                }
+                return row.open ? 58 + (iframeHeights.get(row.id) || 650) : 58;
+            }
+
+            function renderSimilarityRow(row) {
+                const group = indexData.groups[row.g];
+                if (row.kind === 'group') {
+                    const typeLabel = group.type === 'anr' ? 'ANR' : 'Tombstone';
+                    const severityHtml = group.severity
+                        ? `<span class="severity-badge severity-${group.severity_class}">${escapeHtml(group.severity)}</span>`
+                        : '';
+                    const setsHtml = group.sets.length ? `
+                                    <span class="problem-set-badge">
+                                        <span class="set-label">問題 set:</span>
+                                        <span class="set-value">${escapeHtml(group.sets.join(', '))}</span>
+                                    </span>` : '';
+                    const processesHtml = group.processes.length
+                        ? group.processes.map(escapeHtml).join('<br>')
+                        : '無進程資訊';
+                    return `
+                <div class="similarity-group ${group.type}-group vgroup-head" id="${escapeHtml(group.id)}">
+                    <div class="group-header-section" onclick="toggleSimilarityGroup(${row.g})">
+                        <div class="group-header-left">
+                            <div class="group-title-wrapper">
+                                <h3 class="group-title">
+                                    ${severityHtml}
+                                    <span class="type-badge ${group.type}-type">${typeLabel}</span>
+                                    ${escapeHtml(group.title)}
+                                </h3>
+                                <div class="group-subtitle">
+                                    <span class="file-count-badge">${group.count} 個相似檔案</span>
+                                    <span class="confidence-badge ${group.confidence_class}">
+                                        <span class="confidence-icon">${group.confidence_icon}</span>
+                                        信心度: ${group.similarity}%
+                                    </span>${setsHtml}
+                                </div>
+                            </div>
+                        </div>
+                        <div class="group-header-right">
+                            <button class="action-btn collapse-btn" onclick="event.stopPropagation(); toggleSimilarityGroup(${row.g})" title="${row.collapsed ? '展開' : '收合'}">
+                                <svg class="collapse-icon" width="14" height="14" viewBox="0 0 16 16" style="transform: rotate(${row.collapsed ? '-90' : '0'}deg)">
+                                    <path d="M3 6l5 5 5-5" stroke="currentColor" stroke-width="1.5" fill="none"/>
+                                </svg>
+                            </button>
+                            <button class="action-btn copy-btn" onclick="event.stopPropagation(); copyGroupInfo(${row.g})" title="複製群組資訊">
+                                <svg width="14" height="14" viewBox="0 0 16 16" fill="none">
+                                    <path d="M0 6.75C0 5.784.784 5 1.75 5h1.5a.75.75 0 010 1.5h-1.5a.25.25 0 00-.25.25v7.5c0 .138.112.25.25.25h7.5a.25.25 0 00.25-.25v-1.5a.75.75 0 011.5 0v1.5A1.75 1.75 0 019.25 16h-7.5A1.75 1.75 0 010 14.25v-7.5z" fill="currentColor"/>
+                                    <path d="M5 1.75C5 .784 5.784 0 6.75 0h7.5C15.216 0 16 .784 16 1.75v7.5A1.75 1.75 0 0114.25 11h-7.5A1.75 1.75 0 015 9.25v-7.5zm1.75-.25a.25.25 0 00-.25.25v7.5c0 .138.112.25.25.25h7.5a.25.25 0 00.25-.25v-7.5a.25.25 0 00-.25-.25h-7.5z" fill="currentColor"/>
+                                </svg>
+                            </button>
+                        </div>
+                    </div>
+                    <div class="group-cards-section${row.collapsed ? ' collapsed' : ''}">
+                        <div class="problem-cards">
+                            <div class="problem-card">
+                                <h4>📋 描述</h4>
+                                ${escapeHtml(group.details.description)}
+                            </div>
+                            <div class="problem-card">
+                                <h4>🎯 影響範圍</h4>
+                                ${escapeHtml(group.details.impact)}
+                            </div>
+                            <div class="problem-card">
+                                <h4>⚡ 優先級</h4>
+                                <div class="priority-${escapeHtml(group.priority_class)}">${escapeHtml(group.details.priority)}</div>
+                            </div>
+                            <div class="problem-card">
+                                <h4>💡 建議</h4>
+                                ${escapeHtml(group.details.recommendation)}
+                            </div>
+                            <div class="problem-card">
+                                <h4>📱 進程名稱</h4>
+                                <div>${processesHtml}</div>
+                            </div>
+                            <div class="problem-card">
+                                <h4>🔍 關鍵堆疊</h4>
+                                <div class="key-stack">
+                                    <div class="stack-marker ${escapeHtml(group.stack.marker_class)}">${escapeHtml(group.stack.marker)}</div>
+                                    <div class="stack-frame">${escapeHtml(group.stack.frame)}</div>
+                                    <div class="stack-reason">${escapeHtml(group.stack.reason)}</div>
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                </div>`;
+                }
+
+                const report = indexData.reports[row.r];
+                const link = viewAnalysisUrl(report.p);
+                let displayName = escapeHtml(report.n);
+                if (report.s) {
+                    displayName += ` <span class="problem-set">(問題 set: ${escapeHtml(report.s)})</span>`;
+                }
+                displayName += historyBadge(report.h);
+                const savedHeight = iframeHeights.get(row.id);
+                const iframeHtml = row.open ? `
+                        <div class="report-content">
+                            <iframe src="${escapeHtml(link)}"
+                                    class="report-iframe"
+                                    data-row="${row.id}"
+                                    onload="adjustIframeHeight(this)"
+                                    style="width: 100%; min-height: 600px; ${savedHeight ? 'height: ' + savedHeight + 'px; ' : ''}border: 1px solid #ddd; background: white;">
+                            </iframe>
+                        </div>` : '';
+                return `
+                <div class="vgroup-body">
+                    <div class="similarity-item${searchQuery ? ' search-highlight' : ''}">
+                        <div class="report-header" onclick="toggleReport('${row.id}')" data-path="${escapeHtml(report.p)}">
+                            <svg class="report-arrow${row.open ? ' open' : ''}" width="16" height="16" viewBox="0 0 16 16">
                                 <path d="M6 4l4 4-4 4" stroke="currentColor" stroke-width="1.5" fill="none"/>
                             </svg>
                             <span class="report-icon">📄</span>
-                            <span class="report-name">{display_name}</span>
+                            <span class="report-name">${displayName}</span>
                             <div class="file-actions">
-                                <button class="action-icon-btn" onclick="event.stopPropagation(); copyPath(this)" data-path="{html.escape(report.get('path', ''))}" title="複製檔案路徑">
-                                        <svg width="16" height="16" viewBox="0 0 16 16" fill="none">
-                                            <path d="M6 1.5h7.5a1 1 0 011 1v8.5a1 1 0 01-1 1H6a1 1 0 01-1-1V2.5a1 1 0 011-1z" stroke="currentColor" stroke-width="1.5" fill="none"/>
-                                            <path d="M2.5 4.5H3v8.5a1 1 0 001 1h7.5v.5" stroke="currentColor" stroke-width="1.5" fill="none"/>
-                                        </svg>
+                                <button class="action-icon-btn" onclick="event.stopPropagation(); copyPath(this)" data-path="${escapeHtml(report.p)}" title="複製檔案路徑">
+                                    <svg width="16" height="16" viewBox="0 0 16 16" fill="none">
+                                        <path d="M6 1.5h7.5a1 1 0 011 1v8.5a1 1 0 01-1 1H6a1 1 0 01-1-1V2.5a1 1 0 011-1z" stroke="currentColor" stroke-width="1.5" fill="none"/>
+                                        <path d="M2.5 4.5H3v8.5a1 1 0 001 1h7.5v.5" stroke="currentColor" stroke-width="1.5" fill="none"/>
+                                    </svg>
                                 </button>
-                                <a href="{view_link}" target="_blank" class="action-icon-btn" title="在新視窗開啟" onclick="event.stopPropagation();">
+                                <a href="${escapeHtml(link)}" target="_blank" class="action-icon-btn" title="在新視窗開啟" onclick="event.stopPropagation();">
                                     <svg width="16" height="16" viewBox="0 0 16 16" fill="none">
                                         <path d="M6.5 2.5h-3a1 1 0 00-1 1v9a1 1 0 001 1h9a1 1 0 001-1v-3M10.5 2.5h3v3M6.5 9.5l7-7" stroke="currentColor" stroke-width="1.5" stroke-linecap="round" stroke-linejoin="round" fill="none"/>
                                     </svg>
                                 </a>
                             </div>
-                        </div>
-                        <div class="report-content" id="content-{report_id}" style="display: block;">
-                            <iframe src="{iframe_src}" 
-                                    class="report-iframe"
-                                    id="iframe-{report_id}"
-                                    style="width: 100%; min-height: 600px; border: 1px solid #ddd; background: white;">
-                            </iframe>
-                        </div>
-                    </div>
-                    '''
-                
-                html_str += '''
-                        </div>
+                        </div>${iframeHtml}
                     </div>
-                    '''
-            
-            return html_str
+                </div>`;
+            }
 
-        # 計算統計數據
-        def _count_files(data):
-            count = 0
-            for value in data.values():
-                if isinstance(value, dict):
-                    if 'analyzed_file' in value:
-                        count += 1
-                    else:
-                        count += _count_files(value)
-            return count
+            function adjustIframeHeight(iframe) {
+                const rowId = iframe.getAttribute('data-row');
+                const applyHeight = (height) => {
+                    iframe.style.height = height + 'px';
+                    if (rowId) iframeHeights.set(rowId, height);
+                };
+                try {
+                    setTimeout(() => {
+                        try {
+                            const iframeDoc = iframe.contentDocument || iframe.contentWindow.document;
+                            const height = Math.max(
+                                iframeDoc.body.scrollHeight,
+                                iframeDoc.documentElement.scrollHeight,
+                                600
+                            );
+                            applyHeight(Math.min(height + 50, 1000));
+                        } catch (e) {
+                            applyHeight(700);
+                        }
+                    }, 100);
+                } catch (e) {
+                    applyHeight(700);
+                }
+            }
+
+            // ----- 展開 / 收合 -----
+            function toggleFolder(index) {
+                if (closedFolders.has(index)) closedFolders.delete(index);
+                else closedFolders.add(index);
+                fileList.setRows(buildFileRows(), true);
+            }
+
+            function toggleReport(reportId) {
+                if (collapsedReports.has(reportId)) collapsedReports.delete(reportId);
+                else collapsedReports.add(reportId);
+                similarityList.setRows(buildSimilarityRows(), true);
+            }
+
+            function toggleSimilarityGroup(groupIndex) {
+                if (collapsedGroups.has(groupIndex)) collapsedGroups.delete(groupIndex);
+                else collapsedGroups.add(groupIndex);
+                similarityList.setRows(buildSimilarityRows(), true);
+            }
+
+            // 舊版按鈕使用的名稱
+            const toggleGroupCollapse = toggleSimilarityGroup;
+
+            function expandAll() {
+                if (currentView === 'file') {
+                    closedFolders.clear();
+                    if (fileList) fileList.setRows(buildFileRows(), true);
+                } else {
+                    collapsedGroups.clear();
+                    collapsedReports.clear();
+                    if (similarityList) similarityList.setRows(buildSimilarityRows(), true);
+                }
+                // 更新狀態和按鈕（只有在不是從toggleExpandCollapse調用時）
+                if (!window.calledFromToggle) {
+                    isExpanded = true;
+                    updateToggleButton();
+                }
+            }
+
+            function collapseAll() {
+                if (currentView === 'file') {
+                    indexData.tree.forEach((node, i) => {
+                        if (node.t === 'd') closedFolders.add(i);
+                    });
+                    if (fileList) fileList.setRows(buildFileRows(), true);
+                } else {
+                    indexData.groups.forEach((group, gi) => {
+                        collapsedGroups.add(gi);
+                        group.reports.forEach(ri => collapsedReports.add('r' + gi + '_' + ri));
+                    });
+                    if (similarityList) similarityList.setRows(buildSimilarityRows(), true);
+                }
+                if (!window.calledFromToggle) {
+                    isExpanded = false;
+                    updateToggleButton();
+                }
+            }
+
+            function updateToggleButton() {
+                const toggleBtn = document.getElementById('toggleBtn');
+                const toggleIcon = document.getElementById('toggleIcon');
+                const toggleText = document.getElementById('toggleText');
+                const floatingToggleBtn = document.getElementById('floatingToggleBtn');
+                const floatingToggleIcon = document.getElementById('floatingToggleIcon');
+
+                if (isExpanded) {
+                    // 當前是展開狀態，顯示收合按鈕
+                    toggleIcon.innerHTML = '<path d="M3 10l5-5 5 5" stroke="currentColor" stroke-width="1.5"/>';
+                    toggleText.textContent = '全部收合';
+                    floatingToggleIcon.innerHTML = '<path d="M3 18l9-9 9 9" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>';
+                    floatingToggleBtn.title = '全部收合';
+                    floatingToggleBtn.classList.remove('collapsed');
+                    toggleBtn.classList.remove('toggle-state-collapsed');
+                    toggleBtn.classList.add('toggle-state-expanded');
+                } else {
+                    // 當前是收合狀態，顯示展開按鈕
+                    toggleIcon.innerHTML = '<path d="M3 6l5 5 5-5" stroke="currentColor" stroke-width="1.5"/>';
+                    toggleText.textContent = '全部展開';
+                    floatingToggleIcon.innerHTML = '<path d="M3 6l9 9 9-9" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>';
+                    floatingToggleBtn.title = '全部展開';
+                    floatingToggleBtn.classList.add('collapsed');
+                    toggleBtn.classList.remove('toggle-state-expanded');
+                    toggleBtn.classList.add('toggle-state-collapsed');
+                }
+            }
+
+            function toggleExpandCollapse() {
+                if (!indexData) return;
+                window.calledFromToggle = true; // 設置標誌
+
+                if (isExpanded) {
+                    collapseAll();
+                    isExpanded = false;
+                } else {
+                    expandAll();
+                    isExpanded = true;
+                }
+
+                updateToggleButton();
+                window.calledFromToggle = false; // 清除標誌
+            }
+
+            // 切換檔案 / 相似問題視圖
+            function setView(view) {
+                const fileView = document.getElementById('fileView');
+                const similarityView = document.getElementById('similarityView');
+                const similarityBtn = document.getElementById('similarityBtn');
+                const viewSwitcher = document.querySelector('.view-switcher');
+                const copyButtons = [document.getElementById('copySummaryBtn'), document.querySelector('.copy-summary-btn')];
+
+                currentView = view;
+                fileView.classList.toggle('active', view === 'file');
+                similarityView.classList.toggle('active', view === 'similarity');
+                similarityBtn.classList.toggle('active', view === 'similarity');
+
+                // 複製摘要按鈕只在相似問題視圖顯示
+                copyButtons.forEach(btn => {
+                    if (!btn) return;
+                    if (view === 'similarity') {
+                        btn.style.display = 'flex';
+                        setTimeout(() => btn.classList.add('visible'), 10);
+                    } else {
+                        btn.classList.remove('visible');
+                        btn.style.display = 'none';
+                    }
+                });
+
+                if (viewSwitcher) {
+                    viewSwitcher.innerHTML = view === 'similarity'
+                        ? '<svg width="24" height="24" viewBox="0 0 24 24" fill="none"><path d="M3 3h18v18H3V3zm16 16V5H5v14h14z" stroke="currentColor" stroke-width="2"/></svg>'
+                        : '<svg width="24" height="24" viewBox="0 0 24 24" fill="none"><path d="M4 6h16M4 12h16M4 18h16" stroke="currentColor" stroke-width="2" stroke-linecap="round"/></svg>';
+                }
+
+                // 隱藏中的清單沒有渲染，切換後立即渲染
+                const list = view === 'file' ? fileList : similarityList;
+                if (list) list.render(true);
+            }
+
+            function toggleView(view) {
+                if (view === 'similarity') {
+                    setView(currentView === 'similarity' ? 'file' : 'similarity');
+                }
+            }
+
+            function toggleFloatingView() {
+                setView(currentView === 'file' ? 'similarity' : 'file');
+            }
+
+            // ----- 搜尋（在已載入的資料上過濾） -----
+            function searchFiles(query) {
+                const clearBtn = document.querySelector('.clear-search');
+                clearBtn.style.display = query ? 'block' : 'none';
+
+                const normalized = (query || '').trim().toLowerCase();
+                if (normalized === searchQuery) return;
+                searchQuery = normalized;
+                if (indexData) refreshViews(false);
+            }
+
+            function clearSearch() {
+                document.getElementById('searchInput').value = '';
+                searchFiles('');
+            }
+
+            // ----- 複製群組資訊 -----
+            // separator: 卡片標題與內容之間的分隔（群組複製使用 ': '，摘要使用 ' '）
+            function groupCopyLines(group, separator) {
+                const lines = [];
+                const typeLabel = group.type === 'anr' ? 'ANR' : 'Tombstone';
+                lines.push(((group.severity || '') + ' ' + typeLabel + ' ' + group.title).trim().replace(/\s+/g, ' '));
+                lines.push('🧩 ' + group.count + ' 個相似檔案');
+                lines.push('✨ 信心度: ' + group.similarity + '%');
+                if (group.sets.length) {
+                    lines.push('🕵️ 問題集: ' + group.sets.join(', '));
+                }
+
+                const cards = [
+                    ['📋 描述', group.details.description],
+                    ['🎯 影響範圍', group.details.impact],
+                    ['⚡ 優先級', group.details.priority],
+                    ['💡 建議', group.details.recommendation],
+                    ['📱 進程名稱', group.processes.length ? group.processes.join(', ') : '無進程資訊']
+                ];
+                cards.forEach(([title, text]) => {
+                    lines.push('');
+                    if (text) lines.push(title + separator + text);
+                });
+
+                lines.push('');
+                lines.push(separator === ': ' ? '🔍 關鍵堆疊: ' : '🔍 關鍵堆疊');
+                lines.push(group.stack.marker + ' ' + group.stack.frame);
+                if (group.stack.reason) {
+                    lines.push(group.stack.reason);
+                }
+
+                lines.push('');
+                lines.push('📋 相關檔案列表:');
+                group.reports.forEach((ri, index) => {
+                    lines.push((index + 1) + '. ' + indexData.reports[ri].n);
+                });
+                return lines;
+            }
+
+            function copyGroupInfo(groupIndex) {
+                const NEWLINE = String.fromCharCode(10);
+                try {
+                    const group = indexData.groups[groupIndex];
+                    const copyText = groupCopyLines(group, ': ').join(NEWLINE);
+                    if (navigator.clipboard && window.isSecureContext) {
+                        navigator.clipboard.writeText(copyText).then(function() {
+                            showCopySuccess(group.id);
+                        }).catch(function(err) {
+                            console.error('複製失敗:', err);
+                            fallbackCopyTextToClipboard(copyText, group.id);
+                        });
+                    } else {
+                        fallbackCopyTextToClipboard(copyText, group.id);
+                    }
+                } catch (error) {
+                    console.error('copyGroupInfo 錯誤:', error);
+                    alert('複製時發生錯誤：' + error.message);
+                }
+            }
+
+            function showCopySuccess(groupId) {
+                // 群組可能已捲出視窗而不在 DOM 中
+                const group = document.getElementById(groupId);
+                if (!group) return;
+
+                const copyBtn = group.querySelector('.copy-btn');
+                if (!copyBtn) return;
+
+                const originalHTML = copyBtn.innerHTML;
+                copyBtn.classList.add('copied');
+                copyBtn.innerHTML = `
+                    <svg width="16" height="16" viewBox="0 0 16 16" fill="none">
+                        <path d="M13.78 4.22a.75.75 0 010 1.06l-7.25 7.25a.75.75 0 01-1.06 0L2.22 9.28a.75.75 0 011.06-1.06L6 10.94l6.72-6.72a.75.75 0 011.06 0z" fill="currentColor"/>
+                    </svg>
+                    已複製
+                `;
+
+                setTimeout(() => {
+                    copyBtn.classList.remove('copied');
+                    copyBtn.innerHTML = originalHTML;
+                }, 2000);
+            }
+
+            function fallbackCopyTextToClipboard(text, groupId) {
+                const textArea = document.createElement('textarea');
+                textArea.value = text;
+                textArea.style.position = 'fixed';
+                textArea.style.left = '-999999px';
+                textArea.style.top = '-999999px';
+                document.body.appendChild(textArea);
+                textArea.focus();
+                textArea.select();
+
+                try {
+                    const successful = document.execCommand('copy');
+                    if (successful) {
+                        showCopySuccess(groupId);
+                    } else {
+                        alert('複製失敗，請手動選擇文字複製');
+                    }
+                } catch (err) {
+                    console.error('Fallback 複製失敗:', err);
+                    alert('複製失敗，請手動選擇文字複製');
+                }
+
+                document.body.removeChild(textArea);
+            }
+
+            // 複製相似問題視圖摘要
+            function copySimilarityView() {
+                const NEWLINE = String.fromCharCode(10);
+
+                try {
+                    const copyTextParts = [];
+                    copyTextParts.push('📊 Android Log 分析報告 - 相似問題摘要');
+                    copyTextParts.push('=' + '='.repeat(50));
+                    copyTextParts.push('');
+
+                    const groups = indexData ? indexData.groups : [];
+                    if (groups.length === 0) {
+                        copyTextParts.push('沒有發現相似問題');
+                    } else {
+                        copyTextParts.push(`🔍 發現 ${groups.length} 組相似問題:`);
+                        copyTextParts.push('');
+
+                        groups.forEach((group, groupIndex) => {
+                            if (groupIndex > 0) {
+                                copyTextParts.push('');
+                                copyTextParts.push('-'.repeat(60));
+                                copyTextParts.push('');
+                            }
+                            copyTextParts.push(`【第 ${groupIndex + 1} 組】`);
+                            copyTextParts.push(...groupCopyLines(group, ' '));
+                        });
+                    }
+
+                    copyTextParts.push('');
+                    copyTextParts.push('=' + '='.repeat(50));
+                    copyTextParts.push('⏰ 生成時間: ' + new Date().toLocaleString('zh-TW'));
+
+                    const copyText = copyTextParts.join(NEWLINE);
+                    if (navigator.clipboard && window.isSecureContext) {
+                        navigator.clipboard.writeText(copyText).then(() => {
+                            showCopySummarySuccess();
+                        }).catch(err => {
+                            console.error('複製失敗:', err);
+                            fallbackCopySummary(copyText);
+                        });
+                    } else {
+                        fallbackCopySummary(copyText);
+                    }
+                } catch (error) {
+                    console.error('複製摘要錯誤:', error);
+                    alert('複製時發生錯誤：' + error.message);
+                }
+            }
+
+            // 顯示複製成功（摘要）
+            function showCopySummarySuccess() {
+                const controlBtn = document.getElementById('copySummaryBtn');
+                if (controlBtn) {
+                    const originalHTML = controlBtn.innerHTML;
+                    controlBtn.classList.add('copying');
+                    controlBtn.innerHTML = `
+                        <svg width="16" height="16" viewBox="0 0 16 16" fill="none">
+                            <path d="M13.78 4.22a.75.75 0 010 1.06l-7.25 7.25a.75.75 0 01-1.06 0L2.22 9.28a.75.75 0 011.06-1.06L6 10.94l6.72-6.72a.75.75 0 011.06 0z" fill="currentColor"/>
+                        </svg>
+                        已複製
+                    `;
+
+                    setTimeout(() => {
+                        controlBtn.classList.remove('copying');
+                        controlBtn.innerHTML = originalHTML;
+                    }, 2000);
+                }
+
+                const floatingBtn = document.querySelector('.copy-summary-btn');
+                if (floatingBtn) {
+                    floatingBtn.classList.add('copied');
+                    setTimeout(() => {
+                        floatingBtn.classList.remove('copied');
+                    }, 2000);
+                }
+            }
+
+            // Fallback 複製方法（摘要）
+            function fallbackCopySummary(text) {
+                const textArea = document.createElement('textarea');
+                textArea.value = text;
+                textArea.style.position = 'fixed';
+                textArea.style.left = '-999999px';
+                textArea.style.top = '-999999px';
+                document.body.appendChild(textArea);
+                textArea.focus();
+                textArea.select();
+
+                try {
+                    const successful = document.execCommand('copy');
+                    if (successful) {
+                        showCopySummarySuccess();
+                    } else {
+                        alert('複製失敗，請手動選擇文字複製');
+                    }
+                } catch (err) {
+                    console.error('Fallback 複製失敗:', err);
+                    alert('複製失敗，請手動選擇文字複製');
+                }
+
+                document.body.removeChild(textArea);
+            }
+
+            // 匯出單一 HTML 檔：內嵌全部索引資料，不需要 index_data/ 資料夾
+            const exportHTML = () => {
+                if (!indexData) return;
+                const doc = document.documentElement.cloneNode(true);
+                doc.querySelector('.export-btn').style.display = 'none';
+                doc.querySelectorAll('script.index-chunk').forEach(el => el.remove());
+                doc.querySelectorAll('.virtual-list').forEach(el => {
+                    el.innerHTML = '<p class="index-loading">載入中...</p>';
+                });
+
+                const dataScript = document.createElement('script');
+                dataScript.textContent = 'window.INDEX_INLINE_DATA = ' + JSON.stringify(indexData).replace(/<\//g, '<\\/') + ';';
+                const appScript = doc.querySelector('#indexAppScript');
+                appScript.parentNode.insertBefore(dataScript, appScript);
+
+                const htmlContent = '<!DOCTYPE html>\n' + doc.outerHTML;
+                const blob = new Blob([htmlContent], { type: 'text/html;charset=utf-8' });
+                const url = window.URL.createObjectURL(blob);
+                const a = document.createElement('a');
+                a.href = url;
+                a.download = 'android_log_analysis_' + new Date().toISOString().slice(0,10) + '.html';
+                document.body.appendChild(a);
+                a.click();
+                document.body.removeChild(a);
+                window.URL.revokeObjectURL(url);
+            };
+
+            // 初始化
+            document.addEventListener('DOMContentLoaded', function() {
+                initTheme();
+                updateToggleButton();
+
+                // 確保複製摘要按鈕初始是隱藏的（檔案視圖）
+                const copySummaryBtn = document.getElementById('copySummaryBtn');
+                const floatingCopyBtn = document.querySelector('.copy-summary-btn');
+                [copySummaryBtn, floatingCopyBtn].forEach(btn => {
+                    if (btn) {
+                        btn.classList.remove('visible');
+                        btn.style.display = 'none';
+                    }
+                });
+
+                // 支援 Enter 鍵搜尋
+                const searchInput = document.getElementById('searchInput');
+                if (searchInput) {
+                    searchInput.addEventListener('keypress', function(e) {
+                        if (e.key === 'Enter') {
+                            e.preventDefault();
+                            searchFiles(this.value);
+                        }
+                    });
+                }
+
+                loadIndexData();
+            });
+        """
+    
+    def _generate_html_index(self, index_manifest: Dict) -> str:
+        """生成 HTML 索引外殼 - 增強美化版
+        
+        檔案樹與相似度組由 index_data/ 的分塊資料在瀏覽器端以虛擬捲動渲染，
+        索引頁大小與開啟時間不隨報告數量增加
+        """
+        # 內嵌在 <script> 中的分塊清單
+        manifest_json = json.dumps(index_manifest, ensure_ascii=False).replace('</', '<\\/')
         
         return f"""<!DOCTYPE html>
     <html lang="zh-TW">
@@ -10220,7 +12301,7 @@ class LogAnalyzerSystem:
             .tooltip-text:focus-within ~ .tooltip-copy-btn {{
                 opacity: 0.5;
             }}
-
+            {self._get_index_virtual_styles()}
         </style>
     </head>
     <body>
@@ -10316,12 +12397,16 @@ class LogAnalyzerSystem:
                         <span class="folder-icon">📂</span>
                         檔案列表
                     </div>
-                    {render_tree(index_data)}
+                    <div class="virtual-list" id="fileList">
+                        <p class="index-loading">載入中...</p>
+                    </div>
                 </main>
                 
                 <!-- 相似問題視圖 -->
                 <main class="similarity-view view-mode" id="similarityView">
-                    {render_similarity_groups(similarity_groups)}
+                    <div class="virtual-list" id="similarityList">
+                        <p class="index-loading">載入中...</p>
+                    </div>
                 </main>
             </div>
         </div>
@@ -10385,609 +12470,40 @@ class LogAnalyzerSystem:
                 if (savedTheme === 'light') {{
                     root.classList.add('light-theme');
                     lightBtn.classList.add('active');
-                    darkBtn.classList.remove('active');
-                }} else {{
-                    root.classList.remove('light-theme');
-                    darkBtn.classList.add('active');
-                    lightBtn.classList.remove('active');
-                }}
-            }};
-            
-            const toggleTheme = () => {{
-                const root = document.documentElement;
-                const darkBtn = document.getElementById('darkMode');
-                const lightBtn = document.getElementById('lightMode');
-                
-                if (root.classList.contains('light-theme')) {{
-                    root.classList.remove('light-theme');
-                    localStorage.setItem('theme', 'dark');
-                    darkBtn.classList.add('active');
-                    lightBtn.classList.remove('active');
-                }} else {{
-                    root.classList.add('light-theme');
-                    localStorage.setItem('theme', 'light');
-                    lightBtn.classList.add('active');
-                    darkBtn.classList.remove('active');
-                }}
-            }};
-            
-            // Export HTML
-            const exportHTML = () => {{
-                // 先隱藏匯出按鈕
-                const exportBtn = document.querySelector('.export-btn');
-                const originalDisplay = exportBtn.style.display;
-                exportBtn.style.display = 'none';
-                
-                // 獲取 HTML 內容
-                const htmlContent = document.documentElement.outerHTML;
-                
-                // 恢復按鈕顯示
-                exportBtn.style.display = originalDisplay;
-                
-                // 創建並下載文件
-                const blob = new Blob([htmlContent], {{ type: 'text/html;charset=utf-8' }});
-                const url = window.URL.createObjectURL(blob);
-                const a = document.createElement('a');
-                a.href = url;
-                a.download = 'android_log_analysis_' + new Date().toISOString().slice(0,10) + '.html';
-                document.body.appendChild(a);
-                a.click();
-                document.body.removeChild(a);
-                window.URL.revokeObjectURL(url);
-            }};
-            
-            let currentView = 'file';
-            let isExpanded = true; // 追蹤展開/收合狀態
-
-            // 定義為全局函數
-            function adjustIframeHeight(iframe) {{
-                try {{
-                    iframe.style.height = '100px';
-                    setTimeout(() => {{
-                        try {{
-                            const iframeDoc = iframe.contentDocument || iframe.contentWindow.document;
-                            const height = Math.max(
-                                iframeDoc.body.scrollHeight,
-                                iframeDoc.documentElement.scrollHeight,
-                                600
-                            );
-                            iframe.style.height = Math.min(height + 50, 1000) + 'px';
-                        }} catch (e) {{
-                            iframe.style.height = '700px';
-                        }}
-                    }}, 100);
-                }} catch (e) {{
-                    iframe.style.height = '700px';
-                }}
-            }}
-
-            function updateToggleButton() {{
-                const toggleBtn = document.getElementById('toggleBtn');
-                const toggleIcon = document.getElementById('toggleIcon');
-                const toggleText = document.getElementById('toggleText');
-                const floatingToggleBtn = document.getElementById('floatingToggleBtn');
-                const floatingToggleIcon = document.getElementById('floatingToggleIcon');
-                
-                if (isExpanded) {{
-                    // 當前是展開狀態，顯示收合按鈕
-                    toggleIcon.innerHTML = '<path d="M3 10l5-5 5 5" stroke="currentColor" stroke-width="1.5"/>';
-                    toggleText.textContent = '全部收合';
-                    floatingToggleIcon.innerHTML = '<path d="M3 18l9-9 9 9" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>';
-                    floatingToggleBtn.title = '全部收合';
-                    floatingToggleBtn.classList.remove('collapsed');
-                    
-                    // 更新按鈕狀態樣式
-                    toggleBtn.classList.remove('toggle-state-collapsed');
-                    toggleBtn.classList.add('toggle-state-expanded');
-                }} else {{
-                    // 當前是收合狀態，顯示展開按鈕
-                    toggleIcon.innerHTML = '<path d="M3 6l5 5 5-5" stroke="currentColor" stroke-width="1.5"/>';
-                    toggleText.textContent = '全部展開';
-                    floatingToggleIcon.innerHTML = '<path d="M3 6l9 9 9-9" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>';
-                    floatingToggleBtn.title = '全部展開';
-                    floatingToggleBtn.classList.add('collapsed');
-                    
-                    // 更新按鈕狀態樣式
-                    toggleBtn.classList.remove('toggle-state-expanded');
-                    toggleBtn.classList.add('toggle-state-collapsed');
-                }}
-            }}
-
-            function toggleExpandCollapse() {{
-                window.calledFromToggle = true; // 設置標誌
-                
-                if (isExpanded) {{
-                    collapseAll();
-                    isExpanded = false;
-                }} else {{
-                    expandAll();
-                    isExpanded = true;
-                }}
-                
-                updateToggleButton();
-                window.calledFromToggle = false; // 清除標誌
-            }}
-
-            function toggleView(view) {{
-                const fileView = document.getElementById('fileView');
-                const similarityView = document.getElementById('similarityView');
-                const similarityBtn = document.getElementById('similarityBtn');
-                const copySummaryBtn = document.getElementById('copySummaryBtn');
-                const floatingCopyBtn = document.querySelector('.copy-summary-btn');
-                
-                if (view === 'similarity') {{
-                    if (currentView === 'similarity') {{
-                        // 切換回檔案視圖
-                        fileView.classList.add('active');
-                        similarityView.classList.remove('active');
-                        similarityBtn.classList.remove('active');
-                        currentView = 'file';
-                        
-                        // 隱藏複製摘要按鈕
-                        if (copySummaryBtn) {{
-                            copySummaryBtn.classList.remove('visible');
-                            copySummaryBtn.style.display = 'none';
-                        }}
-                        if (floatingCopyBtn) {{
-                            floatingCopyBtn.classList.remove('visible');
-                            floatingCopyBtn.style.display = 'none';
-                        }}
-                    }} else {{
-                        // 切換到相似問題視圖
-                        fileView.classList.remove('active');
-                        similarityView.classList.add('active');
-                        similarityBtn.classList.add('active');
-                        currentView = 'similarity';
-                        
-                        // 顯示複製摘要按鈕
-                        if (copySummaryBtn) {{
-                            copySummaryBtn.style.display = 'flex';
-                            setTimeout(() => {{
-                                copySummaryBtn.classList.add('visible');
-                            }}, 10);
-                        }}
-                        if (floatingCopyBtn) {{
-                            floatingCopyBtn.style.display = 'flex';
-                            setTimeout(() => {{
-                                floatingCopyBtn.classList.add('visible');
-                            }}, 10);
-                        }}
-                    }}
-                }}
-            }}
-            
-            function toggleFolder(folderId) {{
-                const folder = document.getElementById(folderId);
-                const arrow = document.getElementById('arrow-' + folderId);
-                
-                if (folder.style.display === 'none' || folder.style.display === '') {{
-                    folder.style.display = 'block';
-                    arrow.classList.add('open');
-                }} else {{
-                    folder.style.display = 'none';
-                    arrow.classList.remove('open');
-                }}
-            }}
-            
-            function toggleGroup(groupId) {{
-                const content = document.getElementById('content-' + groupId);
-                const arrow = document.getElementById('arrow-' + groupId);
-                
-                if (content.style.display === 'none') {{
-                    content.style.display = 'block';
-                    arrow.classList.add('open');
-                }} else {{
-                    content.style.display = 'none';
-                    arrow.classList.remove('open');
-                }}
-            }}
-            
-            function toggleReport(reportId) {{
-                const content = document.getElementById('content-' + reportId);
-                const arrow = document.getElementById('arrow-' + reportId);
-                
-                // 簡單地切換顯示狀態
-                if (content.style.display === 'none') {{
-                    content.style.display = 'block';
-                    arrow.classList.add('open');
-                }} else {{
-                    content.style.display = 'none';
-                    arrow.classList.remove('open');
-                }}
-            }}
-            
-            // 群組展開/收合功能
-            function toggleGroupCollapse(groupId) {{
-                const cardsSection = document.getElementById('cards-' + groupId);
-                const content = document.getElementById('content-' + groupId);
-                const icon = document.getElementById('collapse-' + groupId);
-                
-                if (!cardsSection || !content || !icon) {{
-                    console.error('找不到元素:', groupId);
-                    return;
-                }}
-                
-                const isCollapsed = cardsSection.classList.contains('collapsed');
-                
-                if (isCollapsed) {{
-                    // 展開
-                    cardsSection.classList.remove('collapsed');
-                    content.classList.remove('collapsed');
-                    icon.style.transform = 'rotate(0deg)';
-                    icon.parentElement.title = '收合';
-                }} else {{
-                    // 收合
-                    cardsSection.classList.add('collapsed');
-                    content.classList.add('collapsed');
-                    icon.style.transform = 'rotate(-90deg)';
-                    icon.parentElement.title = '展開';
-                }}
-            }}
-
-            function toggleSimilarityGroup(groupId) {{
-                const cardsSection = document.getElementById('cards-' + groupId);
-                const contentSection = document.getElementById('content-' + groupId);
-                
-                // 檢查當前狀態
-                const isExpanded = !cardsSection.classList.contains('collapsed');
-                
-                if (isExpanded) {{
-                    // 目前是展開的，要收合
-                    cardsSection.classList.add('collapsed');
-                    contentSection.classList.add('collapsed');
-                }} else {{
-                    // 目前是收合的，要展開
-                    cardsSection.classList.remove('collapsed');
-                    contentSection.classList.remove('collapsed');
-                }}
-            }}
-
-            // 全域展開所有群組
-            function expandAllGroups() {{
-                const cardsSections = document.querySelectorAll('.group-cards-section');
-                const contents = document.querySelectorAll('.group-content');
-                const icons = document.querySelectorAll('.collapse-icon');
-                
-                cardsSections.forEach(section => section.classList.remove('collapsed'));
-                contents.forEach(content => content.classList.remove('collapsed'));
-                icons.forEach(icon => icon.classList.remove('collapsed'));
-            }}
-
-            // 全域收合所有群組
-            function collapseAllGroups() {{
-                const cardsSections = document.querySelectorAll('.group-cards-section');
-                const contents = document.querySelectorAll('.group-content');
-                const icons = document.querySelectorAll('.collapse-icon');
-                
-                cardsSections.forEach(section => section.classList.add('collapsed'));
-                contents.forEach(content => content.classList.add('collapsed'));
-                icons.forEach(icon => icon.classList.add('collapsed'));
-            }}
-
-            // 修改原有的 expandAll 函數以支援兩種視圖
-            function expandAll() {{
-                if (currentView === 'file') {{
-                    // 檔案視圖的展開
-                    const folders = document.querySelectorAll('.folder-content');
-                    const arrows = document.querySelectorAll('.folder-arrow');
-                    
-                    folders.forEach(folder => {{
-                        folder.style.display = 'block';
-                    }});
-                    
-                    arrows.forEach(arrow => {{
-                        arrow.classList.add('open');
-                    }});
-                }} else {{
-                    // 相似問題視圖的展開
-                    expandAllGroups();
-                    
-                    // 也展開報告內容
-                    const reportContents = document.querySelectorAll('.report-content');
-                    const reportArrows = document.querySelectorAll('.report-arrow');
-                    
-                    reportContents.forEach(content => {{
-                        content.style.display = 'block';
-                    }});
-                    
-                    reportArrows.forEach(arrow => {{
-                        arrow.classList.add('open');
-                    }});
-                }}
-                // 更新狀態和按鈕（只有在不是從toggleExpandCollapse調用時）
-                if (!window.calledFromToggle) {{
-                    isExpanded = true;
-                    updateToggleButton();
-                }}                
-            }}
-
-            // 修改原有的 collapseAll 函數以支援兩種視圖
-            function collapseAll() {{
-                if (currentView === 'file') {{
-                    // 檔案視圖的收合
-                    const folders = document.querySelectorAll('.folder-content');
-                    const arrows = document.querySelectorAll('.folder-arrow');
-                    
-                    folders.forEach(folder => {{
-                        folder.style.display = 'none';
-                    }});
-                    
-                    arrows.forEach(arrow => {{
-                        arrow.classList.remove('open');
-                    }});
-                }} else {{
-                    // 相似問題視圖的收合
-                    collapseAllGroups();
-                    
-                    // 也收合報告內容
-                    const reportContents = document.querySelectorAll('.report-content');
-                    const reportArrows = document.querySelectorAll('.report-arrow');
-                    
-                    reportContents.forEach(content => {{
-                        content.style.display = 'none';
-                    }});
-                    
-                    reportArrows.forEach(arrow => {{
-                        arrow.classList.remove('open');
-                    }});
-                }}
-                if (!window.calledFromToggle) {{
-                    isExpanded = false;
-                    updateToggleButton();
-                }}                
-            }}
-            
-            // 初始化
-            document.addEventListener('DOMContentLoaded', function() {{
-                initTheme();
-                expandAll();
-                isExpanded = true; // 設定狀態
-                updateToggleButton(); // 更新按鈕外觀
-
-                // 初始化複製摘要按鈕的顯示狀態
-                const copySummaryBtn = document.getElementById('copySummaryBtn');
-                const floatingCopyBtn = document.querySelector('.copy-summary-btn');
-
-                // 確保初始狀態是隱藏的
-                if (copySummaryBtn) {{
-                    copySummaryBtn.classList.remove('visible');
-                    copySummaryBtn.style.display = 'none';
-                }}
-                if (floatingCopyBtn) {{
-                    floatingCopyBtn.classList.remove('visible');
-                    floatingCopyBtn.style.display = 'none';
-                }}
-
-                // 根據初始視圖設置按鈕狀態
-                if (currentView === 'similarity') {{
-                    if (copySummaryBtn) copySummaryBtn.classList.add('visible');
-                    if (floatingCopyBtn) floatingCopyBtn.classList.add('visible');
-                }} else {{
-                    if (copySummaryBtn) copySummaryBtn.classList.remove('visible');
-                    if (floatingCopyBtn) floatingCopyBtn.classList.remove('visible');
-                }}
-
-                // 為所有 iframe 設置 onload 事件
-                const iframes = document.querySelectorAll('.report-iframe');
-                iframes.forEach(iframe => {{
-                    iframe.onload = function() {{
-                        adjustIframeHeight(this);
-                    }};
-                    // 如果 iframe 已經載入，立即調整高度
-                    if (iframe.contentDocument && iframe.contentDocument.readyState === 'complete') {{
-                        adjustIframeHeight(iframe);
-                    }}
-                }});
-
-                // 為所有收合按鈕綁定事件
-                document.addEventListener('click', function(e) {{
-                    if (e.target.closest('.collapse-btn')) {{
-                        const button = e.target.closest('.collapse-btn');
-                        const groupId = button.getAttribute('onclick').match(/'([^']+)'/)[1];
-                        toggleGroupCollapse(groupId);
-                        e.stopPropagation(); // 防止事件冒泡
-                    }}
-                }});                
-            }});
-        </script>
-        <script>
-            // 搜尋功能
-            function searchFiles(query) {{
-                const clearBtn = document.querySelector('.clear-search');
-                if (query) {{
-                    clearBtn.style.display = 'block';
-                }} else {{
-                    clearBtn.style.display = 'none';
-                }}
-                
-                if (currentView === 'file') {{
-                    // 檔案視圖搜尋
-                    searchInFileView(query);
-                }} else {{
-                    // 相似問題視圖搜尋
-                    searchInSimilarityView(query);
-                }}
-            }}
-
-            function searchInFileView(query) {{
-                const fileItems = document.querySelectorAll('.file-item');
-                const folders = document.querySelectorAll('.folder-item');
-                
-                if (!query) {{
-                    // 清空搜尋，顯示所有項目
-                    fileItems.forEach(item => {{
-                        item.classList.remove('search-highlight');
-                        item.style.display = '';
-                    }});
-                    folders.forEach(folder => {{
-                        folder.style.display = '';
-                    }});
-                    return;
-                }}
-                
-                query = query.toLowerCase();
-                
-                // 搜尋並高亮匹配的檔案
-                folders.forEach(folder => {{
-                    const folderContent = folder.querySelector('.folder-content');
-                    const folderName = folder.querySelector('.folder-name').textContent.toLowerCase();
-                    let hasMatch = false;
-                    
-                    // 檢查資料夾內的檔案
-                    const innerItems = folderContent.querySelectorAll('.file-item');
-                    innerItems.forEach(item => {{
-                        const fileName = item.querySelector('.file-name').textContent.toLowerCase();
-                        if (fileName.includes(query)) {{
-                            item.classList.add('search-highlight');
-                            item.style.display = '';
-                            hasMatch = true;
-                        }} else {{
-                            item.classList.remove('search-highlight');
-                            item.style.display = 'none';
-                        }}
-                    }});
-                    
-                    // 如果資料夾名稱匹配或內部有匹配，顯示資料夾
-                    if (folderName.includes(query) || hasMatch) {{
-                        folder.style.display = '';
-                        if (hasMatch) {{
-                            // 展開包含匹配項的資料夾
-                            folderContent.style.display = 'block';
-                            const arrow = folder.querySelector('.folder-arrow');
-                            arrow.classList.add('open');
-                        }}
-                    }} else {{
-                        folder.style.display = 'none';
-                    }}
-                }});
-            }}
-
-            function searchInSimilarityView(query) {{
-                const groups = document.querySelectorAll('.similarity-group');
-                
-                if (!query) {{
-                    groups.forEach(group => {{
-                        group.style.display = '';
-                        const items = group.querySelectorAll('.similarity-item');
-                        items.forEach(item => {{
-                            item.classList.remove('search-highlight');
-                            item.style.display = '';
-                        }});
-                    }});
-                    return;
-                }}
-                
-                query = query.toLowerCase();
-                
-                groups.forEach(group => {{
-                    const groupContent = group.querySelector('.group-content');
-                    const items = group.querySelectorAll('.similarity-item');
-                    let hasMatch = false;
-                    
-                    items.forEach(item => {{
-                        const reportName = item.querySelector('.report-name').textContent.toLowerCase();
-                        if (reportName.includes(query)) {{
-                            item.classList.add('search-highlight');
-                            item.style.display = '';
-                            hasMatch = true;
-                        }} else {{
-                            item.classList.remove('search-highlight');
-                            item.style.display = 'none';
-                        }}
-                    }});
-                    
-                    if (hasMatch) {{
-                        group.style.display = '';
-                        groupContent.style.display = 'block';
-                        const arrow = group.querySelector('.group-arrow');
-                        arrow.classList.add('open');
-                    }} else {{
-                        group.style.display = 'none';
-                    }}
-                }});
-            }}
-
-            function clearSearch() {{
-                document.getElementById('searchInput').value = '';
-                searchFiles('');
-            }}
-
-            // 支援 Enter 鍵搜尋
-            document.addEventListener('DOMContentLoaded', function() {{
-                const searchInput = document.getElementById('searchInput');
-                if (searchInput) {{
-                    searchInput.addEventListener('keypress', function(e) {{
-                        if (e.key === 'Enter') {{
-                            e.preventDefault();
-                            searchFiles(this.value);
-                        }}
-                    }});
-                }}
-            }});        
-        </script>
-        <script>
-            // 浮動視圖切換
-            function toggleFloatingView() {{
-                const fileView = document.getElementById('fileView');
-                const similarityView = document.getElementById('similarityView');
-                const similarityBtn = document.getElementById('similarityBtn');
-                const viewSwitcher = document.querySelector('.view-switcher');
-                const copySummaryBtn = document.getElementById('copySummaryBtn');
-                const floatingCopyBtn = document.querySelector('.copy-summary-btn');
+                    darkBtn.classList.remove('active');
+                }} else {{
+                    root.classList.remove('light-theme');
+                    darkBtn.classList.add('active');
+                    lightBtn.classList.remove('active');
+                }}
+            }};
+            
+            const toggleTheme = () => {{
+                const root = document.documentElement;
+                const darkBtn = document.getElementById('darkMode');
+                const lightBtn = document.getElementById('lightMode');
                 
-                if (currentView === 'file') {{
-                    // 切換到相似問題視圖
-                    fileView.classList.remove('active');
-                    similarityView.classList.add('active');
-                    similarityBtn.classList.add('active');
-                    currentView = 'similarity';
-                    
-                    // 顯示複製摘要按鈕
-                    if (copySummaryBtn) {{
-                        copySummaryBtn.style.display = 'flex';
-                        setTimeout(() => {{
-                            copySummaryBtn.classList.add('visible');
-                        }}, 10);
-                    }}
-                    if (floatingCopyBtn) {{
-                        floatingCopyBtn.style.display = 'flex';
-                        setTimeout(() => {{
-                            floatingCopyBtn.classList.add('visible');
-                        }}, 10);
-                    }}
-                    
-                    // 更新按鈕圖標
-                    viewSwitcher.innerHTML = `
-                        <svg width="24" height="24" viewBox="0 0 24 24" fill="none">
-                            <path d="M3 3h18v18H3V3zm16 16V5H5v14h14z" stroke="currentColor" stroke-width="2"/>
-                        </svg>
-                    `;
+                if (root.classList.contains('light-theme')) {{
+                    root.classList.remove('light-theme');
+                    localStorage.setItem('theme', 'dark');
+                    darkBtn.classList.add('active');
+                    lightBtn.classList.remove('active');
                 }} else {{
-                    // 切換回檔案視圖
-                    fileView.classList.add('active');
-                    similarityView.classList.remove('active');
-                    similarityBtn.classList.remove('active');
-                    currentView = 'file';
-                    
-                    // 隱藏複製摘要按鈕
-                    if (copySummaryBtn) {{
-                        copySummaryBtn.classList.remove('visible');
-                        copySummaryBtn.style.display = 'none';
-                    }}
-                    if (floatingCopyBtn) {{
-                        floatingCopyBtn.classList.remove('visible');
-                        floatingCopyBtn.style.display = 'none';
-                    }}
-                    
-                    // 更新按鈕圖標
-                    viewSwitcher.innerHTML = `
-                        <svg width="24" height="24" viewBox="0 0 24 24" fill="none">
-                            <path d="M4 6h16M4 12h16M4 18h16" stroke="currentColor" stroke-width="2" stroke-linecap="round"/>
-                        </svg>
-                    `;
+                    root.classList.add('light-theme');
+                    localStorage.setItem('theme', 'light');
+                    lightBtn.classList.add('active');
+                    darkBtn.classList.remove('active');
                 }}
-            }}
-
+            }};
+            
+        </script>
+        <script>
+            const INDEX_MANIFEST = {manifest_json};
+        </script>
+        <script id="indexAppScript">
+            {self._get_index_app_script()}
+        </script>
+        <script>
             // 回到頂部
             function scrollToTop() {{
                 window.scrollTo({{
@@ -11006,441 +12522,6 @@ class LogAnalyzerSystem:
                 }}
             }});
 
-            // 複製相似問題群組資訊
-            function copyGroupInfo(groupId) {{
-
-                const NEWLINE = String.fromCharCode(10);  
-
-                try {{
-                    const group = document.getElementById(groupId);
-                    if (!group) {{
-                        console.error('找不到群組：', groupId);
-                        return;
-                    }}
-                    
-                    // 建立複製文字的陣列，最後再用 join 結合
-                    const copyTextParts = [];
-                    
-                    // 獲取群組標題
-                    const titleElement = group.querySelector('.group-title');
-                    if (titleElement) {{
-                        // 使用 textContent 而不是 innerHTML，避免 HTML 實體問題
-                        let title = titleElement.textContent.trim();
-                        
-                        // 獲取嚴重程度
-                        const severityElement = group.querySelector('.severity-badge');
-                        const severity = severityElement ? severityElement.textContent.trim() : '';
-                        
-                        // 移除標題中重複的嚴重程度文字
-                        if (severity && title.includes(severity)) {{
-                            title = title.replace(severity, '').trim();
-                        }}
-                        
-                        copyTextParts.push(severity + ' ' + title.trim().replace(/\s+/g, ' '));
-                    }}
-                    
-                    // 獲取檔案數量
-                    const fileCountElement = group.querySelector('.file-count-badge');
-                    if (fileCountElement) {{
-                        copyTextParts.push('🧩 ' + fileCountElement.textContent.trim());
-                    }}
-                    
-                    // 獲取信心度
-                    const confidenceElement = group.querySelector('.confidence-badge');
-                    if (confidenceElement) {{
-                        const confidenceText = confidenceElement.textContent.trim();
-                        const confidenceMatch = confidenceText.match(/(\d+)%/);
-                        if (confidenceMatch) {{
-                            copyTextParts.push('✨ 信心度: ' + confidenceMatch[0]);
-                        }}
-                    }}
-                    
-                    // 獲取問題集資訊
-                    const problemSetsElement = group.querySelector('.sets-list');
-                    if (problemSetsElement) {{
-                        copyTextParts.push('🕵️ 問題集: ' + problemSetsElement.textContent.trim());
-                    }}
-                    
-                    // 獲取卡片內容
-                    const cards = group.querySelectorAll('.problem-card');
-                    cards.forEach(function(card) {{
-                        const cardTitle = card.querySelector('h4');
-                        if (!cardTitle) return;
-                        
-                        const titleText = cardTitle.textContent.trim();
-                        
-                        // 特別處理關鍵堆疊卡片
-                        if (titleText.includes('關鍵堆疊')) {{
-                            copyTextParts.push(''); // 空行
-                            copyTextParts.push(titleText + ': ');  // 標題
-                            
-                            const keyStack = card.querySelector('.key-stack');
-                            if (keyStack) {{
-                                const stackMarker = keyStack.querySelector('.stack-marker');
-                                const stackFrame = keyStack.querySelector('.stack-frame');
-                                const stackReason = keyStack.querySelector('.stack-reason');
-                                
-                                if (stackMarker && stackFrame) {{
-                                    // 將標記和堆疊放在同一行
-                                    const markerText = stackMarker.textContent.trim();
-                                    const frameText = stackFrame.textContent.trim();
-                                    copyTextParts.push(markerText + ' ' + frameText);
-                                }}
-                                
-                                if (stackReason && stackReason.textContent.trim()) {{
-                                    // 原因單獨一行
-                                    copyTextParts.push(stackReason.textContent);
-                                }}
-                            }}
-                        }} else {{
-                            // 處理其他類型的卡片內容
-                            const cardP = card.querySelector('p');
-                            const cardList = card.querySelector('.process-list');
-                            const cardDiv = card.querySelector('div:not(.key-stack):not(.process-list)');
-                            
-                            copyTextParts.push(''); // 空行
-                            
-                            if (cardP) {{
-                                // 一般段落內容
-                                copyTextParts.push(titleText + ': ' + cardP.textContent.trim());
-                            }} else if (cardList) {{
-                                // 處理進程列表
-                                copyTextParts.push(titleText);
-                                const listText = cardList.textContent.trim();
-                                if (listText) {{
-                                    const lines = listText.split(NEWLINE).filter(line => line.trim());
-                                    lines.forEach(function(line) {{
-                                        const trimmedLine = line.trim();
-                                        if (trimmedLine && !trimmedLine.startsWith('•')) {{
-                                            copyTextParts.push('  • ' + trimmedLine);
-                                        }} else if (trimmedLine) {{
-                                            copyTextParts.push('  ' + trimmedLine);
-                                        }}
-                                    }});
-                                }}
-                            }} else if (cardDiv && titleText.includes('優先級')) {{
-                                // 特殊處理優先級
-                                copyTextParts.push(titleText + ': ' + cardDiv.textContent.trim());
-                            }} else {{
-                                // 處理直接文字內容的卡片（如描述、影響範圍、建議）
-                                const cardContent = card.textContent.trim();
-                                const contentWithoutTitle = cardContent.replace(titleText, '').trim();
-                                if (contentWithoutTitle) {{
-                                    copyTextParts.push(titleText + ': ' + contentWithoutTitle);
-                                }}
-                            }}
-                        }}
-                    }});
-                    
-                    // 獲取檔案列表
-                    copyTextParts.push('');
-                    copyTextParts.push('📋 相關檔案列表:');
-                    
-                    const reportItems = group.querySelectorAll('.similarity-item .report-name');
-                    reportItems.forEach(function(item, index) {{
-                        const fileName = item.textContent.trim();
-                        // 移除 (問題 set: xxx) 部分
-                        const cleanFileName = fileName.replace(/\s*\(問題 set:.*?\)\s*$/, '').trim();
-                        copyTextParts.push((index + 1) + '. ' + cleanFileName);
-                    }});
-                    
-                    // 使用換行符號結合所有部分                  
-                    const copyText = copyTextParts.join(NEWLINE);
-                    
-                    // 複製到剪貼板
-                    if (navigator.clipboard && window.isSecureContext) {{
-                        navigator.clipboard.writeText(copyText).then(function() {{
-                            showCopySuccess(groupId);
-                        }}).catch(function(err) {{
-                            console.error('複製失敗:', err);
-                            fallbackCopyTextToClipboard(copyText, groupId);
-                        }});
-                    }} else {{
-                        fallbackCopyTextToClipboard(copyText, groupId);
-                    }}
-                    
-                }} catch (error) {{
-                    console.error('copyGroupInfo 錯誤:', error);
-                    alert('複製時發生錯誤：' + error.message);
-                }}
-            }}            
-
-            function showCopySuccess(groupId) {{
-                // 找到該群組的複製按鈕
-                const group = document.getElementById(groupId);
-                if (!group) return;
-
-                const copyBtn = group.querySelector('.copy-btn');
-                if (!copyBtn) return;
-
-                const originalHTML = copyBtn.innerHTML;
-                copyBtn.classList.add('copied');
-                copyBtn.innerHTML = `
-                    <svg width="16" height="16" viewBox="0 0 16 16" fill="none">
-                        <path d="M13.78 4.22a.75.75 0 010 1.06l-7.25 7.25a.75.75 0 01-1.06 0L2.22 9.28a.75.75 0 011.06-1.06L6 10.94l6.72-6.72a.75.75 0 011.06 0z" fill="currentColor"/>
-                    </svg>
-                    已複製
-                `;
-                
-                setTimeout(() => {{
-                    copyBtn.classList.remove('copied');
-                    copyBtn.innerHTML = originalHTML;
-                }}, 2000);
-            }}
-
-            function fallbackCopyTextToClipboard(text, groupId) {{
-                const textArea = document.createElement('textarea');
-                textArea.value = text;
-                textArea.style.position = 'fixed';
-                textArea.style.left = '-999999px';
-                textArea.style.top = '-999999px';
-                document.body.appendChild(textArea);
-                textArea.focus();
-                textArea.select();
-                
-                try {{
-                    const successful = document.execCommand('copy');
-                    if (successful) {{
-                        showCopySuccess(groupId);
-                    }} else {{
-                        alert('複製失敗，請手動選擇文字複製');
-                    }}
-                }} catch (err) {{
-                    console.error('Fallback 複製失敗:', err);
-                    alert('複製失敗，請手動選擇文字複製');
-                }}
-                
-                document.body.removeChild(textArea);
-            }}
-
-            // 複製相似問題視圖摘要
-            function copySimilarityView() {{
-                const NEWLINE = String.fromCharCode(10);
-                
-                try {{
-                    const copyTextParts = [];
-                    
-                    // 添加標題
-                    copyTextParts.push('📊 Android Log 分析報告 - 相似問題摘要');
-                    copyTextParts.push('=' + '='.repeat(50));
-                    copyTextParts.push('');
-                    
-                    // 獲取所有相似問題群組
-                    const groups = document.querySelectorAll('.similarity-group');
-                    
-                    if (groups.length === 0) {{
-                        copyTextParts.push('沒有發現相似問題');
-                    }} else {{
-                        copyTextParts.push(`🔍 發現 ${{groups.length}} 組相似問題:`);
-                        copyTextParts.push('');
-                        
-                        groups.forEach((group, groupIndex) => {{
-                            // 分隔線
-                            if (groupIndex > 0) {{
-                                copyTextParts.push('');
-                                copyTextParts.push('-'.repeat(60));
-                                copyTextParts.push('');
-                            }}
-                            
-                            copyTextParts.push(`【第 ${{groupIndex + 1}} 組】`);
-                            
-                            // 獲取群組標題
-                            const titleElement = group.querySelector('.group-title');
-                            if (titleElement) {{
-                                let title = titleElement.textContent.trim();
-                                const severityElement = group.querySelector('.severity-badge');
-                                const severity = severityElement ? severityElement.textContent.trim() : '';
-                                
-                                if (severity && title.includes(severity)) {{
-                                    title = title.replace(severity, '').trim();
-                                }}
-                                
-                                copyTextParts.push(severity + ' ' + title.trim().replace(/\s+/g, ' '));
-                            }}
-                            
-                            // 獲取檔案數量
-                            const fileCountElement = group.querySelector('.file-count-badge');
-                            if (fileCountElement) {{
-                                copyTextParts.push('🧩 ' + fileCountElement.textContent.trim());
-                            }}
-                            
-                            // 獲取信心度
-                            const confidenceElement = group.querySelector('.confidence-badge');
-                            if (confidenceElement) {{
-                                const confidenceText = confidenceElement.textContent.trim();
-                                const confidenceMatch = confidenceText.match(/(\d+)%/);
-                                if (confidenceMatch) {{
-                                    copyTextParts.push('✨ 信心度: ' + confidenceMatch[0]);
-                                }}
-                            }}
-                            
-                            // 獲取問題集資訊
-                            const problemSetsElement = group.querySelector('.sets-list');
-                            if (problemSetsElement) {{
-                                copyTextParts.push('🕵️ 問題集: ' + problemSetsElement.textContent.trim());
-                            }}
-                            
-                            // 獲取卡片內容（與 copyGroupInfo 一致的格式）
-                            const cards = group.querySelectorAll('.problem-card');
-                            cards.forEach(function(card) {{
-                                const cardTitle = card.querySelector('h4');
-                                if (!cardTitle) return;
-                                
-                                const titleText = cardTitle.textContent.trim();
-                                
-                                // 特別處理關鍵堆疊卡片
-                                if (titleText.includes('關鍵堆疊')) {{
-                                    copyTextParts.push('');
-                                    copyTextParts.push(titleText);
-                                    
-                                    const keyStack = card.querySelector('.key-stack');
-                                    if (keyStack) {{
-                                        const stackMarker = keyStack.querySelector('.stack-marker');
-                                        const stackFrame = keyStack.querySelector('.stack-frame');
-                                        const stackReason = keyStack.querySelector('.stack-reason');
-                                        
-                                        if (stackMarker && stackFrame) {{
-                                            const markerText = stackMarker.textContent.trim();
-                                            const frameText = stackFrame.textContent.trim();
-                                            copyTextParts.push(markerText + ' ' + frameText);
-                                        }}
-                                        
-                                        if (stackReason && stackReason.textContent.trim()) {{
-                                            copyTextParts.push(stackReason.textContent.trim());
-                                        }}
-                                    }}
-                                }} else {{
-                                    // 處理其他類型的卡片內容
-                                    const cardP = card.querySelector('p');
-                                    const cardList = card.querySelector('.process-list');
-                                    const cardDiv = card.querySelector('div:not(.key-stack):not(.process-list)');
-                                    
-                                    copyTextParts.push('');
-                                    
-                                    if (cardP) {{
-                                        copyTextParts.push(titleText + ' ' + cardP.textContent.trim());
-                                    }} else if (cardList) {{
-                                        copyTextParts.push(titleText);
-                                        const listText = cardList.textContent.trim();
-                                        if (listText) {{
-                                            const lines = listText.split(NEWLINE).filter(line => line.trim());
-                                            lines.forEach(function(line) {{
-                                                const trimmedLine = line.trim();
-                                                if (trimmedLine && !trimmedLine.startsWith('•')) {{
-                                                    copyTextParts.push('  • ' + trimmedLine);
-                                                }} else if (trimmedLine) {{
-                                                    copyTextParts.push('  ' + trimmedLine);
-                                                }}
-                                            }});
-                                        }}
-                                    }} else if (cardDiv && titleText.includes('優先級')) {{
-                                        copyTextParts.push(titleText + ' ' + cardDiv.textContent.trim());
-                                    }} else {{
-                                        // 處理直接文字內容的卡片
-                                        const cardContent = card.textContent.trim();
-                                        const contentWithoutTitle = cardContent.replace(titleText, '').trim();
-                                        if (contentWithoutTitle) {{
-                                            copyTextParts.push(titleText + ' ' + contentWithoutTitle);
-                                        }}
-                                    }}
-                                }}
-                            }});
-                            
-                            // 獲取檔案列表
-                            copyTextParts.push('');
-                            copyTextParts.push('📋 相關檔案列表:');
-                            
-                            const reportItems = group.querySelectorAll('.similarity-item .report-name');
-                            reportItems.forEach(function(item, index) {{
-                                const fileName = item.textContent.trim();
-                                const cleanFileName = fileName.replace(/\s*\(問題 set:.*?\)\s*$/, '').trim();
-                                copyTextParts.push((index + 1) + '. ' + cleanFileName);
-                            }});
-                        }});
-                    }}
-                    
-                    // 添加生成時間
-                    copyTextParts.push('');
-                    copyTextParts.push('=' + '='.repeat(50));
-                    copyTextParts.push('⏰ 生成時間: ' + new Date().toLocaleString('zh-TW'));
-                    
-                    // 結合所有內容
-                    const copyText = copyTextParts.join(NEWLINE);
-                    
-                    // 複製到剪貼板
-                    if (navigator.clipboard && window.isSecureContext) {{
-                        navigator.clipboard.writeText(copyText).then(() => {{
-                            showCopySummarySuccess();
-                        }}).catch(err => {{
-                            console.error('複製失敗:', err);
-                            fallbackCopySummary(copyText);
-                        }});
-                    }} else {{
-                        fallbackCopySummary(copyText);
-                    }}
-                    
-                }} catch (error) {{
-                    console.error('複製摘要錯誤:', error);
-                    alert('複製時發生錯誤：' + error.message);
-                }}
-            }}
-
-            // 顯示複製成功（摘要）
-            function showCopySummarySuccess() {{
-                // 更新控制按鈕
-                const controlBtn = document.getElementById('copySummaryBtn');
-                if (controlBtn) {{
-                    const originalHTML = controlBtn.innerHTML;
-                    controlBtn.classList.add('copying');
-                    controlBtn.innerHTML = `
-                        <svg width="16" height="16" viewBox="0 0 16 16" fill="none">
-                            <path d="M13.78 4.22a.75.75 0 010 1.06l-7.25 7.25a.75.75 0 01-1.06 0L2.22 9.28a.75.75 0 011.06-1.06L6 10.94l6.72-6.72a.75.75 0 011.06 0z" fill="currentColor"/>
-                        </svg>
-                        已複製
-                    `;
-                    
-                    setTimeout(() => {{
-                        controlBtn.classList.remove('copying');
-                        controlBtn.innerHTML = originalHTML;
-                    }}, 2000);
-                }}
-                
-                // 更新浮動按鈕
-                const floatingBtn = document.querySelector('.copy-summary-btn');
-                if (floatingBtn) {{
-                    floatingBtn.classList.add('copied');
-                    setTimeout(() => {{
-                        floatingBtn.classList.remove('copied');
-                    }}, 2000);
-                }}
-            }}
-
-            // Fallback 複製方法（摘要）
-            function fallbackCopySummary(text) {{
-                const textArea = document.createElement('textarea');
-                textArea.value = text;
-                textArea.style.position = 'fixed';
-                textArea.style.left = '-999999px';
-                textArea.style.top = '-999999px';
-                document.body.appendChild(textArea);
-                textArea.focus();
-                textArea.select();
-                
-                try {{
-                    const successful = document.execCommand('copy');
-                    if (successful) {{
-                        showCopySummarySuccess();
-                    }} else {{
-                        alert('複製失敗，請手動選擇文字複製');
-                    }}
-                }} catch (err) {{
-                    console.error('Fallback 複製失敗:', err);
-                    alert('複製失敗，請手動選擇文字複製');
-                }}
-                
-                document.body.removeChild(textArea);
-            }}
-
             // 複製路徑函數
             function copyPath(button) {{
                 const path = button.getAttribute('data-path');
@@ -11705,16 +12786,52 @@ class LogAnalyzerSystem:
             avg_time = self.stats['total_time'] / total_html
             print(f"  • 平均處理時間: {avg_time:.3f} 秒/檔案")
         
+        if self.stats['cache_hits'] or self.stats['cache_misses']:
+            print(f"  • 結果快取: 命中 {self.stats['cache_hits']} 個, 未命中 {self.stats['cache_misses']} 個"
+                  + (f", 淘汰 {self.stats['cache_evicted']} 個" if self.stats['cache_evicted'] else ""))
+        
+        if self.stats['symbolized_frames']:
+            print(f"  • 符號解析: 新解析 {self.stats['symbolized_frames']} 個 pc")
+        
+        if self.stats['original_placement']:
+            placed = ", ".join(f"{method} {count} 個" for method, count in sorted(self.stats['original_placement'].items()))
+            print(f"  • 原始檔案放置: {placed}")
+        
+        if self.stats['signatures_new'] or self.stats['signatures_seen']:
+            print(f"  • 崩潰簽名: 新出現 {self.stats['signatures_new']} 個, "
+                  f"曾經出現 {self.stats['signatures_seen']} 個")
+        
+        peak_rss = self._get_peak_rss_mb()
+        if peak_rss is not None:
+            print(f"  • 記憶體峰值 (RSS): {peak_rss['self']:.1f} MB"
+                  + (f" (工作進程: {peak_rss['children']:.1f} MB)" if peak_rss['children'] else ""))
+        
         print(f"\n🎯 輸出目錄: {self.output_folder}")
         print(f"🌐 請開啟 {os.path.join(self.output_folder, 'index.html')} 查看分析報告")
+    
+    def _get_peak_rss_mb(self) -> Optional[Dict[str, float]]:
+        """取得本進程與工作進程的記憶體峰值 (MB)，不支援的平台回傳 None"""
+        try:
+            import resource
+        except ImportError:
+            return None
+        
+        # Linux 的 ru_maxrss 單位為 KB，macOS 為 bytes
+        divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return {
+            'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor,
+            'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor,
+        }
 
 # ============= 智能分析引擎 =============
 class IntelligentAnalysisEngine:
     """智能分析引擎 - 整合所有分析功能"""
     
-    def __init__(self):
+    def __init__(self, signature_index: Optional[CrashSignatureIndex] = None):
         self.analysis_patterns = self._init_analysis_patterns()
         self.known_issues_db = self._init_known_issues()
+        # 跨執行的崩潰簽名索引（None 表示只看本批次）
+        self.signature_index = signature_index
         
         # 延遲初始化分析器，避免循環引用
         self._analyzers_initialized = False
@@ -11878,7 +12995,7 @@ class IntelligentAnalysisEngine:
             self.anomaly_detector = MLAnomalyDetector()
             self.root_cause_predictor = RootCausePredictor()
             self.risk_engine = RiskAssessmentEngine()
-            self.trend_analyzer = TrendAnalyzer()
+            self.trend_analyzer = TrendAnalyzer(signature_index=self.signature_index)
             self.system_metrics_integrator = SystemMetricsIntegrator()
             self.source_analyzer = SourceCodeAnalyzer()
             self.fix_generator = CodeFixGenerator()
@@ -11968,7 +13085,7 @@ class IntelligentAnalysisEngine:
     
     def _extract_method_name(self, frame: str) -> str:
         """提取方法名稱"""
-        match = re.search(r'\.(\w+)\(', frame)
+        match = patterns_registry.FRAME_METHOD_NAME.search(frame)
         return match.group(1) if match else 'Unknown'
     
     def _extract_webview_action(self, frame: str) -> str:
@@ -12011,7 +13128,7 @@ class IntelligentAnalysisEngine:
         service_chain = []
         for frame in backtrace:
             if 'Service' in frame or 'Manager' in frame:
-                service = re.search(r'(\w+(?:Service|Manager))', frame)
+                service = patterns_registry.FRAME_SERVICE_NAME.search(frame)
                 if service and service.group(1) not in service_chain:
                     service_chain.append(service.group(1))
         
@@ -12039,7 +13156,7 @@ class IntelligentAnalysisEngine:
         for category, patterns in self.analysis_patterns.items():
             for pattern_name, pattern_info in patterns.items():
                 match_count = sum(1 for sig in pattern_info['signatures']
-                                if re.search(sig, stack_str, re.IGNORECASE))
+                                if compiled(sig, re.IGNORECASE).search(stack_str))
                 
                 if match_count > 0:
                     confidence = match_count / len(pattern_info['signatures'])
@@ -12055,7 +13172,7 @@ class IntelligentAnalysisEngine:
         for issue_name, issue_info in self.known_issues_db.items():
             if 'patterns' in issue_info:
                 match_count = sum(1 for pattern in issue_info['patterns']
-                                if re.search(pattern, stack_str, re.IGNORECASE))
+                                if compiled(pattern, re.IGNORECASE).search(stack_str))
                 
                 if match_count > 0:
                     confidence = match_count / len(issue_info['patterns'])
@@ -12093,7 +13210,9 @@ class IntelligentAnalysisEngine:
         if tombstone_info.fault_addr:
             analysis['memory_context'] = self._analyze_memory_context(
                 tombstone_info.fault_addr,
-                tombstone_info.memory_map
+                tombstone_info.memory_regions,
+                tombstone_info.registers,
+                tombstone_info.crash_backtrace
             )
         
         # 生成崩潰簽名（用於相似崩潰匹配）
@@ -12124,14 +13243,36 @@ class IntelligentAnalysisEngine:
         
         return '未知'
 
-    def _analyze_memory_context(self, fault_addr: str, memory_map: List[str]) -> Dict:
-        """分析記憶體上下文"""
+    def _analyze_memory_context(self, fault_addr: str, memory_regions: MemoryMap,
+                                registers: Optional[Dict[str, str]] = None,
+                                backtrace: Optional[List[Dict]] = None) -> Dict:
+        """分析記憶體上下文（故障地址、暫存器與堆疊 pc 共用同一份區間表查詢）"""
         context = {
             'fault_location': None,
             'nearby_regions': [],
-            'analysis': None
+            'analysis': None,
+            'register_regions': {},
+            'non_exec_frames': []
         }
         
+        # 看起來像指標的暫存器值所在的區域
+        for reg_name, reg_value in (registers or {}).items():
+            reg_int = MemoryMap.parse_address(reg_value)
+            if reg_int is None or reg_int < 0x1000:
+                continue
+            region = memory_regions.find(reg_int)
+            if region >= 0:
+                context['register_regions'][reg_name] = memory_regions.region(region)
+        
+        # 堆疊 pc 應落在可執行的映射中
+        for i, frame in enumerate((backtrace or [])[:10]):
+            pc_int = memory_regions.absolute_pc(frame.get('location', ''), frame.get('pc'))
+            if pc_int is None:
+                continue
+            region = memory_regions.lookup(pc_int)
+            if region and 'x' not in region.perms:
+                context['non_exec_frames'].append((i, frame.get('pc', ''), region))
+        
         # 檢查是否為無效地址
         if fault_addr.lower() in ['unknown', 'n/a', 'none', '']:
             context['analysis'] = '無法確定故障地址'
@@ -12150,25 +13291,14 @@ class IntelligentAnalysisEngine:
             elif fault_int == 0xdeadbeef:
                 context['analysis'] = '調試標記地址'
             
-            # 查找所在記憶體區域
-            for mem_line in memory_map[:50]:
-                if '-' in mem_line:
-                    parts = mem_line.split()
-                    if parts:
-                        addr_range = parts[0]
-                        if '-' in addr_range:
-                            start_str, end_str = addr_range.split('-')
-                            try:
-                                start = int(start_str, 16)
-                                end = int(end_str, 16)
-                                
-                                if start <= fault_int <= end:
-                                    context['fault_location'] = mem_line
-                                    context['analysis'] = self._analyze_memory_region(parts)
-                                elif abs(fault_int - start) < 0x1000 or abs(fault_int - end) < 0x1000:
-                                    context['nearby_regions'].append(mem_line)
-                            except:
-                                pass
+            # 查找所在記憶體區域（二分搜尋）
+            region = memory_regions.lookup(fault_int)
+            if region:
+                context['fault_location'] = region.line
+                context['analysis'] = self._analyze_memory_region(region.line.split())
+            context['nearby_regions'] = [
+                nearby.line for nearby in memory_regions.nearby(fault_int, 0x1000)
+            ]
         except:
             pass
         
@@ -12263,12 +13393,12 @@ class IntelligentAnalysisEngine:
         for thread in all_threads:
             if thread.waiting_info and 'held by' in thread.waiting_info:
                 # 解析等待資訊
-                match = re.search(r'held by (?:thread\s+)?(\d+)', thread.waiting_info)
+                match = patterns_registry.ANR_HELD_BY.search(thread.waiting_info)
                 if match:
                     wait_graph[thread.tid] = match.group(1)
                 
                 # 檢查是否在等待其他進程
-                cross_match = re.search(r'held by tid=(\d+) in process (\d+)', thread.waiting_info)
+                cross_match = patterns_registry.ANR_CROSS_PROCESS_LOCK.search(thread.waiting_info)
                 if cross_match:
                     deadlock_info['cross_process'] = True
             
@@ -12379,13 +13509,12 @@ class IntelligentAnalysisEngine:
             r'system_server.*anr.*Trace\.txt'
         ]
         
-        for pattern in watchdog_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                return {
-                    'type': 'Watchdog Timeout',
-                    'severity': 'critical',
-                    'description': 'System server 可能發生死鎖或嚴重阻塞'
-                }
+        if combined(watchdog_patterns, re.IGNORECASE).search(content):
+            return {
+                'type': 'Watchdog Timeout',
+                'severity': 'critical',
+                'description': 'System server 可能發生死鎖或嚴重阻塞'
+            }
         
         return None
 
@@ -12603,23 +13732,116 @@ class HTMLReportGenerator:
         """生成完整的 HTML"""
         return ''.join(self.html_parts)
                             
+# 工作進程中共用的分析系統（由 _init_analysis_worker 在每個工作進程啟動時建立一次）
+_worker_system: Optional['LogAnalyzerSystem'] = None
+
+def _init_analysis_worker(input_folder: str, output_folder: str, worker_options: Optional[Dict] = None):
+    """工作進程初始化：建立分析系統並開啟崩潰簽名索引，之後的每個檔案共用同一份
+    
+    工作進程只讀取崩潰簽名索引（供趨勢分析查詢歷史），簽名一律在主進程合併時寫入
+    """
+    global _worker_system
+    import multiprocessing.util
+    
+    _worker_system = LogAnalyzerSystem(input_folder, output_folder, **(worker_options or {}))
+    _worker_system._open_signature_index()
+    # 工作進程以 os._exit 結束，atexit 不會執行；改用 multiprocessing 的結束處理關閉索引與符號解析器
+    multiprocessing.util.Finalize(None, _close_analysis_worker, exitpriority=10)
+
+def _close_analysis_worker():
+    """工作進程結束時關閉崩潰簽名索引與符號解析器"""
+    global _worker_system
+    if _worker_system is None:
+        return
+    _worker_system._close_signature_index()
+    if _worker_system._symbolizer is not None:
+        _worker_system._symbolizer.close()
+    _worker_system = None
+
+def _process_file_in_worker(file_info: Dict) -> Dict:
+    """工作進程入口：以初始化時建立的分析系統分析單個檔案，回傳合併所需的資訊"""
+    with analysis_frame_scope():
+        return _worker_system._process_file(file_info)
+
+def parse_arguments(argv: Optional[List[str]] = None):
+    """解析命令列參數"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='Android ANR / Tombstone 日誌分析系統',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+範例:
+    python3 vp_analyze_logs.py logs/ output/
+    python3 vp_analyze_logs.py logs/ output/ -j 8
+
+特點:
+  • 使用物件導向設計，易於擴展和維護
+  • 支援所有 Android 版本的 ANR 和 Tombstone 格式
+  • 基於大量真實案例的智能分析
+  • 提供詳細的根本原因分析和解決建議
+  • 支援多進程並行分析 (-j 0 表示使用所有 CPU 核心)
+  • 低記憶體索引模式 (--low-memory)，適合上千個檔案的分析
+  • 跨執行的崩潰簽名索引，預設停用；--data-dir 指定跨執行資料目錄 (或 --signature-db 只指定索引資料夾) 時啟用
+  • 以內容摘要為鍵的結果快取，未變更的檔案不會重新分析；預設停用，--data-dir 或 --cache-dir 指定資料夾時啟用 (--no-cache 停用)
+  • 直接分析 zip 壓縮檔（含巢狀 zip）內的檔案，不需先解壓縮 (--no-zip 停用)
+  • 增量更新索引，只重新分群新增或變更的報告；索引狀態存放在 --data-dir，未指定時每次完整重建 (--full-index 完整重建)
+  • 報告 CSS/JS 預設內嵌成單檔報告；--shared-assets 改寫成共用檔案 report_assets/，每個輸出資料夾只寫一次
+  • 原始檔案以硬連結 / reflink 放到輸出資料夾，不必逐一複製 (--original copy 完整複製，
+    --original reference 改用相對符號連結，輸入資料夾需保留)
+  • 以本機符號資料夾批次解析 tombstone 堆疊的源碼位置，結果持久快取 (--symbols-dir)
+        '''
+    )
+    
+    parser.add_argument('input_folder', help='輸入資料夾')
+    parser.add_argument('output_folder', help='輸出資料夾')
+    parser.add_argument('-j', '--workers', type=int, default=1, metavar='N', help='工作進程數（0 表示使用所有 CPU 核心，預設 1）')
+    parser.add_argument('--low-memory', action='store_true', help='低記憶體索引模式')
+    
+    data_group = parser.add_argument_group('跨執行資料（預設停用，不讀取環境變數）')
+    data_group.add_argument('--data-dir', metavar='資料夾', help='跨執行資料目錄（崩潰簽名索引、結果快取、增量索引狀態）')
+    data_group.add_argument('--signature-db', dest='signature_db_dir', metavar='資料夾', help='只指定崩潰簽名索引的資料夾')
+    data_group.add_argument('--no-signature-db', action='store_true', help='停用崩潰簽名索引')
+    data_group.add_argument('--cache-dir', dest='result_cache_dir', metavar='資料夾', help='只指定結果快取的資料夾')
+    data_group.add_argument('--cache-max-mb', dest='result_cache_max_mb', type=int, default=2048, metavar='MB',
+                            help='結果快取容量上限（MB，預設 2048）')
+    data_group.add_argument('--no-cache', action='store_true', help='停用結果快取')
+    data_group.add_argument('--full-index', action='store_true', help='完整重建索引，不做增量更新')
+    
+    output_group = parser.add_argument_group('輸入與輸出')
+    output_group.add_argument('--no-zip', action='store_true', help='不分析 zip 壓縮檔內的檔案')
+    output_group.add_argument('--shared-assets', action='store_true', help='報告 CSS/JS 改寫成共用檔案 report_assets/')
+    output_group.add_argument('--original', dest='original_placement', choices=PLACEMENT_MODES, default=PLACEMENT_AUTO,
+                              help='原始檔案放到輸出資料夾的方式（預設 auto）')
+    output_group.add_argument('--symbols-dir', metavar='資料夾', help='離線符號解析的本機符號資料夾')
+    
+    args = parser.parse_args(argv)
+    if args.symbols_dir is not None and not os.path.isdir(args.symbols_dir):
+        parser.error(f"--symbols-dir 需要一個存在的資料夾: {args.symbols_dir}")
+    return args
+
 def main():
     """主函數"""
-    if len(sys.argv) != 3:
-        print("用法: python3 vp_analyze_logs.py <輸入資料夾> <輸出資料夾>")
-        print("範例: python3 vp_analyze_logs.py logs/ output/")
-        print("\n特點:")
-        print("  • 使用物件導向設計，易於擴展和維護")
-        print("  • 支援所有 Android 版本的 ANR 和 Tombstone 格式")
-        print("  • 基於大量真實案例的智能分析")
-        print("  • 提供詳細的根本原因分析和解決建議")
-        sys.exit(1)
-    
-    input_folder = sys.argv[1]
-    output_folder = sys.argv[2]
+    args = parse_arguments()
+    
+    workers = args.workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    
+    # 命令列不讀取環境變數：崩潰簽名索引、結果快取與增量索引狀態只在指定資料夾時啟用
+    use_signature_db = not args.no_signature_db and bool(args.data_dir or args.signature_db_dir)
+    use_result_cache = not args.no_cache and bool(args.data_dir or args.result_cache_dir)
+    incremental_index = bool(args.data_dir)
     
     # 創建分析系統並執行
-    analyzer = LogAnalyzerSystem(input_folder, output_folder)
+    analyzer = LogAnalyzerSystem(args.input_folder, args.output_folder, workers=workers, low_memory=args.low_memory,
+                                 data_dir=args.data_dir, signature_db_dir=args.signature_db_dir,
+                                 use_signature_db=use_signature_db,
+                                 result_cache_dir=args.result_cache_dir, use_result_cache=use_result_cache,
+                                 result_cache_max_mb=args.result_cache_max_mb, scan_zip=not args.no_zip,
+                                 incremental_index=incremental_index, full_index_rebuild=args.full_index,
+                                 report_assets=ASSET_MODE_SHARED if args.shared_assets else ASSET_MODE_INLINE,
+                                 original_placement=args.original_placement, symbols_dir=args.symbols_dir)
     analyzer.analyze()
 
 
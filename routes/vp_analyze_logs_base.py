@@ -14,9 +14,15 @@ import time
 import json
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple, Set
+from typing import List, Dict, Optional, Tuple, Set, Iterable, Iterator
 from enum import Enum
 import traceback
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableSequence
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 # ============================================================================
 @dataclass
@@ -155,9 +161,150 @@ class ANRType(Enum):
     FOREGROUND_SERVICE = "Foreground Service ANR"
     UNKNOWN = "Unknown ANR"
 
-@dataclass
+class FrameTable:
+    """共用的堆疊幀字串表 (frame id -> 字串)
+
+    相同的堆疊幀（例如 android.os.MessageQueue.nativePollOnce）在同一次分析的所有線程、所有報告之間
+    只保存一份，Backtrace 只記錄 frame id 與所屬的表格。表格只增不減，但只在一次分析期間使用
+    （見 frame_table_scope），分析結束且不再有 Backtrace 引用時即可回收；
+    跨進程傳遞時 Backtrace 會轉回字串（見 Backtrace.__reduce__），由接收端的表格重新編號。
+    """
+
+    __slots__ = ('_ids', '_frames', '_lock')
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._frames: List[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, frame: str) -> int:
+        """取得堆疊幀的 id（第一次出現時加入表格）"""
+        frame_id = self._ids.get(frame)
+        if frame_id is None:
+            with self._lock:
+                frame_id = self._ids.get(frame)
+                if frame_id is None:
+                    frame_id = len(self._frames)
+                    self._frames.append(frame)
+                    self._ids[frame] = frame_id
+        return frame_id
+
+    def lookup(self, frame: str) -> Optional[int]:
+        """查詢堆疊幀的 id，不存在時回傳 None（不會加入表格）"""
+        return self._ids.get(frame)
+
+    def frame(self, frame_id: int) -> str:
+        return self._frames[frame_id]
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+# 目前分析範圍的 frame 表（每個執行緒 / context 各自獨立，並行的分析互不影響）
+_ACTIVE_FRAME_TABLE: ContextVar[Optional[FrameTable]] = ContextVar('frame_table', default=None)
+
+
+def current_frame_table() -> FrameTable:
+    """目前分析範圍的 frame 表；不在任何範圍內時回傳新的獨立表格（不跨呼叫共用，不會累積）"""
+    table = _ACTIVE_FRAME_TABLE.get()
+    return table if table is not None else FrameTable()
+
+
+@contextmanager
+def frame_table_scope(table: Optional[FrameTable] = None) -> Iterator[FrameTable]:
+    """在 with 區塊內建立的 Backtrace 共用同一個 frame 表（預設為新的表格）
+
+    LogAnalyzerSystem 每次執行、監看模式每批檔案各使用一個範圍，
+    長時間執行的服務不會累積歷次分析的堆疊幀。
+    """
+    if table is None:
+        table = FrameTable()
+    token = _ACTIVE_FRAME_TABLE.set(table)
+    try:
+        yield table
+    finally:
+        _ACTIVE_FRAME_TABLE.reset(token)
+
+
+class Backtrace(MutableSequence):
+    """以 frame id 陣列保存的堆疊
+
+    行為與 List[str] 相同：索引取得字串，切片回傳 List[str]，可迭代、append、與 list 比較；
+    每一層只佔 4 bytes，字串本身存放在建立時所在範圍的 frame 表。
+    """
+
+    __slots__ = ('_ids', '_table')
+
+    def __init__(self, frames: Iterable[str] = ()):
+        self._table = current_frame_table()
+        intern = self._table.intern
+        self._ids = array('I', [intern(frame) for frame in frames])
+
+    @classmethod
+    def from_ids(cls, frame_ids: Iterable[int], table: FrameTable) -> 'Backtrace':
+        backtrace = cls()
+        backtrace._table = table
+        backtrace._ids.extend(frame_ids)
+        return backtrace
+
+    @property
+    def frame_ids(self) -> array:
+        """frame id 陣列（唯讀使用，id 對應 table）"""
+        return self._ids
+
+    @property
+    def table(self) -> FrameTable:
+        return self._table
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        frames = self._table._frames
+        if isinstance(index, slice):
+            return [frames[frame_id] for frame_id in self._ids[index]]
+        return frames[self._ids[index]]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._ids[index] = array('I', [self._table.intern(frame) for frame in value])
+        else:
+            self._ids[index] = self._table.intern(value)
+
+    def __delitem__(self, index):
+        del self._ids[index]
+
+    def insert(self, index: int, value: str):
+        self._ids.insert(index, self._table.intern(value))
+
+    def append(self, value: str):
+        self._ids.append(self._table.intern(value))
+
+    def __iter__(self):
+        return map(self._table._frames.__getitem__, self._ids)
+
+    def __eq__(self, other):
+        if isinstance(other, Backtrace):
+            if self._table is other._table:
+                return self._ids == other._ids
+            return list(self) == list(other)
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Backtrace({list(self)!r})"
+
+    def __reduce__(self):
+        # frame id 只在本進程有效，序列化時轉回字串
+        return (Backtrace, (list(self),))
+
+
+@dataclass(slots=True)
 class ThreadInfo:
-    """線程資訊"""
+    """線程資訊（slots；backtrace 以 frame id 陣列保存，傳入 List[str] 時自動轉換）"""
     name: str
     tid: str
     prio: str = "N/A"
@@ -165,7 +312,7 @@ class ThreadInfo:
     nice: Optional[str] = None
     core: Optional[str] = None
     handle: Optional[str] = None
-    backtrace: List[str] = field(default_factory=list)
+    backtrace: Backtrace = field(default_factory=Backtrace)
     waiting_info: Optional[str] = None
     held_locks: List[str] = field(default_factory=list)
     waiting_locks: List[str] = field(default_factory=list)
@@ -173,6 +320,11 @@ class ThreadInfo:
     stm: Optional[str] = None  # 系統態時間
     schedstat: Optional[str] = None  # 調度統計
     sysTid: Optional[str] = None  # 系統線程ID
+    
+    def __post_init__(self):
+        if not isinstance(self.backtrace, Backtrace):
+            self.backtrace = Backtrace(self.backtrace)
+
 @dataclass
 class ANRInfo:
     """ANR 資訊"""
@@ -187,6 +339,164 @@ class ANRInfo:
     memory_info: Optional[Dict] = None
     timeout_info: Optional[Dict] = None  # 新增欄位
 
+@dataclass(frozen=True, slots=True)
+class MemoryRegion:
+    """記憶體映射中的一個區域"""
+    start: int
+    end: int
+    perms: str
+    offset: int
+    path: str
+    build_id: str
+    line: str  # 原始映射行（已去除前後空白）
+
+
+class MemoryMap:
+    """依起始位址排序、以陣列保存的記憶體映射區間表
+
+    映射只解析一次；之後故障地址、堆疊 pc 與看起來像指標的暫存器值都以二分搜尋 (O(log n)) 定位，
+    不再逐行重新解析十六進位範圍。同時支援 /proc maps 格式與 tombstone 格式
+    （位址以 ' 分隔高低 32 位元、offset / size 欄位、BuildId）。
+    區間沿用原本的包含判斷 start <= addr <= end；相鄰區域共用邊界時取較前面的區域。
+    """
+
+    __slots__ = ('_starts', '_ends', '_offsets', '_perms', '_paths', '_build_ids', '_lines', 'lines', '_load_bases')
+
+    MAP_LINE = re.compile(r"(?:--->)?\s*([0-9a-fA-F']+)-([0-9a-fA-F']+)\s+([rwxps-]{3,4})(?!\S)\s*(.*)")
+    BUILD_ID = re.compile(r'\s*\(BuildId:\s*([0-9a-fA-F]+)\)')
+
+    def __init__(self):
+        self._starts = array('Q')
+        self._ends = array('Q')
+        self._offsets = array('Q')
+        self._perms: List[str] = []
+        self._paths: List[str] = []
+        self._build_ids: List[str] = []
+        self._lines: List[str] = []
+        self.lines: List[str] = []  # 依原始順序的映射行，供報告顯示
+        self._load_bases: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def parse(cls, lines: Iterable[str]) -> 'MemoryMap':
+        """解析映射行（無法解析的行會被略過）"""
+        memory_map = cls()
+        entries = []
+        for line in lines:
+            entry = cls.parse_line(line)
+            if entry:
+                entries.append(entry)
+                memory_map.lines.append(entry[-1])
+
+        entries.sort(key=lambda entry: entry[0])
+        for start, end, perms, offset, path, build_id, line in entries:
+            memory_map._starts.append(start)
+            memory_map._ends.append(end)
+            memory_map._offsets.append(offset)
+            memory_map._perms.append(perms)
+            memory_map._paths.append(path)
+            memory_map._build_ids.append(build_id)
+            memory_map._lines.append(line)
+        return memory_map
+
+    @classmethod
+    def parse_line(cls, line: str) -> Optional[Tuple[int, int, str, int, str, str, str]]:
+        """解析一行映射：(start, end, perms, offset, path, build_id, line)"""
+        line = line.strip()
+        match = cls.MAP_LINE.match(line)
+        if not match:
+            return None
+
+        try:
+            start = int(match.group(1).replace("'", ''), 16)
+            end = int(match.group(2).replace("'", ''), 16)
+        except ValueError:
+            return None
+
+        rest = match.group(4)
+        build_id = ''
+        build_id_match = cls.BUILD_ID.search(rest)
+        if build_id_match:
+            build_id = build_id_match.group(1)
+            rest = rest[:build_id_match.start()]
+
+        fields = rest.split()
+        if len(fields) >= 3 and ':' in fields[1]:
+            # /proc maps 格式: offset dev inode [path]
+            offset_text, path = fields[0], ' '.join(fields[3:])
+        else:
+            # tombstone 格式: offset size [path]
+            offset_text = fields[0] if fields else '0'
+            path = ' '.join(fields[2:])
+        try:
+            offset = int(offset_text, 16)
+        except ValueError:
+            offset = 0
+
+        return start, end, match.group(3), offset, path, build_id, line
+
+    @staticmethod
+    def parse_address(address) -> Optional[int]:
+        """將位址（整數或十六進位字串，可帶 0x 與 ' 分隔）轉為整數"""
+        if isinstance(address, int):
+            return address
+        try:
+            return int(str(address).strip().replace("'", ''), 16)
+        except ValueError:
+            return None
+
+    def find(self, address: int) -> int:
+        """找出包含位址的區域索引，找不到時回傳 -1"""
+        index = bisect_right(self._starts, address) - 1
+        if index < 0:
+            return -1
+        if index > 0 and self._ends[index - 1] >= address:
+            index -= 1
+        return index if self._ends[index] >= address else -1
+
+    def region(self, index: int) -> MemoryRegion:
+        return MemoryRegion(
+            self._starts[index], self._ends[index], self._perms[index],
+            self._offsets[index], self._paths[index], self._build_ids[index], self._lines[index]
+        )
+
+    def lookup(self, address) -> Optional[MemoryRegion]:
+        """找出包含位址的區域"""
+        address = self.parse_address(address)
+        if address is None:
+            return None
+        index = self.find(address)
+        return self.region(index) if index >= 0 else None
+
+    def nearby(self, address: int, distance: int) -> List[MemoryRegion]:
+        """起始或結束位址與 address 相距小於 distance、但不包含 address 的區域（依位址排序）"""
+        low, high = address - distance, address + distance
+        indexes = set(range(bisect_right(self._starts, low), bisect_left(self._starts, high)))
+        indexes.update(range(bisect_right(self._ends, low), bisect_left(self._ends, high)))
+        return [
+            self.region(index) for index in sorted(indexes)
+            if not self._starts[index] <= address <= self._ends[index]
+        ]
+
+    def absolute_pc(self, path: str, relative_pc) -> Optional[int]:
+        """將堆疊中相對於函式庫的 pc 換算為絕對位址（以該檔案第一個映射推算載入基址）"""
+        relative_pc = self.parse_address(relative_pc)
+        if relative_pc is None or not path:
+            return None
+        if self._load_bases is None:
+            self._load_bases = {}
+            for index, region_path in enumerate(self._paths):
+                if region_path and region_path not in self._load_bases:
+                    self._load_bases[region_path] = self._starts[index] - self._offsets[index]
+        load_base = self._load_bases.get(path)
+        return load_base + relative_pc if load_base is not None else None
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __iter__(self):
+        return map(self.region, range(len(self._starts)))
+
+
 @dataclass
 class TombstoneInfo:
     """Tombstone 資訊"""
@@ -203,5 +513,7 @@ class TombstoneInfo:
     memory_map: List[str] = field(default_factory=list)
     open_files: List[str] = field(default_factory=list)
     registers: Dict[str, str] = field(default_factory=dict)
+    memory_regions: MemoryMap = field(default_factory=MemoryMap)  # 完整映射的區間表
 
 # ============================================================================
+
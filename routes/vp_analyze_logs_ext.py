@@ -16,12 +16,14 @@ import time
 import json
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple, Set, TYPE_CHECKING
+from typing import List, Dict, Optional, Tuple, Set, Iterable, Iterator, TYPE_CHECKING
 from enum import Enum
+from contextlib import contextmanager
+from contextvars import ContextVar
 import traceback
 
 # 導入基礎類別
-from vp_analyze_logs_base import ANRInfo, ThreadInfo, ThreadState
+from vp_analyze_logs_base import ANRInfo, ThreadInfo, ThreadState, FrameTable, frame_table_scope
 
 # 使用 TYPE_CHECKING 避免循環引入
 if TYPE_CHECKING:
@@ -1451,9 +1453,11 @@ class RiskAssessmentEngine:
 class TrendAnalyzer:
     """趨勢分析器"""
     
-    def __init__(self):
+    def __init__(self, signature_index: Optional['CrashSignatureIndex'] = None):
         self.trend_window = 24 * 60 * 60  # 24小時窗口
         self.pattern_threshold = 0.7  # 模式識別閾值
+        # 跨執行的簽名索引，提供本批次以外的歷史出現次數
+        self.signature_index = signature_index
     
     def analyze_trends(self, historical_data: List[ANRInfo]) -> Dict:
         """分析歷史趨勢"""
@@ -1534,16 +1538,22 @@ class TrendAnalyzer:
                 signature = self._generate_stack_signature(anr.main_thread.backtrace[:5])
                 stack_patterns[signature].append(anr)
         
-        # 找出重複模式
+        # 找出重複模式（有簽名索引時，一併計入歷史執行中的出現次數）
         for signature, anrs in stack_patterns.items():
-            if len(anrs) >= 3:  # 至少出現3次
-                patterns.append({
+            history = self.signature_index.lookup('anr', signature) if self.signature_index else None
+            historical_count = history['count'] if history else 0
+            if max(len(anrs), historical_count) >= 3:  # 至少出現3次
+                pattern = {
                     'type': 'stack_pattern',
                     'signature': signature,
                     'count': len(anrs),
                     'description': self._describe_stack_pattern(anrs[0]),
                     'examples': [anr.timestamp for anr in anrs[:5]]
-                })
+                }
+                if history:
+                    pattern['historical_count'] = historical_count
+                    pattern['first_seen'] = history['first_seen']
+                patterns.append(pattern)
         
         # 2. ANR 類型模式
         type_counts = Counter(anr.anr_type for anr in historical_data)
@@ -1659,18 +1669,24 @@ class TrendAnalyzer:
     
     def _generate_stack_signature(self, frames: List[str]) -> str:
         """生成堆疊簽名"""
-        # 提取關鍵方法名
+        # 提取關鍵方法名（每個不同的幀只在符號表中解析一次）
+        symbols = current_frame_symbols()
         key_methods = []
         for frame in frames:
-            # 簡化提取方法名
-            match = re.search(r'\.(\w+)\(', frame)
-            if match:
-                key_methods.append(match.group(1))
+            method = symbols.derive('trend_method', frame, self._frame_method)
+            if method:
+                key_methods.append(method)
         
         # 生成簽名
         signature = '|'.join(key_methods[:3])
         return hashlib.md5(signature.encode()).hexdigest()[:16]
     
+    @staticmethod
+    def _frame_method(frame: str) -> str:
+        """簡化提取方法名"""
+        match = re.search(r'\.(\w+)\(', frame)
+        return match.group(1) if match else ''
+    
     def _describe_stack_pattern(self, anr: ANRInfo) -> str:
         """描述堆疊模式"""
         if anr.main_thread and anr.main_thread.backtrace:
@@ -3321,15 +3337,19 @@ class ComparativeAnalyzer:
     def _find_stack_patterns(self, anr_list: List[ANRInfo]) -> List[Dict]:
         """找出共同的堆疊模式"""
         stack_signatures = defaultdict(list)
+        # 本次比較的主線程頂層幀倒排索引（共用整批的符號表）
+        frame_index = FrameIndex()
         
         for i, anr in enumerate(anr_list):
             if anr.main_thread and anr.main_thread.backtrace:
                 # 為每個 ANR 的主線程堆疊生成簽名
                 signature = self._generate_stack_signature(anr.main_thread.backtrace[:10])
+                top_frames = anr.main_thread.backtrace[:5]
+                frame_index.add(str(i), 'main', top_frames)
                 stack_signatures[signature].append({
                     'anr_index': i,
                     'timestamp': anr.timestamp,
-                    'top_frames': anr.main_thread.backtrace[:5]
+                    'top_frames': top_frames
                 })
         
         # 找出重複的模式
@@ -3340,7 +3360,7 @@ class ComparativeAnalyzer:
                     'signature': signature,
                     'count': len(occurrences),
                     'percentage': len(occurrences) / len(anr_list) * 100,
-                    'common_frames': self._extract_common_frames(occurrences),
+                    'common_frames': self._extract_common_frames(occurrences, frame_index),
                     'occurrences': occurrences
                 })
         
@@ -3415,70 +3435,76 @@ class ComparativeAnalyzer:
         }
     
     def _cluster_anrs(self, anr_list: List[ANRInfo]) -> List[Dict]:
-        """將相似的 ANR 聚類"""
-        clusters = []
-        clustered = set()
+        """將相似的 ANR 聚類（使用共用的簽名分群引擎）"""
+        if not anr_list:
+            return []
         
-        for i, anr1 in enumerate(anr_list):
-            if i in clustered:
-                continue
-            
-            cluster = {
-                'members': [i],
-                'representative': i,
-                'common_features': []
-            }
-            
-            # 找出相似的 ANR
-            for j, anr2 in enumerate(anr_list[i+1:], i+1):
-                if j not in clustered:
-                    similarity = self._calculate_anr_similarity(anr1, anr2)
-                    if similarity > self.similarity_threshold:
-                        cluster['members'].append(j)
-                        clustered.add(j)
-            
-            clustered.add(i)
-            
-            # 提取共同特徵
-            cluster['common_features'] = self._extract_cluster_features(
-                [anr_list[idx] for idx in cluster['members']]
-            )
-            
-            clusters.append(cluster)
+        features = [ANRSignatureFeatures.extract(anr) for anr in anr_list]
+        frame_index = FrameIndex()
+        for idx, feature in enumerate(features):
+            frame_index.add(str(idx), 'main', feature['main_stack'], normalized=True)
+        engine = SignatureClusteringEngine()
+        labels = engine.cluster(
+            list(range(len(anr_list))),
+            lambda idx: ANRSignatureFeatures.tokens(features[idx]),
+            lambda i, j: ANRSignatureFeatures.similarity(
+                features[i], features[j],
+                (frame_index.frame_set(str(i), 'main'), frame_index.frame_set(str(j), 'main'))
+            ),
+            self.similarity_threshold * 100
+        )
+        
+        members_by_label = defaultdict(list)
+        for idx, label in enumerate(labels):
+            members_by_label[int(label)].append(idx)
+        
+        clusters = []
+        for label in sorted(members_by_label, key=lambda l: members_by_label[l][0]):
+            members = members_by_label[label]
+            clusters.append({
+                'members': members,
+                'representative': members[0],
+                'common_features': self._extract_cluster_features(
+                    [anr_list[idx] for idx in members]
+                )
+            })
         
         return clusters
     
     def _generate_stack_signature(self, frames: List[str]) -> str:
         """生成堆疊簽名"""
-        # 提取關鍵方法名和類名
+        # 提取關鍵方法名和類名（每個不同的幀只在符號表中解析一次）
+        symbols = current_frame_symbols()
         key_elements = []
         for frame in frames[:5]:  # 只用前5幀
-            # 簡化提取類名和方法名
-            match = re.search(r'([a-zA-Z0-9._$]+)\.([a-zA-Z0-9_$]+)\(', frame)
-            if match:
-                class_name = match.group(1).split('.')[-1]  # 只取最後一部分
-                method_name = match.group(2)
-                key_elements.append(f"{class_name}.{method_name}")
+            element = symbols.derive('compare_element', frame, self._frame_element)
+            if element:
+                key_elements.append(element)
         
         # 生成簽名
         signature_str = '|'.join(key_elements)
         return hashlib.md5(signature_str.encode()).hexdigest()[:16]
     
-    def _extract_common_frames(self, occurrences: List[Dict]) -> List[str]:
-        """提取共同的堆疊幀"""
+    @staticmethod
+    def _frame_element(frame: str) -> str:
+        """簡化提取類名和方法名"""
+        match = re.search(r'([a-zA-Z0-9._$]+)\.([a-zA-Z0-9_$]+)\(', frame)
+        if match:
+            class_name = match.group(1).split('.')[-1]  # 只取最後一部分
+            return f"{class_name}.{match.group(2)}"
+        return ''
+    
+    def _extract_common_frames(self, occurrences: List[Dict], frame_index: 'FrameIndex') -> List[str]:
+        """提取共同的堆疊幀（以正規化幀比對，同一方法不同行號視為相同）"""
         if not occurrences:
             return []
         
-        # 取第一個作為參考
-        reference_frames = occurrences[0]['top_frames']
-        common_frames = []
-        
-        # 檢查每一幀是否在所有 occurrence 中都存在
-        for frame in reference_frames:
-            if all(frame in occ['top_frames'] for occ in occurrences[1:]):
-                common_frames.append(frame)
-        
-        return common_frames
+        # 取第一個作為參考，由倒排索引找出所有 occurrence 都含有的幀
+        common_ids = set(frame_index.common_frames(
+            [(str(occ['anr_index']), 'main') for occ in occurrences]
+        ))
+        symbols = frame_index.symbols
+        return [frame for frame in occurrences[0]['top_frames'] if symbols.normalize(frame) in common_ids]
     
     def _calculate_env_correlation(self, env_factors: Dict) -> Dict:
         """計算環境因素相關性"""
@@ -3498,85 +3524,6 @@ class ComparativeAnalyzer:
         
         return correlations
     
-    def _calculate_anr_similarity(self, anr1: ANRInfo, anr2: ANRInfo) -> float:
-        """計算兩個 ANR 的相似度"""
-        similarity_score = 0.0
-        weight_sum = 0.0
-        
-        # ANR 類型相似度
-        if anr1.anr_type == anr2.anr_type:
-            similarity_score += 0.3
-        weight_sum += 0.3
-        
-        # 主線程堆疊相似度
-        if anr1.main_thread and anr2.main_thread:
-            stack_sim = self._calculate_stack_similarity(
-                anr1.main_thread.backtrace[:10],
-                anr2.main_thread.backtrace[:10]
-            )
-            similarity_score += stack_sim * 0.5
-        weight_sum += 0.5
-        
-        # 線程狀態相似度
-        thread_sim = self._calculate_thread_state_similarity(anr1.all_threads, anr2.all_threads)
-        similarity_score += thread_sim * 0.2
-        weight_sum += 0.2
-        
-        return similarity_score / weight_sum if weight_sum > 0 else 0
-    
-    def _calculate_stack_similarity(self, stack1: List[str], stack2: List[str]) -> float:
-        """計算堆疊相似度"""
-        if not stack1 or not stack2:
-            return 0.0
-        
-        # 計算共同幀的比例
-        common_frames = 0
-        for i, (frame1, frame2) in enumerate(zip(stack1, stack2)):
-            if frame1 == frame2:
-                common_frames += 1
-            elif i < 3 and self._is_similar_frame(frame1, frame2):
-                common_frames += 0.5  # 部分匹配
-        
-        return common_frames / max(len(stack1), len(stack2))
-    
-    def _is_similar_frame(self, frame1: str, frame2: str) -> bool:
-        """判斷兩個堆疊幀是否相似"""
-        # 提取類名和方法名進行比較
-        pattern = r'([a-zA-Z0-9._$]+)\.([a-zA-Z0-9_$]+)\('
-        
-        match1 = re.search(pattern, frame1)
-        match2 = re.search(pattern, frame2)
-        
-        if match1 and match2:
-            return (match1.group(1) == match2.group(1) and 
-                   match1.group(2) == match2.group(2))
-        
-        return False
-    
-    def _calculate_thread_state_similarity(self, threads1: List[ThreadInfo], 
-                                         threads2: List[ThreadInfo]) -> float:
-        """計算線程狀態相似度"""
-        # 統計線程狀態分布
-        states1 = Counter(t.state.value for t in threads1)
-        states2 = Counter(t.state.value for t in threads2)
-        
-        # 計算分布相似度
-        all_states = set(states1.keys()) | set(states2.keys())
-        
-        if not all_states:
-            return 0.0
-        
-        similarity = 0.0
-        for state in all_states:
-            count1 = states1.get(state, 0)
-            count2 = states2.get(state, 0)
-            
-            # 使用最小值除以最大值計算相似度
-            if count1 > 0 or count2 > 0:
-                similarity += min(count1, count2) / max(count1, count2)
-        
-        return similarity / len(all_states)
-    
     def _extract_cluster_features(self, cluster_anrs: List[ANRInfo]) -> List[str]:
         """提取聚類的共同特徵"""
         features = []
@@ -3976,6 +3923,801 @@ class IncrementalAnalyzer:
         self._save_cache()
         print("快取已清除")
 
+class CrashSignatureIndex:
+    """跨分析執行的崩潰簽名索引 (SQLite)
+    
+    記錄每份報告的簽名 (Tombstone 崩潰簽名 / ANR 堆疊簽名)，新的分析只需
+    以主鍵查詢即可得知「是否見過 / 首次出現時間 / 出現次數」，不必重新掃描
+    歷史輸出資料夾。同一份報告 (以內容摘要識別) 重複分析不會重複計數。
+    """
+    
+    DB_FILENAME = 'crash_signatures.db'
+    
+    def __init__(self, data_dir: Optional[str] = None):
+        self.data_dir = data_dir or self.default_data_dir()
+        if not self.data_dir:
+            raise ValueError("未設定資料目錄 (ANR_SIGNATURE_DB_DIR)")
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.db_path = os.path.join(self.data_dir, self.DB_FILENAME)
+        
+        import sqlite3
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS signatures (
+                kind TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                first_report TEXT,
+                first_report_key TEXT,
+                PRIMARY KEY (kind, signature)
+            );
+            CREATE TABLE IF NOT EXISTS reports (
+                report_key TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                report_path TEXT,
+                recorded_at TEXT NOT NULL,
+                PRIMARY KEY (report_key, kind, signature)
+            );
+        """)
+        self.conn.commit()
+    
+    @staticmethod
+    def default_data_dir() -> Optional[str]:
+        """環境變數 ANR_SIGNATURE_DB_DIR 設定的資料目錄，未設定時回傳 None（不保存跨執行資料）"""
+        return os.environ.get('ANR_SIGNATURE_DB_DIR') or None
+    
+    def lookup(self, kind: str, signature: str) -> Optional[Dict]:
+        """查詢簽名的歷史記錄，未見過時回傳 None"""
+        row = self.conn.execute(
+            'SELECT first_seen, last_seen, count, first_report, first_report_key '
+            'FROM signatures WHERE kind = ? AND signature = ?',
+            (kind, signature)
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            'first_seen': row[0],
+            'last_seen': row[1],
+            'count': row[2],
+            'first_report': row[3],
+            'first_report_key': row[4],
+        }
+    
+    def record(self, kind: str, signature: str, report_key: str,
+               report_path: str = '', seen_at: Optional[str] = None) -> Dict:
+        """記錄一次簽名出現，回傳記錄前的歷史狀態
+        
+        回傳: {'seen_before', 'first_seen', 'count', 'first_report'}，
+        count 為包含本次在內的累計報告數；已在索引中的簽名 (包含先前執行
+        分析過的同一份報告) 皆視為見過。
+        """
+        seen_at = seen_at or datetime.now().isoformat(timespec='seconds')
+        history = self.lookup(kind, signature)
+        
+        cursor = self.conn.execute(
+            'INSERT OR IGNORE INTO reports (report_key, kind, signature, report_path, recorded_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (report_key, kind, signature, report_path, seen_at)
+        )
+        is_new_report = cursor.rowcount > 0
+        
+        if history is None:
+            self.conn.execute(
+                'INSERT INTO signatures (kind, signature, first_seen, last_seen, count, first_report, first_report_key) '
+                'VALUES (?, ?, ?, ?, 1, ?, ?)',
+                (kind, signature, seen_at, seen_at, report_path, report_key)
+            )
+            return {'seen_before': False, 'first_seen': seen_at, 'count': 1, 'first_report': report_path}
+        
+        count = history['count']
+        if is_new_report:
+            count += 1
+            self.conn.execute(
+                'UPDATE signatures SET last_seen = ?, count = ? WHERE kind = ? AND signature = ?',
+                (seen_at, count, kind, signature)
+            )
+        
+        return {
+            'seen_before': True,
+            'first_seen': history['first_seen'],
+            'count': count,
+            'first_report': history['first_report'],
+        }
+    
+    def flush(self):
+        """提交寫入"""
+        self.conn.commit()
+    
+    def close(self):
+        """提交並關閉資料庫"""
+        try:
+            self.conn.commit()
+        finally:
+            self.conn.close()
+
+
+class AnalysisResultCache:
+    """以內容摘要為鍵的分析結果快取
+    
+    快取鍵 = 原始檔內容摘要 + 檔案類型 + 分析器版本，存放於輸出資料夾之外，
+    輸入未變更時直接重用先前的 .analyzed.txt / .analyzed.html 與結構化記錄。
+    每個項目為獨立資料夾（先寫入暫存資料夾再改名，可供多個工作進程同時使用），
+    超過容量上限時依最後使用時間淘汰最舊的項目。
+    """
+    
+    META_FILE = 'meta.json'
+    
+    def __init__(self, cache_dir: str, analyzer_version: str, max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.analyzer_version = analyzer_version
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def make_key(self, digest: str, file_type: str) -> str:
+        """組合快取鍵"""
+        raw = f"{digest}|{file_type}|{self.analyzer_version}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """讀取快取項目，未命中回傳 None
+        
+        回傳: {'name', 'text', 'html' (可能為 None), 'record' (可能為 None)}
+        """
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, self.META_FILE)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(os.path.join(entry_dir, 'report.txt'), 'r', encoding='utf-8') as f:
+                text = f.read()
+            html_content = None
+            html_path = os.path.join(entry_dir, 'report.html')
+            if os.path.exists(html_path):
+                with open(html_path, 'r', encoding='utf-8') as f:
+                    html_content = f.read()
+        except (OSError, ValueError):
+            return None
+        
+        # 更新最後使用時間（供淘汰使用）
+        try:
+            os.utime(meta_path, None)
+        except OSError:
+            pass
+        
+        return {
+            'name': meta.get('name', ''),
+            'text': text,
+            'html': html_content,
+            'record': meta.get('record'),
+        }
+    
+    def put(self, key: str, name: str, text: str, html_content: Optional[str] = None,
+            record: Optional[Dict] = None):
+        """寫入快取項目（原子性改名，已存在時保留既有項目）"""
+        entry_dir = self._entry_dir(key)
+        if os.path.exists(entry_dir):
+            return
+        
+        parent = os.path.dirname(entry_dir)
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = os.path.join(parent, f".{key}.{os.getpid()}.tmp")
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            with open(os.path.join(tmp_dir, 'report.txt'), 'w', encoding='utf-8') as f:
+                f.write(text)
+            if html_content is not None:
+                with open(os.path.join(tmp_dir, 'report.html'), 'w', encoding='utf-8') as f:
+                    f.write(html_content)
+            with open(os.path.join(tmp_dir, self.META_FILE), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'name': name,
+                    'analyzer_version': self.analyzer_version,
+                    'created': datetime.now().isoformat(timespec='seconds'),
+                    'record': record,
+                }, f, ensure_ascii=False)
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # 其他進程已寫入相同項目，或磁碟錯誤：快取失敗不影響分析
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    def enforce_limit(self) -> int:
+        """依最後使用時間淘汰項目，直到總大小不超過上限；回傳淘汰數量"""
+        entries = []
+        total_size = 0
+        for bucket in os.scandir(self.cache_dir):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.is_dir() or entry.name.startswith('.'):
+                    continue
+                size = 0
+                last_used = 0
+                for item in os.scandir(entry.path):
+                    stat = item.stat()
+                    size += stat.st_size
+                    if item.name == self.META_FILE:
+                        last_used = stat.st_mtime
+                entries.append((last_used, size, entry.path))
+                total_size += size
+        
+        evicted = 0
+        if total_size <= self.max_bytes:
+            return evicted
+        
+        for last_used, size, path in sorted(entries):
+            shutil.rmtree(path, ignore_errors=True)
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass  # 分桶資料夾內仍有其他項目
+            total_size -= size
+            evicted += 1
+            if total_size <= self.max_bytes:
+                break
+        
+        return evicted
+
+
+class FrameSymbolTable:
+    """正規化堆疊幀的符號表 (一次分析共用，見 frame_symbols_scope)
+    
+    原始堆疊幀只正規化一次 (class.method 或 lib!symbol，規則與
+    ANRSignatureFeatures.normalize_stack 相同) 並配給整數 id；
+    由字串衍生的特徵 (簽名片段、關鍵詞、堆疊模式等) 以 derive() 依 (種類, 字串) 快取。
+    """
+    
+    def __init__(self):
+        self._table = FrameTable()
+        self._raw_ids: Dict[str, Optional[int]] = {}
+        self._derived: Dict[Tuple[str, str], object] = {}
+    
+    @staticmethod
+    def normalize_frame(frame: str) -> Optional[str]:
+        """將單一堆疊幀正規化為 class.method 或 lib!symbol，鎖資訊行回傳 None"""
+        frame = frame.strip()
+        if frame.startswith('- '):
+            return None
+        
+        native_match = re.search(r'pc\s+[0-9a-fA-F]+\s+(\S+)(?:\s+\(([^)+]+))?', frame)
+        if native_match:
+            lib = native_match.group(1).rsplit('/', 1)[-1]
+            return f"{lib}!{native_match.group(2) or '?'}"
+        
+        java_match = re.match(r'(?:at\s+)?([\w$.<>]+)\(', frame)
+        return java_match.group(1) if java_match else frame[:120]
+    
+    def intern(self, frame: str) -> int:
+        """取得已正規化堆疊幀的 id"""
+        return self._table.intern(frame)
+    
+    def normalize(self, raw_frame: str) -> Optional[int]:
+        """取得原始堆疊幀正規化後的 id（鎖資訊行回傳 None）"""
+        try:
+            return self._raw_ids[raw_frame]
+        except KeyError:
+            normalized = self.normalize_frame(raw_frame)
+            frame_id = self._table.intern(normalized) if normalized is not None else None
+            self._raw_ids[raw_frame] = frame_id
+            return frame_id
+    
+    def frame(self, frame_id: int) -> str:
+        return self._table.frame(frame_id)
+    
+    def derive(self, kind: str, text: str, builder):
+        """取得字串衍生的特徵，同一個 (kind, text) 只計算一次"""
+        key = (kind, text)
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = self._derived[key] = builder(text)
+            return value
+    
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+# 目前分析範圍的符號表（每個執行緒 / context 各自獨立）
+_ACTIVE_FRAME_SYMBOLS: ContextVar[Optional[FrameSymbolTable]] = ContextVar('frame_symbols', default=None)
+
+
+def current_frame_symbols() -> FrameSymbolTable:
+    """目前分析範圍的符號表；不在任何範圍內時回傳新的獨立符號表（快取只在該次呼叫有效）"""
+    symbols = _ACTIVE_FRAME_SYMBOLS.get()
+    return symbols if symbols is not None else FrameSymbolTable()
+
+
+@contextmanager
+def frame_symbols_scope(symbols: Optional[FrameSymbolTable] = None) -> Iterator[FrameSymbolTable]:
+    """在 with 區塊內共用同一個符號表，離開後不再保留正規化與衍生特徵的快取"""
+    if symbols is None:
+        symbols = FrameSymbolTable()
+    token = _ACTIVE_FRAME_SYMBOLS.set(symbols)
+    try:
+        yield symbols
+    finally:
+        _ACTIVE_FRAME_SYMBOLS.reset(token)
+
+
+@contextmanager
+def analysis_frame_scope() -> Iterator[None]:
+    """一次分析的堆疊幀範圍：frame 表與正規化符號表都只在範圍內共用"""
+    with frame_table_scope(), frame_symbols_scope():
+        yield
+
+
+class FrameIndex:
+    """堆疊幀倒排索引：正規化幀 → 含有此幀的報告與線程
+    
+    正向保存每份報告各線程的幀 id 序列，倒排保存「幀 id → {報告: {線程}}」。
+    相似度的幀集合、共同幀與出現次數都以集合 / posting list 運算取得，
+    不必對堆疊字串逐對重新掃描。同一個 (報告, 線程) 重複加入時會取代舊的內容。
+    """
+    
+    def __init__(self, symbols: Optional[FrameSymbolTable] = None):
+        self.symbols = symbols if symbols is not None else current_frame_symbols()
+        self._stacks: Dict[str, Dict[str, Tuple[int, ...]]] = {}  # 報告 -> {線程: 幀 id 序列}
+        self._sets: Dict[Tuple[str, str], frozenset] = {}
+        self._postings: Dict[int, Dict[str, Set[str]]] = defaultdict(dict)
+    
+    def add(self, report: str, thread: str, frames: List[str], normalized: bool = False) -> Tuple[int, ...]:
+        """加入一個線程的堆疊；normalized=True 表示 frames 已是正規化後的幀"""
+        symbols = self.symbols
+        if normalized:
+            ids = tuple(symbols.intern(frame) for frame in frames)
+        else:
+            ids = tuple(frame_id for frame_id in map(symbols.normalize, frames) if frame_id is not None)
+        
+        threads = self._stacks.setdefault(report, {})
+        if threads.get(thread) == ids:
+            return ids
+        if thread in threads:
+            self._unlink(report, thread, threads[thread])
+        
+        threads[thread] = ids
+        self._sets[(report, thread)] = frozenset(ids)
+        for frame_id in ids:
+            self._postings[frame_id].setdefault(report, set()).add(thread)
+        return ids
+    
+    def remove(self, report: str) -> None:
+        """移除報告的所有線程"""
+        for thread, ids in self._stacks.pop(report, {}).items():
+            self._unlink(report, thread, ids)
+    
+    def _unlink(self, report: str, thread: str, ids: Tuple[int, ...]) -> None:
+        self._sets.pop((report, thread), None)
+        for frame_id in set(ids):
+            posting = self._postings.get(frame_id)
+            threads = posting.get(report) if posting else None
+            if threads is None:
+                continue
+            threads.discard(thread)
+            if not threads:
+                del posting[report]
+                if not posting:
+                    del self._postings[frame_id]
+    
+    def stack(self, report: str, thread: str) -> Optional[Tuple[int, ...]]:
+        """報告中某線程的幀 id 序列（未索引時回傳 None）"""
+        return self._stacks.get(report, {}).get(thread)
+    
+    def frame_set(self, report: str, thread: str) -> Optional[frozenset]:
+        """報告中某線程的幀 id 集合（未索引時回傳 None）"""
+        return self._sets.get((report, thread))
+    
+    def reports_with(self, frame_id: int) -> Set[str]:
+        """含有此幀的報告"""
+        return set(self._postings.get(frame_id, ()))
+    
+    def threads_with(self, frame_id: int) -> Dict[str, Set[str]]:
+        """含有此幀的報告與線程"""
+        return {report: set(threads) for report, threads in self._postings.get(frame_id, {}).items()}
+    
+    def common_frames(self, stacks: List[Tuple[str, str]]) -> List[int]:
+        """所有 (報告, 線程) 共同含有的幀，依第一個堆疊的順序"""
+        if not stacks:
+            return []
+        first = self.stack(*stacks[0]) or ()
+        others = stacks[1:]
+        common = []
+        for frame_id in dict.fromkeys(first):
+            posting = self._postings.get(frame_id, {})
+            if all(thread in posting.get(report, ()) for report, thread in others):
+                common.append(frame_id)
+        return common
+    
+    def __contains__(self, report: str) -> bool:
+        return report in self._stacks
+    
+    def __len__(self) -> int:
+        return len(self._stacks)
+
+
+class ANRSignatureFeatures:
+    """ANR 分群特徵：主線程堆疊簽名、ANR 類型、鎖等待圖形狀與 Binder 目標
+    
+    LogAnalyzerSystem 的相似度分群與 ComparativeAnalyzer 共用此特徵，
+    搭配 SignatureClusteringEngine 進行分群。
+    """
+    
+    STACK_DEPTH = 10
+    
+    @staticmethod
+    def extract(anr_info: ANRInfo) -> Dict:
+        """從 ANRInfo 提取分群特徵（可 JSON 序列化）"""
+        main = anr_info.main_thread
+        backtrace = main.backtrace if main else []
+        
+        return {
+            'main_stack': ANRSignatureFeatures.normalize_stack(backtrace),
+            'anr_type': anr_info.anr_type.value if anr_info.anr_type else '',
+            'lock_shape': ANRSignatureFeatures._lock_graph_shape(anr_info),
+            'binder_target': ANRSignatureFeatures._binder_target(backtrace),
+        }
+    
+    @staticmethod
+    def normalize_stack(backtrace: List[str], depth: int = STACK_DEPTH) -> List[str]:
+        """將堆疊幀正規化為 class.method 或 lib!symbol，略過鎖資訊行"""
+        symbols = current_frame_symbols()
+        frames = []
+        for frame_id in map(symbols.normalize, backtrace):
+            if frame_id is None:
+                continue
+            frames.append(symbols.frame(frame_id))
+            if len(frames) >= depth:
+                break
+        
+        return frames
+    
+    @staticmethod
+    def _lock_graph_shape(anr_info: ANRInfo) -> str:
+        """描述主線程所在的鎖等待圖形狀：等待鏈長度、是否成環、阻塞線程數量級與鎖類別"""
+        waiting_graph = {}
+        for thread in anr_info.all_threads:
+            if thread.waiting_info:
+                match = re.search(r'(?:held by (?:thread\s+)?|被線程 )(\d+)', thread.waiting_info)
+                if match:
+                    waiting_graph[thread.tid] = match.group(1)
+        
+        chain_length = 0
+        has_cycle = False
+        main = anr_info.main_thread
+        if main:
+            current = main.tid
+            visited = {current}
+            while current in waiting_graph:
+                current = waiting_graph[current]
+                chain_length += 1
+                if current in visited:
+                    has_cycle = True
+                    break
+                visited.add(current)
+        
+        blocked = sum(1 for t in anr_info.all_threads if t.state == ThreadState.BLOCKED)
+        if blocked == 0:
+            blocked_bucket = '0'
+        elif blocked < 3:
+            blocked_bucket = '1-2'
+        elif blocked < 10:
+            blocked_bucket = '3-9'
+        else:
+            blocked_bucket = '10+'
+        
+        lock_class = ''
+        if main:
+            for frame in main.backtrace:
+                lock_match = re.search(r'waiting (?:on|to lock)\s+<[^>]+>\s+\(a\s+([\w.$]+)\)', frame)
+                if lock_match:
+                    lock_class = lock_match.group(1)
+                    break
+        
+        return f"chain={min(chain_length, 5)}|cycle={int(has_cycle)}|blocked={blocked_bucket}|lock={lock_class}"
+    
+    @staticmethod
+    def _binder_target(backtrace: List[str]) -> str:
+        """找出主線程 Binder 呼叫的目標介面"""
+        has_binder = False
+        for frame in backtrace[:30]:
+            proxy_match = re.search(r'([\w$.]+)\$Stub\$Proxy\.(\w+)', frame)
+            if proxy_match:
+                interface = proxy_match.group(1).rsplit('.', 1)[-1]
+                return f"{interface}.{proxy_match.group(2)}"
+            if 'BinderProxy.transact' in frame or 'IPCThreadState::transact' in frame:
+                has_binder = True
+        
+        return 'binder' if has_binder else ''
+    
+    @staticmethod
+    def tokens(features: Dict) -> Set[str]:
+        """產生 MinHash 使用的簽名 token"""
+        tokens = set()
+        for idx, frame in enumerate(features.get('main_stack') or []):
+            tokens.add(f"frame:{frame}")
+            if idx < 3:
+                tokens.add(f"top{idx}:{frame}")
+        
+        if features.get('anr_type'):
+            tokens.add(f"type:{features['anr_type']}")
+        if features.get('lock_shape'):
+            tokens.add(f"lock:{features['lock_shape']}")
+        if features.get('binder_target'):
+            tokens.add(f"binder:{features['binder_target']}")
+        
+        return tokens
+    
+    @staticmethod
+    def similarity(features1: Dict, features2: Dict,
+                   frame_sets: Optional[Tuple[frozenset, frozenset]] = None) -> float:
+        """ANR 特徵相似度 (0~100)
+        
+        frame_sets 為 FrameIndex 中兩個主線程堆疊的幀 id 集合，提供時不再逐對建立字串集合
+        """
+        score = 0.0
+        
+        # 主線程堆疊 (50%)：整體幀集合 Jaccard + 頂層幀位置比對
+        stack1 = features1.get('main_stack') or []
+        stack2 = features2.get('main_stack') or []
+        if stack1 and stack2:
+            set1, set2 = frame_sets or (set(stack1), set(stack2))
+            score += 35 * len(set1 & set2) / len(set1 | set2)
+            top_matches = sum(1 for f1, f2 in zip(stack1[:3], stack2[:3]) if f1 == f2)
+            score += 15 * top_matches / 3
+        
+        # ANR 類型 (15%)
+        if features1.get('anr_type') == features2.get('anr_type'):
+            score += 15
+        
+        # 鎖等待圖形狀 (15%)
+        shape1 = features1.get('lock_shape', '')
+        shape2 = features2.get('lock_shape', '')
+        if shape1 == shape2:
+            score += 15
+        else:
+            lock1 = shape1.rsplit('|', 1)[-1]
+            if lock1 != 'lock=' and lock1 == shape2.rsplit('|', 1)[-1]:
+                score += 7.5
+        
+        # Binder 目標 (20%)
+        if features1.get('binder_target', '') == features2.get('binder_target', ''):
+            score += 20
+        elif features1.get('binder_target') and features2.get('binder_target'):
+            score += 5
+        
+        return score
+
+class SignatureClusteringEngine:
+    """簽名分群引擎
+    
+    以 MinHash/LSH 將簽名 token 相近的項目分桶，只對同桶的候選配對計算精確相似度，
+    再以稀疏距離矩陣 (metric='precomputed') 交給 DBSCAN 分群。
+    稀疏圖是精確相似度圖的子圖，因此只可能把精確結果中的群組拆開，不會錯誤合併；
+    分群後以抽樣錨點檢查同群召回率，低於容忍度時自動退回精確矩陣。
+    
+    connected_components=True 時不載入 scikit-learn，直接以 union-find 標記連通分量：
+    DBSCAN (min_samples=1) 的每個點都是核心點，群組即為距離 <= eps 的連通分量，
+    標籤依各分量第一個成員的順序編號，結果與 DBSCAN 相同。
+    """
+    
+    # 32 位元雜湊使用的梅森質數 (2^31 - 1)，a * h 不會溢位 uint64
+    _PRIME = (1 << 31) - 1
+    
+    def __init__(self, num_perm: int = 64, bands: int = 32, min_items_for_lsh: int = 200,
+                 recall_tolerance: float = 0.05, validation_anchors: int = 20,
+                 max_bucket_size: int = 50, seed: int = 42, connected_components: bool = False):
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm ({num_perm}) 必須能被 bands ({bands}) 整除")
+        
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_items_for_lsh = min_items_for_lsh
+        self.recall_tolerance = recall_tolerance
+        self.validation_anchors = validation_anchors
+        self.max_bucket_size = max_bucket_size
+        self.seed = seed
+        self.connected_components = connected_components
+        
+        rng = np.random.RandomState(seed)
+        self._hash_a = rng.randint(1, self._PRIME, size=num_perm).astype(np.uint64)
+        self._hash_b = rng.randint(0, self._PRIME, size=num_perm).astype(np.uint64)
+        
+        # 最近一次分群的統計
+        self.last_stats: Dict = {}
+    
+    def cluster(self, items: List, token_fn, similarity_fn, threshold: float) -> np.ndarray:
+        """對項目分群，回傳 DBSCAN 標籤
+        
+        Args:
+            items: 待分群的項目
+            token_fn: item -> Set[str]，用於 MinHash 的簽名 token
+            similarity_fn: (item1, item2) -> 0~100 的精確相似度
+            threshold: 視為相似的最低分數 (對應 DBSCAN eps = 100 - threshold)
+        """
+        n = len(items)
+        total_pairs = n * (n - 1) // 2
+        
+        if n == 0:
+            self.last_stats = {'mode': 'exact', 'items': 0, 'pairs_scored': 0, 'total_pairs': 0}
+            return np.array([], dtype=int)
+        
+        if n < self.min_items_for_lsh:
+            labels = self._cluster_exact(items, similarity_fn, threshold)
+            self.last_stats = {'mode': 'exact', 'items': n, 'pairs_scored': total_pairs, 'total_pairs': total_pairs}
+            return labels
+        
+        signatures = self.compute_signatures([token_fn(item) for item in items])
+        pairs = self.candidate_pairs(signatures)
+        
+        # 只對候選配對計算精確相似度
+        scores = {}
+        for i, j in pairs:
+            scores[(i, j)] = similarity_fn(items[i], items[j])
+        
+        labels = self._cluster_sparse(n, scores, threshold)
+        recall = self._validate_labels(items, labels, similarity_fn, threshold, scores)
+        
+        self.last_stats = {
+            'mode': 'lsh',
+            'items': n,
+            'pairs_scored': len(scores),
+            'total_pairs': total_pairs,
+            'recall': recall,
+        }
+        
+        if recall < 1.0 - self.recall_tolerance:
+            print(f"⚠️ LSH 分群召回率 {recall:.2%} 低於容忍度，改用精確相似度矩陣")
+            labels = self._cluster_exact(items, similarity_fn, threshold)
+            self.last_stats['mode'] = 'exact_fallback'
+            self.last_stats['pairs_scored'] += total_pairs
+        
+        return labels
+    
+    def compute_signatures(self, token_sets: List[Set[str]]) -> np.ndarray:
+        """計算 MinHash 簽名矩陣 (n x num_perm)"""
+        import zlib
+        
+        signatures = np.full((len(token_sets), self.num_perm), self._PRIME, dtype=np.uint64)
+        for idx, tokens in enumerate(token_sets):
+            if not tokens:
+                continue
+            hashes = np.fromiter(
+                (zlib.crc32(token.encode('utf-8')) for token in tokens),
+                dtype=np.uint64, count=len(tokens)
+            )
+            permuted = (np.outer(hashes, self._hash_a) + self._hash_b) % self._PRIME
+            signatures[idx] = permuted.min(axis=0)
+        
+        return signatures
+    
+    def candidate_pairs(self, signatures: np.ndarray) -> Set[Tuple[int, int]]:
+        """依 LSH 分桶產生候選配對 (i < j)"""
+        pairs = set()
+        n = signatures.shape[0]
+        if n < 2:
+            return pairs
+        
+        for band in range(self.bands):
+            band_slice = np.ascontiguousarray(signatures[:, band * self.rows:(band + 1) * self.rows])
+            _, bucket_ids = np.unique(band_slice, axis=0, return_inverse=True)
+            bucket_ids = bucket_ids.ravel()
+            
+            order = np.argsort(bucket_ids, kind='stable')
+            boundaries = np.flatnonzero(np.diff(bucket_ids[order])) + 1
+            for members in np.split(order, boundaries):
+                if len(members) < 2:
+                    continue
+                members = sorted(int(m) for m in members)
+                if len(members) > self.max_bucket_size:
+                    # 超大桶只串接相鄰成員，DBSCAN (min_samples=1) 具遞移性仍可連成同群
+                    pairs.update(zip(members, members[1:]))
+                else:
+                    for a in range(len(members)):
+                        for b in range(a + 1, len(members)):
+                            pairs.add((members[a], members[b]))
+        
+        return pairs
+    
+    def _cluster_exact(self, items: List, similarity_fn, threshold: float) -> np.ndarray:
+        """精確相似度矩陣分群"""
+        n = len(items)
+        if self.connected_components:
+            eps = 100 - threshold
+            return self._label_components(n, (
+                (i, j) for i in range(n) for j in range(i + 1, n)
+                if 100 - similarity_fn(items[i], items[j]) <= eps
+            ))
+        
+        from sklearn.cluster import DBSCAN
+        
+        similarity_matrix = np.zeros((n, n))
+        for i in range(n):
+            for j in range(i + 1, n):
+                similarity = similarity_fn(items[i], items[j])
+                similarity_matrix[i, j] = similarity
+                similarity_matrix[j, i] = similarity
+        np.fill_diagonal(similarity_matrix, 100)
+        
+        clustering = DBSCAN(eps=100 - threshold, min_samples=1, metric='precomputed')
+        return clustering.fit_predict(100 - similarity_matrix)
+    
+    def _cluster_sparse(self, n: int, scores: Dict[Tuple[int, int], float], threshold: float) -> np.ndarray:
+        """以稀疏距離矩陣分群"""
+        eps = 100 - threshold
+        if self.connected_components:
+            return self._label_components(n, (pair for pair, similarity in scores.items() if 100 - similarity <= eps))
+        
+        from sklearn.cluster import DBSCAN
+        from scipy.sparse import csr_matrix
+        
+        rows, cols, data = [], [], []
+        for (i, j), similarity in scores.items():
+            distance = 100 - similarity
+            if distance <= eps:
+                # 距離 0 需存為極小正值，避免被視為不存在的邊
+                distance = max(distance, 1e-6)
+                rows.extend((i, j))
+                cols.extend((j, i))
+                data.extend((distance, distance))
+        
+        distance_matrix = csr_matrix((data, (rows, cols)), shape=(n, n))
+        clustering = DBSCAN(eps=eps, min_samples=1, metric='precomputed')
+        return clustering.fit_predict(distance_matrix)
+    
+    @staticmethod
+    def _label_components(n: int, edges: Iterable[Tuple[int, int]]) -> np.ndarray:
+        """以 union-find 標記連通分量，標籤依各分量最小索引的順序編號 (與 DBSCAN min_samples=1 相同)"""
+        parent = list(range(n))
+        
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+        
+        for i, j in edges:
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+        
+        labels = np.empty(n, dtype=int)
+        label_of_root = {}
+        for node in range(n):
+            labels[node] = label_of_root.setdefault(find(node), len(label_of_root))
+        return labels
+    
+    def _validate_labels(self, items: List, labels: np.ndarray, similarity_fn,
+                         threshold: float, scores: Dict[Tuple[int, int], float]) -> float:
+        """抽樣錨點驗證：精確相似的配對中，被分到同一群的比例"""
+        n = len(items)
+        rng = np.random.RandomState(self.seed)
+        anchors = rng.choice(n, size=min(self.validation_anchors, n), replace=False)
+        
+        positives = 0
+        matched = 0
+        for anchor in anchors:
+            anchor = int(anchor)
+            for other in range(n):
+                if other == anchor:
+                    continue
+                key = (min(anchor, other), max(anchor, other))
+                similarity = scores.get(key)
+                if similarity is None:
+                    similarity = similarity_fn(items[anchor], items[other])
+                if similarity >= threshold:
+                    positives += 1
+                    if labels[anchor] == labels[other]:
+                        matched += 1
+        
+        return matched / positives if positives else 1.0
+
 class BinderCallChainAnalyzer:
     """Binder 調用鏈分析器"""
     
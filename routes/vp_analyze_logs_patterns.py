@@ -0,0 +1,169 @@
+"""
+預先編譯的正規表達式登錄表 - ANRAnalyzer、TombstoneAnalyzer 與 IntelligentAnalysisEngine 共用
+
+逐行解析的熱點迴圈原本每一行都以字串呼叫 re.search/re.match（每次都要查 re 模組的快取），
+判斷「是否為線程開頭 / 堆疊幀」時還要依序嘗試多個模式。這裡集中提供：
+
+- compiled(pattern, flags)     : 以 (模式, flags) 為鍵快取的 re.compile
+- compiled_list(patterns)      : 依序編譯一組模式（保留原本的嘗試順序）
+- combined(patterns)           : 把多個模式合併成單一 alternation，只用來判斷「任一個是否符合」
+- FirstMatchScanner            : 分段保存的內容上查詢模式的第一個符合（ANRTraceParser 的文件層級欄位）
+- ANR_* / TOMBSTONE_* 常數      : 分析器熱點迴圈使用的已編譯模式
+
+逐行解析成本的微基準測試見 bench/bench_anr_patterns.py
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+_COMPILED: Dict[Tuple[str, int], Pattern] = {}
+_COMBINED: Dict[Tuple[Tuple[str, ...], int], Pattern] = {}
+_lock = threading.Lock()
+
+
+def compiled(pattern: str, flags: int = 0) -> Pattern:
+    """取得已編譯的模式（同一個模式與 flags 只編譯一次）"""
+    key = (pattern, flags)
+    regex = _COMPILED.get(key)
+    if regex is None:
+        regex = re.compile(pattern, flags)
+        with _lock:
+            _COMPILED.setdefault(key, regex)
+    return regex
+
+
+def compiled_list(patterns: Iterable[str], flags: int = 0) -> List[Pattern]:
+    """依序編譯一組模式"""
+    return [compiled(pattern, flags) for pattern in patterns]
+
+
+def combined(patterns: Iterable[str], flags: int = 0) -> Pattern:
+    """將多個模式合併成一個 alternation
+
+    合併後的群組編號與原本不同，只能用來判斷是否有任一模式符合
+    （等同 any(re.search(p, line) for p in patterns)）。
+    """
+    key = (tuple(patterns), flags)
+    regex = _COMBINED.get(key)
+    if regex is None:
+        regex = re.compile('|'.join(f'(?:{pattern})' for pattern in key[0]), flags)
+        with _lock:
+            _COMBINED.setdefault(key, regex)
+    return regex
+
+
+class FirstMatchScanner:
+    """分段保存的內容上查詢第一個符合
+
+    內容以完整的行為單位分段送入 (feed)；查詢時才依序搜尋各區塊，找到就停止，結果會快取，
+    沒有被查詢的模式完全不需要掃描。結果與對整份內容呼叫 re.search / in 相同：
+    區塊之間重疊前一區塊的最後一行，只有跨越兩行以上又剛好落在區塊邊界的符合才可能不同。
+    """
+
+    MAX_OVERLAP = 4096
+
+    def __init__(self):
+        self._blocks: List[str] = []
+        self._overlaps: List[str] = []  # 每個區塊前面要接上的前一區塊最後一行
+        self._matches: Dict[Pattern, Optional[re.Match]] = {}
+        self._texts: Dict[Tuple[str, bool], bool] = {}
+
+    def feed(self, block: str):
+        """送入下一段內容（需以完整的行為單位）"""
+        if not block:
+            return
+        if self._blocks:
+            previous = self._blocks[-1]
+            last_break = previous.rfind('\n', 0, len(previous) - 1)
+            self._overlaps.append(previous[last_break + 1:][-self.MAX_OVERLAP:])
+        else:
+            self._overlaps.append('')
+        self._blocks.append(block)
+
+    def _texts_to_search(self):
+        for overlap, block in zip(self._overlaps, self._blocks):
+            yield overlap + block if overlap else block
+
+    def search(self, pattern, flags: int = 0) -> Optional[re.Match]:
+        """第一個符合（pattern 可以是字串或已編譯的模式）"""
+        regex = compiled(pattern, flags) if isinstance(pattern, str) else pattern
+        if regex not in self._matches:
+            match = None
+            for text in self._texts_to_search():
+                match = regex.search(text)
+                if match:
+                    break
+            self._matches[regex] = match
+        return self._matches[regex]
+
+    def contains(self, text: str) -> bool:
+        """內容是否包含 text"""
+        key = (text, False)
+        if key not in self._texts:
+            self._texts[key] = any(text in block for block in self._texts_to_search())
+        return self._texts[key]
+
+    def contains_lower(self, text: str) -> bool:
+        """轉小寫後的內容是否包含 text"""
+        key = (text, True)
+        if key not in self._texts:
+            self._texts[key] = any(text in block.lower() for block in self._texts_to_search())
+        return self._texts[key]
+
+
+def compile_pattern_groups(groups: Dict[str, List[str]], flags: int = 0) -> Dict[str, List[Pattern]]:
+    """編譯分析器 _init_patterns() 回傳的模式表（只處理字串列表）"""
+    return {
+        name: compiled_list(patterns, flags)
+        for name, patterns in groups.items()
+        if isinstance(patterns, list) and all(isinstance(p, str) for p in patterns)
+    }
+
+
+# ============= ANR 線程解析 =============
+
+# 線程標頭: "GmsDynamite" prio=5 tid=46 Waiting
+ANR_THREAD_HEADER = compiled(r'"([^"]+)"\s+prio=(\d+)\s+tid=(\d+)\s+(\w+)')
+# 線程標頭後的詳細資訊
+ANR_SYSTID = compiled(r'sysTid=(\d+)')
+ANR_DETAILED_STATE = compiled(r'\|\s+state=([A-Z])')
+ANR_UTM = compiled(r'utm=(\d+)')
+ANR_STM = compiled(r'stm=(\d+)')
+ANR_SCHEDSTAT = compiled(r'schedstat=\(\s*(\d+)\s+(\d+)\s+(\d+)\s*\)')
+# 下一個線程開頭（停止讀取詳細資訊）
+ANR_NEXT_THREAD = compiled(r'"[^"]+".*tid=\d+')
+
+# 堆疊幀判斷（合併成單一模式）
+ANR_STACK_FRAME_PATTERNS = (
+    r'^\s*at\s+',
+    r'^\s*#\d+\s+',
+    r'\([^)]+\.java:\d+\)',
+    r'\([^)]+\.kt:\d+\)',
+    r'^\s*-\s+(locked|waiting)',
+    r'Native Method',
+)
+ANR_STACK_FRAME = combined(ANR_STACK_FRAME_PATTERNS)
+ANR_FRAME_AT_PREFIX = compiled(r'^\s*at\s+')
+ANR_FRAME_NUM_PREFIX = compiled(r'^\s*#\d+\s+')
+
+# 鎖資訊
+ANR_LOCKED = compiled(r'- locked\s+<([^>]+)>')
+ANR_WAITING_LOCK = compiled(r'- waiting (?:on|to lock)\s+<([^>]+)>')
+ANR_HELD_BY = compiled(r'held by (?:thread\s+)?(\d+)')
+ANR_PARKING = compiled(r'parking to wait for\s+<([^>]+)>')
+ANR_CROSS_PROCESS_LOCK = compiled(r'held by tid=(\d+) in process (\d+)')
+
+# 方法名稱與服務名稱
+FRAME_METHOD_NAME = compiled(r'\.(\w+)\(')
+FRAME_SERVICE_NAME = compiled(r'(\w+(?:Service|Manager))')
+
+# ============= Tombstone 解析 =============
+
+TOMBSTONE_MAP_LINE = compiled(r'[0-9a-f]+-[0-9a-f]+\s+[rwxps-]+')
+TOMBSTONE_FD_LINE = compiled(r'(\d+):\s+(.+)')
+TOMBSTONE_THREAD_SPLIT = compiled(r'\n(?=tid=|Thread \d+)')
+TOMBSTONE_TID = compiled(r'tid=(\d+)')
+TOMBSTONE_THREAD_NAME = compiled(r'name=([^\s]+)')
+TOMBSTONE_PC_FRAME = compiled(r'\s*#\d+\s+pc')
+
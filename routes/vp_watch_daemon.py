@@ -0,0 +1,381 @@
+"""
+資料夾監看模式 - 持續監看 anr/tombstones 資料夾，新檔案寫入完成後立即分析並更新索引
+
+用法: python3 vp_watch_daemon.py <輸入資料夾> <輸出資料夾> [--interval 秒] [--debounce 秒] [--polling] [--data-dir 資料夾]
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# vp_analyze_logs 以頂層模組方式互相引入，grep_analyzer 則以 routes 套件引入
+ROUTES_DIR = os.path.dirname(os.path.abspath(__file__))
+for _path in (ROUTES_DIR, os.path.dirname(ROUTES_DIR)):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+    HAS_INOTIFY = True
+except ImportError:
+    HAS_INOTIFY = False
+
+from vp_analyze_logs import LogAnalyzerSystem
+from vp_analyze_logs_ext import analysis_frame_scope
+from routes.grep_analyzer import AndroidLogAnalyzer
+
+
+class LatencyMetrics:
+    """每個檔案的端到端延遲統計（檔案寫入 -> 偵測 -> 分析完成 -> 索引更新）"""
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)  # 最近的延遲樣本
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, name: str, landed: float, detected: float, analyzed: float, indexed: float):
+        """記錄一個檔案的各階段時間點 (time.time())"""
+        sample = {
+            'file': name,
+            'detect_latency': round(detected - landed, 3),
+            'analyze_time': round(analyzed - detected, 3),
+            'end_to_end': round(indexed - landed, 3),
+            'indexed_at': indexed,
+        }
+        with self._lock:
+            self._samples.append(sample)
+            self.count += 1
+        return sample
+
+    def summary(self) -> Dict:
+        """延遲統計摘要（秒）"""
+        with self._lock:
+            samples = list(self._samples)
+            count = self.count
+
+        if not samples:
+            return {'count': count, 'window': 0}
+
+        latencies = sorted(sample['end_to_end'] for sample in samples)
+
+        def percentile(p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(round(p * (len(latencies) - 1))))]
+
+        return {
+            'count': count,
+            'window': len(samples),
+            'last': samples[-1]['end_to_end'],
+            'avg': round(sum(latencies) / len(latencies), 3),
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'max': latencies[-1],
+            'recent': samples[-20:],
+        }
+
+
+class LogWatchDaemon:
+    """監看輸入資料夾，只分析新寫入（或內容變更）的 ANR/Tombstone 檔案
+
+    - 以 AndroidLogAnalyzer.find_target_folders 找出 anr/tombstones 資料夾（定期重新搜尋新資料夾）
+    - 有 inotify_simple 時以 inotify 喚醒，否則定期以 stat 快照比對
+    - 檔案大小與修改時間在 debounce 秒內沒有變化才視為寫入完成
+    - 每批新檔案以 LogAnalyzerSystem._analyze_file 分析後重新產生 index.html 與相似度分群
+    """
+
+    METRICS_FILE = 'watch_metrics.json'
+
+    def __init__(self, input_folder: str, output_folder: str, poll_interval: float = 5.0,
+                 debounce: float = 3.0, rescan_interval: float = 60.0,
+                 use_inotify: Optional[bool] = None, **system_options):
+        self.input_folder = input_folder
+        self.output_folder = output_folder
+        self.poll_interval = poll_interval  # 輪詢間隔（秒）
+        self.debounce = debounce  # 檔案靜止多久才視為寫入完成（秒）
+        self.rescan_interval = rescan_interval  # 重新搜尋 anr/tombstones 資料夾的間隔（秒）
+        self.use_inotify = HAS_INOTIFY if use_inotify is None else (use_inotify and HAS_INOTIFY)
+
+        self.system = LogAnalyzerSystem(input_folder, output_folder, **system_options)
+        self.folder_finder = AndroidLogAnalyzer(scan_workers=1)
+        self.metrics = LatencyMetrics()
+
+        self.index_data: Dict = {}  # 與 LogAnalyzerSystem.analyze 相同的索引結構
+        self.known: Dict[str, Tuple[int, float]] = {}  # 已處理的檔案 -> (大小, 修改時間)
+        self.pending: Dict[str, Dict] = {}  # 等待寫入完成的檔案
+        self.target_folders: List[str] = []
+        self.files_analyzed = 0
+        self.errors = 0
+
+        self._last_rescan = 0.0
+        self._stop_event = threading.Event()
+        self._inotify = None
+        self._watch_descriptors: Dict[str, int] = {}
+
+    # ============= 主迴圈 =============
+
+    def run(self):
+        """執行監看（阻塞直到呼叫 stop()）"""
+        os.makedirs(self.output_folder, exist_ok=True)
+        print(f"👀 監看模式啟動: {self.input_folder} -> {self.output_folder} "
+              f"({'inotify' if self.use_inotify else '輪詢'}，間隔 {self.poll_interval}s，debounce {self.debounce}s)")
+
+        if self.use_inotify:
+            self._inotify = INotify()
+
+        self.system._open_signature_index()
+        try:
+            self._discover_folders()
+            self._catch_up()
+            while not self._stop_event.is_set():
+                self._wait_for_changes()
+                if self._stop_event.is_set():
+                    break
+                if time.time() - self._last_rescan >= self.rescan_interval:
+                    self._discover_folders()
+                self.poll_once()
+        finally:
+            self.system._close_signature_index()
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+            print("👋 監看模式結束")
+
+    def stop(self):
+        """停止監看"""
+        self._stop_event.set()
+
+    def _wait_for_changes(self):
+        """等待下一次檢查：有 inotify 時事件發生即返回；有待處理檔案時只等待 debounce"""
+        timeout = min(self.poll_interval, self.debounce) if self.pending else self.poll_interval
+        if self._inotify is not None:
+            self._inotify.read(timeout=int(timeout * 1000))
+        else:
+            self._stop_event.wait(timeout)
+
+    # ============= 變更偵測 =============
+
+    def _discover_folders(self):
+        """重新搜尋 anr/tombstones 資料夾（排除輸出資料夾）"""
+        anr_folders, tombstone_folders = self.folder_finder.find_target_folders(self.input_folder)
+        output_root = os.path.abspath(self.output_folder) + os.sep
+        self.target_folders = sorted(
+            folder for folder in set(anr_folders + tombstone_folders)
+            if not (os.path.abspath(folder) + os.sep).startswith(output_root)
+        )
+        self._last_rescan = time.time()
+
+        if self._inotify is not None:
+            watch_flags = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE
+            for folder in self.target_folders:
+                if folder not in self._watch_descriptors:
+                    try:
+                        self._watch_descriptors[folder] = self._inotify.add_watch(folder, watch_flags)
+                    except OSError as e:
+                        print(f"⚠️ 無法監看資料夾 {folder}: {e}")
+
+    def _take_snapshot(self) -> Dict[str, Tuple[int, float]]:
+        """目前所有 anr/tombstones 資料夾第一層檔案的 (大小, 修改時間)"""
+        snapshot = {}
+        for folder in self.target_folders:
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            snapshot[entry.path] = (stat.st_size, stat.st_mtime)
+            except OSError:
+                continue
+        return snapshot
+
+    def _catch_up(self):
+        """啟動時比對既有輸出：已有較新分析報告的檔案直接加入索引，其餘排入待處理"""
+        now = time.time()
+        registered = 0
+        for path, stat in self._take_snapshot().items():
+            file_info = self.system._build_file_info(path, verbose=False)
+            output_file = self._existing_output(file_info) if file_info else None
+            if output_file and os.path.getmtime(output_file) >= stat[1]:
+                self.system._update_index(self.index_data, file_info['rel_path'], output_file,
+                                          os.path.join(os.path.dirname(output_file), file_info['name']))
+                self.known[path] = stat
+                registered += 1
+            else:
+                self.pending[path] = self._new_pending_entry(stat, now)
+                # 啟動前就存在的檔案從啟動時開始計算延遲
+                self.pending[path]['landed'] = now
+
+        print(f"📋 既有分析 {registered} 個，待分析 {len(self.pending)} 個")
+        if registered and not self.pending:
+            self.system._generate_index(self.index_data)
+
+    @staticmethod
+    def _new_pending_entry(stat: Tuple[int, float], now: float) -> Dict:
+        """待處理檔案；landed 為第一次看到的修改時間（不晚於偵測時間）"""
+        return {'stat': stat, 'stable_since': now, 'detected': now, 'landed': min(stat[1], now)}
+    
+    def _existing_output(self, file_info: Dict) -> Optional[str]:
+        """已存在的分析報告路徑（HTML 優先）"""
+        output_dir = os.path.join(self.output_folder, os.path.dirname(file_info['rel_path']))
+        for suffix in ('.analyzed.html', '.analyzed.txt'):
+            output_file = os.path.join(output_dir, file_info['name'] + suffix)
+            if os.path.exists(output_file):
+                return output_file
+        return None
+
+    def poll_once(self) -> int:
+        """比對一次快照並分析已寫入完成的檔案
+
+        Returns:
+            本次分析的檔案數
+        """
+        now = time.time()
+        snapshot = self._take_snapshot()
+
+        for path, stat in snapshot.items():
+            if self.known.get(path) == stat:
+                continue
+            entry = self.pending.get(path)
+            if entry is None:
+                self.pending[path] = self._new_pending_entry(stat, now)
+            elif entry['stat'] != stat:
+                # 仍在寫入中，重新計算靜止時間
+                entry['stat'] = stat
+                entry['stable_since'] = now
+
+        # 已刪除的檔案不再等待，也不再保留狀態（長時間執行時 known 不會持續增長）
+        for path in [path for path in self.pending if path not in snapshot]:
+            del self.pending[path]
+        for path in [path for path in self.known if path not in snapshot]:
+            del self.known[path]
+
+        ready = sorted(
+            path for path, entry in self.pending.items()
+            if now - entry['stable_since'] >= self.debounce and now - entry['stat'][1] >= self.debounce
+        )
+        if ready:
+            self._process_ready(ready)
+        return len(ready)
+
+    # ============= 分析與索引 =============
+
+    def _process_ready(self, ready: List[str]):
+        """分析一批寫入完成的檔案，然後更新索引與延遲統計"""
+        # 每批檔案使用獨立的堆疊幀表與符號表，長時間監看不會累積歷次分析的堆疊幀
+        with analysis_frame_scope():
+            self._process_batch(ready)
+
+    def _process_batch(self, ready: List[str]):
+        """分析一批檔案（在 _process_ready 的堆疊幀範圍內執行）"""
+        finished = []
+        for path in ready:
+            entry = self.pending.pop(path)
+            self.known[path] = entry['stat']
+
+            # 空檔案等不符合條件的檔案只記錄狀態，內容變更時會再次偵測
+            file_info = self.system._build_file_info(path, verbose=False)
+            if not file_info:
+                continue
+
+            try:
+                self.system._analyze_file(file_info, self.index_data)
+                self.files_analyzed += 1
+                finished.append((file_info['name'], entry, time.time()))
+            except Exception as e:
+                print(f"❌ 分析 {path} 時發生錯誤: {str(e)}")
+                self.errors += 1
+
+        if not finished:
+            return
+
+        # 更新索引與相似度分群
+        try:
+            self.system._generate_index(self.index_data)
+        except Exception as e:
+            print(f"❌ 更新索引失敗: {str(e)}")
+            self.errors += 1
+            return
+        if self.system.signature_index is not None:
+            self.system.signature_index.flush()
+
+        indexed = time.time()
+        for name, entry, analyzed in finished:
+            sample = self.metrics.record(name, entry['landed'], entry['detected'], analyzed, indexed)
+            print(f"⏱️ {name}: 端到端延遲 {sample['end_to_end']:.2f}s "
+                  f"(偵測 {sample['detect_latency']:.2f}s，分析 {sample['analyze_time']:.2f}s)")
+        self._save_metrics()
+
+    def get_metrics(self) -> Dict:
+        """目前的監看統計與延遲指標"""
+        return {
+            'mode': 'inotify' if self._inotify is not None else 'polling',
+            'target_folders': len(self.target_folders),
+            'known_files': len(self.known),
+            'pending_files': len(self.pending),
+            'files_analyzed': self.files_analyzed,
+            'errors': self.errors,
+            'latency': self.metrics.summary(),
+            'updated': time.time(),
+        }
+
+    def _save_metrics(self):
+        """將延遲指標寫入輸出資料夾（先寫暫存檔再改名）"""
+        metrics_file = os.path.join(self.output_folder, self.METRICS_FILE)
+        tmp_file = metrics_file + '.tmp'
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.get_metrics(), f, ensure_ascii=False, indent=1)
+            os.replace(tmp_file, metrics_file)
+        except OSError as e:
+            print(f"⚠️ 無法寫入監看指標: {str(e)}")
+
+
+def main():
+    """主函數"""
+    args = sys.argv[1:]
+    options = {'poll_interval': 5.0, 'debounce': 3.0}
+
+    if '--polling' in args:
+        options['use_inotify'] = False
+        args.remove('--polling')
+
+    # 跨執行資料（崩潰簽名索引、結果快取、增量索引狀態）只在指定 --data-dir 時啟用，不讀取環境變數
+    if '--data-dir' in args:
+        pos = args.index('--data-dir')
+        if pos + 1 >= len(args):
+            print("❌ --data-dir 需要一個資料夾參數")
+            sys.exit(1)
+        options['data_dir'] = args[pos + 1]
+        del args[pos:pos + 2]
+    else:
+        options.update(use_signature_db=False, use_result_cache=False, incremental_index=False)
+
+    for flag, key in (('--interval', 'poll_interval'), ('--debounce', 'debounce')):
+        if flag in args:
+            pos = args.index(flag)
+            try:
+                options[key] = float(args[pos + 1])
+            except (IndexError, ValueError):
+                print(f"❌ {flag} 需要一個數字參數（秒）")
+                sys.exit(1)
+            del args[pos:pos + 2]
+
+    if len(args) != 2:
+        print("用法: python3 vp_watch_daemon.py <輸入資料夾> <輸出資料夾> [--interval 秒] [--debounce 秒] [--polling] "
+              "[--data-dir 資料夾]")
+        print("範例: python3 vp_watch_daemon.py /mnt/device_farm/ output/ --interval 2")
+        sys.exit(1)
+
+    daemon = LogWatchDaemon(args[0], args[1], **options)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
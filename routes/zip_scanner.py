@@ -0,0 +1,242 @@
+"""
+Zip 壓縮檔直接掃描 - 以 zipfile 讀取壓縮檔內的 anr/tombstones 檔案（支援巢狀 zip），
+不需要先解壓縮到 "<name>.zip_extracted" 資料夾
+
+壓縮檔內的檔案以虛擬路徑表示: /data/drop.zip!/FS/data/anr/anr_1
+巢狀 zip: /data/drop.zip!/logs/inner.zip!/tombstones/tombstone_00
+"""
+
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import threading
+import zipfile
+from datetime import datetime
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+# 虛擬路徑中壓縮檔與成員的分隔符號
+ZIP_MEMBER_SEPARATOR = '!/'
+
+_ZIP_MEMBER_RE = re.compile(r'\.zip!/', re.IGNORECASE)
+
+# 成員名稱開頭的磁碟代號（C: 或 /C:）
+_DRIVE_RE = re.compile(r'^/?[A-Za-z]:')
+
+# zipfile 可以直接讀取的壓縮方式（其他方式需要改用 unzip 解壓縮）
+_SUPPORTED_COMPRESSION = {zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA}
+
+
+def is_zip_member_path(path: str) -> bool:
+    """判斷路徑是否為壓縮檔內的成員（虛擬路徑）"""
+    return bool(path) and _ZIP_MEMBER_RE.search(path) is not None
+
+
+def split_zip_member_path(path: str) -> Tuple[str, List[str]]:
+    """拆解虛擬路徑
+
+    Returns:
+        (磁碟上的壓縮檔路徑, [成員名稱, ...]) - 巢狀 zip 時成員名稱依層級排列
+    """
+    parts = []
+    last = 0
+    for match in _ZIP_MEMBER_RE.finditer(path):
+        parts.append(path[last:match.end() - len(ZIP_MEMBER_SEPARATOR)])
+        last = match.end()
+    parts.append(path[last:])
+    return parts[0], parts[1:]
+
+
+def member_path_parts(member: str) -> List[str]:
+    """將成員名稱拆成相對路徑的各段（與 unzip 相同，去掉開頭的 '/' 與磁碟代號）
+
+    "/tmp/x/anr/a" -> ['tmp', 'x', 'anr', 'a']、"C:\\logs\\anr\\a" -> ['logs', 'anr', 'a']；
+    '..' 保留給呼叫端判斷是否略過。
+    """
+    member = _DRIVE_RE.sub('', member.replace('\\', '/'))
+    return [part for part in member.split('/') if part not in ('', '.')]
+
+
+def can_scan_in_place(zip_path: str) -> bool:
+    """檢查壓縮檔能否直接以 zipfile 讀取（未加密、壓縮方式支援、格式正確）"""
+    try:
+        with zipfile.ZipFile(zip_path) as zf:
+            for info in zf.infolist():
+                if info.flag_bits & 0x1:  # 加密
+                    return False
+                if info.compress_type not in _SUPPORTED_COMPRESSION:
+                    return False
+        return True
+    except (zipfile.BadZipFile, OSError, NotImplementedError):
+        return False
+
+
+class ZipArchiveReader:
+    """讀取壓縮檔（含巢狀 zip）內的成員
+
+    開啟過的壓縮檔會保留到 close() 為止，同一次掃描中不必重複解析中央目錄；
+    巢狀 zip 會先串流到暫存檔（小檔案保留在記憶體），再以 zipfile 開啟。
+    可在多個執行緒中同時讀取。
+    """
+
+    def __init__(self, max_depth: int = 3, spool_max_bytes: int = 64 * 1024 * 1024):
+        self.max_depth = max_depth  # 巢狀 zip 最大層數
+        self.spool_max_bytes = spool_max_bytes  # 巢狀 zip 超過此大小時改用磁碟暫存
+        self._archives: Dict[Tuple[str, ...], Tuple[zipfile.ZipFile, Optional[IO[bytes]]]] = {}
+        self._lock = threading.Lock()
+
+    def _get_archive(self, chain: Tuple[str, ...]) -> zipfile.ZipFile:
+        """取得已開啟的壓縮檔，chain = (磁碟路徑, 巢狀 zip 成員, ...)"""
+        with self._lock:
+            cached = self._archives.get(chain)
+            if cached:
+                return cached[0]
+
+        if len(chain) == 1:
+            archive = zipfile.ZipFile(chain[0])
+            backing = None
+        else:
+            parent = self._get_archive(chain[:-1])
+            backing = tempfile.SpooledTemporaryFile(max_size=self.spool_max_bytes)
+            with parent.open(chain[-1]) as src:
+                shutil.copyfileobj(src, backing, 1024 * 1024)
+            backing.seek(0)
+            archive = zipfile.ZipFile(backing)
+
+        with self._lock:
+            if chain in self._archives:
+                # 其他執行緒已經開啟同一個壓縮檔
+                archive.close()
+                if backing is not None:
+                    backing.close()
+                return self._archives[chain][0]
+            self._archives[chain] = (archive, backing)
+        return archive
+
+    def iter_members(self, zip_path: str) -> Iterator[Dict]:
+        """列出壓縮檔內所有檔案（巢狀 zip 會展開）
+
+        Yields:
+            {'path': 虛擬路徑, 'name': 檔名, 'size': 位元組數, 'mtime': 修改時間 (timestamp)}
+        """
+        yield from self._iter_chain((zip_path,), zip_path)
+
+    def _iter_chain(self, chain: Tuple[str, ...], virtual_prefix: str) -> Iterator[Dict]:
+        try:
+            archive = self._get_archive(chain)
+        except (zipfile.BadZipFile, OSError, NotImplementedError, RuntimeError) as e:
+            print(f"✗ 無法讀取壓縮檔 {virtual_prefix}: {e}")
+            return
+
+        for info in archive.infolist():
+            if info.is_dir() or info.flag_bits & 0x1:
+                continue
+            virtual_path = virtual_prefix + ZIP_MEMBER_SEPARATOR + info.filename
+            if info.filename.lower().endswith('.zip'):
+                if len(chain) <= self.max_depth:
+                    yield from self._iter_chain(chain + (info.filename,), virtual_path)
+                continue
+            yield {
+                'path': virtual_path,
+                'name': os.path.basename(info.filename),
+                'size': info.file_size,
+                'mtime': self._zipinfo_mtime(info),
+            }
+
+    @staticmethod
+    def _zipinfo_mtime(info: zipfile.ZipInfo) -> float:
+        try:
+            return datetime(*info.date_time).timestamp()
+        except (ValueError, OverflowError):
+            return 0.0
+
+    def _locate(self, virtual_path: str) -> Tuple[zipfile.ZipFile, str]:
+        zip_path, members = split_zip_member_path(virtual_path)
+        if not members:
+            raise FileNotFoundError(virtual_path)
+        archive = self._get_archive((zip_path,) + tuple(members[:-1]))
+        return archive, members[-1]
+
+    def open(self, virtual_path: str) -> IO[bytes]:
+        """以二進位串流開啟壓縮檔內的成員"""
+        archive, member = self._locate(virtual_path)
+        try:
+            return archive.open(member)
+        except KeyError:
+            raise FileNotFoundError(virtual_path)
+
+    def stat(self, virtual_path: str) -> Tuple[int, float]:
+        """取得成員大小與修改時間"""
+        archive, member = self._locate(virtual_path)
+        try:
+            info = archive.getinfo(member)
+        except KeyError:
+            raise FileNotFoundError(virtual_path)
+        return info.file_size, self._zipinfo_mtime(info)
+
+    def exists(self, virtual_path: str) -> bool:
+        try:
+            self.stat(virtual_path)
+            return True
+        except (FileNotFoundError, zipfile.BadZipFile, OSError, NotImplementedError):
+            return False
+
+    def materialize(self, virtual_path: str, dest_path: Optional[str] = None) -> str:
+        """將成員寫成實體檔案
+
+        dest_path 未指定時寫入暫存資料夾（依壓縮檔路徑與修改時間命名，已存在時直接重用）
+
+        Returns:
+            實體檔案路徑
+        """
+        if dest_path is None:
+            zip_path, _ = split_zip_member_path(virtual_path)
+            archive_stat = os.stat(zip_path)
+            key = hashlib.sha1(
+                f"{virtual_path}\0{archive_stat.st_mtime}\0{archive_stat.st_size}".encode('utf-8')
+            ).hexdigest()
+            dest_dir = os.path.join(tempfile.gettempdir(), 'anr_zip_members', key[:2], key)
+            dest_path = os.path.join(dest_dir, os.path.basename(virtual_path))
+            if os.path.exists(dest_path):
+                return dest_path
+
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+
+        # 先寫入暫存檔再改名，避免中斷時留下不完整的檔案
+        tmp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with self.open(virtual_path) as src, open(tmp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            _, mtime = self.stat(virtual_path)
+            if mtime:
+                os.utime(tmp_path, (mtime, mtime))
+            os.replace(tmp_path, dest_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return dest_path
+
+    def close(self):
+        """關閉所有已開啟的壓縮檔"""
+        with self._lock:
+            archives = list(self._archives.values())
+            self._archives.clear()
+        for archive, backing in archives:
+            archive.close()
+            if backing is not None:
+                backing.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def materialize_zip_member(virtual_path: str) -> str:
+    """將壓縮檔成員寫到暫存資料夾並回傳實體路徑（供 /view-file 等使用）"""
+    with ZipArchiveReader() as reader:
+        return reader.materialize(virtual_path)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# 分析器模組以 routes 資料夾為匯入根目錄，grep_analyzer 等則以 routes 套件匯入
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (ROOT, os.path.join(ROOT, 'routes')):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
@@ -0,0 +1,104 @@
+import json
+import threading
+
+import pytest
+
+from analysisJobManager import AnalysisJobManager
+
+
+@pytest.fixture
+def manager():
+    manager = AnalysisJobManager(max_workers=2, max_pending=3, job_ttl=60)
+    yield manager
+    manager._executor.shutdown(wait=True)
+
+
+def _parse_stream(chunks):
+    """把 text/event-stream 片段轉成 (event, data) 列表（略過 heartbeat）"""
+    events = []
+    for chunk in chunks:
+        if chunk.startswith(':'):
+            continue
+        lines = chunk.strip().split('\n')
+        events.append((lines[0][len('event: '):], json.loads(lines[1][len('data: '):])))
+    return events
+
+
+def _blocking_job(release):
+    def job(progress):
+        release.wait(5)
+        return 'ok'
+    return job
+
+
+def test_rejects_duplicate_active_key(manager):
+    release = threading.Event()
+    job_id, error = manager.submit(_blocking_job(release), job_key='/logs/a')
+    assert job_id and error is None
+    assert manager.has_active_job('/logs/a')
+
+    duplicate, error = manager.submit(_blocking_job(release), job_key='/logs/a')
+    assert duplicate is None and error
+    other, error = manager.submit(_blocking_job(release), job_key='/logs/b')
+    assert other and error is None
+
+    release.set()
+    list(manager.stream_events(job_id, heartbeat=0.1))
+    # 完成後同一路徑可以再次提交
+    assert not manager.has_active_job('/logs/a')
+    again, error = manager.submit(lambda progress: None, job_key='/logs/a')
+    assert again and error is None
+
+
+def test_rejects_when_queue_full(manager):
+    release = threading.Event()
+    for key in ('a', 'b', 'c'):
+        assert manager.submit(_blocking_job(release), job_key=key)[0]
+    job_id, error = manager.submit(_blocking_job(release), job_key='d')
+    assert job_id is None and '3' in error
+    release.set()
+
+
+def test_expired_jobs_removed_after_ttl(manager, monkeypatch):
+    job_id, _ = manager.submit(lambda progress: 'ok')
+    list(manager.stream_events(job_id, heartbeat=0.1))
+    finished = manager.get_job(job_id)['finished']
+
+    monkeypatch.setattr('analysisJobManager.time.time', lambda: finished + 30)
+    manager.submit(lambda progress: None)
+    assert manager.get_job(job_id) is not None
+
+    monkeypatch.setattr('analysisJobManager.time.time', lambda: finished + 61)
+    manager.submit(lambda progress: None)
+    assert manager.get_job(job_id) is None
+
+
+def test_stream_events_reports_progress_then_done(manager):
+    def job(progress):
+        progress('scan', 0, 2, '掃描')
+        progress('analyze', 1, 2, 'anr_1')
+        progress('analyze', 2, 2, 'anr_2')
+        return {'reports': 2}
+
+    job_id, _ = manager.submit(job)
+    events = _parse_stream(manager.stream_events(job_id, heartbeat=0.1))
+
+    progress = [data for event, data in events if event == 'progress']
+    assert [data['seq'] for data in progress] == list(range(len(progress)))
+    assert [data['stage'] for data in progress] == ['queued', 'queued', 'scan', 'analyze', 'analyze', 'done']
+    assert progress[-1]['status'] == 'done'
+    assert events[-1] == ('done', {'job_id': job_id, 'status': 'done', 'error': None})
+    assert manager.get_job(job_id)['result'] == {'reports': 2}
+
+
+def test_stream_events_reports_error(manager):
+    def job(progress):
+        raise RuntimeError('boom')
+
+    job_id, _ = manager.submit(job)
+    events = _parse_stream(manager.stream_events(job_id, heartbeat=0.1))
+    assert events[-1] == ('error', {'job_id': job_id, 'status': 'error', 'error': 'boom'})
+
+
+def test_stream_unknown_job(manager):
+    assert _parse_stream(manager.stream_events('missing')) == [('error', {'error': '找不到分析工作'})]
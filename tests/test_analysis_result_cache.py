@@ -0,0 +1,130 @@
+import os
+import shutil
+
+from report_assets import ASSET_MODE_INLINE, ASSET_MODE_SHARED
+from vp_analyze_logs import LogAnalyzerSystem
+from vp_analyze_logs_ext import AnalysisResultCache
+
+ANR_TRACE = """----- pid 1234 at 2024-01-01 10:00:00 -----
+Cmd line: com.example.app
+Subject: ANR Input dispatching timed out (Waited 5001ms for FocusEvent)
+
+DALVIK THREADS (2):
+"main" prio=5 tid=1 Blocked
+  | group="main" sCount=1 dsCount=0 flags=1 obj=0x72c5a5b8 self=0xb400007
+  | sysTid=1234 nice=-10 cgrp=default sched=0/0 handle=0x7f
+  at com.example.app.MainActivity.doWork(MainActivity.java:42)
+  - waiting to lock <0x0abc1234> (a java.lang.Object) held by thread 12
+  at android.os.Looper.loop(Looper.java:223)
+
+"Worker-1" prio=5 tid=12 Sleeping
+  | group="main" sCount=1 dsCount=0 flags=1 obj=0x12c00000 self=0xb400008
+  at java.lang.Thread.sleep(Native method)
+  - locked <0x0abc1234> (a java.lang.Object)
+
+----- end 1234 -----
+"""
+
+
+def _entry_size(cache, key):
+    entry_dir = cache._entry_dir(key)
+    return sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+
+
+def test_make_key_depends_on_version(tmp_path):
+    v1 = AnalysisResultCache(str(tmp_path), 'v1')
+    v2 = AnalysisResultCache(str(tmp_path), 'v2')
+    assert v1.make_key('abc', 'anr') == v1.make_key('abc', 'anr')
+    assert v1.make_key('abc', 'anr') != v1.make_key('abc', 'tombstone')
+    assert v1.make_key('abc', 'anr') != v2.make_key('abc', 'anr')
+
+
+def test_miss_then_hit(tmp_path):
+    cache = AnalysisResultCache(str(tmp_path), 'v1')
+    key = cache.make_key('abc', 'anr')
+    assert cache.get(key) is None
+
+    cache.put(key, 'anr_1', 'report', '<html/>', {'pid': 1})
+    assert cache.get(key) == {'name': 'anr_1', 'text': 'report', 'html': '<html/>', 'record': {'pid': 1}}
+
+
+def test_put_keeps_existing_entry(tmp_path):
+    cache = AnalysisResultCache(str(tmp_path), 'v1')
+    key = cache.make_key('abc', 'anr')
+    cache.put(key, 'anr_1', 'first')
+    cache.put(key, 'anr_1', 'second')
+    hit = cache.get(key)
+    assert hit['text'] == 'first'
+    assert hit['html'] is None
+    assert hit['record'] is None
+
+
+def test_version_change_misses(tmp_path):
+    old = AnalysisResultCache(str(tmp_path), 'v1')
+    old.put(old.make_key('abc', 'anr'), 'anr_1', 'report')
+
+    new = AnalysisResultCache(str(tmp_path), 'v2')
+    assert new.get(new.make_key('abc', 'anr')) is None
+
+
+def test_enforce_limit_evicts_least_recently_used(tmp_path):
+    cache = AnalysisResultCache(str(tmp_path), 'v1')
+    keys = [cache.make_key(str(i), 'anr') for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, f'anr_{i}', 'x' * 1000)
+        meta_path = os.path.join(cache._entry_dir(key), cache.META_FILE)
+        os.utime(meta_path, (1000 + i, 1000 + i))
+
+    # 讀取最舊的項目會更新最後使用時間，淘汰時改為淘汰第二個項目
+    assert cache.get(keys[0]) is not None
+    cache.max_bytes = _entry_size(cache, keys[0]) * 2
+
+    assert cache.enforce_limit() == 1
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+
+
+def test_enforce_limit_under_capacity(tmp_path):
+    cache = AnalysisResultCache(str(tmp_path), 'v1')
+    key = cache.make_key('abc', 'anr')
+    cache.put(key, 'anr_1', 'report')
+    assert cache.enforce_limit() == 0
+    assert cache.get(key) is not None
+
+
+def _analyze(tmp_path, output, report_assets, use_result_cache=True):
+    system = LogAnalyzerSystem(str(tmp_path / 'in'), str(tmp_path / output), report_assets=report_assets,
+                               data_dir=str(tmp_path / 'data'), use_signature_db=False,
+                               use_result_cache=use_result_cache, incremental_index=False)
+    system.analyze()
+    with open(str(tmp_path / output / 'anr' / 'anr_1.analyzed.html'), encoding='utf-8') as f:
+        return system.stats, f.read()
+
+
+def test_cached_html_follows_asset_mode(tmp_path, monkeypatch):
+    (tmp_path / 'in' / 'anr').mkdir(parents=True)
+    (tmp_path / 'in' / 'anr' / 'anr_1').write_text(ANR_TRACE)
+    _, fresh_inline_html = _analyze(tmp_path, 'fresh_inline', ASSET_MODE_INLINE, use_result_cache=False)
+    _, fresh_shared_html = _analyze(tmp_path, 'fresh_shared', ASSET_MODE_SHARED, use_result_cache=False)
+
+    stats, shared_html = _analyze(tmp_path, 'shared', ASSET_MODE_SHARED)
+    assert stats['cache_misses'] == 1
+    assert shared_html == fresh_shared_html
+    assert str(tmp_path) not in shared_html
+
+    # 快取的 HTML 不含 CSS/JS：命中時直接重用，再依這次的資源模式附上
+    generated = []
+    body = LogAnalyzerSystem._generate_html_report_body
+    monkeypatch.setattr(LogAnalyzerSystem, '_generate_html_report_body',
+                        lambda self, *args: generated.append(args) or body(self, *args))
+    stats, inline_html = _analyze(tmp_path, 'inline', ASSET_MODE_INLINE)
+    assert stats['cache_hits'] == 1
+    assert inline_html == fresh_inline_html
+
+    shutil.rmtree(str(tmp_path / 'shared'))
+    stats, shared_html = _analyze(tmp_path, 'shared', ASSET_MODE_SHARED)
+    assert stats['cache_hits'] == 1
+    assert shared_html == fresh_shared_html
+    assert os.path.isdir(str(tmp_path / 'shared' / 'report_assets'))
+    assert generated == []
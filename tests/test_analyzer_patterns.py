@@ -0,0 +1,92 @@
+import re
+
+from vp_analyze_logs import ANRAnalyzer, ThreadInfo
+from vp_analyze_logs_patterns import (ANR_STACK_FRAME, ANR_STACK_FRAME_PATTERNS, combined, compile_pattern_groups,
+                                      compiled)
+
+LINES = [
+    '"main" prio=5 tid=1 Native',
+    '"Signal Catcher" daemon prio=10 tid=6 Runnable',
+    '"binder:1234_2" prio=5 tid=12 Blocked',
+    '"RenderThread" tid=15 Waiting',
+    'Thread-5 "pool-3-thread-1" prio=5 tid=33 Sleeping',
+    '"HeapTaskDaemon" | group="system" sCount=1 tid=7 | state=S',
+    'system_server prio=5 tid=2 TimedWaiting',
+    'Thread 12 (HwBinder:1234) State: S',
+    '  | group="main" sCount=1 dsCount=0 flags=1 obj=0x12c00 self=0xb40',
+    '  | sysTid=1001 nice=0 cgrp=default sched=0/0 handle=0x7d',
+    '  | state=S schedstat=( 100 200 300 ) utm=1 stm=2 core=1 HZ=100',
+    '  at android.os.MessageQueue.nativePollOnce(Native Method)',
+    '  at com.example.Foo.bar(Foo.java:42)',
+    '  at com.example.Baz.qux(Baz.kt:7)',
+    '  native: #00 pc 000000000009b1a4  /apex/com.android.runtime/lib64/bionic/libc.so (__ioctl+4)',
+    '  #01 pc 0000000000012345  /system/lib64/libfoo.so',
+    '  - locked <0x0abc0001> (a java.lang.Object)',
+    '  - waiting to lock <0x0abc0002> (a java.lang.Object) held by thread 3',
+    '  - waiting on <0x0abc0003> (a java.lang.Object)',
+    '  - parking to wait for <0x0abc0004> (a java.util.concurrent.locks.ReentrantLock)',
+    'held by tid=5 in process 4321',
+    'tid=4 but no thread header',
+    'Subject: ANR Input dispatching timed out',
+    'State: unknown',
+    '\x0c',
+    '',
+]
+
+# 改用登錄表之前的逐行判斷（每一行以字串模式呼叫 re.search）
+LEGACY_STACK_FRAME_PATTERNS = [
+    r'^\s*at\s+',
+    r'^\s*#\d+\s+',
+    r'\([^)]+\.java:\d+\)',
+    r'\([^)]+\.kt:\d+\)',
+    r'^\s*-\s+(locked|waiting)',
+    r'Native Method',
+]
+
+
+def _legacy_parse_thread_header(analyzer, line):
+    thread_match = re.match(r'"([^"]+)"\s+prio=(\d+)\s+tid=(\d+)\s+(\w+)', line)
+    if thread_match:
+        name, prio, tid, state = thread_match.groups()
+        return ThreadInfo(name=name, tid=tid, prio=prio, state=analyzer._parse_thread_state(state)), True
+    for pattern in analyzer.patterns['thread_patterns']:
+        match = re.search(pattern, line)
+        if match:
+            groups = match.groups()
+            if len(groups) == 4 and 'daemon' not in pattern:
+                name, prio, tid, state = groups
+                return ThreadInfo(name=name, tid=tid, prio=prio, state=analyzer._parse_thread_state(state)), False
+            elif len(groups) == 3:
+                name, tid, state = groups
+                return ThreadInfo(name=name, tid=tid, state=analyzer._parse_thread_state(state)), False
+    return None
+
+
+def test_compiled_is_cached_per_flags():
+    assert compiled(r'tid=(\d+)') is compiled(r'tid=(\d+)')
+    assert compiled(r'tid=(\d+)', re.IGNORECASE) is not compiled(r'tid=(\d+)')
+    assert combined(['a', 'b']) is combined(('a', 'b'))
+
+
+def test_combined_matches_any_pattern():
+    assert tuple(LEGACY_STACK_FRAME_PATTERNS) == ANR_STACK_FRAME_PATTERNS
+    for line in LINES:
+        expected = any(re.search(pattern, line) for pattern in LEGACY_STACK_FRAME_PATTERNS)
+        assert (ANR_STACK_FRAME.search(line) is not None) == expected, line
+
+
+def test_compile_pattern_groups_skips_non_string_tables():
+    groups = compile_pattern_groups({'a': [r'x+', r'y'], 'b': {'k': 'v'}, 'c': [r'z', 1]})
+    assert list(groups) == ['a']
+    assert [regex.pattern for regex in groups['a']] == ['x+', 'y']
+
+
+def test_line_checks_match_legacy_regex_path():
+    analyzer = ANRAnalyzer()
+    thread_patterns = analyzer.patterns['thread_patterns']
+    for line in LINES:
+        assert analyzer._parse_thread_header(line) == _legacy_parse_thread_header(analyzer, line), line
+        assert analyzer._is_thread_start(line) == any(re.search(p, line) for p in thread_patterns[:3]), line
+        assert analyzer._is_stack_frame(line) == any(re.search(p, line) for p in LEGACY_STACK_FRAME_PATTERNS), line
+        legacy_clean = re.sub(r'^\s*#\d+\s+', '', re.sub(r'^\s*at\s+', '', line)).strip()
+        assert analyzer._clean_stack_frame(line) == legacy_clean, line
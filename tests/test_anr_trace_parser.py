@@ -0,0 +1,142 @@
+import io
+import re
+
+import pytest
+
+from vp_analyze_logs import ANRAnalyzer, ANRTraceParser, ANRType, ThreadState
+from vp_analyze_logs_patterns import FirstMatchScanner
+
+TRACE = """\
+----- pid 4321 at 2024-03-05 12:34:56.789+0800 -----
+Cmd line: com.example.app
+Subject: ANR Input dispatching timed out (Waited 5001ms for FocusEvent(hasFocus=false))
+Reason: Input dispatching timed out (Waited 5001ms for FocusEvent)
+CPU usage from 0ms to 5000ms later:
+  45% 4321/com.example.app: 30% user + 15% kernel
+  12% 1000/system_server: 8% user + 4% kernel
+TOTAL: 60% user + 20% kernel + 5% iowait
+Total memory: 3800000 kB
+Free memory: 120000 kB
+
+DALVIK THREADS (4):
+"main" prio=5 tid=1 Blocked
+  | group="main" sCount=1 dsCount=0 flags=1 obj=0x72a0 self=0xb400
+  | sysTid=4321 nice=-10 cgrp=top-app sched=0/0 handle=0x7f00
+  | state=S schedstat=( 5000000 2000000 300 ) utm=250 stm=50 core=3 HZ=100
+  at com.example.app.Store.save(Store.java:88)
+  - waiting to lock <0x0a1b2c3d> (a java.lang.Object) held by thread 12
+  at com.example.app.MainActivity.onClick(MainActivity.kt:41)
+  at android.os.Handler.dispatchMessage(Handler.java:106)
+  at android.app.ActivityThread.main(ActivityThread.java:7839)
+
+"Worker-12" prio=5 tid=12 Runnable
+  | group="main" sCount=0 dsCount=0 flags=0 obj=0x12c0 self=0xb401
+  | sysTid=4400 nice=0 cgrp=default sched=0/0 handle=0x7f01
+  | state=R schedstat=( 900000 100 20 ) utm=80 stm=10 core=1 HZ=100
+  at com.example.app.Store.flush(Store.java:120)
+  - locked <0x0a1b2c3d> (a java.lang.Object)
+  at android.os.BinderProxy.transactNative(Native Method)
+  - waiting to lock <0x0fff0001> (a android.os.Binder) held by tid=77 in process 1000
+
+"pool-2-thread-1" prio=5 tid=13 Waiting
+  | sysTid=4401 nice=0 cgrp=default sched=0/0 handle=0x7f02
+  at sun.misc.Unsafe.park(Native Method)
+  - parking to wait for <0x0c0ffee0> (a java.util.concurrent.locks.AbstractQueuedSynchronizer$ConditionObject)
+  at java.util.concurrent.locks.LockSupport.park(LockSupport.java:190)
+Thread-5 "legacy-worker" prio=5 tid=21 Sleeping
+  at java.lang.Thread.sleep(Native Method)
+  at com.example.app.Poller.run(Poller.java:33)
+"HwBinder:4321_1" tid=22 Native
+  native: #00 pc 000000000009b1a4  /apex/com.android.runtime/lib64/bionic/libc.so (__ioctl+4)
+  native: #01 pc 0000000000057e1c  /system/lib64/libhidlbase.so (android::hardware::IPCThreadState::talkWithDriver+212)
+
+----- end 4321 -----
+"""
+
+# 單次掃描解析器之前的逐行 regex 實作 (_extract_all_threads 與各線程輔助方法) 對 TRACE 的解析結果
+LEGACY_THREADS = [
+    # (名稱, tid, prio, 狀態, sysTid, utm, stm, schedstat, 持有的鎖, 等待的鎖, 等待資訊, 堆疊幀數)
+    ('main', '1', '5', ThreadState.SLEEPING, '4321', '250', '50', '運行:5.0ms 等待:2.0ms',
+     ['0x0a1b2c3d'], ['0x0a1b2c3d', '0x0fff0001'], '等待跨進程鎖，被進程 1000 的線程 77 持有', 5),
+    ('Worker-12', '12', '5', ThreadState.RUNNABLE, '4400', '80', '10', '運行:0.9ms 等待:0.0ms',
+     ['0x0a1b2c3d'], ['0x0fff0001'], '等待跨進程鎖，被進程 1000 的線程 77 持有', 4),
+    ('pool-2-thread-1', '13', '5', ThreadState.WAIT, '4401', None, None, None,
+     [], [], 'Parking 等待: 0x0c0ffee0', 2),
+    ('legacy-worker', '21', 'N/A', ThreadState.SLEEPING, None, None, None, None, [], [], None, 2),
+    ('HwBinder:4321_1', '22', 'N/A', ThreadState.NATIVE, None, None, None, None, [], [], None, 0),
+]
+
+
+def _summary(info):
+    threads = [(t.name, t.tid, t.prio, t.state, t.sysTid, t.utm, t.stm, t.schedstat,
+                t.held_locks, t.waiting_locks, t.waiting_info, len(t.backtrace)) for t in info.all_threads]
+    return (info.anr_type, info.process_name, info.pid, info.timestamp, info.main_thread.name,
+            info.timeout_info, threads, [list(t.backtrace) for t in info.all_threads])
+
+
+def test_parser_matches_legacy_regex_path():
+    info = ANRAnalyzer()._parse_anr_info(TRACE)
+    assert info.anr_type == ANRType.INPUT_DISPATCHING
+    assert (info.process_name, info.pid, info.timestamp) == ('com.example.app', '4321', '2024-03-05 12:34:56.789')
+    assert info.main_thread is info.all_threads[0]
+    assert info.timeout_info == {'is_foreground': True, 'timeout_threshold': 5000, 'wait_time': 5001}
+    assert _summary(info)[6] == LEGACY_THREADS
+    assert list(info.all_threads[0].backtrace) == [
+        'com.example.app.Store.save(Store.java:88)',
+        '- waiting to lock <0x0a1b2c3d> (a java.lang.Object) held by thread 12',
+        'com.example.app.MainActivity.onClick(MainActivity.kt:41)',
+        'android.os.Handler.dispatchMessage(Handler.java:106)',
+        'android.app.ActivityThread.main(ActivityThread.java:7839)',
+    ]
+    # 備用格式的標頭：堆疊收集到下一個線程開頭為止
+    assert list(info.all_threads[3].backtrace) == [
+        'java.lang.Thread.sleep(Native Method)', 'com.example.app.Poller.run(Poller.java:33)',
+    ]
+
+
+def test_parser_result_independent_of_block_size(monkeypatch):
+    analyzer = ANRAnalyzer()
+    expected = _summary(ANRTraceParser(analyzer).parse(io.StringIO(TRACE)))
+    monkeypatch.setattr(ANRTraceParser, 'BLOCK_SIZE', 64)
+    parser = ANRTraceParser(analyzer)
+    assert _summary(parser.parse(io.StringIO(TRACE))) == expected
+    assert parser.content == TRACE
+
+
+def _scanner(blocks):
+    scanner = FirstMatchScanner()
+    for block in blocks:
+        scanner.feed(block)
+    return scanner
+
+
+def _split_lines(text, lines_per_block):
+    lines = text.splitlines(keepends=True)
+    return [''.join(lines[i:i + lines_per_block]) for i in range(0, len(lines), lines_per_block)]
+
+
+@pytest.mark.parametrize('lines_per_block', [1, 3, 7, 1000])
+@pytest.mark.parametrize('pattern, flags', [
+    (r'Cmd line:\s*(\S+)', 0),
+    (r'held by tid=(\d+) in process (\d+)', 0),
+    (r'TOTAL:\s*(\d+)% user', 0),
+    (r'Free memory:\s*(\d+)', re.IGNORECASE),
+    (r'^"(\S+)" prio=\d+ tid=(\d+)', re.MULTILINE),
+    # 跨越相鄰兩行的符合（由區塊間重疊的前一行處理）
+    (r'Total memory: \d+ kB\nFree memory: (\d+)', 0),
+    (r'no such line', 0),
+])
+def test_first_match_scanner_matches_whole_content_search(lines_per_block, pattern, flags):
+    scanner = _scanner(_split_lines(TRACE, lines_per_block))
+    expected = re.search(pattern, TRACE, flags)
+    match = scanner.search(pattern, flags)
+    assert (match and match.groups()) == (expected and expected.groups())
+    assert scanner.search(re.compile(pattern, flags)) is scanner.search(re.compile(pattern, flags))
+
+
+@pytest.mark.parametrize('lines_per_block', [1, 4, 1000])
+def test_first_match_scanner_contains(lines_per_block):
+    scanner = _scanner(_split_lines(TRACE, lines_per_block))
+    for text in ('Input dispatching timed out', 'ContentProvider', 'DALVIK THREADS', 'nope'):
+        assert scanner.contains(text) == (text in TRACE)
+        assert scanner.contains_lower(text.lower()) == (text.lower() in TRACE.lower())
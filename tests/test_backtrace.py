@@ -0,0 +1,112 @@
+import copy
+import pickle
+import threading
+
+import pytest
+
+from vp_analyze_logs_base import Backtrace, FrameTable, ThreadInfo, ThreadState, frame_table_scope
+
+FRAMES = [
+    'android.os.MessageQueue.nativePollOnce(Native Method)',
+    'android.os.MessageQueue.next(MessageQueue.java:335)',
+    'android.os.Looper.loop(Looper.java:193)',
+    '- waiting to lock <0x0a1b2c3d> (a java.lang.Object) held by thread 12',
+]
+
+
+def test_behaves_like_list():
+    backtrace = Backtrace(FRAMES)
+    expected = list(FRAMES)
+    assert backtrace == expected and backtrace == tuple(expected)
+    assert len(backtrace) == 4 and bool(Backtrace()) is False
+    assert backtrace[0] == expected[0] and backtrace[-1] == expected[-1]
+    assert backtrace[1:3] == expected[1:3] and isinstance(backtrace[1:3], list)
+    assert backtrace[::-1] == expected[::-1]
+    assert list(reversed(backtrace)) == list(reversed(expected))
+    assert FRAMES[2] in backtrace and 'missing' not in backtrace
+    assert backtrace.index(FRAMES[2]) == 2 and backtrace.count(FRAMES[0]) == 1
+    with pytest.raises(IndexError):
+        backtrace[10]
+
+    # 修改操作與 list 相同
+    for target in (backtrace, expected):
+        target.append('a')
+        target.insert(0, 'b')
+        target[1] = 'c'
+        target[2:4] = ['d', 'e', 'f']
+        del target[-1]
+        target.extend(['g', 'h'])
+        target.remove('g')
+        target += ['i']
+    assert backtrace.pop() == expected.pop()
+    assert backtrace == expected
+    assert repr(backtrace) == f'Backtrace({expected!r})'
+    assert backtrace != expected + ['extra']
+    assert backtrace.__eq__(42) is NotImplemented
+    with pytest.raises(TypeError):
+        hash(backtrace)
+
+
+def test_frames_shared_within_scope():
+    with frame_table_scope() as table:
+        first = Backtrace(FRAMES)
+        second = Backtrace(FRAMES[:2])
+        assert first.table is second.table is table
+        assert list(second.frame_ids) == list(first.frame_ids[:2])
+        assert len(table) == len(FRAMES)
+
+    # 範圍外每個 Backtrace 使用獨立的表格；範圍結束後原本的 id 仍然有效
+    outside = Backtrace(FRAMES)
+    assert outside.table is not table
+    assert first == outside and first[0] == FRAMES[0]
+
+
+def test_from_ids_and_cross_table_equality():
+    table = FrameTable()
+    ids = [table.intern(frame) for frame in FRAMES]
+    assert table.intern(FRAMES[0]) == ids[0] and table.lookup('missing') is None
+    backtrace = Backtrace.from_ids(ids, table)
+    assert backtrace == FRAMES and backtrace == Backtrace(FRAMES)
+
+
+def test_concurrent_scopes_are_separate():
+    tables = {}
+
+    def run(name):
+        with frame_table_scope() as table:
+            Backtrace(FRAMES[:2] if name == 'a' else FRAMES)
+            tables[name] = table
+
+    workers = [threading.Thread(target=run, args=(name,)) for name in 'ab']
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert tables['a'] is not tables['b']
+    assert (len(tables['a']), len(tables['b'])) == (2, 4)
+
+
+def test_pickle_reinterns_into_receiving_scope():
+    with frame_table_scope():
+        backtrace = Backtrace(FRAMES)
+        data = pickle.dumps(backtrace)
+
+    with frame_table_scope() as table:
+        table.intern('unrelated frame')
+        restored = pickle.loads(data)
+        assert restored.table is table
+        assert restored == FRAMES
+        assert list(restored.frame_ids) == [1, 2, 3, 4]
+
+
+def test_thread_info_converts_and_pickles():
+    thread = ThreadInfo(name='main', tid='1', prio='5', state=ThreadState.BLOCKED, backtrace=list(FRAMES),
+                        held_locks=['0x1'], sysTid='4321')
+    assert isinstance(thread.backtrace, Backtrace) and thread.backtrace == FRAMES
+    assert not hasattr(thread, '__dict__')
+    assert isinstance(ThreadInfo(name='t', tid='2').backtrace, Backtrace)
+
+    for restored in (pickle.loads(pickle.dumps(thread)), copy.deepcopy(thread)):
+        assert restored == thread
+        assert isinstance(restored.backtrace, Backtrace)
+        assert (restored.state, restored.held_locks, restored.sysTid) == (ThreadState.BLOCKED, ['0x1'], '4321')
@@ -0,0 +1,133 @@
+import json
+import os
+
+import pytest
+
+from vp_analyze_logs import LogAnalyzerSystem
+from vp_analyze_logs_ext import CrashSignatureIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = CrashSignatureIndex(str(tmp_path))
+    yield idx
+    idx.close()
+
+
+def test_lookup_unknown_signature(index):
+    assert index.lookup('anr', 'sig') is None
+
+
+def test_record_first_and_repeat(index):
+    first = index.record('anr', 'sig', 'r1', 'a/anr_1', seen_at='2024-01-01T00:00:00')
+    assert first == {'seen_before': False, 'first_seen': '2024-01-01T00:00:00',
+                     'count': 1, 'first_report': 'a/anr_1'}
+
+    second = index.record('anr', 'sig', 'r2', 'b/anr_2', seen_at='2024-01-02T00:00:00')
+    assert second['seen_before'] is True
+    assert second['count'] == 2
+    assert second['first_seen'] == '2024-01-01T00:00:00'
+    assert second['first_report'] == 'a/anr_1'
+
+    history = index.lookup('anr', 'sig')
+    assert history['count'] == 2
+    assert history['last_seen'] == '2024-01-02T00:00:00'
+    assert history['first_report_key'] == 'r1'
+
+
+def test_same_report_not_counted_twice(index):
+    index.record('tombstone', 'sig', 'r1', 'a')
+    again = index.record('tombstone', 'sig', 'r1', 'a')
+    # 同一份報告重新分析時視為見過，但不重複計數
+    assert again['seen_before'] is True
+    assert again['count'] == 1
+
+
+def test_kinds_are_separate(index):
+    index.record('anr', 'sig', 'r1')
+    assert index.lookup('tombstone', 'sig') is None
+
+
+def test_persists_across_reopen(tmp_path):
+    index = CrashSignatureIndex(str(tmp_path))
+    index.record('anr', 'sig', 'r1', 'a', seen_at='2024-01-01T00:00:00')
+    index.close()
+
+    reopened = CrashSignatureIndex(str(tmp_path))
+    try:
+        result = reopened.record('anr', 'sig', 'r2', 'b')
+        assert result['seen_before'] is True
+        assert result['count'] == 2
+        assert result['first_seen'] == '2024-01-01T00:00:00'
+    finally:
+        reopened.close()
+
+
+def test_default_data_dir_env(monkeypatch, tmp_path):
+    monkeypatch.setenv('ANR_SIGNATURE_DB_DIR', str(tmp_path))
+    assert CrashSignatureIndex.default_data_dir() == str(tmp_path)
+
+
+def test_merge_writes_history_into_record_file(tmp_path):
+    system = LogAnalyzerSystem(str(tmp_path / 'in'), str(tmp_path / 'out'),
+                               signature_db_dir=str(tmp_path / 'db'), use_result_cache=False)
+    system._open_signature_index()
+    try:
+        index_data = {}
+        for name in ('anr_1', 'anr_2'):
+            record_file = str(tmp_path / f'{name}.analyzed.json')
+            system._merge_file_result({
+                'rel_path': os.path.join('anr', name),
+                'type': 'anr',
+                'output_file': str(tmp_path / f'{name}.analyzed.html'),
+                'original_copy': str(tmp_path / name),
+                'record': {'type': 'anr', 'stack_signature': 'sig', 'source_digest': name,
+                           'source_rel_path': os.path.join('anr', name)},
+                'record_file': record_file,
+            }, index_data)
+            with open(record_file, encoding='utf-8') as f:
+                saved = json.load(f)
+            assert saved['history']['count'] == (1 if name == 'anr_1' else 2)
+            assert saved['history']['seen_before'] is (name == 'anr_2')
+    finally:
+        system._close_signature_index()
+
+    assert system.stats['signatures_new'] == 1
+    assert system.stats['signatures_seen'] == 1
+
+
+def test_index_payload_carries_history(tmp_path):
+    system = LogAnalyzerSystem(str(tmp_path), str(tmp_path / 'out'), use_signature_db=False, use_result_cache=False)
+    report_path = str(tmp_path / 'out' / 'anr' / 'anr_1.analyzed.html')
+    index_data = {'anr': {'anr_1.analyzed.html': {'analyzed_file': report_path,
+                                                  'original_file': str(tmp_path / 'out' / 'anr' / 'anr_1')}}}
+    groups = [{'group_id': 1, 'title': 't', 'count': 1, 'similarity': 100.0,
+               'reports': [{'type': 'anr', 'path': report_path, 'filename': 'anr_1.analyzed.html'}]}]
+    history = {'seen_before': True, 'first_seen': '2024-01-01T00:00:00', 'count': 3}
+
+    payload = system._build_index_payload(index_data, groups, {report_path: history})
+    expected = {'b': 1, 'f': '2024-01-01T00:00:00', 'c': 3}
+    assert payload['tree'][1]['h'] == expected
+    assert payload['reports'][0]['h'] == expected
+
+    payload = system._build_index_payload(index_data, groups)
+    assert 'h' not in payload['tree'][1]
+
+
+def test_no_data_dir_disables_signature_index(monkeypatch, tmp_path):
+    monkeypatch.delenv('ANR_SIGNATURE_DB_DIR', raising=False)
+    assert CrashSignatureIndex.default_data_dir() is None
+    with pytest.raises(ValueError):
+        CrashSignatureIndex()
+
+    system = LogAnalyzerSystem(str(tmp_path), str(tmp_path / 'out'), use_result_cache=False)
+    system._open_signature_index()
+    assert system.signature_index is None
+
+    system = LogAnalyzerSystem(str(tmp_path), str(tmp_path / 'out'), data_dir=str(tmp_path / 'data'),
+                               use_result_cache=False)
+    system._open_signature_index()
+    try:
+        assert system.signature_index.db_path == str(tmp_path / 'data' / CrashSignatureIndex.DB_FILENAME)
+    finally:
+        system._close_signature_index()
@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+import file_placement
+from file_placement import (
+    PLACEMENT_AUTO, PLACEMENT_COPY, PLACEMENT_HARDLINK, PLACEMENT_REFERENCE, PLACEMENT_REFLINK, place_file,
+)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'in' / 'anr_1'
+    path.parent.mkdir()
+    path.write_text('trace')
+    (tmp_path / 'out').mkdir()
+    return str(path)
+
+
+@pytest.fixture
+def attempts(monkeypatch):
+    """記錄嘗試順序，並讓指定的方式失敗"""
+    calls = []
+    failing = set()
+
+    def wrap(method, placer):
+        def placer_wrapper(source_path, tmp_path):
+            calls.append(method)
+            if method in failing:
+                raise OSError(f"{method} 不可用")
+            placer(source_path, tmp_path)
+        return placer_wrapper
+
+    for method, placer in list(file_placement._PLACERS.items()):
+        monkeypatch.setitem(file_placement._PLACERS, method, wrap(method, placer))
+    return calls, failing
+
+
+def test_unknown_mode(source, tmp_path):
+    with pytest.raises(ValueError):
+        place_file(source, str(tmp_path / 'out' / 'anr_1'), 'move')
+
+
+def test_auto_prefers_hardlink(source, tmp_path, attempts):
+    calls, _ = attempts
+    dest = str(tmp_path / 'out' / 'anr_1')
+    assert place_file(source, dest) == PLACEMENT_HARDLINK
+    assert calls == [PLACEMENT_HARDLINK]
+    assert os.path.samefile(source, dest)
+
+
+def test_auto_fallback_order(source, tmp_path, attempts):
+    calls, failing = attempts
+    failing.update({PLACEMENT_HARDLINK, PLACEMENT_REFLINK})
+    dest = str(tmp_path / 'out' / 'anr_1')
+    assert place_file(source, dest, PLACEMENT_AUTO) == PLACEMENT_COPY
+    # auto 不使用符號連結：輸入資料夾刪除後仍可開啟
+    assert calls == [PLACEMENT_HARDLINK, PLACEMENT_REFLINK, PLACEMENT_COPY]
+    assert not os.path.islink(dest)
+    assert not os.path.samefile(source, dest)
+    assert sorted(os.listdir(str(tmp_path / 'out'))) == ['anr_1']
+
+
+def test_explicit_reference(source, tmp_path, attempts):
+    calls, _ = attempts
+    dest = str(tmp_path / 'out' / 'anr_1')
+    assert place_file(source, dest, PLACEMENT_REFERENCE) == PLACEMENT_REFERENCE
+    assert calls == [PLACEMENT_REFERENCE]
+    # 相對路徑的符號連結
+    assert os.readlink(dest) == os.path.join('..', 'in', 'anr_1')
+    with open(dest) as f:
+        assert f.read() == 'trace'
+
+
+def test_explicit_mode_falls_back_to_copy_only(source, tmp_path, attempts):
+    calls, failing = attempts
+    failing.add(PLACEMENT_REFLINK)
+    dest = str(tmp_path / 'out' / 'anr_1')
+    assert place_file(source, dest, PLACEMENT_REFLINK) == PLACEMENT_COPY
+    assert calls == [PLACEMENT_REFLINK, PLACEMENT_COPY]
+
+
+def test_all_methods_fail(source, tmp_path, attempts):
+    _, failing = attempts
+    failing.update({PLACEMENT_HARDLINK, PLACEMENT_COPY})
+    dest = str(tmp_path / 'out' / 'anr_1')
+    with pytest.raises(OSError):
+        place_file(source, dest, PLACEMENT_HARDLINK)
+    # 暫存檔已清除
+    assert os.listdir(str(tmp_path / 'out')) == []
+
+
+def test_existing_link_is_kept(source, tmp_path, attempts):
+    calls, _ = attempts
+    dest = str(tmp_path / 'out' / 'anr_1')
+    place_file(source, dest, PLACEMENT_HARDLINK)
+    assert place_file(source, dest) == 'existing'
+    assert calls == [PLACEMENT_HARDLINK]
+
+
+def test_copy_replaces_existing(source, tmp_path):
+    dest = tmp_path / 'out' / 'anr_1'
+    dest.write_text('old report')
+    assert place_file(source, str(dest), PLACEMENT_COPY) == PLACEMENT_COPY
+    assert dest.read_text() == 'trace'
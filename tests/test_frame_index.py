@@ -0,0 +1,95 @@
+from vp_analyze_logs import LogAnalyzerSystem
+from vp_analyze_logs_ext import (FrameIndex, FrameSymbolTable, analysis_frame_scope, current_frame_symbols,
+                                 frame_symbols_scope)
+
+MAIN = [
+    'at android.os.MessageQueue.nativePollOnce(Native Method)',
+    '- waiting to lock <0x0a1b2c3d> (a java.lang.Object)',
+    'at android.os.Looper.loop(Looper.java:193)',
+]
+NATIVE = ['#00 pc 000000000009b1a4  /apex/com.android.runtime/lib64/bionic/libc.so (__ioctl+4)']
+
+
+def test_normalize_frame():
+    assert FrameSymbolTable.normalize_frame(MAIN[0]) == 'android.os.MessageQueue.nativePollOnce'
+    assert FrameSymbolTable.normalize_frame(MAIN[1]) is None
+    assert FrameSymbolTable.normalize_frame(NATIVE[0]) == 'libc.so!__ioctl'
+
+
+def test_index_uses_scope_symbols():
+    with analysis_frame_scope():
+        symbols = current_frame_symbols()
+        assert FrameIndex().symbols is symbols
+        assert current_frame_symbols() is symbols
+
+    # 範圍外每次取得獨立的符號表，正規化與衍生特徵的快取不會跨分析保留
+    assert current_frame_symbols() is not symbols
+    assert FrameIndex().symbols is not FrameIndex().symbols
+
+
+def test_explicit_empty_symbol_table_is_kept():
+    # 空的符號表 (len == 0) 也要直接使用，不能被當成未指定
+    symbols = FrameSymbolTable()
+    with frame_symbols_scope():
+        assert FrameIndex(symbols).symbols is symbols
+
+
+def test_nested_scopes_restore_outer_table():
+    with frame_symbols_scope() as outer:
+        with frame_symbols_scope() as inner:
+            assert current_frame_symbols() is inner
+        assert current_frame_symbols() is outer
+
+
+def test_add_replace_remove_and_postings():
+    index = FrameIndex(FrameSymbolTable())
+    ids = index.add('r1', 'main', MAIN)
+    assert [index.symbols.frame(frame_id) for frame_id in ids] == [
+        'android.os.MessageQueue.nativePollOnce', 'android.os.Looper.loop',
+    ]
+    assert index.add('r2', 'main', ['android.os.Looper.loop'], normalized=True) == ids[1:]
+    index.add('r2', 'binder', NATIVE)
+
+    poll, loop = ids
+    assert index.reports_with(loop) == {'r1', 'r2'}
+    assert index.threads_with(loop) == {'r1': {'main'}, 'r2': {'main'}}
+    assert index.common_frames([('r1', 'main'), ('r2', 'main')]) == [loop]
+    assert index.frame_set('r1', 'main') == frozenset(ids)
+    assert 'r2' in index and len(index) == 2
+
+    # 同一個 (報告, 線程) 重新加入時取代舊的內容
+    index.add('r1', 'main', MAIN[2:])
+    assert index.reports_with(poll) == set()
+    assert index.stack('r1', 'main') == (loop,)
+
+    index.remove('r2')
+    assert 'r2' not in index and index.reports_with(loop) == {'r1'}
+    assert index.stack('r2', 'binder') is None and index.frame_set('r2', 'main') is None
+
+
+def test_derive_is_memoized_per_table():
+    calls = []
+
+    def build(text):
+        calls.append(text)
+        return len(text)
+
+    symbols = FrameSymbolTable()
+    assert symbols.derive('kind', 'abc', build) == 3
+    assert symbols.derive('kind', 'abc', build) == 3
+    assert FrameSymbolTable().derive('kind', 'abc', build) == 3
+    assert calls == ['abc', 'abc']
+
+
+def test_system_rebuilds_frame_index_per_index_generation(tmp_path):
+    system = LogAnalyzerSystem(str(tmp_path / 'in'), str(tmp_path / 'out'), use_signature_db=False,
+                               use_result_cache=False, incremental_index=False)
+    (tmp_path / 'out').mkdir()
+    with analysis_frame_scope():
+        system._index_report_frames({'type': 'anr', 'path': '/out/anr_1.analyzed.html',
+                                     'cluster_features': {'main_stack': ['android.os.Looper.loop']}})
+        first = system.frame_index
+        assert '/out/anr_1.analyzed.html' in first
+        system._generate_index({})
+        assert system.frame_index is not first
+        assert len(system.frame_index) == 0
@@ -0,0 +1,93 @@
+import shutil
+
+import pytest
+
+from routes.grep_analyzer import AndroidLogAnalyzer
+
+ANR = """----- pid {pid} at 2024-01-0{day} 10:00:00 -----
+Cmd line: {process}
+Subject: Input dispatching timed out ({process})
+"""
+TOMBSTONE = """Build fingerprint: 'google/sdk/generic:11/RSR1/123:user/release-keys'
+Timestamp: 2024-01-0{day} 11:00:00
+pid: {pid}, tid: {pid}, name: main  >>> {process} <<<
+Cmd line: {process}
+"""
+
+# 掃描結果中與執行時間有關的欄位
+TIMING_KEYS = ('analysis_time', 'search_time')
+
+
+# 檔案類型依完整路徑是否含 anr 判定，測試名稱（tmp_path 的一部分）不可含 anr
+@pytest.fixture
+def log_tree(tmp_path):
+    files = {
+        'dev1/anr/anr_1': ANR.format(pid=100, day=1, process='com.example.app'),
+        'dev1/anr/anr_2': ANR.format(pid=101, day=2, process='com.example.app'),
+        'dev1/anr/notes.txt': 'no subject here\n',
+        'dev1/tombstones/tombstone_01': TOMBSTONE.format(pid=200, day=1, process='/system/bin/surfaceflinger'),
+        'dev2/anr/anr_3': ANR.format(pid=102, day=3, process='com.android.systemui'),
+        # 路徑含 anr 的 tombstone 資料夾：檔案類型判定為 ANR
+        'dev2/anr_dump/tombstones/tombstone_02': TOMBSTONE.format(pid=201, day=2, process='com.example.app'),
+    }
+    for rel_path, content in files.items():
+        path = tmp_path / 'logs' / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return str(tmp_path / 'logs')
+
+
+def _scan(path, scan_workers, use_grep):
+    analyzer = AndroidLogAnalyzer(scan_workers=scan_workers)
+    analyzer.use_grep = use_grep
+    result = analyzer.analyze_logs(path)
+    for key in TIMING_KEYS:
+        result.pop(key)
+    for folder in result['folder_scan_times']:
+        folder.pop('seconds')
+    return result
+
+
+@pytest.mark.parametrize('use_grep', [
+    pytest.param(True, marks=pytest.mark.skipif(not shutil.which('grep'), reason='需要 grep')),
+    False,
+])
+def test_serial_and_concurrent_scans_match(log_tree, use_grep):
+    serial = _scan(log_tree, 1, use_grep)
+    concurrent = _scan(log_tree, 4, use_grep)
+    assert concurrent == serial
+    assert serial['files_with_cmdline'] == 5
+    assert serial['anr_folders'] == 2
+    assert serial['tombstone_folders'] == 2
+
+
+@pytest.mark.parametrize('use_grep, expected', [
+    pytest.param(True, 3, marks=pytest.mark.skipif(not shutil.which('grep'), reason='需要 grep')),
+    # 沒有 grep 時 tombstone 資料夾中的 ANR 類型檔案也計入（原有統計方式）
+    (False, 4),
+])
+def test_subject_count_rule(log_tree, use_grep, expected):
+    for scan_workers in (1, 4):
+        assert _scan(log_tree, scan_workers, use_grep)['anr_subject_count'] == expected
+
+
+@pytest.mark.parametrize('use_grep', [
+    pytest.param(True, marks=pytest.mark.skipif(not shutil.which('grep'), reason='需要 grep')),
+    False,
+])
+def test_crlf_lines_do_not_leak_carriage_return(tmp_path, use_grep):
+    folder = tmp_path / 'logs' / 'dev1'
+    (folder / 'anr').mkdir(parents=True)
+    (folder / 'tombstones').mkdir()
+    # Subject 中沒有進程名稱時改從 Cmd line: 取得
+    (folder / 'anr' / 'anr_1').write_bytes(
+        b'----- pid 100 at 2024-01-01 10:00:00 -----\r\nSubject: Input dispatching timed out\r\n'
+        b'Cmd line: com.example.app\r\n')
+    (folder / 'tombstones' / 'tombstone_01').write_bytes(TOMBSTONE.format(
+        day=1, pid=200, process='/system/bin/surfaceflinger').replace('\n', '\r\n').encode())
+
+    logs = {log['filename']: log for log in _scan(str(tmp_path / 'logs'), 1, use_grep)['logs']}
+    assert logs['anr_1']['process'] == 'com.example.app'
+    assert logs['anr_1']['cmdline'] == 'Input dispatching timed out'
+    assert logs['tombstone_01']['cmdline'] == '/system/bin/surfaceflinger'
+    assert logs['tombstone_01']['timestamp'] == '2024-01-01 11:00:00'
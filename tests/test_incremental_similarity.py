@@ -0,0 +1,69 @@
+import pytest
+
+from vp_analyze_logs import LogAnalyzerSystem
+
+
+def _report(report_type, name, key):
+    return {'type': report_type, 'filename': f'{name}.analyzed.html', 'path': f'/out/{report_type}/{name}.analyzed.html',
+            'key': key}
+
+
+def _similarity(a, b):
+    # 相鄰的 key 視為相似，可形成跨多份報告的連通分量
+    return 100.0 if abs(a['key'] - b['key']) <= 1 else 0.0
+
+
+@pytest.fixture
+def system(tmp_path, monkeypatch):
+    system = LogAnalyzerSystem(str(tmp_path), str(tmp_path / 'out'), use_signature_db=False, use_result_cache=False)
+    monkeypatch.setattr(system, '_calculate_tombstone_pair_similarity', _similarity)
+    monkeypatch.setattr(system, '_calculate_anr_pair_similarity', _similarity)
+    monkeypatch.setattr(system, '_create_similarity_group', lambda reports, group_id: {
+        'group_id': group_id, 'title': reports[0]['filename'], 'count': len(reports), 'reports': reports,
+    })
+    return system
+
+
+def _state(groups):
+    """與 _save_index_state 相同格式的群組狀態"""
+    return {'groups': [{
+        'type': group['reports'][0]['type'],
+        'members': [report['path'] for report in group['reports']],
+        'summary': {key: value for key, value in group.items() if key not in ('reports', 'group_id')},
+    } for group in groups]}
+
+
+def _membership(groups):
+    return [(group['group_id'], [report['path'] for report in group['reports']]) for group in groups]
+
+
+def test_incremental_matches_full_rebuild(system):
+    # 上一次: tombstone {t00, t01} {t02, t03} {t04} {t05}，ANR {a00} {a01} {a02, a03}
+    previous = [_report('tombstone', f't{i:02d}', key) for i, key in enumerate([0, 1, 3, 4, 9, 20])]
+    previous += [_report('anr', f'a{i:02d}', key) for i, key in enumerate([0, 4, 6, 7])]
+    state = _state(system._analyze_similarity(previous))
+
+    # 刪除 t05；t03 變更後併入 {t04}；新增的 t06 連接 {t00, t01} 與 t02，a04 連接兩個沿用的 ANR 群組
+    current = [dict(report) for report in previous if report['filename'] != 't05.analyzed.html']
+    changed_report = next(report for report in current if report['filename'] == 't03.analyzed.html')
+    changed_report['key'] = 8
+    current += [_report('tombstone', 't06', 2), _report('anr', 'a04', 5)]
+    changed = {changed_report['path'], current[-2]['path'], current[-1]['path']}
+
+    incremental = system._update_similarity_groups(current, state, changed)
+    full = system._analyze_similarity(current)
+    assert _membership(incremental) == _membership(full)
+    assert [[report['filename'][:3] for report in group['reports']] for group in incremental] == [
+        ['t00', 't01', 't02', 't06'], ['t03', 't04'], ['a01', 'a02', 'a03', 'a04'], ['a00'],
+    ]
+
+
+def test_incremental_reuses_unchanged_groups(system):
+    reports = [_report('anr', f'a{i:02d}', key) for i, key in enumerate([0, 1, 5])]
+    groups = system._analyze_similarity(reports)
+    state = _state(groups)
+    state['groups'][0]['summary']['title'] = 'cached'
+
+    incremental = system._update_similarity_groups(reports, state, set())
+    assert _membership(incremental) == _membership(groups)
+    assert incremental[0]['title'] == 'cached'
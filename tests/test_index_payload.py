@@ -0,0 +1,97 @@
+import json
+import os
+
+import pytest
+
+import vp_analyze_logs
+from vp_analyze_logs import INDEX_DATA_DIR, LogAnalyzerSystem
+
+
+@pytest.fixture
+def system(tmp_path):
+    return LogAnalyzerSystem(str(tmp_path / 'in'), str(tmp_path / 'out'), use_signature_db=False,
+                             use_result_cache=False)
+
+
+def _file_node(system, rel_path):
+    report = os.path.join(system.output_folder, rel_path + '.analyzed.html')
+    return {'analyzed_file': report, 'original_file': os.path.join(system.output_folder, rel_path)}
+
+
+def _read_chunk(system, chunk):
+    """loadIndexChunk(kind, offset, items); -> (kind, offset, items)"""
+    with open(os.path.join(system.output_folder, chunk['file']), encoding='utf-8') as f:
+        content = f.read()
+    assert content.startswith('loadIndexChunk(') and content.endswith(');\n')
+    return json.loads('[' + content[len('loadIndexChunk('):-len(');\n')] + ']')
+
+
+def test_tree_is_depth_first_with_subtree_ends(system):
+    index_data = {
+        'set2': {'anr': {'anr_2': _file_node(system, 'set2/anr/anr_2')}},
+        'set1': {
+            'tombstones': {'tombstone_01': _file_node(system, 'set1/tombstones/tombstone_01')},
+            'anr': {'anr_1': _file_node(system, 'set1/anr/anr_1'), 'anr_0': _file_node(system, 'set1/anr/anr_0')},
+        },
+    }
+    tree = system._build_index_payload(index_data, None)['tree']
+
+    assert [(node['t'], node['d'], node['n']) for node in tree] == [
+        ('d', 0, 'set1'), ('d', 1, 'anr'), ('f', 2, 'anr_0'), ('f', 2, 'anr_1'),
+        ('d', 1, 'tombstones'), ('f', 2, 'tombstone_01'),
+        ('d', 0, 'set2'), ('d', 1, 'anr'), ('f', 2, 'anr_2'),
+    ]
+    folders = {(idx, node['n']): (node['c'], node['e']) for idx, node in enumerate(tree) if node['t'] == 'd'}
+    assert folders == {(0, 'set1'): (3, 6), (1, 'anr'): (2, 4), (4, 'tombstones'): (1, 6),
+                       (6, 'set2'): (1, 9), (7, 'anr'): (1, 9)}
+    assert [node['k'] for node in tree if node['t'] == 'f'] == ['anr', 'anr', 'tombstone', 'anr']
+
+
+def test_groups_reference_reports_by_index(system):
+    def group(group_id, names):
+        return {'group_id': group_id, 'title': group_id, 'count': len(names), 'similarity': 87.5,
+                'reports': [{'type': 'anr', 'filename': name, 'path': f'/out/anr/{name}', 'process_name': 'p'}
+                            for name in names]}
+
+    payload = system._build_index_payload({}, [group('g0', ['a', 'b']), group('g1', ['c'])])
+    assert [report['n'] for report in payload['reports']] == ['a', 'b', 'c']
+    assert [(g['id'], g['reports'], g['similarity'], g['processes']) for g in payload['groups']] == [
+        ('g0', [0, 1], '88', ['p']), ('g1', [2], '88', ['p']),
+    ]
+
+
+def test_write_index_data_chunks(system, monkeypatch):
+    monkeypatch.setattr(vp_analyze_logs, 'INDEX_CHUNK_SIZE', 2)
+    payload = {'tree': [{'n': i} for i in range(5)], 'reports': [{'n': 'r'}], 'groups': []}
+
+    manifest = system._write_index_data(payload)
+    assert manifest['root'] == os.path.abspath(system.output_folder)
+    assert manifest['counts'] == {'tree': 5, 'reports': 1, 'groups': 0}
+    assert [chunk['file'] for chunk in manifest['chunks']] == [
+        f'{INDEX_DATA_DIR}/tree-0000.js', f'{INDEX_DATA_DIR}/tree-0001.js', f'{INDEX_DATA_DIR}/tree-0002.js',
+        f'{INDEX_DATA_DIR}/reports-0000.js',
+    ]
+    assert [_read_chunk(system, chunk) for chunk in manifest['chunks']] == [
+        ['tree', 0, [{'n': 0}, {'n': 1}]], ['tree', 2, [{'n': 2}, {'n': 3}]], ['tree', 4, [{'n': 4}]],
+        ['reports', 0, [{'n': 'r'}]],
+    ]
+
+
+def test_write_index_data_rewrites_only_changed_chunks(system, monkeypatch):
+    monkeypatch.setattr(vp_analyze_logs, 'INDEX_CHUNK_SIZE', 2)
+    payload = {'tree': [{'n': i} for i in range(5)], 'reports': [], 'groups': []}
+    first = system._write_index_data(payload)
+    data_dir = os.path.join(system.output_folder, INDEX_DATA_DIR)
+    for name in os.listdir(data_dir):
+        os.utime(os.path.join(data_dir, name), (0, 0))
+
+    # 只改第二個分塊，並移除最後一個分塊
+    payload['tree'] = payload['tree'][:4]
+    payload['tree'][2] = {'n': 'changed'}
+    second = system._write_index_data(payload)
+
+    assert sorted(os.listdir(data_dir)) == ['tree-0000.js', 'tree-0001.js']
+    assert os.path.getmtime(os.path.join(data_dir, 'tree-0000.js')) == 0
+    assert os.path.getmtime(os.path.join(data_dir, 'tree-0001.js')) != 0
+    assert second['chunks'][0] == first['chunks'][0]
+    assert second['chunks'][1]['digest'] != first['chunks'][1]['digest']
@@ -0,0 +1,95 @@
+import pytest
+
+from vp_analyze_logs_base import MemoryMap
+
+TOMBSTONE_MAPS = [
+    "    00000070'00001000-00000070'00001fff r--         0      1000  /system/lib64/libc.so (BuildId: ab12cd)",
+    "    00000070'00002000-00000070'00004fff r-x      1000      3000  /system/lib64/libc.so (BuildId: ab12cd)",
+    "--->00000070'00005000-00000070'00005fff rw-      4000      1000  /system/lib64/libc.so",
+    "    00000070'00010000-00000070'00010fff rw-         0      1000  [anon:scudo]",
+    "not a map line",
+]
+
+
+@pytest.fixture
+def memory_map():
+    # 打亂順序：解析後依起始位址排序，lines 保留原始順序
+    return MemoryMap.parse(reversed(TOMBSTONE_MAPS))
+
+
+def test_parse_tombstone_lines(memory_map):
+    assert len(memory_map) == 4
+    assert [region.start for region in memory_map] == sorted(region.start for region in memory_map)
+    assert memory_map.lines[0].startswith("00000070'00010000")
+
+    region = memory_map.lookup('0x7000002100')
+    assert (region.start, region.end) == (0x7000002000, 0x7000004fff)
+    assert region.perms == 'r-x'
+    assert region.offset == 0x1000
+    assert region.path == '/system/lib64/libc.so'
+    assert region.build_id == 'ab12cd'
+
+    assert memory_map.lookup(0x7000005000).line.startswith('--->')
+    assert memory_map.lookup(0x7000010000).path == '[anon:scudo]'
+
+
+def test_parse_proc_maps_line():
+    start, end, perms, offset, path, build_id, _ = MemoryMap.parse_line(
+        '7f000000-7f001000 r-xp 00002000 fd:01 12345 /system/lib/libfoo.so'
+    )
+    assert (start, end, perms, offset, path, build_id) == (
+        0x7f000000, 0x7f001000, 'r-xp', 0x2000, '/system/lib/libfoo.so', ''
+    )
+    assert MemoryMap.parse_line('7f000000-7f001000 ---p 00000000 00:00 0')[4] == ''
+    assert MemoryMap.parse_line('Cmd line: foo') is None
+
+
+@pytest.mark.parametrize('address, expected_start', [
+    (0x7000000fff, None),           # 第一個區域之前
+    (0x7000001000, 0x7000001000),   # 起始位址
+    (0x7000001fff, 0x7000001000),   # 結束位址（包含）
+    (0x7000002000, 0x7000002000),   # 下一個區域的起始位址
+    (0x7000004fff, 0x7000002000),
+    (0x7000006000, None),           # 區域之間的空隙
+    (0x700000ffff, None),
+    (0x7000010fff, 0x7000010000),   # 最後一個區域的結束位址
+    (0x7000011000, None),           # 最後一個區域之後
+])
+def test_lookup_boundaries(memory_map, address, expected_start):
+    region = memory_map.lookup(address)
+    assert (region.start if region else None) == expected_start
+    assert (memory_map.find(address) >= 0) == (expected_start is not None)
+
+
+def test_shared_boundary_prefers_earlier_region():
+    memory_map = MemoryMap.parse([
+        '1000-2000 r-xp 00000000 00:00 0 /a',
+        '2000-3000 r-xp 00000000 00:00 0 /b',
+    ])
+    assert memory_map.lookup(0x2000).path == '/a'
+    assert memory_map.lookup(0x2001).path == '/b'
+
+
+def test_lookup_address_formats(memory_map):
+    assert memory_map.lookup("00000070'00001010").start == 0x7000001000
+    assert memory_map.lookup('7000001010').start == 0x7000001000
+    assert memory_map.lookup('zz') is None
+
+
+def test_empty_map():
+    memory_map = MemoryMap.parse([])
+    assert len(memory_map) == 0
+    assert memory_map.find(0x1000) == -1
+    assert memory_map.lookup(0) is None
+
+
+def test_nearby(memory_map):
+    regions = memory_map.nearby(0x7000006000, 0x800)
+    assert [region.start for region in regions] == [0x7000005000]
+
+
+def test_absolute_pc(memory_map):
+    # 載入基址 = 第一個映射的起始位址 - offset
+    assert memory_map.absolute_pc('/system/lib64/libc.so', '0x1234') == 0x7000002234
+    assert memory_map.absolute_pc('/system/lib64/libm.so', '0x1234') is None
+    assert memory_map.absolute_pc('', '0x1234') is None
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from report_assets import ASSET_MODE_INLINE, ASSET_MODE_SHARED, ReportAssetStore, resolve_asset_path
+
+
+def test_inline_is_default(tmp_path):
+    store = ReportAssetStore(str(tmp_path))
+    assert store.mode == ASSET_MODE_INLINE
+    assert store.style_tag('report', 'body {}') == '<style>\nbody {}\n</style>'
+    assert not os.path.exists(store.assets_dir)
+
+
+def test_shared_tag_has_no_absolute_path(tmp_path):
+    store = ReportAssetStore(str(tmp_path / 'out'), ASSET_MODE_SHARED)
+    report_dir = str(tmp_path / 'out' / 'set1' / 'anr')
+    tag = store.script_tag('report', 'var a = 1;', report_dir)
+
+    assert str(tmp_path) not in tag
+    assert '"../../report_assets/report-' in tag
+    assert '</script>' not in tag[:-len('</script>')]
+    assert len(os.listdir(store.assets_dir)) == 1
+
+
+def test_resolve_asset_path(tmp_path):
+    report = str(tmp_path / 'out' / 'set1' / 'anr' / 'anr_1.analyzed.html')
+    expected = str(tmp_path / 'out' / 'report_assets' / 'report-abc.css')
+    assert resolve_asset_path(report, '../../report_assets/report-abc.css') == expected
+
+
+@pytest.mark.parametrize('asset', [
+    '../../report_assets/../secret.css',     # 不在 report_assets/ 下
+    '../../report_assets/report.html',       # 只接受 .css/.js
+    '../../other/report_assets/report.js',   # report_assets/ 不在報告的上層資料夾
+])
+def test_resolve_asset_path_rejects(tmp_path, asset):
+    report = str(tmp_path / 'out' / 'set1' / 'anr' / 'anr_1.analyzed.html')
+    assert resolve_asset_path(report, asset) is None
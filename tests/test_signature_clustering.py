@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from vp_analyze_logs_ext import SignatureClusteringEngine
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) * 100 if a | b else 0.0
+
+
+def _partition(labels):
+    """標籤 -> 成員集合（不依賴 DBSCAN 的標籤編號）"""
+    groups = {}
+    for idx, label in enumerate(labels):
+        groups.setdefault(label, set()).add(idx)
+    return sorted(map(frozenset, groups.values()), key=min)
+
+
+def _families(count, seed=7):
+    """三組各自共用大部分 token 的簽名，每個項目另有少量雜訊"""
+    rng = random.Random(seed)
+    bases = [{f"f{family}_{k}" for k in range(20)} for family in range(3)]
+    items = []
+    for idx in range(count):
+        tokens = set(bases[idx % 3])
+        tokens.discard(f"f{idx % 3}_{rng.randrange(20)}")
+        tokens.add(f"noise_{idx}")
+        items.append(frozenset(tokens))
+    return items
+
+
+def test_rejects_bands_that_do_not_divide_num_perm():
+    with pytest.raises(ValueError):
+        SignatureClusteringEngine(num_perm=64, bands=10)
+
+
+def test_empty_input():
+    engine = SignatureClusteringEngine()
+    assert len(engine.cluster([], set, _jaccard, 70)) == 0
+    assert engine.last_stats['mode'] == 'exact'
+
+
+def test_small_input_uses_exact_matrix():
+    engine = SignatureClusteringEngine()
+    items = _families(30)
+    labels = engine.cluster(items, set, _jaccard, 70)
+    assert engine.last_stats['mode'] == 'exact'
+    assert _partition(labels) == [frozenset(range(start, 30, 3)) for start in range(3)]
+
+
+def test_lsh_matches_exact_partition_with_fewer_pairs():
+    items = _families(300)
+    lsh = SignatureClusteringEngine(min_items_for_lsh=200)
+    exact = SignatureClusteringEngine(min_items_for_lsh=10 ** 6)
+
+    lsh_labels = lsh.cluster(items, set, _jaccard, 70)
+    exact_labels = exact.cluster(items, set, _jaccard, 70)
+
+    assert lsh.last_stats['mode'] == 'lsh'
+    assert lsh.last_stats['recall'] == 1.0
+    assert lsh.last_stats['pairs_scored'] < lsh.last_stats['total_pairs']
+    assert _partition(lsh_labels) == _partition(exact_labels)
+
+
+def test_candidate_pairs_pair_identical_signatures_only_once():
+    engine = SignatureClusteringEngine(num_perm=16, bands=8)
+    signatures = engine.compute_signatures([{'a', 'b'}, {'a', 'b'}, {'x', 'y', 'z'}])
+    pairs = engine.candidate_pairs(signatures)
+    assert (0, 1) in pairs
+    assert all(i < j for i, j in pairs)
+
+
+def test_oversized_bucket_is_chained():
+    engine = SignatureClusteringEngine(num_perm=8, bands=4, max_bucket_size=3)
+    signatures = engine.compute_signatures([{'same'}] * 6)
+    assert engine.candidate_pairs(signatures) == {(0, 1), (1, 2), (2, 3), (3, 4), (4, 5)}
+
+
+@pytest.mark.parametrize('count, min_items_for_lsh', [(30, 200), (300, 200)])
+def test_connected_components_match_dbscan_labels(count, min_items_for_lsh):
+    # 低記憶體模式不載入 scikit-learn，標籤編號也須與 DBSCAN 相同
+    items = _families(count) + [frozenset({'lonely'})]
+    dbscan = SignatureClusteringEngine(min_items_for_lsh=min_items_for_lsh)
+    components = SignatureClusteringEngine(min_items_for_lsh=min_items_for_lsh, connected_components=True)
+
+    expected = dbscan.cluster(items, set, _jaccard, 70)
+    labels = components.cluster(items, set, _jaccard, 70)
+    assert components.last_stats['mode'] == dbscan.last_stats['mode']
+    assert list(labels) == list(expected)
@@ -0,0 +1,191 @@
+import os
+import struct
+
+import pytest
+
+from symbolizer import NativeFrame, SymbolCache, Symbolizer, extract_native_frames, read_build_id
+
+BUILD_ID = 'ab12cd34ef56ab12cd34ef56ab12cd34ef56ab12'
+
+
+def _build_id_note(build_id):
+    desc = bytes.fromhex(build_id)
+    return struct.pack('<III', 4, len(desc), 3) + b'GNU\0' + desc
+
+
+def _write_elf(path, build_id, use_sections=True):
+    """最小的 ELF64 檔案：只有一個 GNU build-id 註記（SHT_NOTE 區段或 PT_NOTE 程式標頭）"""
+    note = _build_id_note(build_id)
+    note_offset = 64
+    table_offset = note_offset + len(note)
+    if use_sections:
+        table = struct.pack('<IIQQQQIIQQ', 0, 7, 0, 0, note_offset, len(note), 0, 0, 4, 0)
+        header = struct.pack('<HHIQQQIHHHHHH', 3, 183, 1, 0, 0, table_offset, 0, 64, 0, 0, 64, 1, 0)
+    else:
+        table = struct.pack('<IIQQQQQQ', 4, 4, note_offset, 0, 0, len(note), len(note), 4)
+        header = struct.pack('<HHIQQQIHHHHHH', 3, 183, 1, 0, table_offset, 0, 0, 64, 56, 1, 0, 0, 0)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'\x7fELF\x02\x01\x01' + b'\0' * 9 + header + note + table)
+
+
+class FakeBackend:
+    def __init__(self, results=None, error=None):
+        self.results = results or {}
+        self.error = error
+        self.calls = []
+        self.closed = False
+
+    def resolve(self, symbol_file, offsets):
+        self.calls.append((symbol_file, list(offsets)))
+        if self.error:
+            raise self.error
+        return {offset: self.results.get(offset, ('', '')) for offset in offsets}
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def symbolizer(tmp_path):
+    symbolizer = Symbolizer(str(tmp_path / 'symbols'), str(tmp_path / 'cache'))
+    yield symbolizer
+    symbolizer.close()
+
+
+# ============= read_build_id =============
+
+def test_read_build_id_section(tmp_path):
+    path = str(tmp_path / 'libfoo.so')
+    _write_elf(path, BUILD_ID)
+    assert read_build_id(path) == BUILD_ID
+
+
+def test_read_build_id_program_header(tmp_path):
+    # 沒有區段表時改讀 PT_NOTE
+    path = str(tmp_path / 'libfoo.so')
+    _write_elf(path, BUILD_ID, use_sections=False)
+    assert read_build_id(path) == BUILD_ID
+
+
+def test_read_build_id_not_elf(tmp_path):
+    path = tmp_path / 'libfoo.so'
+    path.write_bytes(b'not an elf file at all')
+    assert read_build_id(str(path)) == ''
+    path.write_bytes(b'\x7fELF\x02\x01')
+    assert read_build_id(str(path)) == ''
+    assert read_build_id(str(tmp_path / 'missing.so')) == ''
+
+
+def test_extract_native_frames():
+    frames = extract_native_frames(
+        "    #00 pc 000000000004b2c8  /apex/com.android.runtime/lib64/bionic/libc.so (abort+168) (BuildId: ABCD)\n"
+        "    #01 pc 0000000000012345  /system/lib64/libfoo.so\n"
+    )
+    assert frames == [
+        NativeFrame(0, 0x4b2c8, '/apex/com.android.runtime/lib64/bionic/libc.so', 'abcd'),
+        NativeFrame(1, 0x12345, '/system/lib64/libfoo.so', ''),
+    ]
+
+
+# ============= SymbolCache =============
+
+def test_symbol_cache_roundtrip(tmp_path):
+    cache = SymbolCache(str(tmp_path))
+    cache.put_many('id', {0x10: ('foo()', 'foo.c:1'), 0x20: ('bar()', '')})
+    assert cache.get('id', 0x10) == ('foo()', 'foo.c:1')
+    assert cache.get('id', 0x30) is None
+    assert cache.get('other', 0x10) is None
+    assert cache.get_many('id', [0x10, 0x20, 0x30]) == {0x10: ('foo()', 'foo.c:1'), 0x20: ('bar()', '')}
+    cache.close()
+
+    reopened = SymbolCache(str(tmp_path))
+    assert reopened.get('id', 0x10) == ('foo()', 'foo.c:1')
+    reopened.close()
+
+
+def test_symbol_cache_ignores_empty_rows(tmp_path):
+    # 舊版快取可能留下解析不到的空白結果
+    cache = SymbolCache(str(tmp_path))
+    cache.put_many('id', {0x10: ('', '')})
+    assert cache.get_many('id', [0x10]) == {}
+    cache.close()
+
+
+def test_symbol_cache_get_many_large_batch(tmp_path):
+    cache = SymbolCache(str(tmp_path))
+    cache.put_many('id', {offset: (f'f{offset}', '') for offset in range(1200)})
+    assert len(cache.get_many('id', range(1500))) == 1200
+    cache.close()
+
+
+# ============= Symbolizer =============
+
+def test_find_symbol_file_mirrored_path(symbolizer):
+    path = os.path.join(symbolizer.symbols_dir, 'system', 'lib64', 'libfoo.so')
+    _write_elf(path, BUILD_ID)
+    assert symbolizer.find_symbol_file('/system/lib64/libfoo.so', BUILD_ID) == path
+    # 沒有 BuildId 時不檢查
+    assert symbolizer.find_symbol_file('/system/lib64/libfoo.so') == path
+
+
+def test_find_symbol_file_rejects_mismatched_build_id(symbolizer):
+    path = os.path.join(symbolizer.symbols_dir, 'system', 'lib64', 'libfoo.so')
+    _write_elf(path, '00' * 20)
+    assert symbolizer.find_symbol_file('/system/lib64/libfoo.so', BUILD_ID) is None
+
+
+def test_find_symbol_file_fallback_order(symbolizer):
+    # 相同路徑的檔案 BuildId 不符時，改用 .build-id/ 或其他位置的同名檔案
+    _write_elf(os.path.join(symbolizer.symbols_dir, 'system', 'lib64', 'libfoo.so'), '00' * 20)
+    other = os.path.join(symbolizer.symbols_dir, 'vendor', 'lib64', 'libfoo.so')
+    _write_elf(other, BUILD_ID)
+    assert symbolizer.find_symbol_file('/system/lib64/libfoo.so', BUILD_ID) == other
+
+    build_id_path = os.path.join(symbolizer.symbols_dir, '.build-id', BUILD_ID[:2], BUILD_ID[2:] + '.debug')
+    _write_elf(build_id_path, BUILD_ID)
+    symbolizer._symbol_files.clear()
+    assert symbolizer.find_symbol_file('/system/lib64/libfoo.so', BUILD_ID) == build_id_path
+
+
+def test_symbolize_caches_only_resolved(symbolizer):
+    _write_elf(os.path.join(symbolizer.symbols_dir, 'system', 'lib64', 'libfoo.so'), BUILD_ID)
+    backend = FakeBackend({0x10: ('foo()', 'foo.c:1')})
+    symbolizer._backend = backend
+    frames = [NativeFrame(0, 0x10, '/system/lib64/libfoo.so', BUILD_ID),
+              NativeFrame(1, 0x20, '/system/lib64/libfoo.so', BUILD_ID)]
+
+    assert symbolizer.symbolize(frames) == 1
+    assert symbolizer.lookup('/system/lib64/libfoo.so', BUILD_ID, 0x10) == ('foo()', 'foo.c:1')
+    assert symbolizer.lookup('/system/lib64/libfoo.so', BUILD_ID, 0x20) is None
+
+    # 快取命中的位址不再送出，解析不到的位址下次重新查詢
+    assert symbolizer.symbolize(frames) == 0
+    assert [offsets for _, offsets in backend.calls] == [[0x10, 0x20], [0x20]]
+
+
+def test_symbolize_missing_symbols(symbolizer):
+    symbolizer._backend = FakeBackend()
+    assert symbolizer.symbolize([NativeFrame(0, 0x10, '/system/lib64/libbar.so', BUILD_ID)]) == 0
+    assert symbolizer.stats['missing_symbols'] == 1
+    assert symbolizer._backend.calls == []
+
+
+def test_symbolize_closes_backend_on_error(symbolizer):
+    _write_elf(os.path.join(symbolizer.symbols_dir, 'system', 'lib64', 'libfoo.so'), BUILD_ID)
+    backend = FakeBackend(error=OSError('broken pipe'))
+    symbolizer._backend = backend
+    assert symbolizer.symbolize([NativeFrame(0, 0x10, '/system/lib64/libfoo.so', BUILD_ID)]) == 0
+    assert backend.closed
+    assert symbolizer._backend is None
+
+
+def test_annotate(symbolizer):
+    symbolizer.cache.put_many(BUILD_ID, {0x10: ('foo()', 'foo.c:1')})
+    content = f"    #00 pc 0000000000000010  /system/lib64/libfoo.so (BuildId: {BUILD_ID})\n"
+    backtrace = [{'pc': '0000000000000010', 'location': '/system/lib64/libfoo.so', 'symbol': ''},
+                 {'pc': 'zz', 'location': '/system/lib64/libfoo.so'}]
+    assert symbolizer.annotate(backtrace, content) == 1
+    assert backtrace[0]['resolved_function'] == 'foo()'
+    assert backtrace[0]['source_location'] == 'foo.c:1'
+    assert backtrace[0]['symbol'] == 'foo()'
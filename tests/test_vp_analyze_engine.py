@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+
+from vp_analyze_engine import VPAnalyzeEngine
+
+
+class FakeSystem:
+    """取代 LogAnalyzerSystem：analyze() 執行指定的動作"""
+    action = None
+
+    def __init__(self, input_folder, output_folder, **options):
+        self.options = options
+        self.stats = {'total_files': 1}
+
+    def analyze(self):
+        type(self).action(self)
+
+
+class FakeModule:
+    LogAnalyzerSystem = FakeSystem
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = VPAnalyzeEngine(timeout=1)
+    engine._module = FakeModule
+    subprocess_calls = []
+    monkeypatch.setattr(engine, '_run_subprocess',
+                        lambda *args, **options: subprocess_calls.append(options) or {'mode': 'subprocess'})
+    engine.subprocess_calls = subprocess_calls
+    return engine
+
+
+def test_in_process_success(engine, monkeypatch):
+    monkeypatch.setattr(FakeSystem, 'action', lambda system: None)
+    result = engine.run('in', 'out', low_memory=True)
+    assert result['success'] is True
+    assert result['mode'] == 'in_process'
+    assert result['stats'] == {'total_files': 1}
+    assert engine.subprocess_calls == []
+
+
+def test_analysis_error_does_not_fall_back(engine, monkeypatch):
+    def fail(system):
+        raise RuntimeError('boom')
+    monkeypatch.setattr(FakeSystem, 'action', fail)
+    result = engine.run('in', 'out')
+    assert result['success'] is False
+    assert 'boom' in result['error']
+    assert engine.subprocess_calls == []
+
+
+def test_setup_error_falls_back_with_options(engine, monkeypatch):
+    def broken_init(self, *args, **options):
+        raise ImportError('no numpy')
+    monkeypatch.setattr(FakeSystem, '__init__', broken_init)
+    result = engine.run('in', 'out', low_memory=True, workers=4)
+    assert result['mode'] == 'subprocess'
+    assert engine.subprocess_calls == [{'low_memory': True, 'workers': 4}]
+
+
+def test_timeout_fails_job_and_drops_late_progress(engine, monkeypatch):
+    release = threading.Event()
+    progress = []
+
+    def hang(system):
+        release.wait(5)
+        system.options['progress_callback']('analyze', 1, 1, 'late')
+    monkeypatch.setattr(FakeSystem, 'action', hang)
+    engine.timeout = 0.1
+    result = engine.run('in', 'out', lambda *args: progress.append(args))
+    assert result['success'] is False
+    assert '超時' in result['error']
+
+    release.set()
+    assert progress == []
+
+
+def test_subprocess_args():
+    assert VPAnalyzeEngine._subprocess_args({
+        'low_memory': True, 'use_result_cache': False, 'report_assets': 'shared',
+        'original_placement': 'copy', 'signature_db_dir': None, 'scan_zip': True,
+    }) == ['--low-memory', '--no-cache', '--shared-assets', '--original', 'copy']
+    with pytest.raises(ValueError):
+        VPAnalyzeEngine._subprocess_args({'index_state_dir': '/tmp/state'})
+
+
+def test_subprocess_args_accepted_by_cli(tmp_path):
+    from vp_analyze_logs import parse_arguments
+
+    options = {key: str(tmp_path) for key in VPAnalyzeEngine._VALUE_FLAGS}
+    options.update(result_cache_max_mb=512, original_placement='copy')
+    options.update({key: trigger for key, (trigger, _) in VPAnalyzeEngine._SWITCH_FLAGS.items()})
+    args = parse_arguments(['in', 'out', '-j', '4'] + VPAnalyzeEngine._subprocess_args(options))
+    assert (args.input_folder, args.output_folder, args.workers) == ('in', 'out', 4)
+    assert args.data_dir == args.signature_db_dir == args.result_cache_dir == str(tmp_path)
+    assert args.result_cache_max_mb == 512 and args.original_placement == 'copy'
+    assert args.low_memory and args.full_index and args.no_signature_db and args.no_cache
+    assert args.no_zip and args.shared_assets
+
+    with pytest.raises(SystemExit):
+        parse_arguments(['in', 'out', '--unknown-flag'])
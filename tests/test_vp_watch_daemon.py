@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+import vp_watch_daemon
+from vp_watch_daemon import LogWatchDaemon
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(1000.0)
+    monkeypatch.setattr(vp_watch_daemon.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def daemon(tmp_path, clock):
+    (tmp_path / 'in' / 'dev1' / 'anr').mkdir(parents=True)
+    (tmp_path / 'out').mkdir()
+    daemon = LogWatchDaemon(str(tmp_path / 'in'), str(tmp_path / 'out'), debounce=3.0, use_inotify=False,
+                            use_signature_db=False, use_result_cache=False, incremental_index=False)
+    daemon._discover_folders()
+
+    # 只記錄要分析的檔案，不實際產生報告與索引
+    daemon.analyzed = []
+    daemon.system._analyze_file = lambda file_info, index_data: daemon.analyzed.append(file_info['name'])
+    daemon.system._generate_index = lambda index_data: None
+    return daemon
+
+
+def _write(daemon, name, content, mtime):
+    path = os.path.join(daemon.input_folder, 'dev1', 'anr', name)
+    with open(path, 'a') as f:
+        f.write(content)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_debounce_waits_for_quiet_file(daemon, clock):
+    path = _write(daemon, 'anr_1', 'Subject: a\n', 1000.0)
+    assert daemon.poll_once() == 0
+    assert path in daemon.pending
+
+    # 仍在寫入：大小或修改時間改變時重新計算靜止時間
+    clock.now = 1002.0
+    _write(daemon, 'anr_1', 'more\n', 1002.0)
+    assert daemon.poll_once() == 0
+    clock.now = 1004.9
+    assert daemon.poll_once() == 0
+
+    clock.now = 1005.0
+    assert daemon.poll_once() == 1
+    assert daemon.analyzed == ['anr_1']
+    assert path in daemon.known and not daemon.pending
+
+    # 沒有變化的檔案不再分析；內容變更後重新 debounce 再分析
+    clock.now = 1010.0
+    assert daemon.poll_once() == 0
+    _write(daemon, 'anr_1', 'again\n', 1010.0)
+    assert daemon.poll_once() == 0
+    clock.now = 1013.0
+    assert daemon.poll_once() == 1
+    assert daemon.analyzed == ['anr_1', 'anr_1']
+
+
+def test_old_mtime_still_waits_for_debounce(daemon, clock):
+    # 修改時間較早的檔案（例如複製時保留時間）也要在偵測後靜止 debounce 秒
+    _write(daemon, 'anr_1', 'Subject: a\n', 900.0)
+    assert daemon.poll_once() == 0
+    clock.now = 1003.0
+    assert daemon.poll_once() == 1
+
+
+def test_deleted_files_are_forgotten(daemon, clock):
+    pending_path = _write(daemon, 'anr_1', 'Subject: a\n', 1000.0)
+    known_path = _write(daemon, 'anr_2', 'Subject: b\n', 1000.0)
+    daemon.poll_once()
+    clock.now = 1003.0
+    assert daemon.poll_once() == 2
+
+    _write(daemon, 'anr_1', 'more\n', 1003.0)
+    daemon.poll_once()
+    assert pending_path in daemon.pending
+
+    os.remove(pending_path)
+    os.remove(known_path)
+    clock.now = 1010.0
+    assert daemon.poll_once() == 0
+    assert daemon.pending == {} and daemon.known == {}
+
+    # 同名檔案重新出現時視為新檔案
+    _write(daemon, 'anr_2', 'Subject: b\n', 1000.0)
+    daemon.poll_once()
+    clock.now = 1013.0
+    assert daemon.poll_once() == 1
+    assert daemon.analyzed == ['anr_1', 'anr_2', 'anr_2']
+
+
+def test_skipped_files_are_not_analyzed(daemon, clock):
+    # anr 資料夾中不是 anr 開頭的檔案只記錄狀態
+    path = _write(daemon, 'notes.txt', 'x\n', 1000.0)
+    daemon.poll_once()
+    clock.now = 1003.0
+    assert daemon.poll_once() == 1
+    assert daemon.analyzed == [] and path in daemon.known
@@ -0,0 +1,98 @@
+import os
+import zipfile
+
+import pytest
+
+from routes.grep_analyzer import AndroidLogAnalyzer
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = AndroidLogAnalyzer(scan_workers=1, zip_mode='extract', extract_workers=2)
+    if not analyzer.use_unzip:
+        pytest.skip('unzip 不可用')
+    return analyzer
+
+
+def _write_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+
+
+@pytest.fixture
+def drop_zip(tmp_path):
+    zip_path = str(tmp_path / 'drop.zip')
+    _write_zip(zip_path, {'anr/anr_1': 'one', 'tombstones/tombstone_00': 'two'})
+    return zip_path
+
+
+def test_extract_writes_manifest(analyzer, drop_zip):
+    extract_dir, outcome = analyzer._extract_zip_file(drop_zip)
+    assert outcome == 'extracted'
+    assert extract_dir == drop_zip + '_extracted'
+    assert os.path.exists(os.path.join(extract_dir, AndroidLogAnalyzer.EXTRACT_MANIFEST_NAME))
+    with open(os.path.join(extract_dir, 'anr', 'anr_1')) as f:
+        assert f.read() == 'one'
+    # 暫存資料夾已改名，不留下殘留
+    assert sorted(os.listdir(os.path.dirname(drop_zip))) == ['drop.zip', 'drop.zip_extracted']
+
+
+def test_current_extraction_is_reused(analyzer, drop_zip):
+    extract_dir, _ = analyzer._extract_zip_file(drop_zip)
+    assert analyzer._is_extraction_current(drop_zip, extract_dir)
+    assert analyzer._extract_zip_file(drop_zip) == (extract_dir, 'reused')
+
+
+def test_missing_member_is_stale(analyzer, drop_zip):
+    extract_dir, _ = analyzer._extract_zip_file(drop_zip)
+    os.remove(os.path.join(extract_dir, 'anr', 'anr_1'))
+    assert not analyzer._is_extraction_current(drop_zip, extract_dir)
+    assert analyzer._extract_zip_file(drop_zip) == (extract_dir, 'extracted')
+    assert os.path.exists(os.path.join(extract_dir, 'anr', 'anr_1'))
+
+
+def test_resized_member_is_stale(analyzer, drop_zip):
+    extract_dir, _ = analyzer._extract_zip_file(drop_zip)
+    with open(os.path.join(extract_dir, 'tombstones', 'tombstone_00'), 'a') as f:
+        f.write('truncated write')
+    assert not analyzer._is_extraction_current(drop_zip, extract_dir)
+
+
+def test_changed_archive_is_stale(analyzer, drop_zip):
+    extract_dir, _ = analyzer._extract_zip_file(drop_zip)
+    stat = os.stat(drop_zip)
+    os.utime(drop_zip, (stat.st_atime, stat.st_mtime + 10))
+    assert not analyzer._is_extraction_current(drop_zip, extract_dir)
+
+
+def test_folder_without_manifest_is_stale(analyzer, drop_zip):
+    # 舊版本或中斷的解壓縮沒有完成清單
+    extract_dir = drop_zip + '_extracted'
+    os.makedirs(os.path.join(extract_dir, 'anr'))
+    assert not analyzer._is_extraction_current(drop_zip, extract_dir)
+    assert analyzer._extract_zip_file(drop_zip)[1] == 'extracted'
+
+
+def test_corrupt_archive_fails(analyzer, tmp_path):
+    zip_path = str(tmp_path / 'broken.zip')
+    with open(zip_path, 'wb') as f:
+        f.write(b'not a zip')
+    assert analyzer._extract_zip_file(zip_path) == (None, 'failed')
+    assert os.listdir(str(tmp_path)) == ['broken.zip']
+
+
+def test_extract_many_keeps_order(analyzer, tmp_path):
+    zip_paths = []
+    for idx in range(3):
+        zip_path = str(tmp_path / f'drop{idx}.zip')
+        _write_zip(zip_path, {f'anr/anr_{idx}': str(idx)})
+        zip_paths.append(zip_path)
+
+    assert analyzer.extract_and_process_zip_files(str(tmp_path), zip_paths) == [
+        path + '_extracted' for path in zip_paths
+    ]
+    assert analyzer.zip_extract_stats == {'extracted': 3, 'reused': 0, 'failed': 0}
+
+    analyzer.extract_and_process_zip_files(str(tmp_path), zip_paths)
+    assert analyzer.zip_extract_stats == {'extracted': 0, 'reused': 3, 'failed': 0}
@@ -0,0 +1,116 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from zip_scanner import (
+    ZipArchiveReader, can_scan_in_place, is_zip_member_path, member_path_parts, split_zip_member_path,
+)
+from vp_analyze_logs import LogAnalyzerSystem
+
+
+def _write_zip(path, members):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(zipfile.ZipInfo(name, (2024, 1, 2, 3, 4, 6)), data)
+
+
+def _zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('member, expected', [
+    ('FS/data/anr/anr_1', ['FS', 'data', 'anr', 'anr_1']),
+    ('/tmp/x/anr/anr_1', ['tmp', 'x', 'anr', 'anr_1']),
+    ('C:\\logs\\anr\\anr_1', ['logs', 'anr', 'anr_1']),
+    ('/C:/logs/anr/anr_1', ['logs', 'anr', 'anr_1']),
+    ('./anr//anr_1', ['anr', 'anr_1']),
+    ('../../anr/anr_1', ['..', '..', 'anr', 'anr_1']),
+])
+def test_member_path_parts(member, expected):
+    assert member_path_parts(member) == expected
+
+
+def test_split_zip_member_path():
+    assert split_zip_member_path('/d/drop.zip!/FS/anr/a') == ('/d/drop.zip', ['FS/anr/a'])
+    assert split_zip_member_path('/d/drop.ZIP!/in.zip!/anr/a') == ('/d/drop.ZIP', ['in.zip', 'anr/a'])
+    assert split_zip_member_path('/d/anr/a') == ('/d/anr/a', [])
+    assert is_zip_member_path('/d/drop.zip!/anr/a')
+    assert not is_zip_member_path('/d/anr/a')
+
+
+def test_reader_nested_members(tmp_path):
+    zip_path = str(tmp_path / 'drop.zip')
+    _write_zip(zip_path, {
+        'anr/anr_1': 'outer',
+        'logs/inner.zip': _zip_bytes({'tombstones/tombstone_00': 'inner'}),
+        'empty/': '',
+    })
+    assert can_scan_in_place(zip_path)
+
+    with ZipArchiveReader() as reader:
+        members = {member['path']: member for member in reader.iter_members(zip_path)}
+        outer = zip_path + '!/anr/anr_1'
+        inner = zip_path + '!/logs/inner.zip!/tombstones/tombstone_00'
+        assert sorted(members) == sorted([outer, inner])
+        assert members[inner]['name'] == 'tombstone_00'
+        assert members[inner]['size'] == len('inner')
+
+        with reader.open(inner) as f:
+            assert f.read() == b'inner'
+        assert reader.exists(outer)
+        assert not reader.exists(zip_path + '!/anr/missing')
+
+        dest = str(tmp_path / 'out' / 'anr_1')
+        assert reader.materialize(outer, dest) == dest
+        with open(dest) as f:
+            assert f.read() == 'outer'
+        assert os.path.getmtime(dest) == members[outer]['mtime']
+
+
+def test_reader_max_depth(tmp_path):
+    zip_path = str(tmp_path / 'drop.zip')
+    _write_zip(zip_path, {'inner.zip': _zip_bytes({'anr/anr_1': 'x'})})
+    with ZipArchiveReader(max_depth=0) as reader:
+        assert list(reader.iter_members(zip_path)) == []
+
+
+def test_scan_zip_members_stays_inside_output(tmp_path):
+    input_folder = tmp_path / 'in'
+    input_folder.mkdir()
+    zip_path = str(input_folder / 'drop.zip')
+    _write_zip(zip_path, {
+        'FS/data/anr/anr_1': 'a',
+        '/tmp/evil/anr/anr_2': 'b',
+        '../../anr/anr_3': 'c',
+        'logs/../../anr/anr_4': 'd',
+        'tombstones/tombstone_00': 'e',
+        'tombstones/empty': '',
+        'other/anr_5': 'f',
+    })
+
+    system = LogAnalyzerSystem(str(input_folder), str(tmp_path / 'out'),
+                               use_signature_db=False, use_result_cache=False)
+    files = {info['name']: info for info in system._scan_zip_members([zip_path])}
+
+    assert sorted(files) == ['anr_1', 'anr_2', 'tombstone_00']
+    assert files['anr_1']['rel_path'] == os.path.join('drop.zip_extracted', 'FS', 'data', 'anr', 'anr_1')
+    # 絕對路徑的成員與 unzip 相同，放在解壓縮資料夾下
+    assert files['anr_2']['rel_path'] == os.path.join('drop.zip_extracted', 'tmp', 'evil', 'anr', 'anr_2')
+    assert files['anr_2']['path'] == zip_path + '!//tmp/evil/anr/anr_2'
+    assert files['tombstone_00']['type'] == 'tombstone'
+    for info in files.values():
+        assert system._is_inside_output(info['rel_path'])
+
+
+def test_is_inside_output(tmp_path):
+    system = LogAnalyzerSystem(str(tmp_path), str(tmp_path / 'out'),
+                               use_signature_db=False, use_result_cache=False)
+    assert system._is_inside_output(os.path.join('drop.zip_extracted', 'anr', 'a'))
+    assert not system._is_inside_output(os.path.join('..', 'anr', 'a'))
+    assert not system._is_inside_output('/etc/passwd')